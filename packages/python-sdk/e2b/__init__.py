@@ -25,78 +25,180 @@ sandbox = await AsyncSandbox.create()
 ```
 """
 
-from .api import (
-    ApiClient,
-    client,
-)
-from .connection_config import (
-    ConnectionConfig,
-    ProxyTypes,
-)
-from .exceptions import (
-    AuthenticationException,
-    BuildException,
-    FileUploadException,
-    InvalidArgumentException,
-    NotEnoughSpaceException,
-    NotFoundException,
-    SandboxException,
-    TemplateException,
-    TimeoutException,
-)
-from .sandbox.commands.command_handle import (
-    CommandExitException,
-    CommandResult,
-    PtyOutput,
-    PtySize,
-    Stderr,
-    Stdout,
-)
-from .sandbox.commands.main import ProcessInfo
-from .sandbox.filesystem.filesystem import EntryInfo, FileType, WriteInfo
-from .sandbox.filesystem.watch_handle import (
-    FilesystemEvent,
-    FilesystemEventType,
-)
-from .sandbox.network import ALL_TRAFFIC
-from .sandbox.sandbox_api import (
-    GitHubMcpServer,
-    GitHubMcpServerConfig,
-    McpServer,
-    SandboxInfo,
-    SandboxMetrics,
-    SandboxNetworkOpts,
-    SandboxQuery,
-    SandboxState,
-)
-from .sandbox_async.commands.command_handle import AsyncCommandHandle
-from .sandbox_async.filesystem.watch_handle import AsyncWatchHandle
-from .sandbox_async.main import AsyncSandbox
-from .sandbox_async.paginator import AsyncSandboxPaginator
-from .sandbox_async.utils import OutputHandler
-from .sandbox_sync.commands.command_handle import CommandHandle
-from .sandbox_sync.filesystem.watch_handle import WatchHandle
-from .sandbox_sync.main import Sandbox
-from .sandbox_sync.paginator import SandboxPaginator
-from .template.logger import (
-    LogEntry,
-    LogEntryEnd,
-    LogEntryLevel,
-    LogEntryStart,
-    default_build_logger,
-)
-from .template.main import TemplateBase, TemplateClass
-from .template.readycmd import (
-    ReadyCmd,
-    wait_for_file,
-    wait_for_port,
-    wait_for_process,
-    wait_for_timeout,
-    wait_for_url,
-)
-from .template.types import BuildInfo, CopyItem
-from .template_async.main import AsyncTemplate
-from .template_sync.main import Template
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import (
+        ApiClient,
+        client,
+    )
+    from .connection_config import (
+        ConnectionConfig,
+        ProxyTypes,
+    )
+    from .exceptions import (
+        AuthenticationException,
+        BuildException,
+        FileUploadException,
+        InvalidArgumentException,
+        NotEnoughSpaceException,
+        NotFoundException,
+        SandboxException,
+        TemplateException,
+        TimeoutException,
+    )
+    from .sandbox.batch import SandboxBatchResult
+    from .sandbox.commands.command_handle import (
+        CommandEvent,
+        CommandExitException,
+        CommandResult,
+        PtyOutput,
+        PtyOverflow,
+        PtySize,
+        Stderr,
+        Stdout,
+    )
+    from .sandbox.commands.main import ProcessInfo
+    from .sandbox.commands.run_many import CommandBatchResult, CommandOutput
+    from .sandbox.filesystem.batch import BatchResult
+    from .sandbox.filesystem.filesystem import EntryInfo, FileType, WriteInfo
+    from .sandbox.filesystem.list_cache import ListCacheStats
+    from .sandbox.filesystem.sync import SyncResult
+    from .sandbox.filesystem.watch_handle import (
+        FilesystemEvent,
+        FilesystemEventType,
+    )
+    from .sandbox.metrics import (
+        MetricsAggregate,
+        MetricsBuffer,
+        SandboxMetricsSummary,
+    )
+    from .sandbox.network import ALL_TRAFFIC
+    from .sandbox.pool import SandboxPoolStats
+    from .sandbox.sandbox_api import (
+        GitHubMcpServer,
+        GitHubMcpServerConfig,
+        McpServer,
+        SandboxInfo,
+        SandboxMetrics,
+        SandboxNetworkOpts,
+        SandboxQuery,
+        SandboxState,
+    )
+    from .sandbox_async.commands.command_handle import AsyncCommandHandle
+    from .sandbox_async.commands.run_many import AsyncCommandGroup
+    from .sandbox_async.filesystem.watch_handle import AsyncWatchHandle
+    from .sandbox_async.main import AsyncSandbox
+    from .sandbox_async.paginator import AsyncSandboxPaginator
+    from .sandbox_async.pool import AsyncSandboxPool
+    from .sandbox_async.utils import OutputHandler
+    from .sandbox_sync.commands.command_handle import CommandHandle
+    from .sandbox_sync.commands.run_many import CommandGroup
+    from .sandbox_sync.filesystem.watch_handle import WatchHandle
+    from .sandbox_sync.main import Sandbox
+    from .sandbox_sync.paginator import SandboxPaginator
+    from .sandbox_sync.pool import SandboxPool
+    from .template.logger import (
+        LogEntry,
+        LogEntryEnd,
+        LogEntryLevel,
+        LogEntryStart,
+        default_build_logger,
+    )
+    from .template.main import TemplateBase, TemplateClass
+    from .template.readycmd import (
+        ReadyCmd,
+        wait_for_file,
+        wait_for_port,
+        wait_for_process,
+        wait_for_timeout,
+        wait_for_url,
+    )
+    from .template.types import BuildInfo, CopyItem
+    from .template_async.main import AsyncTemplate
+    from .template_sync.main import Template
+
+# Public names are imported on first access, so `from e2b import AsyncSandbox`
+# doesn't load the sync SDK, the templates or their dependencies.
+_LAZY_IMPORTS = {
+    "ApiClient": ".api",
+    "client": ".api",
+    "ConnectionConfig": ".connection_config",
+    "ProxyTypes": ".connection_config",
+    "AuthenticationException": ".exceptions",
+    "BuildException": ".exceptions",
+    "FileUploadException": ".exceptions",
+    "InvalidArgumentException": ".exceptions",
+    "NotEnoughSpaceException": ".exceptions",
+    "NotFoundException": ".exceptions",
+    "SandboxException": ".exceptions",
+    "TemplateException": ".exceptions",
+    "TimeoutException": ".exceptions",
+    "SandboxBatchResult": ".sandbox.batch",
+    "CommandEvent": ".sandbox.commands.command_handle",
+    "CommandExitException": ".sandbox.commands.command_handle",
+    "CommandResult": ".sandbox.commands.command_handle",
+    "PtyOutput": ".sandbox.commands.command_handle",
+    "PtyOverflow": ".sandbox.commands.command_handle",
+    "PtySize": ".sandbox.commands.command_handle",
+    "Stderr": ".sandbox.commands.command_handle",
+    "Stdout": ".sandbox.commands.command_handle",
+    "ProcessInfo": ".sandbox.commands.main",
+    "CommandBatchResult": ".sandbox.commands.run_many",
+    "CommandOutput": ".sandbox.commands.run_many",
+    "BatchResult": ".sandbox.filesystem.batch",
+    "EntryInfo": ".sandbox.filesystem.filesystem",
+    "FileType": ".sandbox.filesystem.filesystem",
+    "WriteInfo": ".sandbox.filesystem.filesystem",
+    "ListCacheStats": ".sandbox.filesystem.list_cache",
+    "SyncResult": ".sandbox.filesystem.sync",
+    "FilesystemEvent": ".sandbox.filesystem.watch_handle",
+    "FilesystemEventType": ".sandbox.filesystem.watch_handle",
+    "MetricsAggregate": ".sandbox.metrics",
+    "MetricsBuffer": ".sandbox.metrics",
+    "SandboxMetricsSummary": ".sandbox.metrics",
+    "ALL_TRAFFIC": ".sandbox.network",
+    "SandboxPoolStats": ".sandbox.pool",
+    "GitHubMcpServer": ".sandbox.sandbox_api",
+    "GitHubMcpServerConfig": ".sandbox.sandbox_api",
+    "McpServer": ".sandbox.sandbox_api",
+    "SandboxInfo": ".sandbox.sandbox_api",
+    "SandboxMetrics": ".sandbox.sandbox_api",
+    "SandboxNetworkOpts": ".sandbox.sandbox_api",
+    "SandboxQuery": ".sandbox.sandbox_api",
+    "SandboxState": ".sandbox.sandbox_api",
+    "AsyncCommandHandle": ".sandbox_async.commands.command_handle",
+    "AsyncCommandGroup": ".sandbox_async.commands.run_many",
+    "AsyncWatchHandle": ".sandbox_async.filesystem.watch_handle",
+    "AsyncSandbox": ".sandbox_async.main",
+    "AsyncSandboxPaginator": ".sandbox_async.paginator",
+    "AsyncSandboxPool": ".sandbox_async.pool",
+    "OutputHandler": ".sandbox_async.utils",
+    "CommandHandle": ".sandbox_sync.commands.command_handle",
+    "CommandGroup": ".sandbox_sync.commands.run_many",
+    "WatchHandle": ".sandbox_sync.filesystem.watch_handle",
+    "Sandbox": ".sandbox_sync.main",
+    "SandboxPaginator": ".sandbox_sync.paginator",
+    "SandboxPool": ".sandbox_sync.pool",
+    "LogEntry": ".template.logger",
+    "LogEntryEnd": ".template.logger",
+    "LogEntryLevel": ".template.logger",
+    "LogEntryStart": ".template.logger",
+    "default_build_logger": ".template.logger",
+    "TemplateBase": ".template.main",
+    "TemplateClass": ".template.main",
+    "ReadyCmd": ".template.readycmd",
+    "wait_for_file": ".template.readycmd",
+    "wait_for_port": ".template.readycmd",
+    "wait_for_process": ".template.readycmd",
+    "wait_for_timeout": ".template.readycmd",
+    "wait_for_url": ".template.readycmd",
+    "BuildInfo": ".template.types",
+    "CopyItem": ".template.types",
+    "AsyncTemplate": ".template_async.main",
+    "Template": ".template_sync.main",
+}
 
 __all__ = [
     # API
@@ -122,6 +224,11 @@ __all__ = [
     "SandboxQuery",
     "SandboxState",
     "SandboxMetrics",
+    "MetricsBuffer",
+    "MetricsAggregate",
+    "SandboxMetricsSummary",
+    "SandboxPoolStats",
+    "SandboxBatchResult",
     # Command handle
     "CommandResult",
     "Stderr",
@@ -129,11 +236,18 @@ __all__ = [
     "CommandExitException",
     "PtyOutput",
     "PtySize",
+    "CommandEvent",
+    "PtyOverflow",
+    "CommandOutput",
+    "CommandBatchResult",
     # Filesystem
     "FilesystemEvent",
     "FilesystemEventType",
     "EntryInfo",
     "WriteInfo",
+    "SyncResult",
+    "BatchResult",
+    "ListCacheStats",
     "FileType",
     # Network
     "SandboxNetworkOpts",
@@ -141,14 +255,18 @@ __all__ = [
     # Sync sandbox
     "Sandbox",
     "SandboxPaginator",
+    "SandboxPool",
     "WatchHandle",
     "CommandHandle",
+    "CommandGroup",
     # Async sandbox
     "OutputHandler",
     "AsyncSandboxPaginator",
     "AsyncSandbox",
+    "AsyncSandboxPool",
     "AsyncWatchHandle",
     "AsyncCommandHandle",
+    "AsyncCommandGroup",
     # Template
     "Template",
     "AsyncTemplate",
@@ -172,3 +290,17 @@ __all__ = [
     "GitHubMcpServer",
     "GitHubMcpServerConfig",
 ]
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -3,20 +3,23 @@ import logging
 import os
 from dataclasses import dataclass
 from types import TracebackType
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
 from httpx import AsyncBaseTransport, BaseTransport, Limits
 
 from e2b.api.client.client import AuthenticatedClient
 from e2b.api.client.types import Response
 from e2b.api.metadata import default_headers
-from e2b.connection_config import ConnectionConfig
 from e2b.exceptions import (
     AuthenticationException,
     RateLimitException,
     SandboxException,
 )
 
+if TYPE_CHECKING:
+    # Imported only for the annotations, the config module imports this package
+    from e2b.connection_config import ConnectionConfig
+
 logger = logging.getLogger(__name__)
 
 limits = Limits(
@@ -73,7 +76,7 @@ class ApiClient(AuthenticatedClient):
 
     def __init__(
         self,
-        config: ConnectionConfig,
+        config: "ConnectionConfig",
         require_api_key: bool = True,
         require_access_token: bool = False,
         transport: Optional[Union[BaseTransport, AsyncBaseTransport]] = None,
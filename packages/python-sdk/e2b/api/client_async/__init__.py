@@ -1,28 +1,83 @@
+import asyncio
+import os
+import weakref
 import httpx
 import logging
 
-from typing import Optional
-
-from typing_extensions import Self
+from typing import Optional, Tuple
 
 from e2b.connection_config import ConnectionConfig
 from e2b.api import limits, AsyncApiClient
+from e2b.api.client_cache import (
+    MAX_CACHED_CLIENTS,
+    ClientCache,
+    api_client_key,
+    transport_key,
+)
 
 
 logger = logging.getLogger(__name__)
 
+_Caches = Tuple[ClientCache[AsyncApiClient], ClientCache["AsyncTransportWithLogger"]]
+
+# Async connections can't be used outside of the event loop they were opened in, so each loop has its own clients
+_loop_caches: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Caches]" = (
+    weakref.WeakKeyDictionary()
+)
+_no_loop_caches: Optional[_Caches] = None
+
+
+def _reset_caches():
+    global _no_loop_caches
+    _loop_caches.clear()
+    _no_loop_caches = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_caches)
+
+
+def _caches() -> _Caches:
+    global _no_loop_caches
+
+    def create() -> _Caches:
+        return (
+            ClientCache(MAX_CACHED_CLIENTS, reset_on_fork=False),
+            ClientCache(reset_on_fork=False),
+        )
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        if _no_loop_caches is None:
+            _no_loop_caches = create()
+        return _no_loop_caches
+
+    if loop not in _loop_caches:
+        _loop_caches[loop] = create()
+    return _loop_caches[loop]
+
 
 def get_api_client(config: ConnectionConfig, **kwargs) -> AsyncApiClient:
-    return AsyncApiClient(
-        config,
-        transport=get_transport(config),
-        **kwargs,
-    )
+    """
+    Get the API client for the config, reused for the same API URL, credentials, proxy and headers within the event loop.
+    """
 
+    def create() -> AsyncApiClient:
+        client = AsyncApiClient(
+            config,
+            transport=get_transport(config),
+            **kwargs,
+        )
+        # Created upfront, so concurrent requests don't race to create it
+        client.get_async_httpx_client()
+        return client
 
-class AsyncTransportWithLogger(httpx.AsyncHTTPTransport):
-    singleton: Optional[Self] = None
+    api_clients, _ = _caches()
+    return api_clients.get(api_client_key(config, **kwargs), create)
 
+
+class AsyncTransportWithLogger(httpx.AsyncHTTPTransport):
     async def handle_async_request(self, request):
         url = f"{request.url.scheme}://{request.url.host}{request.url.path}"
         logger.info(f"Request: {request.method} {url}")
@@ -39,12 +94,28 @@ class AsyncTransportWithLogger(httpx.AsyncHTTPTransport):
 
 
 def get_transport(config: ConnectionConfig) -> AsyncTransportWithLogger:
-    if AsyncTransportWithLogger.singleton is not None:
-        return AsyncTransportWithLogger.singleton
-
-    transport = AsyncTransportWithLogger(
-        limits=limits,
-        proxy=config.proxy,
+    """
+    Get the transport for the proxy and HTTP version of the config, shared by all clients using the same ones within the event loop.
+    """
+    _, transports = _caches()
+    return transports.get(
+        transport_key(config),
+        lambda: AsyncTransportWithLogger(
+            limits=limits,
+            proxy=config.proxy,
+            http2=config.http2,
+        ),
     )
-    AsyncTransportWithLogger.singleton = transport
-    return transport
+
+
+async def close_api_clients() -> None:
+    """
+    Close the API clients and transports cached for the current event loop, new ones are created when needed.
+    """
+    api_clients, transports = _caches()
+
+    for client in api_clients.clear():
+        await client.get_async_httpx_client().aclose()
+
+    for transport in transports.clear():
+        await transport.aclose()
@@ -0,0 +1,111 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, List, Optional, TypeVar
+
+import httpx
+
+from e2b.connection_config import ConnectionConfig, ProxyTypes
+
+V = TypeVar("V")
+
+MAX_CACHED_CLIENTS = 128
+"""
+Maximum number of API clients kept per SDK flavor, the least recently used ones are dropped first.
+"""
+
+
+class ClientCache(Generic[V]):
+    """
+    Thread-safe LRU cache of HTTP clients and transports.
+
+    The cache is emptied in a forked child process without closing anything,
+    the connections of the cached clients belong to the parent process.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, reset_on_fork: bool = True):
+        """
+        :param max_size: Maximum number of cached values, unlimited by default
+        :param reset_on_fork: Empty the cache in forked child processes, disable for caches that are dropped as a whole on fork
+        """
+        self._max_size = max_size
+        self._items: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if reset_on_fork and hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable, factory: Callable[[], V]) -> V:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+
+            value = factory()
+            self._items[key] = value
+            if self._max_size is not None and len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+            return value
+
+    def clear(self) -> List[V]:
+        """
+        Empty the cache, returns the removed values so they can be closed.
+        """
+        with self._lock:
+            values = list(self._items.values())
+            self._items.clear()
+            return values
+
+    def _reset(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+
+def _freeze(value) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, Hashable):
+        return value
+    return repr(value)
+
+
+def proxy_key(proxy: Optional[ProxyTypes]) -> Hashable:
+    """
+    Key of the proxy, `httpx.Proxy` is compared including its credentials and headers.
+    """
+    if isinstance(proxy, httpx.Proxy):
+        return (
+            str(proxy.url),
+            proxy.auth,
+            tuple(proxy.headers.multi_items()),
+        )
+    if proxy is None:
+        return None
+    return str(proxy)
+
+
+def transport_key(config: ConnectionConfig) -> Hashable:
+    """
+    Key of the transport created for the config, transports differ only by the proxy and the HTTP version.
+    """
+    return (proxy_key(config.proxy), config.http2)
+
+
+def api_client_key(config: ConnectionConfig, **kwargs) -> Hashable:
+    """
+    Key of the API client created for the config and the additional client arguments.
+    """
+    return (
+        config.api_url,
+        config.api_key,
+        config.access_token,
+        proxy_key(config.proxy),
+        config.http2,
+        _freeze(config.headers),
+        _freeze(kwargs),
+    )
@@ -1,27 +1,40 @@
-from typing import Optional
-
 import httpx
 import logging
 
-from typing_extensions import Self
-
 from e2b.api import ApiClient, limits
+from e2b.api.client_cache import (
+    MAX_CACHED_CLIENTS,
+    ClientCache,
+    api_client_key,
+    transport_key,
+)
 from e2b.connection_config import ConnectionConfig
 
 logger = logging.getLogger(__name__)
 
+_api_clients: ClientCache[ApiClient] = ClientCache(MAX_CACHED_CLIENTS)
+_transports: ClientCache["TransportWithLogger"] = ClientCache()
+
 
 def get_api_client(config: ConnectionConfig, **kwargs) -> ApiClient:
-    return ApiClient(
-        config,
-        transport=get_transport(config),
-        **kwargs,
-    )
+    """
+    Get the API client for the config, reused for the same API URL, credentials, proxy and headers.
+    """
 
+    def create() -> ApiClient:
+        client = ApiClient(
+            config,
+            transport=get_transport(config),
+            **kwargs,
+        )
+        # Created upfront, so concurrent threads don't race to create it
+        client.get_httpx_client()
+        return client
+
+    return _api_clients.get(api_client_key(config, **kwargs), create)
 
-class TransportWithLogger(httpx.HTTPTransport):
-    singleton: Optional[Self] = None
 
+class TransportWithLogger(httpx.HTTPTransport):
     def handle_request(self, request):
         url = f"{request.url.scheme}://{request.url.host}{request.url.path}"
         logger.info(f"Request: {request.method} {url}")
@@ -37,16 +50,26 @@ class TransportWithLogger(httpx.HTTPTransport):
         return self._pool
 
 
-_transport: Optional[TransportWithLogger] = None
+def get_transport(config: ConnectionConfig) -> TransportWithLogger:
+    """
+    Get the transport for the proxy and HTTP version of the config, shared by all clients using the same ones.
+    """
+    return _transports.get(
+        transport_key(config),
+        lambda: TransportWithLogger(
+            limits=limits,
+            proxy=config.proxy,
+            http2=config.http2,
+        ),
+    )
 
 
-def get_transport(config: ConnectionConfig) -> TransportWithLogger:
-    if TransportWithLogger.singleton is not None:
-        return TransportWithLogger.singleton
+def close_api_clients() -> None:
+    """
+    Close the cached API clients and transports, new ones are created when needed.
+    """
+    for client in _api_clients.clear():
+        client.get_httpx_client().close()
 
-    transport = TransportWithLogger(
-        limits=limits,
-        proxy=config.proxy,
-    )
-    TransportWithLogger.singleton = transport
-    return transport
+    for transport in _transports.clear():
+        transport.close()
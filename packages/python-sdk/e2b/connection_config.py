@@ -1,10 +1,13 @@
 import os
 
-from typing import Optional, Dict, TypedDict
+from typing import TYPE_CHECKING, Optional, Dict, TypedDict
 
 from httpx._types import ProxyTypes
 from typing_extensions import Unpack
 
+if TYPE_CHECKING:
+    from e2b_connect.client import RetryPolicy
+
 from e2b.api.metadata import package_version
 
 REQUEST_TIMEOUT: float = 60.0  # 60 seconds
@@ -51,6 +54,12 @@ class ApiParams(TypedDict, total=False):
     sandbox_url: Optional[str]
     """URL to connect to sandbox, defaults to `E2B_SANDBOX_URL` environment variable."""
 
+    http2: Optional[bool]
+    """Whether to use HTTP/2, multiplexing concurrent requests to the same host over one connection, defaults to `E2B_HTTP2` environment variable. Requires the `h2` package (`pip install e2b[http2]`)."""
+
+    rpc_retry_policy: Optional["RetryPolicy"]
+    """Policy the sandbox RPC calls are retried by, defaults to retrying calls that weren't processed and idempotent calls that failed with a transient error."""
+
 
 class ConnectionConfig:
     """
@@ -101,6 +110,10 @@ class ConnectionConfig:
     def _access_token():
         return os.getenv("E2B_ACCESS_TOKEN")
 
+    @staticmethod
+    def _http2():
+        return os.getenv("E2B_HTTP2", "false").lower() == "true"
+
     def __init__(
         self,
         domain: Optional[str] = None,
@@ -115,6 +128,8 @@ class ConnectionConfig:
         proxy: Optional[ProxyTypes] = None,
         local_mode: Optional[bool] = None,
         local_envd_url_template: Optional[str] = None,
+        http2: Optional[bool] = None,
+        rpc_retry_policy: Optional["RetryPolicy"] = None,
     ):
         self.domain = domain or ConnectionConfig._domain()
         self.debug = debug or ConnectionConfig._debug()
@@ -127,6 +142,8 @@ class ConnectionConfig:
         self.__extra_sandbox_headers = extra_sandbox_headers or {}
 
         self.proxy = proxy
+        self.http2 = http2 if http2 is not None else ConnectionConfig._http2()
+        self.rpc_retry_policy = rpc_retry_policy
 
         self.request_timeout = ConnectionConfig._get_request_timeout(
             REQUEST_TIMEOUT,
@@ -230,6 +247,7 @@ class ConnectionConfig:
         domain = opts.get("domain")
         debug = opts.get("debug")
         proxy = opts.get("proxy")
+        http2 = opts.get("http2")
 
         req_headers = self.headers.copy()
         if headers is not None:
@@ -244,6 +262,7 @@ class ConnectionConfig:
                 request_timeout=self.get_request_timeout(request_timeout),
                 headers=req_headers,
                 proxy=proxy if proxy is not None else self.proxy,
+                http2=http2 if http2 is not None else self.http2,
             )
         )
 
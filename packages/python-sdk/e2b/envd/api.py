@@ -1,6 +1,8 @@
 import httpx
 import json
 
+from typing import AsyncIterator, Iterator
+
 from e2b.exceptions import (
     SandboxException,
     NotFoundException,
@@ -42,6 +44,58 @@ async def ahandle_envd_api_exception(res: httpx.Response):
     return format_envd_api_exception(res.status_code, get_message(res))
 
 
+class ResponseBytes:
+    """
+    Iterator over the body of a streamed response.
+
+    It owns the response and closes it once the iteration ends or fails, or when the iterator is closed,
+    also if the iteration never started.
+    """
+
+    def __init__(self, res: httpx.Response):
+        self._res = res
+        self._chunks = res.iter_bytes()
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self._res.close()
+
+
+class AsyncResponseBytes:
+    """
+    Async iterator over the body of a streamed response.
+
+    It owns the response and closes it once the iteration ends or fails, or when the iterator is closed,
+    also if the iteration never started.
+    """
+
+    def __init__(self, res: httpx.Response):
+        self._res = res
+        self._chunks = res.aiter_bytes()
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self
+
+    async def __anext__(self) -> bytes:
+        try:
+            return await self._chunks.__anext__()
+        except BaseException:
+            await self.aclose()
+            raise
+
+    async def aclose(self) -> None:
+        await self._res.aclose()
+
+
 def format_envd_api_exception(status_code: int, message: str):
     if status_code == 400:
         return InvalidArgumentException(message)
@@ -2,7 +2,7 @@ import base64
 
 from typing import Optional
 from packaging.version import Version
-from e2b_connect.client import Code, ConnectException
+from e2b_connect.client import Code, ConnectException, RetryPolicy
 
 from e2b.exceptions import (
     SandboxException,
@@ -13,8 +13,31 @@ from e2b.exceptions import (
     AuthenticationException,
     RateLimitException,
 )
-from e2b.connection_config import Username, default_username
-from e2b.envd.versions import ENVD_DEFAULT_USER
+from e2b.connection_config import ConnectionConfig, Username, default_username
+from e2b.envd.versions import ENVD_DEFAULT_USER, ENVD_PROTOBUF_CODEC
+
+IDEMPOTENT_PROCEDURES = (
+    "filesystem.Filesystem/Stat",
+    "filesystem.Filesystem/ListDir",
+    "filesystem.Filesystem/WatchDir",
+    "process.Process/List",
+    "process.Process/Connect",
+)
+"""
+Envd procedures that only read the sandbox state, so they can be retried after a transient error.
+"""
+
+
+def rpc_retry_policy(config: ConnectionConfig) -> RetryPolicy:
+    """
+    Retry policy of the sandbox RPC clients, shared by all clients of the connection config,
+    so they share the retry budget and stats.
+    """
+    if config.rpc_retry_policy is None:
+        config.rpc_retry_policy = RetryPolicy(
+            idempotent_procedures=IDEMPOTENT_PROCEDURES
+        )
+    return config.rpc_retry_policy
 
 
 def handle_rpc_exception(e: Exception):
@@ -59,3 +82,11 @@ def authentication_header(
     encoded = base64.b64encode(value.encode("utf-8")).decode("utf-8")
 
     return {"Authorization": f"Basic {encoded}"}
+
+
+def use_json_codec(envd_version: Version) -> bool:
+    """
+    Older envd versions are talked to with the JSON codec, newer ones with the binary protobuf codec,
+    which avoids base64 encoding the process output and is much cheaper to decode.
+    """
+    return envd_version < ENVD_PROTOBUF_CODEC
@@ -0,0 +1,93 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_SANDBOX_BATCH_CONCURRENCY = 10
+"""
+Default maximum number of API requests a batch sandbox operation has in flight at the same time.
+"""
+
+RATE_LIMIT_RETRIES = 5
+"""
+Number of times a request of a batch sandbox operation is retried after hitting the rate limit.
+"""
+
+RATE_LIMIT_BASE_DELAY = 0.5
+"""
+Delay in **seconds** before the first retry after hitting the rate limit, doubled with each following retry.
+"""
+
+RATE_LIMIT_MAX_DELAY = 16.0
+"""
+Maximum delay in **seconds** before a retry after hitting the rate limit.
+"""
+
+
+@dataclass
+class SandboxBatchResult(Generic[T]):
+    """
+    Result of one item of a batch sandbox operation.
+    """
+
+    sandbox_id: Optional[str]
+    """
+    ID of the sandbox the result is for, `None` if the sandbox failed to be created.
+    """
+    value: Optional[T] = None
+    """
+    Result of the operation, `None` if it failed.
+    """
+    error: Optional[Exception] = None
+    """
+    Error of the operation if it failed.
+    """
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the operation succeeded for the item.
+        """
+        return self.error is None
+
+
+class RateLimitBackoff:
+    """
+    Exponential backoff with full jitter shared by the requests of a batch.
+
+    Hitting the rate limit pauses all requests of the batch, not just the one that was rejected,
+    so the batch slows down instead of every request hitting the limit on its own.
+    """
+
+    def __init__(
+        self,
+        retries: int = RATE_LIMIT_RETRIES,
+        base_delay: float = RATE_LIMIT_BASE_DELAY,
+        max_delay: float = RATE_LIMIT_MAX_DELAY,
+    ):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait_time(self) -> float:
+        """
+        Time in **seconds** until requests can be sent again.
+        """
+        return max(self._resume_at - time.monotonic(), 0.0)
+
+    def limited(self, attempt: int) -> bool:
+        """
+        Register a rate limited request, returns `False` if it shouldn't be retried anymore.
+        """
+        if attempt >= self.retries:
+            return False
+
+        delay = random.uniform(0, min(self.base_delay * 2**attempt, self.max_delay))
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return True
@@ -1,7 +1,10 @@
+import codecs
+from collections import deque
 from dataclasses import dataclass
-from typing import Optional
+from tempfile import SpooledTemporaryFile
+from typing import IO, Deque, Literal, Optional, Union
 
-from e2b.exceptions import SandboxException
+from e2b.exceptions import InvalidArgumentException, SandboxException
 
 Stdout = str
 """
@@ -39,13 +42,13 @@ class CommandResult:
     Command execution result.
     """
 
-    stderr: str
+    stderr: Union[str, bytes]
     """
-    Command stderr output.
+    Command stderr output, bytes if the command was started with `raw=True`.
     """
-    stdout: str
+    stdout: Union[str, bytes]
     """
-    Command stdout output.
+    Command stdout output, bytes if the command was started with `raw=True`.
     """
     exit_code: int
     """
@@ -57,6 +60,18 @@ class CommandResult:
     """
     Error message from command execution if it failed.
     """
+    stdout_file: Optional[IO[bytes]] = None
+    """
+    Temporary file with the whole stdout output encoded as UTF-8, set only if the command was started with `spill_output=True`.
+
+    `stdout` then holds only the last `max_output_size` characters.
+    """
+    stderr_file: Optional[IO[bytes]] = None
+    """
+    Temporary file with the whole stderr output encoded as UTF-8, set only if the command was started with `spill_output=True`.
+
+    `stderr` then holds only the last `max_output_size` characters.
+    """
 
 
 @dataclass
@@ -67,3 +82,164 @@ class CommandExitException(SandboxException, CommandResult):
 
     def __str__(self):
         return f"Command exited with code {self.exit_code} and error:\n{self.stderr}"
+
+
+DEFAULT_EVENT_QUEUE_SIZE = 256
+"""
+Default number of command events buffered for an iterating consumer before the command output stops being read.
+"""
+
+PtyOverflow = Literal["block", "drop", "coalesce"]
+"""
+What happens to the pty output when the consumer iterating over the command events falls behind.
+
+- `block` stops reading the command output until the consumer catches up
+- `drop` discards the pty output that doesn't fit into the queue
+- `coalesce` joins the pty output that doesn't fit into the queue into one event delivered once the queue is drained
+"""
+
+
+@dataclass
+class CommandEvent:
+    """
+    Event of a running command yielded when iterating over its handle.
+    """
+
+    type: Literal["stdout", "stderr", "pty", "end"]
+    """
+    Type of the event.
+    """
+    data: Optional[Union[Stdout, Stderr, PtyOutput]] = None
+    """
+    Output chunk, `None` for the `end` event.
+    """
+    exit_code: Optional[int] = None
+    """
+    Command exit code, set only for the `end` event.
+    """
+    error: Optional[str] = None
+    """
+    Error message from command execution if it failed, set only for the `end` event.
+    """
+
+
+class OutputDecoder:
+    """
+    Decodes command output chunks as UTF-8.
+
+    A multi-byte character split between chunks is decoded once its last byte arrives,
+    so chunk boundaries don't produce replacement characters. In raw mode the chunks are passed through as bytes.
+    """
+
+    def __init__(self, raw: bool = False):
+        self._decoder = (
+            None if raw else codecs.getincrementaldecoder("utf-8")("replace")
+        )
+
+    def decode(self, chunk: bytes) -> Union[str, bytes]:
+        if self._decoder is None:
+            return chunk
+        return self._decoder.decode(chunk)
+
+    def flush(self) -> Union[str, bytes]:
+        """
+        Decode the bytes left over from an incomplete character at the end of the output.
+        """
+        if self._decoder is None:
+            return b""
+        return self._decoder.decode(b"", final=True)
+
+
+class OutputBuffer:
+    """
+    Accumulates command output chunks and joins them only when the output is read.
+
+    By default the whole output is kept in memory.
+    With `max_size` only the last `max_size` characters are kept,
+    with `spill` set the whole output is also written to a temporary file, so the output over `max_size` isn't lost.
+    In raw mode the chunks are bytes accumulated in a `bytearray` and `max_size` is in bytes.
+    """
+
+    def __init__(
+        self, max_size: Optional[int] = None, spill: bool = False, raw: bool = False
+    ):
+        if max_size is not None and max_size < 0:
+            raise InvalidArgumentException("max_output_size must not be negative")
+
+        if spill and max_size is None:
+            raise InvalidArgumentException(
+                "spill_output requires max_output_size to be set"
+            )
+
+        self._max_size = max_size
+        self._chunks: Deque[str] = deque()
+        self._size = 0
+        self._file: Optional[SpooledTemporaryFile] = (
+            SpooledTemporaryFile(max_size=max(max_size, 1)) if spill else None
+        )
+        self._raw = raw
+        self._bytes = bytearray()
+        self._value: Optional[Union[str, bytes]] = b"" if raw else ""
+
+    def append(self, chunk: Union[str, bytes]) -> None:
+        self._value = None
+
+        if self._file is not None:
+            # The file may have been read since the last chunk
+            self._file.seek(0, 2)
+            self._file.write(chunk if self._raw else chunk.encode("utf-8"))
+
+        if self._raw:
+            self._bytes += chunk
+            # Trimmed only once the buffer doubles, so capped output isn't moved on every chunk
+            if self._max_size is not None and len(self._bytes) > 2 * self._max_size:
+                del self._bytes[: len(self._bytes) - self._max_size]
+            return
+
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+
+        if self._max_size is None:
+            return
+
+        # Drop whole chunks that are no longer part of the kept tail
+        while self._chunks and self._size - len(self._chunks[0]) >= self._max_size:
+            self._size -= len(self._chunks.popleft())
+
+    @property
+    def value(self) -> Union[str, bytes]:
+        """
+        Output accumulated so far, bytes in raw mode.
+
+        Only the last `max_size` characters with `max_size` set, the whole output is in `file` when spilling.
+        """
+        if self._value is not None:
+            return self._value
+
+        if self._raw:
+            size = len(self._bytes)
+            if self._max_size is not None and size > self._max_size:
+                size = self._max_size
+            value = bytes(self._bytes[len(self._bytes) - size :])
+        else:
+            value = "".join(self._chunks)
+            if self._max_size is not None and len(value) > self._max_size:
+                value = value[len(value) - self._max_size :]
+
+            self._chunks.clear()
+            self._chunks.append(value)
+            self._size = len(value)
+
+        self._value = value
+        return value
+
+    @property
+    def file(self) -> Optional[IO[bytes]]:
+        """
+        Temporary file with the whole output written so far positioned at its start, `None` unless spilling.
+        """
+        if self._file is None:
+            return None
+
+        self._file.seek(0)
+        return self._file
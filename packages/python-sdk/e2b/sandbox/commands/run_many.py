@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+from e2b.exceptions import SandboxException, TimeoutException
+from e2b.sandbox.batch import SandboxBatchResult
+from e2b.sandbox.commands.command_handle import CommandResult
+
+DEFAULT_RUN_MANY_CONCURRENCY = 10
+"""
+Default maximum number of commands `run_many` has running at the same time.
+"""
+
+DEFAULT_RUN_MANY_TIMEOUT = 60
+"""
+Default time in **seconds** a command started by `run_many` can run before it's killed.
+"""
+
+RUN_MANY_OUTPUT_QUEUE_SIZE = 1024
+"""
+Maximum number of output chunks of the commands started by `run_many` buffered for the iteration over their output.
+"""
+
+RunManyIteration = Literal["pending", "running", "done"]
+"""
+State of the iteration over the output of the commands started by `run_many`.
+"""
+
+
+@dataclass
+class CommandOutput:
+    """
+    Chunk of the output of one of the commands started by `run_many`.
+    """
+
+    index: int
+    """
+    Position of the command in the commands passed to `run_many`.
+    """
+    sandbox_id: str
+    """
+    ID of the sandbox the command runs in.
+    """
+    pid: int
+    """
+    Process ID of the command.
+    """
+    stream: Literal["stdout", "stderr"]
+    """
+    Output stream the chunk was written to.
+    """
+    data: str
+    """
+    Output chunk.
+    """
+
+
+@dataclass
+class CommandBatchResult(SandboxBatchResult[CommandResult]):
+    """
+    Result of one of the commands started by `run_many`.
+
+    The error is a `CommandExitException` if the command exited with a non-zero exit code,
+    a `TimeoutException` if it was killed after the timeout and a `SandboxException` if the run was cancelled.
+    """
+
+    pid: Optional[int] = None
+    """
+    Process ID of the command, `None` if it wasn't started.
+    """
+
+
+def timed_out(timeout: float) -> TimeoutException:
+    return TimeoutException(
+        f"Command didn't finish within {timeout} seconds and was killed"
+    )
+
+
+def iterated() -> SandboxException:
+    return SandboxException("The command output can be iterated only once")
+
+
+def cancelled() -> SandboxException:
+    return SandboxException("Command was cancelled")
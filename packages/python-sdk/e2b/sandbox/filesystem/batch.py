@@ -0,0 +1,84 @@
+import posixpath
+from dataclasses import dataclass
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+
+from e2b.exceptions import NotFoundException
+
+T = TypeVar("T")
+
+DEFAULT_BATCH_CONCURRENCY = 16
+"""
+Default maximum number of requests a batch operation has in flight at the same time.
+"""
+
+LIST_DIR_THRESHOLD = 8
+"""
+Minimum number of paths in the same directory for which a single directory listing is used instead of one request per path.
+"""
+
+
+@dataclass
+class BatchResult(Generic[T]):
+    """
+    Result of one path of a batch filesystem operation.
+    """
+
+    path: str
+    """
+    Path the result is for.
+    """
+    value: Optional[T] = None
+    """
+    Result of the operation, `None` if it failed.
+    """
+    error: Optional[Exception] = None
+    """
+    Error of the operation if it failed.
+    """
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the operation succeeded for the path.
+        """
+        return self.error is None
+
+
+def group_by_parent(
+    paths: List[str], threshold: int = LIST_DIR_THRESHOLD
+) -> Tuple[Dict[str, List[int]], List[int]]:
+    """
+    Group indices of the paths that can be looked up by listing their parent directory.
+    Only absolute, normalized paths are grouped, the rest is returned separately.
+    """
+    groups: Dict[str, List[int]] = {}
+    singles: List[int] = []
+
+    for index, path in enumerate(paths):
+        if path.startswith("/") and path != "/" and posixpath.normpath(path) == path:
+            groups.setdefault(posixpath.dirname(path), []).append(index)
+        else:
+            singles.append(index)
+
+    for parent in list(groups):
+        if len(groups[parent]) < threshold:
+            singles.extend(groups.pop(parent))
+
+    return groups, sorted(singles)
+
+
+def not_found(path: str) -> NotFoundException:
+    return NotFoundException(f"Path '{path}' does not exist")
+
+
+def exists_result(result: BatchResult) -> BatchResult[bool]:
+    """
+    Turn a `stat` result into an `exists` one, a missing path is not an error.
+    """
+    if result.ok:
+        return BatchResult(result.path, value=True)
+
+    if isinstance(result.error, NotFoundException):
+        return BatchResult(result.path, value=False)
+
+    return BatchResult(result.path, error=result.error)
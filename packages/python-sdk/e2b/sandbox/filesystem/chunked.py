@@ -0,0 +1,169 @@
+import hashlib
+import io
+import os
+import shlex
+from typing import Dict, List, Optional, Tuple
+
+from e2b.exceptions import InvalidArgumentException
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+"""
+Default size of the chunks a file is split into for the chunked transfers.
+"""
+
+CHUNK_RETRIES = 3
+"""
+How many times the chunks that failed to transfer or didn't match their hash are retried.
+"""
+
+_HASH_READ_SIZE = 1024 * 1024
+
+Chunk = Tuple[int, int]
+"""
+Byte range of a chunk as `(offset, length)`.
+"""
+
+
+def plan_chunks(size: int, chunk_size: int) -> List[Chunk]:
+    """
+    Split a file of `size` bytes into chunks of `chunk_size` bytes, the last chunk can be shorter.
+    """
+    if chunk_size <= 0:
+        raise InvalidArgumentException("chunk_size should be a positive number")
+
+    return [
+        (offset, min(chunk_size, size - offset))
+        for offset in range(0, size, chunk_size)
+    ]
+
+
+def chunk_dir(path: str, chunk_size: int) -> str:
+    """
+    Directory in the sandbox the chunks of an upload to `path` are stored in until they are assembled.
+    The chunk size is a part of the name, so an interrupted upload is resumed only with the same chunk size.
+    """
+    return f"{path}.e2b-chunks-{chunk_size}"
+
+
+def chunk_name(index: int) -> str:
+    return f"{index:06d}"
+
+
+def hash_file_range(local_path: str, offset: int, length: int) -> str:
+    """
+    SHA-256 hex digest of a byte range of a local file.
+    """
+    digest = hashlib.sha256()
+    with open(local_path, "rb") as f:
+        f.seek(offset)
+        while length > 0:
+            data = f.read(min(_HASH_READ_SIZE, length))
+            if not data:
+                break
+            digest.update(data)
+            length -= len(data)
+
+    return digest.hexdigest()
+
+
+def range_hashes_command(path: str, chunk_size: int, count: int) -> str:
+    """
+    Command printing the SHA-256 of each chunk of a file in the sandbox, one per line in chunk order.
+    """
+    return (
+        f"for i in $(seq 0 {count - 1}); do "
+        f"dd if={shlex.quote(path)} bs={chunk_size} skip=$i count=1 2>/dev/null | sha256sum; "
+        "done"
+    )
+
+
+def chunk_hashes_command(directory: str) -> str:
+    """
+    Command printing the SHA-256 of the chunk files already uploaded to the directory.
+    """
+    return f"sha256sum {shlex.quote(directory)}/* 2>/dev/null || true"
+
+
+def assemble_command(directory: str, path: str, count: int) -> str:
+    """
+    Command concatenating the uploaded chunks into the target file and removing the chunks.
+
+    The chunk names are listed by `seq` and passed to `cat` by `xargs`,
+    so the number of chunks isn't limited by the maximum length of the command line.
+    """
+    directory = shlex.quote(directory)
+    return (
+        f"(cd {directory} && seq -f %06.0f 0 {count - 1} | xargs cat) > {shlex.quote(path)} "
+        f"&& rm -rf {directory}"
+    )
+
+
+def parse_range_hashes(stdout: str) -> List[str]:
+    return [line.split()[0] for line in stdout.splitlines() if line.strip()]
+
+
+def parse_chunk_hashes(stdout: str) -> Dict[str, str]:
+    """
+    Parse `sha256sum` output into a mapping of the chunk names to their hashes.
+    """
+    hashes = {}
+    for line in stdout.splitlines():
+        if not line.strip():
+            continue
+        digest, name = line.split(maxsplit=1)
+        hashes[os.path.basename(name.lstrip("*"))] = digest
+
+    return hashes
+
+
+class FileRange(io.RawIOBase):
+    """
+    Read-only file object exposing a byte range of a local file, used for uploading a chunk without reading it into memory.
+    """
+
+    def __init__(self, local_path: str, offset: int, length: int):
+        self._file = open(local_path, "rb")
+        self._offset = offset
+        self._length = length
+        self._position = 0
+        self._file.seek(offset)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._length
+
+        self._position = max(0, min(offset, self._length))
+        self._file.seek(self._offset + self._position)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._length - self._position)
+        if size <= 0:
+            return 0
+
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._position += read
+        return read
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._length - self._position
+
+        buffer = bytearray(min(size, self._length - self._position))
+        read = self.readinto(buffer)
+        return bytes(buffer[:read])
+
+    def close(self):
+        self._file.close()
+        super().close()
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import IO, Optional, Union, TypedDict
+from typing import IO, AsyncIterable, Optional, Union, TypedDict
 
 from e2b.envd.filesystem import filesystem_pb2
 
@@ -85,10 +85,17 @@ class EntryInfo(WriteInfo):
     """
 
 
+WriteData = Union[str, bytes, IO, AsyncIterable[bytes]]
+"""
+Data of a file to be written to the filesystem.
+Async iterables are supported only by the async SDK.
+"""
+
+
 class WriteEntry(TypedDict):
     """
     Contains path and data of the file to be written to the filesystem.
     """
 
     path: str
-    data: Union[str, bytes, IO]
+    data: WriteData
@@ -0,0 +1,152 @@
+import posixpath
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from e2b.sandbox.filesystem.filesystem import EntryInfo
+from e2b.sandbox.filesystem.watch_handle import FilesystemEvent
+
+DEFAULT_LIST_CACHE_TTL = 10.0
+"""
+Default time in **seconds** a cached directory listing is used for, even if no change was reported.
+"""
+
+
+@dataclass
+class ListCacheStats:
+    """
+    Counters of the directory listing cache.
+    """
+
+    hits: int = 0
+    """
+    Number of listings served from the cache.
+    """
+    misses: int = 0
+    """
+    Number of listings of the watched directories that had to be requested from the sandbox.
+    """
+    invalidations: int = 0
+    """
+    Number of cached listings dropped because of a change in the directory.
+    """
+
+
+def _within(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip("/") + "/")
+
+
+class ListCache:
+    """
+    Cache of directory listings for the directories watched for changes.
+
+    Listings are stored per path, depth and user, a change of a path drops all cached listings that could include it.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._stats = ListCacheStats()
+        self._roots: List[str] = []
+        self._entries: Dict[
+            Tuple[str, int, Optional[str]], Tuple[float, List[EntryInfo]]
+        ] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> ListCacheStats:
+        with self._lock:
+            return replace(self._stats)
+
+    @property
+    def roots(self) -> List[str]:
+        return list(self._roots)
+
+    @property
+    def generation(self) -> int:
+        """
+        Counter increased on every invalidation, used to not store listings that could be already outdated.
+        """
+        return self._generation
+
+    def root_for(self, path: str) -> Optional[str]:
+        """
+        The watched directory the path is in, `None` if the path isn't watched.
+        """
+        path = posixpath.normpath(path)
+        for root in self._roots:
+            if _within(path, root):
+                return root
+        return None
+
+    def add_root(self, root: str):
+        with self._lock:
+            root = posixpath.normpath(root)
+            if root not in self._roots:
+                self._roots.append(root)
+
+    def remove_root(self, root: str):
+        with self._lock:
+            root = posixpath.normpath(root)
+            if root in self._roots:
+                self._roots.remove(root)
+            self._drop(lambda path: _within(path, root))
+
+    def get(
+        self, path: str, depth: Optional[int], user: Optional[str]
+    ) -> Optional[List[EntryInfo]]:
+        if self.root_for(path) is None:
+            return None
+
+        key = (posixpath.normpath(path), depth or 1, user)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                self._stats.hits += 1
+                return list(cached[1])
+
+            self._entries.pop(key, None)
+            self._stats.misses += 1
+            return None
+
+    def put(
+        self,
+        path: str,
+        depth: Optional[int],
+        user: Optional[str],
+        entries: List[EntryInfo],
+        generation: int,
+    ):
+        """
+        Store the listing, unless something was invalidated since `generation` was read before requesting it.
+        """
+        if self.root_for(path) is None:
+            return
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[(posixpath.normpath(path), depth or 1, user)] = (
+                    time.monotonic(),
+                    list(entries),
+                )
+
+    def invalidate(self, path: str):
+        """
+        Drop the listings that could include the path or that are inside of it.
+        """
+        path = posixpath.normpath(path)
+        with self._lock:
+            self._generation += 1
+            self._stats.invalidations += self._drop(
+                lambda listed: _within(path, listed) or _within(listed, path)
+            )
+
+    def on_event(self, root: str, event: FilesystemEvent):
+        self.invalidate(posixpath.join(root, event.name))
+
+    def _drop(self, predicate) -> int:
+        keys = [key for key in self._entries if predicate(key[0])]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
@@ -0,0 +1,150 @@
+import asyncio
+import io
+import os
+import re
+from typing import AsyncIterable, AsyncIterator, Iterator, List, Optional, Tuple
+
+from e2b.exceptions import InvalidArgumentException
+from e2b.sandbox.filesystem.filesystem import WriteData
+
+CHUNK_SIZE = 256 * 1024
+"""
+Size of the chunks read from file objects when uploading.
+"""
+
+_FORM_PARAM_REPLACEMENTS = {chr(c): f"%{c:02X}" for c in range(0x00, 0x20) if c != 0x1B}
+_FORM_PARAM_REPLACEMENTS.update({'"': "%22", "\\": "\\\\"})
+_FORM_PARAM_RE = re.compile(
+    "|".join(re.escape(c) for c in _FORM_PARAM_REPLACEMENTS.keys())
+)
+
+
+def _format_form_param(name: str, value: str) -> str:
+    value = _FORM_PARAM_RE.sub(lambda m: _FORM_PARAM_REPLACEMENTS[m.group(0)], value)
+    return f'{name}="{value}"'
+
+
+def _data_size(data: WriteData) -> Optional[int]:
+    """
+    Number of bytes the data will take in the request body, `None` if it can't be known upfront.
+    """
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+
+    if isinstance(data, bytes):
+        return len(data)
+
+    if isinstance(data, io.TextIOBase) or not isinstance(data, io.IOBase):
+        return None
+
+    try:
+        return os.fstat(data.fileno()).st_size - data.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+
+    try:
+        position = data.tell()
+        end = data.seek(0, os.SEEK_END)
+        data.seek(position)
+        return end - position
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _encode(chunk) -> bytes:
+    return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+class MultipartEncoder:
+    """
+    Streaming `multipart/form-data` encoder for the envd files API.
+
+    The body is produced chunk by chunk, file objects are read `CHUNK_SIZE` bytes at a time
+    and async iterables are consumed as they produce data,
+    so the memory needed for an upload doesn't depend on the size of the files.
+    """
+
+    def __init__(self, files: List[Tuple[str, WriteData]]):
+        self.boundary = os.urandom(16).hex()
+        self._parts: List[Tuple[bytes, WriteData]] = []
+
+        for path, data in files:
+            if not isinstance(data, (str, bytes, io.IOBase, AsyncIterable)):
+                raise InvalidArgumentException(f"Unsupported data type for file {path}")
+
+            header = (
+                f"--{self.boundary}\r\n"
+                f"Content-Disposition: form-data; {_format_form_param('name', 'file')}; "
+                f"{_format_form_param('filename', path)}\r\n"
+                "Content-Type: application/octet-stream\r\n\r\n"
+            )
+            self._parts.append((header.encode("utf-8"), data))
+
+        self._end = f"--{self.boundary}--\r\n".encode("utf-8")
+
+        # Sizes have to be taken before the file objects are read
+        self._content_length: Optional[int] = len(self._end)
+        for header, data in self._parts:
+            size = _data_size(data)
+            if size is None:
+                self._content_length = None
+                break
+
+            self._content_length += len(header) + size + 2
+
+    @property
+    def is_async(self) -> bool:
+        """
+        Whether some of the files are async iterables, which can be only sent with the async client.
+        """
+        return any(isinstance(data, AsyncIterable) for _, data in self._parts)
+
+    @property
+    def headers(self) -> dict:
+        """
+        Headers describing the body, `Content-Length` is included only if the sizes of all files are known.
+        """
+        headers = {"Content-Type": f"multipart/form-data; boundary={self.boundary}"}
+
+        if self._content_length is not None:
+            headers["Content-Length"] = str(self._content_length)
+
+        return headers
+
+    def __iter__(self) -> Iterator[bytes]:
+        for header, data in self._parts:
+            yield header
+
+            if isinstance(data, (str, bytes)):
+                yield _encode(data)
+            elif isinstance(data, io.IOBase):
+                while chunk := data.read(CHUNK_SIZE):
+                    yield _encode(chunk)
+            else:
+                raise InvalidArgumentException(
+                    "Async iterables can be only uploaded with the async SDK"
+                )
+
+            yield b"\r\n"
+
+        yield self._end
+
+    async def aiter(self) -> AsyncIterator[bytes]:
+        """
+        Produce the body for the async client, file objects are read in a thread so the event loop isn't blocked.
+        """
+        for header, data in self._parts:
+            yield header
+
+            if isinstance(data, (str, bytes)):
+                yield _encode(data)
+            elif isinstance(data, io.IOBase):
+                while chunk := await asyncio.to_thread(data.read, CHUNK_SIZE):
+                    yield _encode(chunk)
+            else:
+                async for chunk in data:
+                    yield _encode(chunk)
+
+            yield b"\r\n"
+
+        yield self._end
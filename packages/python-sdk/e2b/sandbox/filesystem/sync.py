@@ -0,0 +1,310 @@
+import io
+import os
+import posixpath
+import shlex
+import tarfile
+from dataclasses import dataclass
+from datetime import timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from e2b.exceptions import SandboxException
+from e2b.sandbox.filesystem.chunked import hash_file_range
+from e2b.sandbox.filesystem.filesystem import EntryInfo, FileType
+from e2b.sandbox.filesystem.multipart import CHUNK_SIZE
+
+MAX_SYNC_DEPTH = 256
+"""
+Default depth the directories are synced to.
+"""
+
+MTIME_TOLERANCE = 1.0
+"""
+Modification times closer than this many seconds are considered equal, archives don't always keep sub-second precision.
+"""
+
+
+@dataclass
+class SyncResult:
+    """
+    Result of a directory sync.
+    """
+
+    transferred: List[str]
+    """
+    Paths of the files and directories that were copied, relative to the synced directory.
+    """
+    unchanged: int
+    """
+    Number of files and directories that were already up to date.
+    """
+
+
+class FileState(NamedTuple):
+    is_dir: bool
+    size: int
+    mtime: float
+    mode: int
+
+
+Tree = Dict[str, FileState]
+"""
+Files and directories of a synced directory by their relative POSIX paths.
+"""
+
+
+def local_tree(root: str) -> Tree:
+    """
+    Walk a local directory, symlinks are skipped.
+    """
+    tree: Tree = {}
+
+    def walk(directory: str, prefix: str):
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_symlink():
+                    continue
+
+                name = f"{prefix}{entry.name}"
+                st = entry.stat()
+
+                if entry.is_dir():
+                    tree[name] = FileState(True, 0, st.st_mtime, st.st_mode & 0o7777)
+                    walk(entry.path, f"{name}/")
+                elif entry.is_file():
+                    tree[name] = FileState(
+                        False, st.st_size, st.st_mtime, st.st_mode & 0o7777
+                    )
+
+    if os.path.isdir(root):
+        walk(root, "")
+
+    return tree
+
+
+def remote_tree(entries: List[EntryInfo], root: str) -> Tree:
+    """
+    Build the tree from a recursive listing of the directory in the sandbox, symlinks are skipped.
+    """
+    tree: Tree = {}
+    for entry in entries:
+        if entry.symlink_target is not None:
+            continue
+
+        tree[posixpath.relpath(entry.path, root)] = FileState(
+            entry.type == FileType.DIR,
+            entry.size,
+            entry.modified_time.replace(tzinfo=timezone.utc).timestamp(),
+            entry.mode,
+        )
+
+    return tree
+
+
+def diff_trees(
+    source: Tree, target: Tree, checksum: bool
+) -> Tuple[List[str], List[str]]:
+    """
+    Compare the trees, returns the paths that have to be copied
+    and the files of the same size that need their hashes compared when `checksum` is set.
+    """
+    changed, check = [], []
+
+    for name, state in sorted(source.items()):
+        existing = target.get(name)
+
+        if existing is None or existing.is_dir != state.is_dir:
+            changed.append(name)
+        elif state.is_dir:
+            continue
+        elif existing.size != state.size:
+            changed.append(name)
+        elif checksum:
+            check.append(name)
+        elif abs(existing.mtime - state.mtime) >= MTIME_TOLERANCE:
+            changed.append(name)
+
+    return changed, check
+
+
+def local_hashes(root: str, names: List[str], tree: Tree) -> Dict[str, str]:
+    return {
+        name: hash_file_range(os.path.join(root, name), 0, tree[name].size)
+        for name in names
+    }
+
+
+def parse_hashes(stdout: str) -> Dict[str, str]:
+    """
+    Parse `sha256sum` output into a mapping of the paths to their hashes.
+    """
+    hashes = {}
+    for line in stdout.splitlines():
+        if not line.strip():
+            continue
+        digest, name = line.split(maxsplit=1)
+        hashes[name.lstrip("*")] = digest
+
+    return hashes
+
+
+SYNC_TEMPORARY_DIR = "/tmp"
+"""
+Directory in the sandbox the file lists and archives of the syncs are stored in,
+the parent of the synced directory isn't always writable by the user.
+"""
+
+
+def temporary_path(suffix: str) -> str:
+    """
+    Path in the sandbox for the file list or archive of a sync.
+    """
+    return f"{SYNC_TEMPORARY_DIR}/e2b-sync-{os.urandom(8).hex()}.{suffix}"
+
+
+def file_list(names: List[str]) -> bytes:
+    return b"\0".join(name.encode("utf-8") for name in names)
+
+
+def hashes_command(root: str, list_path: str) -> str:
+    """
+    Command printing the SHA-256 of the files in the list, relative to the synced directory.
+    """
+    return (
+        f"cd {shlex.quote(root)} && xargs -0 -a {shlex.quote(list_path)} sha256sum --; "
+        f"rm -f {shlex.quote(list_path)}"
+    )
+
+
+def pack_command(root: str, list_path: str, archive: str) -> str:
+    """
+    Command archiving the listed files and directories of the synced directory.
+    """
+    return (
+        f"tar -cf {shlex.quote(archive)} -C {shlex.quote(root)} "
+        f"--no-recursion --null -T {shlex.quote(list_path)}; "
+        f"s=$?; rm -f {shlex.quote(list_path)}; exit $s"
+    )
+
+
+def unpack_command(archive: str, root: str) -> str:
+    """
+    Command unpacking an uploaded archive into the synced directory and removing it.
+    """
+    return (
+        f"mkdir -p {shlex.quote(root)} && tar -xf {shlex.quote(archive)} -C {shlex.quote(root)}; "
+        f"s=$?; rm -f {shlex.quote(archive)}; exit $s"
+    )
+
+
+def tar_stream(root: str, names: List[str], tree: Tree) -> Iterator[bytes]:
+    """
+    Produce a tar archive of the files and directories chunk by chunk, file content is read as the archive is consumed.
+    """
+    for name in names:
+        state = tree[name]
+
+        info = tarfile.TarInfo(name)
+        info.mtime = state.mtime
+        info.mode = state.mode
+
+        if state.is_dir:
+            info.type = tarfile.DIRTYPE
+            yield info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+            continue
+
+        info.size = state.size
+        yield info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+
+        remaining = state.size
+        with open(os.path.join(root, name), "rb") as f:
+            while remaining > 0:
+                data = f.read(min(CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+
+        # The file got shorter since it was listed, the size in the header has to be kept
+        if remaining:
+            yield bytes(remaining)
+
+        padding = -state.size % tarfile.BLOCKSIZE
+        if padding:
+            yield bytes(padding)
+
+    yield bytes(2 * tarfile.BLOCKSIZE)
+
+
+class IteratorReader(io.RawIOBase):
+    """
+    Read-only file object over an iterator of `bytes`.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._pending: Optional[memoryview] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                self._pending = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _is_within(path: str, root: str) -> bool:
+    return os.path.commonpath([path, root]) == root
+
+
+def _checked_members(tar: tarfile.TarFile, root: str) -> Iterator[tarfile.TarInfo]:
+    """
+    Members of the archive that stay inside the directory, checked one at a time as they are extracted,
+    so the links extracted before are followed.
+    """
+    root = os.path.realpath(root)
+
+    for member in tar:
+        path = os.path.join(root, member.name)
+        if not _is_within(os.path.realpath(path), root):
+            raise SandboxException(
+                f"Archive member '{member.name}' is outside of the target directory"
+            )
+
+        if member.issym():
+            target = os.path.join(os.path.dirname(path), member.linkname)
+        elif member.islnk():
+            target = os.path.join(root, member.linkname)
+        elif member.isdev():
+            raise SandboxException(f"Archive member '{member.name}' is a special file")
+        else:
+            target = None
+
+        if target is not None and not _is_within(os.path.realpath(target), root):
+            raise SandboxException(
+                f"Archive member '{member.name}' links outside of the target directory"
+            )
+
+        yield member
+
+
+def extract_tar(archive: str, root: str):
+    """
+    Unpack a downloaded archive into the local directory.
+
+    The archive is produced in the sandbox, so members pointing outside of the directory are rejected.
+    """
+    os.makedirs(root, exist_ok=True)
+
+    with tarfile.open(archive) as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(root, filter="data")
+        else:
+            tar.extractall(root, members=_checked_members(tar, root))
@@ -0,0 +1,209 @@
+import threading
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from e2b.exceptions import InvalidArgumentException
+from e2b.sandbox.pool import percentile
+from e2b.sandbox.sandbox_api import SandboxMetrics
+
+DEFAULT_METRICS_POLL_INTERVAL = 5.0
+"""
+Default interval in **seconds** in which new sandbox metrics are polled, the sandboxes report them every 5 seconds.
+"""
+
+DEFAULT_METRICS_CAPACITY = 720
+"""
+Default number of samples kept in a metrics buffer, an hour of samples reported every 5 seconds.
+"""
+
+FLEET_METRICS_BATCH_SIZE = 100
+"""
+Maximum number of sandboxes the metrics are requested for in one API request.
+"""
+
+METRICS_COLUMNS = ("cpu_used_pct", "mem_used", "disk_used")
+"""
+Columns of the metrics buffer the aggregates can be computed for.
+"""
+
+
+@dataclass
+class MetricsAggregate:
+    """
+    Aggregate of one metric over a window of samples.
+    """
+
+    p50: float = 0.0
+    """
+    Median of the metric.
+    """
+    p95: float = 0.0
+    """
+    95th percentile of the metric.
+    """
+    max: float = 0.0
+    """
+    Maximum of the metric.
+    """
+
+
+@dataclass
+class SandboxMetricsSummary:
+    """
+    Aggregates of the sandbox metrics over a window of samples.
+    """
+
+    samples: int
+    """
+    Number of samples in the window.
+    """
+    cpu_used_pct: MetricsAggregate
+    """
+    CPU usage in percent.
+    """
+    mem_used: MetricsAggregate
+    """
+    Memory used in bytes.
+    """
+    disk_used: MetricsAggregate
+    """
+    Disk used in bytes.
+    """
+
+
+class MetricsBuffer:
+    """
+    Ring buffer of the most recent sandbox metrics with rolling aggregates.
+
+    The samples are stored in fixed-size columns, so the buffer doesn't grow however long it's fed.
+    Windows are measured back from the latest sample, not from the current time.
+
+    Example
+    ```python
+    buffer = MetricsBuffer()
+
+    async for _ in sandbox.watch_metrics(buffer=buffer):
+        print(buffer.summary(window=60).cpu_used_pct.p95)
+    ```
+    """
+
+    def __init__(self, capacity: int = DEFAULT_METRICS_CAPACITY):
+        """
+        :param capacity: Number of samples kept, the oldest ones are overwritten first
+        """
+        if capacity < 1:
+            raise InvalidArgumentException("Capacity must be at least 1")
+
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._columns = {
+            "cpu_used_pct": array("d", bytes(8 * capacity)),
+            "mem_used": array("q", bytes(8 * capacity)),
+            "disk_used": array("q", bytes(8 * capacity)),
+        }
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, metric: SandboxMetrics):
+        with self._lock:
+            i = (self._start + self._size) % self.capacity
+            if self._size == self.capacity:
+                self._start = (self._start + 1) % self.capacity
+            else:
+                self._size += 1
+
+            self._timestamps[i] = metric.timestamp.timestamp()
+            self._columns["cpu_used_pct"][i] = metric.cpu_used_pct
+            self._columns["mem_used"][i] = metric.mem_used
+            self._columns["disk_used"][i] = metric.disk_used
+
+    def values(self, column: str, window: Optional[float] = None) -> List[float]:
+        """
+        Values of the column from the oldest to the latest sample.
+
+        :param column: One of `cpu_used_pct`, `mem_used` and `disk_used`
+        :param window: Only the samples from the last `window` **seconds** before the latest sample, all samples by default
+        """
+        if column not in self._columns:
+            raise InvalidArgumentException(
+                f"Unknown metrics column '{column}', use one of {', '.join(METRICS_COLUMNS)}"
+            )
+
+        with self._lock:
+            indexes = [(self._start + i) % self.capacity for i in range(self._size)]
+            if window is not None and indexes:
+                since = self._timestamps[indexes[-1]] - window
+                indexes = [i for i in indexes if self._timestamps[i] >= since]
+
+            values = self._columns[column]
+            return [values[i] for i in indexes]
+
+    def aggregate(
+        self, column: str, window: Optional[float] = None
+    ) -> MetricsAggregate:
+        """
+        Percentiles and maximum of the column.
+
+        :param column: One of `cpu_used_pct`, `mem_used` and `disk_used`
+        :param window: Only the samples from the last `window` **seconds** before the latest sample, all samples by default
+        """
+        return _aggregate(self.values(column, window))
+
+    def summary(self, window: Optional[float] = None) -> SandboxMetricsSummary:
+        """
+        Aggregates of all columns.
+
+        :param window: Only the samples from the last `window` **seconds** before the latest sample, all samples by default
+        """
+        cpu, mem, disk = (self.values(column, window) for column in METRICS_COLUMNS)
+        return SandboxMetricsSummary(
+            samples=len(cpu),
+            cpu_used_pct=_aggregate(cpu),
+            mem_used=_aggregate(mem),
+            disk_used=_aggregate(disk),
+        )
+
+
+def _aggregate(values: List[float]) -> MetricsAggregate:
+    return MetricsAggregate(
+        p50=percentile(values, 50),
+        p95=percentile(values, 95),
+        max=max(values, default=0.0),
+    )
+
+
+def metrics_batches(sandbox_ids: Sequence[str]) -> List[List[str]]:
+    """
+    Split the sandbox IDs into batches the metrics can be requested for at once.
+    """
+    unique = list(dict.fromkeys(sandbox_ids))
+    return [
+        unique[i : i + FLEET_METRICS_BATCH_SIZE]
+        for i in range(0, len(unique), FLEET_METRICS_BATCH_SIZE)
+    ]
+
+
+class MetricsCursor:
+    """
+    Timestamp of the latest seen sample, so overlapping polls yield each sample once.
+    """
+
+    def __init__(self):
+        self.last_seen: Optional[datetime] = None
+
+    def new(self, metrics: List[SandboxMetrics]) -> List[SandboxMetrics]:
+        """
+        Samples newer than the latest seen one, in chronological order.
+        """
+        new = []
+        for metric in sorted(metrics, key=lambda m: m.timestamp):
+            if self.last_seen is None or metric.timestamp > self.last_seen:
+                new.append(metric)
+                self.last_seen = metric.timestamp
+        return new
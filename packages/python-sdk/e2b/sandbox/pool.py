@@ -0,0 +1,214 @@
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Generic, List, Optional, Tuple, TypeVar
+
+S = TypeVar("S")
+
+DEFAULT_POOL_SIZE = 2
+"""
+Default number of warm sandboxes kept for each template, metadata and environment variables combination.
+"""
+
+DEFAULT_POOL_SANDBOX_TIMEOUT = 300
+"""
+Default timeout in **seconds** of the warm sandboxes waiting in the pool, it's extended for as long as they wait.
+"""
+
+DEFAULT_HEALTH_CHECK_INTERVAL = 10.0
+"""
+Default interval in **seconds** in which the warm sandboxes are checked, have their timeout extended and the pool is refilled.
+"""
+
+MAX_REFILL_BACKOFF = 300.0
+"""
+Maximum delay in **seconds** before the pool tries again to create sandboxes for a combination that keeps failing to start.
+"""
+
+LATENCY_WINDOW = 1000
+"""
+Number of the most recent checkouts the latency percentiles are computed from.
+"""
+
+PoolKey = Tuple[str, Tuple[Tuple[str, str], ...], Tuple[Tuple[str, str], ...]]
+
+
+def pool_key(
+    template: str,
+    metadata: Optional[Dict[str, str]],
+    envs: Optional[Dict[str, str]],
+) -> PoolKey:
+    """
+    Key of the sandboxes that are interchangeable, the dictionaries are compared regardless of their order.
+    """
+    return (
+        template,
+        tuple(sorted((metadata or {}).items())),
+        tuple(sorted((envs or {}).items())),
+    )
+
+
+@dataclass
+class SandboxPoolStats:
+    """
+    Counters and checkout latencies of a sandbox pool.
+    """
+
+    idle: int = 0
+    """
+    Number of warm sandboxes waiting in the pool.
+    """
+    checkouts: int = 0
+    """
+    Number of sandboxes checked out of the pool.
+    """
+    hits: int = 0
+    """
+    Number of checkouts served by a warm sandbox.
+    """
+    misses: int = 0
+    """
+    Number of checkouts that had to create a new sandbox.
+    """
+    evictions: int = 0
+    """
+    Number of warm sandboxes dropped because they stopped running or couldn't be extended.
+    """
+    errors: int = 0
+    """
+    Number of failed attempts to create a warm sandbox.
+    """
+    latency_p50: float = 0.0
+    """
+    Median checkout latency in **seconds**.
+    """
+    latency_p95: float = 0.0
+    """
+    95th percentile of the checkout latency in **seconds**.
+    """
+    latency_max: float = 0.0
+    """
+    Maximum checkout latency in **seconds**.
+    """
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of the values, `0.0` if there are none.
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters of a sandbox pool with a rolling window of checkout latencies.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._stats = SandboxPoolStats()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def checkout(self, latency: float, warm: bool):
+        with self._lock:
+            self._stats.checkouts += 1
+            if warm:
+                self._stats.hits += 1
+            else:
+                self._stats.misses += 1
+            self._latencies.append(latency)
+            self._stats.latency_max = max(self._stats.latency_max, latency)
+
+    def eviction(self):
+        with self._lock:
+            self._stats.evictions += 1
+
+    def error(self):
+        with self._lock:
+            self._stats.errors += 1
+
+    def snapshot(self, idle: int) -> SandboxPoolStats:
+        with self._lock:
+            latencies = list(self._latencies)
+            stats = self._stats
+
+            return SandboxPoolStats(
+                idle=idle,
+                checkouts=stats.checkouts,
+                hits=stats.hits,
+                misses=stats.misses,
+                evictions=stats.evictions,
+                errors=stats.errors,
+                latency_p50=percentile(latencies, 50),
+                latency_p95=percentile(latencies, 95),
+                latency_max=stats.latency_max,
+            )
+
+
+@dataclass(eq=False)
+class PooledSandbox(Generic[S]):
+    """
+    Warm sandbox waiting in the pool, with the monotonic times of its expiration and last health check.
+    """
+
+    sandbox: S
+    expires_at: float
+    checked_at: float
+    lease_timeout: Optional[int] = None
+    """
+    Timeout in **seconds** the sandbox was checked out with, `None` while it waits in the pool.
+    """
+
+    def needs_check(self, now: float, interval: float) -> bool:
+        return now - self.checked_at >= interval
+
+    def needs_extension(self, now: float, timeout: int) -> bool:
+        """
+        Whether less than half of the timeout is left, so it wouldn't survive much longer than the next check.
+        """
+        return self.expires_at - now <= timeout / 2
+
+
+@dataclass(eq=False)
+class PoolBucket(Generic[S]):
+    """
+    Warm sandboxes of one template, metadata and environment variables combination.
+    """
+
+    template: str
+    metadata: Optional[Dict[str, str]]
+    envs: Optional[Dict[str, str]]
+    idle: Deque[PooledSandbox[S]] = field(default_factory=deque)
+    pending: int = 0
+    """
+    Number of sandboxes being created for the bucket.
+    """
+    failures: int = 0
+    """
+    Number of sandboxes that failed to start since the last one that started.
+    """
+    retry_at: float = 0.0
+    """
+    Monotonic time before which no sandboxes are created for the bucket in the background after a failure.
+    """
+
+    def missing(self, size: int) -> int:
+        return max(size - len(self.idle) - self.pending, 0)
+
+    def failed(self, now: float, interval: float):
+        """
+        Delay creating sandboxes in the background, twice as long after each consecutive failure.
+        """
+        self.failures += 1
+        self.retry_at = now + min(
+            interval * 2 ** (self.failures - 1), MAX_REFILL_BACKOFF
+        )
+
+    def started(self):
+        self.failures = 0
+        self.retry_at = 0.0
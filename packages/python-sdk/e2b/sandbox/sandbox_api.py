@@ -1,13 +1,24 @@
+import urllib.parse
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, TypedDict, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TypedDict, Union
 
 from typing_extensions import NotRequired, Unpack
 
 from e2b import ConnectionConfig
-from e2b.api.client.models import ListedSandbox, SandboxDetail, SandboxState
+from e2b.api.client.models import (
+    ListedSandbox,
+    SandboxDetail,
+    SandboxMetric,
+    SandboxState,
+)
+from e2b.api.client.types import UNSET
 from e2b.connection_config import ApiParams
-from e2b.sandbox.mcp import McpServer as BaseMcpServer
+from e2b.exceptions import InvalidArgumentException
+
+if TYPE_CHECKING:
+    # The MCP server types are large, they are only needed for type checking
+    from e2b.sandbox.mcp import McpServer as BaseMcpServer
 
 
 class GitHubMcpServerConfig(TypedDict):
@@ -35,7 +46,7 @@ class GitHubMcpServerConfig(TypedDict):
 GitHubMcpServer = Dict[str, Union[GitHubMcpServerConfig, Any]]
 
 # Union type that combines base MCP servers with GitHub-based servers
-McpServer = Union[BaseMcpServer, GitHubMcpServer]
+McpServer = Union["BaseMcpServer", GitHubMcpServer]
 
 
 class SandboxNetworkOpts(TypedDict):
@@ -178,6 +189,24 @@ class SandboxMetrics:
     timestamp: datetime
     """Timestamp of the metric entry."""
 
+    @classmethod
+    def _from_sandbox_metric(cls, metric: SandboxMetric):
+        return cls(
+            cpu_count=metric.cpu_count,
+            cpu_used_pct=metric.cpu_used_pct,
+            disk_total=metric.disk_total,
+            disk_used=metric.disk_used,
+            mem_total=metric.mem_total,
+            mem_used=metric.mem_used,
+            timestamp=metric.timestamp,
+        )
+
+
+DEFAULT_LIST_PREFETCH = 1
+"""
+Default number of pages fetched ahead while iterating over the sandbox list.
+"""
+
 
 class SandboxPaginatorBase:
     def __init__(
@@ -185,12 +214,17 @@ class SandboxPaginatorBase:
         query: Optional[SandboxQuery] = None,
         limit: Optional[int] = None,
         next_token: Optional[str] = None,
+        prefetch: int = DEFAULT_LIST_PREFETCH,
         **opts: Unpack[ApiParams],
     ):
+        if prefetch < 0:
+            raise InvalidArgumentException("Prefetch must not be negative")
+
         self._config = ConnectionConfig(**opts)
 
         self.query = query
         self.limit = limit
+        self.prefetch = prefetch
 
         self._has_next = True
         self._next_token = next_token
@@ -208,3 +242,23 @@ class SandboxPaginatorBase:
         Returns the next token to use for pagination.
         """
         return self._next_token
+
+    def _list_params(self) -> Dict[str, Any]:
+        """
+        Query parameters of the request for the next page.
+        """
+        # Convert filters to the format expected by the API
+        metadata: Optional[str] = None
+        if self.query and self.query.metadata:
+            quoted_metadata = {
+                urllib.parse.quote(k): urllib.parse.quote(v)
+                for k, v in self.query.metadata.items()
+            }
+            metadata = urllib.parse.urlencode(quoted_metadata)
+
+        return dict(
+            metadata=metadata if metadata else UNSET,
+            state=self.query.state if self.query and self.query.state else UNSET,
+            limit=self.limit if self.limit else UNSET,
+            next_token=self._next_token if self._next_token else UNSET,
+        )
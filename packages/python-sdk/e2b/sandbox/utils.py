@@ -1,9 +1,19 @@
 from typing import TypeVar, Any, cast, Optional, Type
 import functools
 
+from e2b.exceptions import InvalidArgumentException
+
 T = TypeVar("T")
 
 
+def check_concurrency(concurrency: int):
+    """
+    Check the maximum number of operations running at the same time is at least one.
+    """
+    if concurrency < 1:
+        raise InvalidArgumentException("concurrency should be at least 1")
+
+
 class class_method_variant(object):
     def __init__(self, class_method_name):
         self.class_method_name = class_method_name
@@ -10,7 +10,12 @@ from e2b.connection_config import (
     KEEPALIVE_PING_INTERVAL_SEC,
 )
 from e2b.envd.process import process_connect, process_pb2
-from e2b.envd.rpc import authentication_header, handle_rpc_exception
+from e2b.envd.rpc import (
+    authentication_header,
+    handle_rpc_exception,
+    rpc_retry_policy,
+    use_json_codec,
+)
 from e2b.envd.versions import ENVD_COMMANDS_STDIN
 from e2b.exceptions import SandboxException
 from e2b.sandbox.commands.main import ProcessInfo
@@ -38,8 +43,9 @@ class Commands:
             # TODO: Fix and enable compression again — the headers compression is not solved for streaming.
             # compressor=e2b_connect.GzipCompressor,
             async_pool=pool,
-            json=True,
+            json=use_json_codec(envd_version),
             headers=connection_config.sandbox_headers,
+            retry_policy=rpc_retry_policy(connection_config),
         )
 
     async def list(
@@ -146,6 +152,9 @@ class Commands:
         stdin: Optional[bool] = None,
         timeout: Optional[float] = 60,
         request_timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ) -> CommandResult:
         """
         Start a new command and wait until it finishes executing.
@@ -160,6 +169,9 @@ class Commands:
         :param stdin: If `True`, the command will have a stdin stream that you can send data to using `sandbox.commands.send_stdin()`
         :param timeout: Timeout for the command connection in **seconds**. Using `0` will not limit the command connection time
         :param request_timeout: Timeout for the request in **seconds**
+        :param max_output_size: Maximum number of characters kept in memory for each of stdout and stderr, older output is dropped once it's reached
+        :param spill_output: If `True`, the whole output is also written to temporary files available as `stdout_file` and `stderr_file`
+        :param raw: If `True`, the output is passed and returned as bytes instead of being decoded as UTF-8, `max_output_size` is then in bytes
 
         :return: `CommandResult` result of the command execution
         """
@@ -178,6 +190,9 @@ class Commands:
         stdin: Optional[bool] = None,
         timeout: Optional[float] = 60,
         request_timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ) -> AsyncCommandHandle:
         """
         Start a new command and return a handle to interact with it.
@@ -192,6 +207,9 @@ class Commands:
         :param stdin: If `True`, the command will have a stdin stream that you can send data to using `sandbox.commands.send_stdin()`
         :param timeout: Timeout for the command connection in **seconds**. Using `0` will not limit the command connection time
         :param request_timeout: Timeout for the request in **seconds**
+        :param max_output_size: Maximum number of characters kept in memory for each of stdout and stderr, older output is dropped once it's reached
+        :param spill_output: If `True`, the whole output is also written to temporary files available as `stdout_file` and `stderr_file`
+        :param raw: If `True`, the output is passed and returned as bytes instead of being decoded as UTF-8, `max_output_size` is then in bytes
 
         :return: `AsyncCommandHandle` handle to interact with the running command
         """
@@ -209,6 +227,9 @@ class Commands:
         stdin: Optional[bool] = None,
         timeout: Optional[float] = 60,
         request_timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ):
         # Check version for stdin support
         if stdin is False and self._envd_version < ENVD_COMMANDS_STDIN:
@@ -230,6 +251,9 @@ class Commands:
             stdin,
             on_stdout=on_stdout,
             on_stderr=on_stderr,
+            max_output_size=max_output_size,
+            spill_output=spill_output,
+            raw=raw,
         )
 
         return proc if background else await proc.wait()
@@ -245,6 +269,9 @@ class Commands:
         stdin: bool,
         on_stdout: Optional[OutputHandler[Stdout]],
         on_stderr: Optional[OutputHandler[Stderr]],
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ) -> AsyncCommandHandle:
         events = self._rpc.astart(
             process_pb2.StartRequest(
@@ -280,6 +307,9 @@ class Commands:
                 events=events,
                 on_stdout=on_stdout,
                 on_stderr=on_stderr,
+                max_output_size=max_output_size,
+                spill_output=spill_output,
+                raw=raw,
             )
         except Exception as e:
             raise handle_rpc_exception(e)
@@ -291,6 +321,9 @@ class Commands:
         request_timeout: Optional[float] = None,
         on_stdout: Optional[OutputHandler[Stdout]] = None,
         on_stderr: Optional[OutputHandler[Stderr]] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ) -> AsyncCommandHandle:
         """
         Connects to a running command.
@@ -301,6 +334,9 @@ class Commands:
         :param timeout: Timeout for the command connection in **seconds**. Using `0` will not limit the command connection time
         :param on_stdout: Callback for command stdout output
         :param on_stderr: Callback for command stderr output
+        :param max_output_size: Maximum number of characters kept in memory for each of stdout and stderr, older output is dropped once it's reached
+        :param spill_output: If `True`, the whole output is also written to temporary files available as `stdout_file` and `stderr_file`
+        :param raw: If `True`, the output is passed and returned as bytes instead of being decoded as UTF-8, `max_output_size` is then in bytes
 
         :return: `AsyncCommandHandle` handle to interact with the running command
         """
@@ -331,6 +367,9 @@ class Commands:
                 events=events,
                 on_stdout=on_stdout,
                 on_stderr=on_stderr,
+                max_output_size=max_output_size,
+                spill_output=spill_output,
+                raw=raw,
             )
         except Exception as e:
             raise handle_rpc_exception(e)
@@ -1,10 +1,12 @@
 import asyncio
 import inspect
 from typing import (
+    IO,
     Optional,
     Callable,
     Any,
     AsyncGenerator,
+    AsyncIterator,
     Union,
     Tuple,
     Coroutine,
@@ -12,12 +14,18 @@ from typing import (
 
 from e2b.envd.rpc import handle_rpc_exception
 from e2b.envd.process import process_pb2
+from e2b.exceptions import InvalidArgumentException, SandboxException
 from e2b.sandbox.commands.command_handle import (
+    DEFAULT_EVENT_QUEUE_SIZE,
+    CommandEvent,
     CommandExitException,
     CommandResult,
+    OutputBuffer,
+    OutputDecoder,
     Stderr,
     Stdout,
     PtyOutput,
+    PtyOverflow,
 )
 from e2b.sandbox_async.utils import OutputHandler
 
@@ -39,25 +47,39 @@ class AsyncCommandHandle:
     @property
     def stdout(self):
         """
-        Command stdout output.
+        Command stdout output. Bytes if the command was started with `raw=True`.
         """
-        return self._stdout
+        return self._stdout.value
 
     @property
     def stderr(self):
         """
-        Command stderr output.
+        Command stderr output. Bytes if the command was started with `raw=True`.
         """
-        return self._stderr
+        return self._stderr.value
+
+    @property
+    def stdout_file(self) -> Optional[IO[bytes]]:
+        """
+        Temporary file with the whole stdout output received so far, set only if the command was started with `spill_output=True`.
+        """
+        return self._stdout.file
+
+    @property
+    def stderr_file(self) -> Optional[IO[bytes]]:
+        """
+        Temporary file with the whole stderr output received so far, set only if the command was started with `spill_output=True`.
+        """
+        return self._stderr.file
 
     @property
     def error(self):
         """
         Command execution error message.
         """
-        if self._result is None:
+        if self._end is None:
             return None
-        return self._result.error
+        return self._end.error
 
     @property
     def exit_code(self):
@@ -68,9 +90,9 @@ class AsyncCommandHandle:
 
         It is `None` if the command is still running.
         """
-        if self._result is None:
+        if self._end is None:
             return None
-        return self._result.exit_code
+        return self._end.exit_code
 
     def __init__(
         self,
@@ -82,23 +104,127 @@ class AsyncCommandHandle:
         on_stdout: Optional[OutputHandler[Stdout]] = None,
         on_stderr: Optional[OutputHandler[Stderr]] = None,
         on_pty: Optional[OutputHandler[PtyOutput]] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ):
         self._pid = pid
         self._handle_kill = handle_kill
         self._events = events
 
-        self._stdout: str = ""
-        self._stderr: str = ""
+        self._stdout = OutputBuffer(max_output_size, spill_output, raw)
+        self._stderr = OutputBuffer(max_output_size, spill_output, raw)
+        self._stdout_decoder = OutputDecoder(raw)
+        self._stderr_decoder = OutputDecoder(raw)
 
         self._on_stdout = on_stdout
         self._on_stderr = on_stderr
         self._on_pty = on_pty
 
-        self._result: Optional[CommandResult] = None
+        self._end: Optional[process_pb2.ProcessEvent.EndEvent] = None
         self._iteration_exception: Optional[Exception] = None
 
+        self._queue: Optional["asyncio.Queue[Optional[CommandEvent]]"] = None
+        self._pty_overflow: PtyOverflow = "block"
+        self._coalesced = bytearray()
+        self._events_done = False
+
         self._wait = asyncio.create_task(self._handle_events())
 
+    def __aiter__(self) -> AsyncIterator[CommandEvent]:
+        """
+        Iterate over the command events with the default queue size, blocking on pty output as well.
+
+        :return: Async iterator of the command events
+        """
+        return self.events()
+
+    def events(
+        self,
+        queue_size: int = DEFAULT_EVENT_QUEUE_SIZE,
+        pty_overflow: PtyOverflow = "block",
+    ) -> AsyncIterator[CommandEvent]:
+        """
+        Iterate over the stdout, stderr and pty output of the command, followed by an `end` event once it exits.
+
+        The events are buffered in a queue of `queue_size` events. When the consumer falls behind and the queue is full,
+        the command output stops being read from the sandbox until the consumer catches up.
+        For pty output this can be changed with `pty_overflow`.
+        The output callbacks are still called and the output is still accumulated in `stdout` and `stderr`.
+
+        Only the events received after the iteration starts are yielded and only one iteration can run at a time.
+        Breaking out of the iteration stops buffering the events.
+
+        :param queue_size: Maximum number of events buffered for the consumer
+        :param pty_overflow: What happens to the pty output that doesn't fit into the queue, `block`, `drop` or `coalesce`
+
+        :return: Async iterator of the command events
+        """
+        if queue_size < 1:
+            raise InvalidArgumentException("Queue size must be at least 1")
+        if pty_overflow not in ("block", "drop", "coalesce"):
+            raise InvalidArgumentException(
+                f"Unknown pty overflow policy '{pty_overflow}', use 'block', 'drop' or 'coalesce'"
+            )
+        if self._queue is not None:
+            raise SandboxException("The command events are already being iterated")
+
+        self._queue = asyncio.Queue(queue_size)
+        self._pty_overflow = pty_overflow
+        if self._wait.done() and self._end is not None:
+            self._queue.put_nowait(self._end_event())
+
+        return self._iterate_queue(self._queue)
+
+    async def _iterate_queue(
+        self, queue: "asyncio.Queue[Optional[CommandEvent]]"
+    ) -> AsyncIterator[CommandEvent]:
+        try:
+            while True:
+                if queue.empty():
+                    if self._coalesced:
+                        data = bytes(self._coalesced)
+                        self._coalesced.clear()
+                        yield CommandEvent("pty", data)
+                        continue
+                    if self._events_done:
+                        break
+
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            # Unblock the output reading if the consumer stopped early
+            self._queue = None
+            self._coalesced.clear()
+            while not queue.empty():
+                queue.get_nowait()
+
+        if self._iteration_exception:
+            raise self._iteration_exception
+
+    async def _publish(self, event: CommandEvent):
+        queue = self._queue
+        if queue is None:
+            return
+
+        if event.type == "pty" and self._pty_overflow != "block":
+            if self._coalesced or queue.full():
+                if self._pty_overflow == "coalesce":
+                    self._coalesced += event.data
+                return
+        elif self._coalesced:
+            # Keep the order, the coalesced pty output was received before the event
+            data = bytes(self._coalesced)
+            self._coalesced.clear()
+            await queue.put(CommandEvent("pty", data))
+
+        await queue.put(event)
+
+    def _end_event(self) -> CommandEvent:
+        return CommandEvent("end", exit_code=self._end.exit_code, error=self._end.error)
+
     async def _iterate_events(
         self,
     ) -> AsyncGenerator[
@@ -112,22 +238,27 @@ class AsyncCommandHandle:
         async for event in self._events:
             if event.event.HasField("data"):
                 if event.event.data.stdout:
-                    out = event.event.data.stdout.decode("utf-8", "replace")
-                    self._stdout += out
-                    yield out, None, None
+                    out = self._stdout_decoder.decode(event.event.data.stdout)
+                    if out:
+                        self._stdout.append(out)
+                        yield out, None, None
                 if event.event.data.stderr:
-                    out = event.event.data.stderr.decode("utf-8", "replace")
-                    self._stderr += out
-                    yield None, out, None
+                    out = self._stderr_decoder.decode(event.event.data.stderr)
+                    if out:
+                        self._stderr.append(out)
+                        yield None, out, None
                 if event.event.data.pty:
                     yield None, None, event.event.data.pty
             if event.event.HasField("end"):
-                self._result = CommandResult(
-                    stdout=self._stdout,
-                    stderr=self._stderr,
-                    exit_code=event.event.end.exit_code,
-                    error=event.event.end.error,
-                )
+                out = self._stdout_decoder.flush()
+                if out:
+                    self._stdout.append(out)
+                    yield out, None, None
+                out = self._stderr_decoder.flush()
+                if out:
+                    self._stderr.append(out)
+                    yield None, out, None
+                self._end = event.event.end
 
     async def disconnect(self) -> None:
         """
@@ -155,10 +286,27 @@ class AsyncCommandHandle:
                     cb = self._on_pty(pty)
                     if inspect.isawaitable(cb):
                         await cb
+
+                if self._queue is not None:
+                    if stdout is not None:
+                        await self._publish(CommandEvent("stdout", stdout))
+                    elif stderr is not None:
+                        await self._publish(CommandEvent("stderr", stderr))
+                    elif pty is not None:
+                        await self._publish(CommandEvent("pty", pty))
+
+            if self._end is not None:
+                await self._publish(self._end_event())
         except StopAsyncIteration:
             pass
         except Exception as e:
             self._iteration_exception = handle_rpc_exception(e)
+        finally:
+            self._events_done = True
+            # Wake up a waiting consumer, a full queue or coalesced output are drained first anyway
+            queue = self._queue
+            if queue is not None and not queue.full() and not self._coalesced:
+                queue.put_nowait(None)
 
     async def wait(self) -> CommandResult:
         """
@@ -171,18 +319,27 @@ class AsyncCommandHandle:
         if self._iteration_exception:
             raise self._iteration_exception
 
-        if self._result is None:
+        if self._end is None:
             raise Exception("Command ended without an end event")
 
-        if self._result.exit_code != 0:
+        if self._end.exit_code != 0:
             raise CommandExitException(
-                stdout=self._stdout,
-                stderr=self._stderr,
-                exit_code=self._result.exit_code,
-                error=self._result.error,
+                stdout=self.stdout,
+                stderr=self.stderr,
+                exit_code=self._end.exit_code,
+                error=self._end.error,
+                stdout_file=self._stdout.file,
+                stderr_file=self._stderr.file,
             )
 
-        return self._result
+        return CommandResult(
+            stdout=self.stdout,
+            stderr=self.stderr,
+            exit_code=self._end.exit_code,
+            error=self._end.error,
+            stdout_file=self._stdout.file,
+            stderr_file=self._stderr.file,
+        )
 
     async def kill(self) -> bool:
         """
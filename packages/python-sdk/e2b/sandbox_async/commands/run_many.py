@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from e2b.sandbox.commands.command_handle import CommandExitException
+from e2b.sandbox.commands.run_many import (
+    RUN_MANY_OUTPUT_QUEUE_SIZE,
+    CommandBatchResult,
+    CommandOutput,
+    RunManyIteration,
+    cancelled,
+    iterated,
+    timed_out,
+)
+from e2b.sandbox.utils import check_concurrency
+from e2b.sandbox_async.commands.command_handle import AsyncCommandHandle
+
+if TYPE_CHECKING:
+    from e2b.sandbox_async.main import AsyncSandbox
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCommandGroup:
+    """
+    Commands started by `AsyncSandbox.run_many`.
+
+    Iterating over the group yields the output of all commands as it arrives, tagged with the sandbox and the process ID.
+    The iteration ends when all commands have finished, it can be done only once.
+    Output not consumed by iterating is still kept in the results.
+
+    Up to `RUN_MANY_OUTPUT_QUEUE_SIZE` output chunks are buffered until the iteration starts, the later ones are not yielded.
+    While iterating, the output of the commands stops being read when the consumer falls behind, until it catches up.
+    Breaking out of the iteration stops buffering the output.
+
+    Example
+    ```python
+    async with await AsyncSandbox.run_many([(sbx, "make test") for sbx in sandboxes]) as group:
+        async for output in group:
+            print(output.sandbox_id, output.data, end="")
+
+        results = await group.wait()
+    ```
+    """
+
+    def __init__(
+        self,
+        commands: Sequence[Tuple["AsyncSandbox", str]],
+        concurrency: int,
+        timeout: Optional[float],
+        **run_opts,
+    ):
+        check_concurrency(concurrency)
+
+        self._commands = list(commands)
+        self._timeout = timeout
+        self._run_opts = run_opts
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._handles: Dict[int, AsyncCommandHandle] = {}
+        self._queue: "asyncio.Queue[Optional[CommandOutput]]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(RUN_MANY_OUTPUT_QUEUE_SIZE)
+        self._iteration: RunManyIteration = "pending"
+        self._cancelled = False
+
+        self._tasks = [
+            asyncio.create_task(self._run(index, sandbox, cmd))
+            for index, (sandbox, cmd) in enumerate(self._commands)
+        ]
+        self._done = asyncio.create_task(self._close_output())
+
+    def __aiter__(self) -> AsyncIterator[CommandOutput]:
+        return self._iterate_output()
+
+    async def _iterate_output(self) -> AsyncIterator[CommandOutput]:
+        if self._iteration != "pending":
+            raise iterated()
+        self._iteration = "running"
+
+        try:
+            while True:
+                output = await self._queue.get()
+                if output is None:
+                    return
+                self._slots.release()
+                yield output
+        finally:
+            # Unblock the commands if the consumer stopped early
+            self._iteration = "done"
+            while not self._queue.empty():
+                if self._queue.get_nowait() is not None:
+                    self._slots.release()
+
+    async def wait(self) -> List[CommandBatchResult]:
+        """
+        Wait for all commands to finish.
+        Cancelling the wait cancels the commands as well.
+
+        :return: Result for each command in the order of the commands, failed commands have the error set instead of raising it
+        """
+        try:
+            return list(await asyncio.gather(*self._tasks))
+        except asyncio.CancelledError:
+            await self.cancel()
+            raise
+
+    async def cancel(self) -> None:
+        """
+        Kill the running commands and don't start the ones still waiting for their turn.
+        """
+        self._cancelled = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.cancel()
+
+    async def _run(
+        self, index: int, sandbox: "AsyncSandbox", cmd: str
+    ) -> CommandBatchResult:
+        result = CommandBatchResult(sandbox.sandbox_id)
+        handle: Optional[AsyncCommandHandle] = None
+        starting: Optional[asyncio.Future] = None
+        # The output can arrive before the handle is returned, it waits for the process ID
+        pid: "asyncio.Future[int]" = asyncio.get_running_loop().create_future()
+        try:
+            async with self._semaphore:
+                if self._cancelled:
+                    raise asyncio.CancelledError()
+
+                # The command is killed by the group after the timeout, so the stream itself has no deadline
+                starting = asyncio.ensure_future(
+                    sandbox.commands.run(
+                        cmd,
+                        background=True,
+                        on_stdout=lambda data: self._emit(index, pid, "stdout", data),
+                        on_stderr=lambda data: self._emit(index, pid, "stderr", data),
+                        timeout=0,
+                        **self._run_opts,
+                    )
+                )
+                # A command cancelled while starting still has to be killed once it's started
+                handle = await asyncio.shield(starting)
+                self._handles[index] = handle
+                result.pid = handle.pid
+                pid.set_result(handle.pid)
+
+                result.value = await asyncio.wait_for(
+                    handle.wait(), self._timeout or None
+                )
+        except CommandExitException as e:
+            result.error = e
+        except asyncio.TimeoutError:
+            result.error = timed_out(self._timeout)
+            await self._kill(handle)
+        except asyncio.CancelledError:
+            result.error = cancelled()
+            if handle is None and starting is not None:
+                handle = await self._started(starting)
+            if handle is not None:
+                result.pid = handle.pid
+                if not pid.done():
+                    pid.set_result(handle.pid)
+                await self._kill(handle)
+        except Exception as e:
+            result.error = e
+        finally:
+            self._handles.pop(index, None)
+
+        return result
+
+    async def _emit(
+        self,
+        index: int,
+        pid: "asyncio.Future[int]",
+        stream: Literal["stdout", "stderr"],
+        data: str,
+    ):
+        process_id = await pid
+        if self._iteration == "done":
+            return
+        # Before the iteration starts the output is buffered only while there's room
+        if self._iteration == "pending" and self._slots.locked():
+            return
+        await self._slots.acquire()
+        if self._iteration == "done":
+            self._slots.release()
+            return
+
+        self._queue.put_nowait(
+            CommandOutput(
+                index=index,
+                sandbox_id=self._commands[index][0].sandbox_id,
+                pid=process_id,
+                stream=stream,
+                data=data,
+            )
+        )
+
+    async def _close_output(self):
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+        self._queue.put_nowait(None)
+
+    @staticmethod
+    async def _started(
+        starting: "asyncio.Future[AsyncCommandHandle]",
+    ) -> Optional[AsyncCommandHandle]:
+        try:
+            return await starting
+        except Exception:
+            return None
+
+    @staticmethod
+    async def _kill(handle: AsyncCommandHandle):
+        try:
+            await handle.kill()
+        except Exception as e:
+            logger.debug(f"Failed to kill command {handle.pid}: {e}")
@@ -1,9 +1,69 @@
+import asyncio
+import hashlib
+import os
+import posixpath
+import shlex
+import tempfile
+
 import httpcore
 import httpx
-from io import IOBase
 from packaging.version import Version
-from typing import AsyncIterator, IO, List, Literal, Optional, overload, Union
-from e2b.sandbox.filesystem.filesystem import WriteEntry
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    TypeVar,
+    overload,
+)
+from e2b.sandbox.filesystem.batch import (
+    DEFAULT_BATCH_CONCURRENCY,
+    BatchResult,
+    exists_result,
+    group_by_parent,
+    not_found,
+)
+from e2b.sandbox.filesystem.chunked import (
+    CHUNK_RETRIES,
+    FileRange,
+    assemble_command,
+    chunk_dir,
+    chunk_hashes_command,
+    chunk_name,
+    hash_file_range,
+    parse_chunk_hashes,
+    parse_range_hashes,
+    plan_chunks,
+    range_hashes_command,
+)
+from e2b.sandbox.utils import check_concurrency
+from e2b.sandbox.filesystem.filesystem import WriteData, WriteEntry
+from e2b.sandbox.filesystem.sync import (
+    MAX_SYNC_DEPTH,
+    SyncResult,
+    diff_trees,
+    extract_tar,
+    file_list,
+    hashes_command,
+    local_hashes,
+    local_tree,
+    pack_command,
+    parse_hashes,
+    remote_tree,
+    tar_stream,
+    temporary_path,
+    unpack_command,
+)
+from e2b.sandbox.filesystem.list_cache import (
+    DEFAULT_LIST_CACHE_TTL,
+    ListCache,
+    ListCacheStats,
+)
+from e2b.sandbox.filesystem.multipart import MultipartEncoder
 import e2b_connect as connect
 from e2b.connection_config import (
     ConnectionConfig,
@@ -12,20 +72,48 @@ from e2b.connection_config import (
     KEEPALIVE_PING_HEADER,
     KEEPALIVE_PING_INTERVAL_SEC,
 )
-from e2b.envd.api import ENVD_API_FILES_ROUTE, ahandle_envd_api_exception
+from e2b.envd.api import (
+    ENVD_API_FILES_ROUTE,
+    ahandle_envd_api_exception,
+    AsyncResponseBytes,
+)
 from e2b.envd.filesystem import filesystem_connect, filesystem_pb2
-from e2b.envd.rpc import authentication_header, handle_rpc_exception
+from e2b.envd.rpc import (
+    authentication_header,
+    handle_rpc_exception,
+    rpc_retry_policy,
+    use_json_codec,
+)
 from e2b.envd.versions import ENVD_VERSION_RECURSIVE_WATCH, ENVD_DEFAULT_USER
-from e2b.exceptions import SandboxException, TemplateException, InvalidArgumentException
+from e2b.exceptions import (
+    InvalidArgumentException,
+    NotFoundException,
+    SandboxException,
+    TemplateException,
+)
 from e2b.sandbox.filesystem.filesystem import (
     WriteInfo,
     EntryInfo,
     map_file_type,
 )
 from e2b.sandbox.filesystem.watch_handle import FilesystemEvent
+from e2b.sandbox_async.commands.command import Commands
 from e2b.sandbox_async.filesystem.watch_handle import AsyncWatchHandle
 from e2b.sandbox_async.utils import OutputHandler
 
+T = TypeVar("T")
+
+
+async def _in_thread(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Produce the chunks in a thread, so reading the files doesn't block the event loop.
+    """
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
 
 class Filesystem:
     """
@@ -39,20 +127,25 @@ class Filesystem:
         connection_config: ConnectionConfig,
         pool: httpcore.AsyncConnectionPool,
         envd_api: httpx.AsyncClient,
+        commands: Optional[Commands] = None,
     ) -> None:
         self._envd_api_url = envd_api_url
         self._envd_version = envd_version
         self._connection_config = connection_config
         self._pool = pool
         self._envd_api = envd_api
+        self._commands = commands
+        self._list_cache: Optional[ListCache] = None
+        self._list_cache_watchers: Dict[str, AsyncWatchHandle] = {}
 
         self._rpc = filesystem_connect.FilesystemClient(
             envd_api_url,
             # TODO: Fix and enable compression again — the headers compression is not solved for streaming.
             # compressor=e2b_connect.GzipCompressor,
             async_pool=pool,
-            json=True,
+            json=use_json_codec(envd_version),
             headers=connection_config.sandbox_headers,
+            retry_policy=rpc_retry_policy(connection_config),
         )
 
     @overload
@@ -105,6 +198,7 @@ class Filesystem:
     ) -> AsyncIterator[bytes]:
         """
         Read file content as a `AsyncIterator[bytes]`.
+        The content is streamed from the sandbox as it is consumed, the connection is released once the iterator is exhausted or closed.
 
         :param path: Path to the file
         :param user: Run the operation as this user
@@ -130,6 +224,9 @@ class Filesystem:
         if username:
             params["username"] = username
 
+        if format == "stream":
+            return await self._read_stream(params, request_timeout)
+
         r = await self._envd_api.get(
             ENVD_API_FILES_ROUTE,
             params=params,
@@ -144,13 +241,203 @@ class Filesystem:
             return r.text
         elif format == "bytes":
             return bytearray(r.content)
-        elif format == "stream":
-            return r.aiter_bytes()
+
+    async def _read_stream(
+        self,
+        params: dict,
+        request_timeout: Optional[float],
+    ) -> AsyncIterator[bytes]:
+        r = await self._envd_api.send(
+            self._envd_api.build_request(
+                "GET",
+                ENVD_API_FILES_ROUTE,
+                params=params,
+                timeout=self._connection_config.get_request_timeout(request_timeout),
+            ),
+            stream=True,
+        )
+
+        err = await ahandle_envd_api_exception(r)
+        if err:
+            await r.aclose()
+            raise err
+
+        return AsyncResponseBytes(r)
+
+    async def read_to_path(
+        self,
+        path: str,
+        local_path: str,
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        chunk_size: Optional[int] = None,
+        concurrency: int = 4,
+    ) -> int:
+        """
+        Download a file to the local filesystem.
+        The file content is written to disk as it arrives, so it is never held in memory as a whole.
+
+        With `chunk_size` set, the file is downloaded in byte ranges over parallel requests.
+        Each chunk is checked against its SHA-256 in the sandbox and
+        only the chunks that failed or don't match are downloaded again.
+
+        :param path: Path to the file in the sandbox
+        :param local_path: Path to the local file, it will be overwritten if it already exists
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for the request in **seconds**
+        :param chunk_size: Size of the chunks in **bytes**, the file is downloaded over a single request if not set
+        :param concurrency: Maximum number of chunks downloaded at the same time
+
+        :return: Number of bytes written
+        """
+        if chunk_size is not None:
+            return await self._read_chunked(
+                path, local_path, user, request_timeout, chunk_size, concurrency
+            )
+
+        # Opened before the request, so a local error doesn't leave the response open
+        f = await asyncio.to_thread(open, local_path, "wb")
+        written = 0
+        try:
+            stream = await self.read(
+                path, format="stream", user=user, request_timeout=request_timeout
+            )
+            try:
+                async for chunk in stream:
+                    await asyncio.to_thread(f.write, chunk)
+                    written += len(chunk)
+            finally:
+                await stream.aclose()
+        except BaseException:
+            await asyncio.to_thread(f.close)
+            os.remove(local_path)
+            raise
+
+        await asyncio.to_thread(f.close)
+
+        return written
+
+    async def _read_chunked(
+        self,
+        path: str,
+        local_path: str,
+        user: Optional[Username],
+        request_timeout: Optional[float],
+        chunk_size: int,
+        concurrency: int,
+    ) -> int:
+        check_concurrency(concurrency)
+        commands = self._require_commands("Chunked transfer")
+
+        size = (
+            await self.get_info(path, user=user, request_timeout=request_timeout)
+        ).size
+        chunks = plan_chunks(size, chunk_size)
+        result = await commands.run(
+            range_hashes_command(path, chunk_size, len(chunks)),
+            # Runs as long as the file takes to read, not limited by the command timeout
+            timeout=0,
+            user=user,
+            request_timeout=request_timeout,
+        )
+        expected = parse_range_hashes(result.stdout)
+        if len(expected) != len(chunks):
+            raise SandboxException(f"Failed to get hashes of the chunks of {path}")
+
+        username = user
+        if username is None and self._envd_version < ENVD_DEFAULT_USER:
+            username = default_username
+
+        params = {"path": path}
+        if username:
+            params["username"] = username
+
+        async def download(index: int) -> Optional[str]:
+            offset, length = chunks[index]
+            digest = hashlib.sha256()
+
+            try:
+                async with self._envd_api.stream(
+                    "GET",
+                    ENVD_API_FILES_ROUTE,
+                    params=params,
+                    headers={"Range": f"bytes={offset}-{offset + length - 1}"},
+                    timeout=self._connection_config.get_request_timeout(
+                        request_timeout
+                    ),
+                ) as r:
+                    err = await ahandle_envd_api_exception(r)
+                    if err:
+                        raise err
+
+                    f = await asyncio.to_thread(open, local_path, "r+b")
+                    try:
+                        f.seek(offset)
+                        async for data in r.aiter_bytes():
+                            await asyncio.to_thread(f.write, data)
+                            digest.update(data)
+                    finally:
+                        await asyncio.to_thread(f.close)
+            except httpx.TransportError:
+                # Chunks that failed in transit are retried
+                return None
+
+            return digest.hexdigest()
+
+        async def verify(pending: List[int], digests: List[Optional[str]]) -> List[int]:
+            return [i for i, d in zip(pending, digests) if d != expected[i]]
+
+        def create():
+            with open(local_path, "wb") as f:
+                f.truncate(size)
+
+        await asyncio.to_thread(create)
+
+        try:
+            await self._transfer_chunks(
+                path, list(range(len(chunks))), download, verify, concurrency
+            )
+        except BaseException:
+            os.remove(local_path)
+            raise
+
+        return size
+
+    async def _transfer_chunks(
+        self,
+        path: str,
+        pending: List[int],
+        transfer: Callable[[int], Awaitable[Optional[str]]],
+        verify: Callable[[List[int], List[Optional[str]]], Awaitable[List[int]]],
+        concurrency: int,
+    ):
+        """
+        Transfer the chunks in parallel, `verify` returns the chunks that failed or didn't match their hash,
+        only those are transferred again.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(index: int) -> Optional[str]:
+            async with semaphore:
+                return await transfer(index)
+
+        for _ in range(CHUNK_RETRIES + 1):
+            if not pending:
+                return
+
+            digests = await asyncio.gather(*(limited(i) for i in pending))
+            pending = await verify(pending, digests)
+
+        if pending:
+            raise SandboxException(
+                f"Failed to transfer {len(pending)} chunks of {path} "
+                f"after {CHUNK_RETRIES} retries"
+            )
 
     async def write(
         self,
         path: str,
-        data: Union[str, bytes, IO],
+        data: WriteData,
         user: Optional[Username] = None,
         request_timeout: Optional[float] = None,
     ) -> WriteInfo:
@@ -161,7 +448,7 @@ class Filesystem:
         Writing to a file at path that doesn't exist creates the necessary directories.
 
         :param path: Path to the file
-        :param data: Data to write to the file, can be a `str`, `bytes`, or `IO`.
+        :param data: Data to write to the file, can be a `str`, `bytes`, or `IO`, or an `AsyncIterable[bytes]`. File objects are uploaded in chunks, without reading them into memory.
         :param user: Run the operation as this user
         :param request_timeout: Timeout for the request in **seconds**
 
@@ -176,6 +463,228 @@ class Filesystem:
 
         return result[0]
 
+    async def write_from_path(
+        self,
+        path: str,
+        local_path: str,
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        chunk_size: Optional[int] = None,
+        concurrency: int = 4,
+    ) -> WriteInfo:
+        """
+        Upload a local file to the sandbox.
+        The file is read from disk as it is uploaded, so it is never held in memory as a whole.
+
+        With `chunk_size` set, the file is uploaded in chunks over parallel requests and assembled in the sandbox.
+        Each chunk is checked against its SHA-256,
+        only the chunks that failed or don't match are uploaded again.
+        Chunks left in the sandbox by an interrupted upload with the same `chunk_size` are reused.
+
+        :param path: Path to the file in the sandbox
+        :param local_path: Path to the local file
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for the request in **seconds**
+        :param chunk_size: Size of the chunks in **bytes**, the file is uploaded over a single request if not set
+        :param concurrency: Maximum number of chunks uploaded at the same time
+
+        :return: Information about the written file
+        """
+        if chunk_size is None:
+            with open(local_path, "rb") as f:
+                return await self.write(
+                    path, f, user=user, request_timeout=request_timeout
+                )
+
+        check_concurrency(concurrency)
+        commands = self._require_commands("Chunked transfer")
+
+        chunks = plan_chunks(os.path.getsize(local_path), chunk_size)
+        if not chunks:
+            # An empty file has no chunks to assemble
+            return await self.write(
+                path, b"", user=user, request_timeout=request_timeout
+            )
+        directory = chunk_dir(path, chunk_size)
+
+        expected = await asyncio.gather(
+            *(asyncio.to_thread(hash_file_range, local_path, *c) for c in chunks)
+        )
+
+        async def upload(index: int) -> Optional[str]:
+            with FileRange(local_path, *chunks[index]) as f:
+                try:
+                    await self.write(
+                        f"{directory}/{chunk_name(index)}",
+                        f,
+                        user=user,
+                        request_timeout=request_timeout,
+                    )
+                except httpx.TransportError:
+                    # Chunks that failed in transit are retried
+                    return None
+
+            return expected[index]
+
+        async def missing(*_) -> List[int]:
+            result = await commands.run(
+                chunk_hashes_command(directory),
+                timeout=0,
+                user=user,
+                request_timeout=request_timeout,
+            )
+            existing = parse_chunk_hashes(result.stdout)
+            return [
+                i
+                for i in range(len(chunks))
+                if existing.get(chunk_name(i)) != expected[i]
+            ]
+
+        # Chunks already in the sandbox from an interrupted upload aren't sent again
+        await self._transfer_chunks(path, await missing(), upload, missing, concurrency)
+
+        await commands.run(
+            assemble_command(directory, path, len(chunks)),
+            timeout=0,
+            user=user,
+            request_timeout=request_timeout,
+        )
+
+        info = await self.get_info(path, user=user, request_timeout=request_timeout)
+        return WriteInfo(name=info.name, type=info.type, path=info.path)
+
+    async def sync_dir(
+        self,
+        local_path: str,
+        remote_path: str,
+        direction: Literal["upload", "download"] = "upload",
+        checksum: bool = False,
+        depth: int = MAX_SYNC_DEPTH,
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+    ) -> SyncResult:
+        """
+        Sync a local directory with a directory in the sandbox, copying only the files that changed.
+
+        Both sides are listed and files are compared by size and modification time, or by SHA-256 with `checksum`.
+        Changed files are sent as one tar archive unpacked in a single command,
+        so the number of requests doesn't grow with the number of files.
+        Files missing in the source directory are not deleted from the target and symlinks are skipped.
+
+        :param local_path: Path to the local directory
+        :param remote_path: Path to the directory in the sandbox
+        :param direction: `upload` copies the local changes to the sandbox, `download` copies the sandbox changes to the local directory
+        :param checksum: Compare files of the same size by their SHA-256 instead of the modification time
+        :param depth: Depth of the directories to sync
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for the request in **seconds**
+
+        :return: Paths of the copied files and number of unchanged files
+        """
+        if direction not in ("upload", "download"):
+            raise InvalidArgumentException("direction should be 'upload' or 'download'")
+
+        commands = self._require_commands("Directory sync")
+
+        local = await asyncio.to_thread(local_tree, local_path)
+        try:
+            info = await self.get_info(
+                remote_path, user=user, request_timeout=request_timeout
+            )
+            root = info.path
+            entries = await self.list(
+                root, depth=depth, user=user, request_timeout=request_timeout
+            )
+            remote = remote_tree(entries, root)
+        except NotFoundException:
+            root, remote = remote_path, {}
+
+        source, target = (local, remote) if direction == "upload" else (remote, local)
+        changed, check = diff_trees(source, target, checksum)
+
+        if check:
+            list_path = temporary_path("list")
+            await self.write(
+                list_path, file_list(check), user=user, request_timeout=request_timeout
+            )
+            result = await commands.run(
+                hashes_command(root, list_path),
+                timeout=0,
+                user=user,
+                request_timeout=request_timeout,
+            )
+            remote_hashes = parse_hashes(result.stdout)
+            hashes = await asyncio.to_thread(local_hashes, local_path, check, local)
+            changed = sorted(
+                changed + [n for n in check if remote_hashes.get(n) != hashes[n]]
+            )
+
+        if changed:
+            archive = temporary_path("tar")
+
+            if direction == "upload":
+                await self.write(
+                    archive,
+                    _in_thread(tar_stream(local_path, changed, local)),
+                    user=user,
+                    request_timeout=request_timeout,
+                )
+                await commands.run(
+                    unpack_command(archive, root),
+                    timeout=0,
+                    user=user,
+                    request_timeout=request_timeout,
+                )
+            else:
+                await self._download_archive(
+                    root, archive, changed, local_path, user, request_timeout
+                )
+
+        return SyncResult(transferred=changed, unchanged=len(source) - len(changed))
+
+    async def _download_archive(
+        self,
+        root: str,
+        archive: str,
+        names: List[str],
+        local_path: str,
+        user: Optional[Username],
+        request_timeout: Optional[float],
+    ):
+        commands = self._require_commands("Directory sync")
+
+        list_path = temporary_path("list")
+        await self.write(
+            list_path, file_list(names), user=user, request_timeout=request_timeout
+        )
+
+        try:
+            await commands.run(
+                pack_command(root, list_path, archive),
+                timeout=0,
+                user=user,
+                request_timeout=request_timeout,
+            )
+
+            with tempfile.TemporaryDirectory() as tmp:
+                local_archive = os.path.join(tmp, "sync.tar")
+                await self.read_to_path(
+                    archive, local_archive, user=user, request_timeout=request_timeout
+                )
+                await asyncio.to_thread(extract_tar, local_archive, local_path)
+        finally:
+            await commands.run(
+                f"rm -f {shlex.quote(archive)}",
+                user=user,
+                request_timeout=request_timeout,
+            )
+
+    def _require_commands(self, feature: str) -> "Commands":
+        if self._commands is None:
+            raise SandboxException(f"{feature} needs to run commands in the sandbox")
+
+        return self._commands
+
     async def write_files(
         self,
         files: List[WriteEntry],
@@ -205,29 +714,21 @@ class Filesystem:
         if len(files) == 1:
             params["path"] = files[0]["path"]
 
-        # Prepare the files for the multipart/form-data request
-        httpx_files = []
-        for file in files:
-            file_path, file_data = file["path"], file["data"]
-            if isinstance(file_data, str) or isinstance(file_data, bytes):
-                httpx_files.append(("file", (file_path, file_data)))
-            elif isinstance(file_data, IOBase):
-                httpx_files.append(("file", (file_path, file_data.read())))
-            else:
-                raise InvalidArgumentException(
-                    f"Unsupported data type for file {file_path}"
-                )
-
         # Allow passing empty list of files
-        if len(httpx_files) == 0:
+        if len(files) == 0:
             return []
 
+        # The multipart/form-data body is streamed, file objects are read chunk by chunk while uploading
+        encoder = MultipartEncoder([(file["path"], file["data"]) for file in files])
+
         r = await self._envd_api.post(
             ENVD_API_FILES_ROUTE,
-            files=httpx_files,
+            content=encoder.aiter(),
+            headers=encoder.headers,
             params=params,
             timeout=self._connection_config.get_request_timeout(request_timeout),
         )
+        self._invalidate_list_cache(*(file["path"] for file in files))
 
         err = await ahandle_envd_api_exception(r)
         if err:
@@ -260,6 +761,13 @@ class Filesystem:
         if depth is not None and depth < 1:
             raise InvalidArgumentException("depth should be at least 1")
 
+        cache = self._list_cache
+        if cache is not None:
+            cached = self._cached_list(cache, path, depth, user)
+            if cached is not None:
+                return cached
+            generation = cache.generation
+
         try:
             res = await self._rpc.alist_dir(
                 filesystem_pb2.ListDirRequest(path=path, depth=depth),
@@ -294,6 +802,9 @@ class Filesystem:
                         )
                     )
 
+            if cache is not None:
+                cache.put(path, depth, user, entries, generation)
+
             return entries
         except Exception as e:
             raise handle_rpc_exception(e)
@@ -396,6 +907,8 @@ class Filesystem:
             )
         except Exception as e:
             raise handle_rpc_exception(e)
+        finally:
+            self._invalidate_list_cache(path)
 
     async def rename(
         self,
@@ -445,6 +958,8 @@ class Filesystem:
             )
         except Exception as e:
             raise handle_rpc_exception(e)
+        finally:
+            self._invalidate_list_cache(old_path, new_path)
 
     async def make_dir(
         self,
@@ -476,6 +991,166 @@ class Filesystem:
                 if e.status == connect.Code.already_exists:
                     return False
             raise handle_rpc_exception(e)
+        finally:
+            self._invalidate_list_cache(path)
+
+    async def exists_many(
+        self,
+        paths: List[str],
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[BatchResult[bool]]:
+        """
+        Check if files or directories exist.
+        Requests for the paths are sent in parallel, many paths in the same directory are checked with a single listing.
+
+        :param paths: Paths to files or directories
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for each request in **seconds**
+        :param concurrency: Maximum number of requests sent at the same time
+
+        :return: Results in the order of `paths`, each with `True` if the path exists or the error for the path
+        """
+        results = await self.stat_many(
+            paths,
+            user=user,
+            request_timeout=request_timeout,
+            concurrency=concurrency,
+        )
+        return [exists_result(r) for r in results]
+
+    async def stat_many(
+        self,
+        paths: List[str],
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[BatchResult[EntryInfo]]:
+        """
+        Get information about files or directories.
+        Requests for the paths are sent in parallel, many paths in the same directory are looked up with a single listing.
+
+        :param paths: Paths to files or directories
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for each request in **seconds**
+        :param concurrency: Maximum number of requests sent at the same time
+
+        :return: Results in the order of `paths`, each with the information about the path or the error for the path
+        """
+        check_concurrency(concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        results: List[Optional[BatchResult[EntryInfo]]] = [None] * len(paths)
+        groups, singles = group_by_parent(paths)
+
+        async def list_parent(parent: str) -> List[int]:
+            indices = groups[parent]
+            try:
+                async with semaphore:
+                    listed = await self.list(
+                        parent, user=user, request_timeout=request_timeout
+                    )
+                entries = {e.name: e for e in listed}
+            except NotFoundException:
+                entries = {}
+            except Exception:
+                # Fall back to looking up the paths one by one
+                return indices
+
+            for i in indices:
+                entry = entries.get(posixpath.basename(paths[i]))
+                results[i] = (
+                    BatchResult(paths[i], value=entry)
+                    if entry is not None
+                    else BatchResult(paths[i], error=not_found(paths[i]))
+                )
+            return []
+
+        async def stat(index: int):
+            async with semaphore:
+                results[index] = await self._batch_item(
+                    paths[index],
+                    lambda p: self.get_info(
+                        p, user=user, request_timeout=request_timeout
+                    ),
+                )
+
+        for fallback in await asyncio.gather(*(list_parent(p) for p in groups)):
+            singles.extend(fallback)
+        await asyncio.gather(*(stat(i) for i in singles))
+
+        return results
+
+    async def remove_many(
+        self,
+        paths: List[str],
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[BatchResult[None]]:
+        """
+        Remove files or directories, requests for the paths are sent in parallel.
+
+        :param paths: Paths to files or directories
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for each request in **seconds**
+        :param concurrency: Maximum number of requests sent at the same time
+
+        :return: Results in the order of `paths`, each with the error for the path if it couldn't be removed
+        """
+        return await self._batch(
+            paths,
+            lambda p: self.remove(p, user=user, request_timeout=request_timeout),
+            concurrency,
+        )
+
+    async def make_dirs(
+        self,
+        paths: List[str],
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[BatchResult[bool]]:
+        """
+        Create directories and all directories along the way if needed, requests for the paths are sent in parallel.
+
+        :param paths: Paths to new directories
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for each request in **seconds**
+        :param concurrency: Maximum number of requests sent at the same time
+
+        :return: Results in the order of `paths`, each with `True` if the directory was created, `False` if it already existed, or the error for the path
+        """
+        return await self._batch(
+            paths,
+            lambda p: self.make_dir(p, user=user, request_timeout=request_timeout),
+            concurrency,
+        )
+
+    async def _batch(
+        self,
+        paths: List[str],
+        operation: Callable[[str], Awaitable[T]],
+        concurrency: int,
+    ) -> List[BatchResult[T]]:
+        check_concurrency(concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(path: str) -> BatchResult[T]:
+            async with semaphore:
+                return await self._batch_item(path, operation)
+
+        return list(await asyncio.gather(*(run(p) for p in paths)))
+
+    @staticmethod
+    async def _batch_item(
+        path: str, operation: Callable[[str], Awaitable[T]]
+    ) -> BatchResult[T]:
+        try:
+            return BatchResult(path, value=await operation(path))
+        except Exception as e:
+            return BatchResult(path, error=e)
 
     async def watch_dir(
         self,
@@ -529,3 +1204,91 @@ class Filesystem:
             return AsyncWatchHandle(events=events, on_event=on_event, on_exit=on_exit)
         except Exception as e:
             raise handle_rpc_exception(e)
+
+    async def enable_list_cache(
+        self,
+        path: str,
+        ttl: float = DEFAULT_LIST_CACHE_TTL,
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Cache the results of `list()` for the directory and everything inside it.
+
+        The directory is watched recursively and a cached listing is dropped when a change inside it is reported,
+        changes made through this module drop it right away.
+        A listing is requested from the sandbox again after `ttl` seconds at the latest.
+
+        :param path: Path to the watched directory, only listings of paths inside it, written the same way, are cached
+        :param ttl: Maximum time in **seconds** a cached listing is used for
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for the request in **seconds**
+        """
+        if self._list_cache is None:
+            self._list_cache = ListCache(ttl)
+        self._list_cache.ttl = ttl
+
+        root = posixpath.normpath(path)
+        if root in self._list_cache_watchers:
+            return
+
+        cache = self._list_cache
+        handle: Optional[AsyncWatchHandle] = None
+
+        def on_exit(_):
+            cache.remove_root(root)
+            if handle is not None and self._list_cache_watchers.get(root) is handle:
+                del self._list_cache_watchers[root]
+
+        handle = await self.watch_dir(
+            path,
+            on_event=lambda event: cache.on_event(root, event),
+            on_exit=on_exit,
+            user=user,
+            request_timeout=request_timeout,
+            timeout=0,
+            recursive=True,
+        )
+        self._list_cache_watchers[root] = handle
+        cache.add_root(root)
+
+    async def disable_list_cache(self) -> None:
+        """
+        Stop caching directory listings and stop the watchers used for it.
+        """
+        for handle in self._list_cache_watchers.values():
+            await handle.stop()
+
+        self._list_cache_watchers = {}
+        self._list_cache = None
+
+    @property
+    def list_cache_stats(self) -> Optional[ListCacheStats]:
+        """
+        Hit, miss and invalidation counters of the directory listing cache, `None` if the cache isn't enabled.
+        """
+        return self._list_cache.stats if self._list_cache is not None else None
+
+    def _cached_list(
+        self,
+        cache: ListCache,
+        path: str,
+        depth: Optional[int],
+        user: Optional[Username],
+    ) -> Optional[List[EntryInfo]]:
+        root = cache.root_for(path)
+        if root is None:
+            return None
+
+        if not self._list_cache_watchers[root].is_running:
+            # Without the watcher the cached listings can't be trusted anymore
+            del self._list_cache_watchers[root]
+            cache.remove_root(root)
+            return None
+
+        return cache.get(path, depth, user)
+
+    def _invalidate_list_cache(self, *paths: str):
+        if self._list_cache is not None:
+            for path in paths:
+                self._list_cache.invalidate(path)
@@ -36,6 +36,13 @@ class AsyncWatchHandle:
         # BUG: In Python 3.8 closing async generator can throw RuntimeError.
         # await self._events.aclose()
 
+    @property
+    def is_running(self) -> bool:
+        """
+        Whether the directory is still being watched, `False` once the watcher was stopped or the watch ended.
+        """
+        return not self._wait.done()
+
     async def _iterate_events(self):
         try:
             async for event in self._events:
@@ -2,25 +2,33 @@ import datetime
 import json
 import logging
 import uuid
-from typing import Dict, List, Optional, overload
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, overload
 
 import httpx
 from packaging.version import Version
 from typing_extensions import Self, Unpack
 
+from e2b.api import AsyncApiClient
 from e2b.api.client.types import Unset
-from e2b.connection_config import ApiParams, ConnectionConfig
+from e2b.connection_config import ApiParams, ConnectionConfig, Username
 from e2b.envd.api import ENVD_API_HEALTH_ROUTE, ahandle_envd_api_exception
 from e2b.envd.versions import ENVD_DEBUG_FALLBACK
 from e2b.exceptions import SandboxException, format_request_timeout_error
+from e2b.sandbox.batch import DEFAULT_SANDBOX_BATCH_CONCURRENCY, SandboxBatchResult
+from e2b.sandbox.commands.run_many import (
+    DEFAULT_RUN_MANY_CONCURRENCY,
+    DEFAULT_RUN_MANY_TIMEOUT,
+)
 from e2b.sandbox.main import SandboxOpts
+from e2b.sandbox.metrics import DEFAULT_METRICS_POLL_INTERVAL, MetricsBuffer
 from e2b.sandbox.sandbox_api import McpServer, SandboxMetrics, SandboxNetworkOpts
 from e2b.sandbox.utils import class_method_variant
 from e2b.sandbox_async.commands.command import Commands
 from e2b.sandbox_async.commands.pty import Pty
+from e2b.sandbox_async.commands.run_many import AsyncCommandGroup
 from e2b.sandbox_async.filesystem.filesystem import Filesystem
 from e2b.sandbox_async.sandbox_api import SandboxApi, SandboxInfo
-from e2b.api.client_async import get_transport
+from e2b.api.client_async import get_api_client, get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -86,18 +94,19 @@ class AsyncSandbox(SandboxApi):
             transport=self._transport,
             headers=self.connection_config.sandbox_headers,
         )
-        self._filesystem = Filesystem(
+        self._commands = Commands(
             self.envd_api_url,
-            self._envd_version,
             self.connection_config,
             self._transport.pool,
-            self._envd_api,
+            self._envd_version,
         )
-        self._commands = Commands(
+        self._filesystem = Filesystem(
             self.envd_api_url,
+            self._envd_version,
             self.connection_config,
             self._transport.pool,
-            self._envd_version,
+            self._envd_api,
+            self._commands,
         )
         self._pty = Pty(
             self.envd_api_url,
@@ -205,6 +214,112 @@ class AsyncSandbox(SandboxApi):
 
         return sandbox
 
+    @classmethod
+    async def create_many(
+        cls,
+        count: int,
+        template: Optional[str] = None,
+        timeout: Optional[int] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        envs: Optional[Dict[str, str]] = None,
+        secure: bool = True,
+        allow_internet_access: bool = True,
+        network: Optional[SandboxNetworkOpts] = None,
+        concurrency: int = DEFAULT_SANDBOX_BATCH_CONCURRENCY,
+        **opts: Unpack[ApiParams],
+    ) -> List[SandboxBatchResult[Self]]:
+        """
+        Create multiple sandboxes concurrently.
+
+        The requests share one API client and at most `concurrency` of them are in flight at the same time.
+        Requests hitting the rate limit are retried with a backoff, other errors are returned in the results instead of being raised.
+
+        :param count: Number of sandboxes to create
+        :param template: Sandbox template name or ID
+        :param timeout: Timeout for the sandboxes in **seconds**, default to 300 seconds
+        :param metadata: Custom metadata for the sandboxes
+        :param envs: Custom environment variables for the sandboxes
+        :param secure: Envd is secured with access token and cannot be used without it, defaults to `True`.
+        :param allow_internet_access: Allow sandboxes to access the internet, defaults to `True`.
+        :param network: Sandbox network configuration
+        :param concurrency: Maximum number of requests in flight at the same time
+
+        :return: Result for each of the `count` sandboxes, failed creations have no sandbox ID
+        """
+        api_client = get_api_client(ConnectionConfig(**opts))
+
+        results = await cls._batch(
+            [None] * count,
+            lambda _: cls._create(
+                template=template,
+                timeout=timeout,
+                auto_pause=False,
+                metadata=metadata,
+                envs=envs,
+                secure=secure,
+                allow_internet_access=allow_internet_access,
+                network=network,
+                api_client=api_client,
+                **opts,
+            ),
+            concurrency,
+        )
+
+        for result in results:
+            if result.value is not None:
+                result.sandbox_id = result.value.sandbox_id
+        return results
+
+    @staticmethod
+    async def run_many(
+        commands: Sequence[Tuple["AsyncSandbox", str]],
+        concurrency: int = DEFAULT_RUN_MANY_CONCURRENCY,
+        timeout: Optional[float] = DEFAULT_RUN_MANY_TIMEOUT,
+        envs: Optional[Dict[str, str]] = None,
+        user: Optional[Username] = None,
+        cwd: Optional[str] = None,
+        request_timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+    ) -> AsyncCommandGroup:
+        """
+        Run commands in multiple sandboxes, or multiple commands in one sandbox, concurrently.
+
+        At most `concurrency` commands run at the same time, the rest wait for their turn.
+        The returned group yields the output of all commands as it arrives, tagged with the sandbox ID and the process ID,
+        and returns the results in the order of `commands`. Commands running longer than `timeout` are killed.
+
+        ```python
+        group = await AsyncSandbox.run_many([(sbx, "make test") for sbx in sandboxes], concurrency=4)
+        async for output in group:
+            print(output.sandbox_id, output.pid, output.data, end="")
+        results = await group.wait()
+        ```
+
+        :param commands: Pairs of the sandbox and the command to run in it
+        :param concurrency: Maximum number of commands running at the same time
+        :param timeout: Time in **seconds** a command can run before it's killed, `None` or `0` for no limit
+        :param envs: Environment variables used for the commands
+        :param user: User to run the commands as
+        :param cwd: Working directory to run the commands in
+        :param request_timeout: Timeout for the requests starting and killing the commands in **seconds**
+        :param max_output_size: Maximum number of characters kept in memory for each of stdout and stderr of each command, older output is dropped once it's reached
+        :param spill_output: If `True`, the whole output is also written to temporary files available as `stdout_file` and `stderr_file`
+
+        :return: Group of the started commands
+        """
+        return AsyncCommandGroup(
+            commands,
+            concurrency,
+            timeout,
+            envs=envs,
+            user=user,
+            cwd=cwd,
+            request_timeout=request_timeout,
+            max_output_size=max_output_size,
+            spill_output=spill_output,
+        )
+
     @overload
     async def connect(
         self,
@@ -510,6 +625,85 @@ class AsyncSandbox(SandboxApi):
             **self.connection_config.get_api_params(**opts),
         )
 
+    @overload
+    def watch_metrics(
+        self,
+        interval: float = DEFAULT_METRICS_POLL_INTERVAL,
+        start: Optional[datetime.datetime] = None,
+        buffer: Optional[MetricsBuffer] = None,
+        **opts: Unpack[ApiParams],
+    ) -> AsyncIterator[SandboxMetrics]:
+        """
+        Poll the metrics of the current sandbox, yielding each new sample once.
+
+        Only the samples since the latest seen one are fetched with each poll.
+        The iteration doesn't end on its own, break out of it to stop polling.
+
+        :param interval: Interval in **seconds** between the polls
+        :param start: Start time for the metrics, defaults to the start of the sandbox
+        :param buffer: Buffer fed with the new samples, for rolling aggregates like `buffer.summary(window=60)`
+
+        :return: Async iterator of the new metrics
+        """
+        ...
+
+    @overload
+    @staticmethod
+    def watch_metrics(
+        sandbox_id: str,
+        interval: float = DEFAULT_METRICS_POLL_INTERVAL,
+        start: Optional[datetime.datetime] = None,
+        buffer: Optional[MetricsBuffer] = None,
+        **opts: Unpack[ApiParams],
+    ) -> AsyncIterator[SandboxMetrics]:
+        """
+        Poll the metrics of the sandbox specified by sandbox ID, yielding each new sample once.
+
+        Only the samples since the latest seen one are fetched with each poll.
+        The iteration doesn't end on its own, break out of it to stop polling.
+
+        :param sandbox_id: Sandbox ID
+        :param interval: Interval in **seconds** between the polls
+        :param start: Start time for the metrics, defaults to the start of the sandbox
+        :param buffer: Buffer fed with the new samples, for rolling aggregates like `buffer.summary(window=60)`
+
+        :return: Async iterator of the new metrics
+        """
+        ...
+
+    @class_method_variant("_cls_watch_metrics")
+    def watch_metrics(
+        self,
+        interval: float = DEFAULT_METRICS_POLL_INTERVAL,
+        start: Optional[datetime.datetime] = None,
+        buffer: Optional[MetricsBuffer] = None,
+        **opts: Unpack[ApiParams],
+    ) -> AsyncIterator[SandboxMetrics]:
+        """
+        Poll the metrics of the current sandbox, yielding each new sample once.
+
+        Only the samples since the latest seen one are fetched with each poll.
+        The iteration doesn't end on its own, break out of it to stop polling.
+
+        :param interval: Interval in **seconds** between the polls
+        :param start: Start time for the metrics, defaults to the start of the sandbox
+        :param buffer: Buffer fed with the new samples, for rolling aggregates like `buffer.summary(window=60)`
+
+        :return: Async iterator of the new metrics
+        """
+        if self._envd_version < Version("0.1.5"):
+            raise SandboxException(
+                "Metrics are not supported in this version of the sandbox, please rebuild your template."
+            )
+
+        return SandboxApi._cls_watch_metrics(
+            sandbox_id=self.sandbox_id,
+            interval=interval,
+            start=start,
+            buffer=buffer,
+            **self.connection_config.get_api_params(**opts),
+        )
+
     @classmethod
     async def beta_create(
         cls,
@@ -680,55 +874,69 @@ class AsyncSandbox(SandboxApi):
         secure: bool,
         mcp: Optional[McpServer] = None,
         network: Optional[SandboxNetworkOpts] = None,
+        api_client: Optional[AsyncApiClient] = None,
         **opts: Unpack[ApiParams],
     ) -> Self:
         extra_sandbox_headers = {}
 
         debug = opts.get("debug")
-        if debug:
-            sandbox_id = "debug_sandbox_id"
-            sandbox_domain = None
-            envd_version = ENVD_DEBUG_FALLBACK
-            envd_access_token = None
-            traffic_access_token = None
-        else:
-            response = await SandboxApi._create_sandbox(
-                template=template or cls.default_template,
-                timeout=timeout or cls.default_sandbox_timeout,
-                auto_pause=auto_pause,
-                metadata=metadata,
-                env_vars=envs,
-                secure=secure,
-                allow_internet_access=allow_internet_access,
-                mcp=mcp,
-                network=network,
+        sandbox_id: Optional[str] = None
+        try:
+            if debug:
+                sandbox_id = "debug_sandbox_id"
+                sandbox_domain = None
+                envd_version = ENVD_DEBUG_FALLBACK
+                envd_access_token = None
+                traffic_access_token = None
+            else:
+                response = await SandboxApi._create_sandbox(
+                    template=template or cls.default_template,
+                    timeout=timeout or cls.default_sandbox_timeout,
+                    auto_pause=auto_pause,
+                    metadata=metadata,
+                    env_vars=envs,
+                    secure=secure,
+                    allow_internet_access=allow_internet_access,
+                    mcp=mcp,
+                    network=network,
+                    api_client=api_client,
+                    **opts,
+                )
+
+                sandbox_id = response.sandbox_id
+                sandbox_domain = response.sandbox_domain
+                envd_version = Version(response.envd_version)
+                envd_access_token = response.envd_access_token
+                traffic_access_token = response.traffic_access_token
+
+                if envd_access_token is not None and not isinstance(
+                    envd_access_token, Unset
+                ):
+                    extra_sandbox_headers["X-Access-Token"] = envd_access_token
+
+            extra_sandbox_headers["E2b-Sandbox-Id"] = sandbox_id
+            extra_sandbox_headers["E2b-Sandbox-Port"] = str(ConnectionConfig.envd_port)
+
+            connection_config = ConnectionConfig(
+                extra_sandbox_headers=extra_sandbox_headers,
                 **opts,
             )
 
-            sandbox_id = response.sandbox_id
-            sandbox_domain = response.sandbox_domain
-            envd_version = Version(response.envd_version)
-            envd_access_token = response.envd_access_token
-            traffic_access_token = response.traffic_access_token
-
-            if envd_access_token is not None and not isinstance(
-                envd_access_token, Unset
-            ):
-                extra_sandbox_headers["X-Access-Token"] = envd_access_token
-
-        extra_sandbox_headers["E2b-Sandbox-Id"] = sandbox_id
-        extra_sandbox_headers["E2b-Sandbox-Port"] = str(ConnectionConfig.envd_port)
-
-        connection_config = ConnectionConfig(
-            extra_sandbox_headers=extra_sandbox_headers,
-            **opts,
-        )
-
-        return cls(
-            sandbox_id=sandbox_id,
-            sandbox_domain=sandbox_domain,
-            envd_version=envd_version,
-            envd_access_token=envd_access_token,
-            traffic_access_token=traffic_access_token,
-            connection_config=connection_config,
-        )
+            return cls(
+                sandbox_id=sandbox_id,
+                sandbox_domain=sandbox_domain,
+                envd_version=envd_version,
+                envd_access_token=envd_access_token,
+                traffic_access_token=traffic_access_token,
+                connection_config=connection_config,
+            )
+        except BaseException:
+            if sandbox_id is not None and not debug:
+                # The sandbox is already running, nobody else knows its ID to kill it
+                try:
+                    await SandboxApi._cls_kill(
+                        sandbox_id, api_client=api_client, **opts
+                    )
+                except Exception:
+                    pass
+            raise
@@ -1,8 +1,7 @@
-import urllib.parse
-from typing import Optional, List
+import asyncio
+from typing import AsyncIterator, List, Union
 
 from e2b.api.client.api.sandboxes import get_v2_sandboxes
-from e2b.api.client.types import UNSET
 from e2b.exceptions import SandboxException
 from e2b.sandbox.sandbox_api import SandboxPaginatorBase, SandboxInfo
 from e2b.api import handle_api_exception
@@ -22,6 +21,13 @@ class AsyncSandboxPaginator(SandboxPaginatorBase):
         sandboxes = await paginator.next_items()
         print(sandboxes)
     ```
+
+    The paginator can also be iterated over, the next `prefetch` pages are fetched in the background
+    while the current one is being consumed:
+    ```python
+    async for sandbox in AsyncSandbox.list(limit=500, prefetch=2):
+        print(sandbox.sandbox_id)
+    ```
     """
 
     async def next_items(self) -> List[SandboxInfo]:
@@ -35,22 +41,10 @@ class AsyncSandboxPaginator(SandboxPaginatorBase):
         if not self.has_next:
             raise Exception("No more items to fetch")
 
-        # Convert filters to the format expected by the API
-        metadata: Optional[str] = None
-        if self.query and self.query.metadata:
-            quoted_metadata = {
-                urllib.parse.quote(k): urllib.parse.quote(v)
-                for k, v in self.query.metadata.items()
-            }
-            metadata = urllib.parse.urlencode(quoted_metadata)
-
         api_client = get_api_client(self._config)
         res = await get_v2_sandboxes.asyncio_detailed(
             client=api_client,
-            metadata=metadata if metadata else UNSET,
-            state=self.query.state if self.query and self.query.state else UNSET,
-            limit=self.limit if self.limit else UNSET,
-            next_token=self._next_token if self._next_token else UNSET,
+            **self._list_params(),
         )
 
         if res.status_code >= 300:
@@ -67,3 +61,48 @@ class AsyncSandboxPaginator(SandboxPaginatorBase):
             raise SandboxException(f"{res.parsed.message}: Request failed")
 
         return [SandboxInfo._from_listed_sandbox(sandbox) for sandbox in res.parsed]
+
+    async def __aiter__(self) -> AsyncIterator[SandboxInfo]:
+        """
+        Iterate over the remaining sandboxes, fetching up to `prefetch` pages ahead.
+
+        Don't call `next_items` while iterating, the pages are fetched by the iteration.
+        """
+        if self.prefetch == 0:
+            while self.has_next:
+                for sandbox in await self.next_items():
+                    yield sandbox
+            return
+
+        pages: "asyncio.Queue[Union[List[SandboxInfo], Exception, None]]" = (
+            asyncio.Queue()
+        )
+        # A slot is taken for every page fetched and freed once it's being consumed
+        slots = asyncio.Semaphore(self.prefetch)
+
+        async def fetch():
+            try:
+                while self.has_next:
+                    await slots.acquire()
+                    pages.put_nowait(await self.next_items())
+            except Exception as e:
+                pages.put_nowait(e)
+                return
+
+            pages.put_nowait(None)
+
+        fetcher = asyncio.create_task(fetch())
+        try:
+            while True:
+                page = await pages.get()
+                if page is None:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+
+                slots.release()
+                for sandbox in page:
+                    yield sandbox
+        finally:
+            fetcher.cancel()
+            await asyncio.gather(fetcher, return_exceptions=True)
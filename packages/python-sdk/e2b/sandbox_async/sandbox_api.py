@@ -1,12 +1,23 @@
+import asyncio
 import datetime
-from typing import Dict, List, Optional
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+)
 
 from packaging.version import Version
 from typing_extensions import Unpack
 
-from e2b.api import SandboxCreateResponse, handle_api_exception
+from e2b.api import AsyncApiClient, SandboxCreateResponse, handle_api_exception
 from e2b.api.client.api.sandboxes import (
     delete_sandboxes_sandbox_id,
+    get_sandboxes_metrics,
     get_sandboxes_sandbox_id,
     get_sandboxes_sandbox_id_metrics,
     post_sandboxes,
@@ -20,14 +31,33 @@ from e2b.api.client.models import (
     NewSandbox,
     PostSandboxesSandboxIDTimeoutBody,
     Sandbox,
+    SandboxMetric,
     SandboxNetworkConfig,
 )
 from e2b.api.client.types import UNSET
 from e2b.api.client_async import get_api_client
 from e2b.connection_config import ApiParams, ConnectionConfig
-from e2b.exceptions import NotFoundException, SandboxException, TemplateException
+from e2b.exceptions import (
+    NotFoundException,
+    RateLimitException,
+    SandboxException,
+    TemplateException,
+)
+from e2b.sandbox.batch import (
+    DEFAULT_SANDBOX_BATCH_CONCURRENCY,
+    RateLimitBackoff,
+    SandboxBatchResult,
+)
+from e2b.sandbox.utils import check_concurrency
 from e2b.sandbox.main import SandboxBase
+from e2b.sandbox.metrics import (
+    DEFAULT_METRICS_POLL_INTERVAL,
+    MetricsBuffer,
+    MetricsCursor,
+    metrics_batches,
+)
 from e2b.sandbox.sandbox_api import (
+    DEFAULT_LIST_PREFETCH,
     McpServer,
     SandboxInfo,
     SandboxMetrics,
@@ -36,6 +66,8 @@ from e2b.sandbox.sandbox_api import (
 )
 from e2b.sandbox_async.paginator import AsyncSandboxPaginator
 
+T = TypeVar("T")
+
 
 class SandboxApi(SandboxBase):
     @staticmethod
@@ -43,6 +75,7 @@ class SandboxApi(SandboxBase):
         query: Optional[SandboxQuery] = None,
         limit: Optional[int] = None,
         next_token: Optional[str] = None,
+        prefetch: int = DEFAULT_LIST_PREFETCH,
         **opts: Unpack[ApiParams],
     ) -> AsyncSandboxPaginator:
         """
@@ -51,6 +84,7 @@ class SandboxApi(SandboxBase):
         :param query: Filter the list of sandboxes by metadata or state, e.g. `SandboxListQuery(metadata={"key": "value"})` or `SandboxListQuery(state=[SandboxState.RUNNING])`
         :param limit: Maximum number of sandboxes to return per page
         :param next_token: Token for pagination
+        :param prefetch: Number of pages fetched ahead while iterating over the paginator, `0` fetches them only when needed
 
         :return: List of running sandboxes
         """
@@ -58,9 +92,170 @@ class SandboxApi(SandboxBase):
             query=query,
             limit=limit,
             next_token=next_token,
+            prefetch=prefetch,
             **opts,
         )
 
+    @classmethod
+    async def kill_many(
+        cls,
+        sandbox_ids: List[str],
+        concurrency: int = DEFAULT_SANDBOX_BATCH_CONCURRENCY,
+        **opts: Unpack[ApiParams],
+    ) -> List[SandboxBatchResult[bool]]:
+        """
+        Kill multiple sandboxes concurrently.
+
+        The requests share one API client and at most `concurrency` of them are in flight at the same time.
+        Requests hitting the rate limit are retried with a backoff, other errors are returned in the results instead of being raised.
+
+        :param sandbox_ids: IDs of the sandboxes to kill
+        :param concurrency: Maximum number of requests in flight at the same time
+
+        :return: Result for each sandbox in the order of `sandbox_ids`, the value is `False` if the sandbox wasn't found
+        """
+        api_client = get_api_client(ConnectionConfig(**opts))
+
+        return await cls._batch(
+            sandbox_ids,
+            lambda sandbox_id: cls._cls_kill(sandbox_id, api_client=api_client, **opts),
+            concurrency,
+        )
+
+    @classmethod
+    async def set_timeout_many(
+        cls,
+        sandbox_ids: List[str],
+        timeout: int,
+        concurrency: int = DEFAULT_SANDBOX_BATCH_CONCURRENCY,
+        **opts: Unpack[ApiParams],
+    ) -> List[SandboxBatchResult[None]]:
+        """
+        Set the timeout of multiple sandboxes concurrently.
+
+        The requests share one API client and at most `concurrency` of them are in flight at the same time.
+        Requests hitting the rate limit are retried with a backoff, other errors are returned in the results instead of being raised.
+
+        :param sandbox_ids: IDs of the sandboxes
+        :param timeout: Timeout for the sandboxes in **seconds**
+        :param concurrency: Maximum number of requests in flight at the same time
+
+        :return: Result for each sandbox in the order of `sandbox_ids`
+        """
+        api_client = get_api_client(ConnectionConfig(**opts))
+
+        return await cls._batch(
+            sandbox_ids,
+            lambda sandbox_id: cls._cls_set_timeout(
+                sandbox_id, timeout, api_client=api_client, **opts
+            ),
+            concurrency,
+        )
+
+    @classmethod
+    async def get_metrics_many(
+        cls,
+        sandbox_ids: List[str],
+        concurrency: int = DEFAULT_SANDBOX_BATCH_CONCURRENCY,
+        **opts: Unpack[ApiParams],
+    ) -> Dict[str, SandboxMetrics]:
+        """
+        Get the latest metrics of multiple sandboxes.
+
+        The metrics are requested for up to 100 sandboxes at once, at most `concurrency` requests are in flight at the same time.
+
+        :param sandbox_ids: IDs of the sandboxes
+        :param concurrency: Maximum number of requests in flight at the same time
+
+        :return: Latest metrics by sandbox ID, sandboxes that aren't running or haven't reported any metrics yet are left out
+        """
+        check_concurrency(concurrency)
+        config = ConnectionConfig(**opts)
+
+        if config.debug:
+            # Skip getting the metrics in debug mode
+            return {}
+
+        api_client = get_api_client(config)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get(batch: List[str]) -> Dict[str, SandboxMetrics]:
+            async with semaphore:
+                return await cls._get_metrics_batch(batch, api_client)
+
+        metrics: Dict[str, SandboxMetrics] = {}
+        for batch in await asyncio.gather(
+            *(get(batch) for batch in metrics_batches(sandbox_ids))
+        ):
+            metrics.update(batch)
+        return metrics
+
+    @classmethod
+    async def watch_metrics_many(
+        cls,
+        sandbox_ids: List[str],
+        interval: float = DEFAULT_METRICS_POLL_INTERVAL,
+        buffers: Optional[Dict[str, MetricsBuffer]] = None,
+        concurrency: int = DEFAULT_SANDBOX_BATCH_CONCURRENCY,
+        **opts: Unpack[ApiParams],
+    ) -> AsyncIterator[Dict[str, SandboxMetrics]]:
+        """
+        Poll the latest metrics of multiple sandboxes.
+
+        Each poll yields the metrics of the sandboxes that reported a new sample since the previous poll.
+        The iteration doesn't end on its own, break out of it or cancel it to stop polling.
+
+        :param sandbox_ids: IDs of the sandboxes
+        :param interval: Interval in **seconds** between the polls
+        :param buffers: Buffers fed with the new samples by sandbox ID, missing buffers are added
+        :param concurrency: Maximum number of requests in flight at the same time
+
+        :return: Async iterator of the new metrics by sandbox ID
+        """
+        cursors: Dict[str, MetricsCursor] = {}
+        while True:
+            new: Dict[str, SandboxMetrics] = {}
+            metrics = await cls.get_metrics_many(sandbox_ids, concurrency, **opts)
+            for sandbox_id, metric in metrics.items():
+                cursor = cursors.setdefault(sandbox_id, MetricsCursor())
+                if not cursor.new([metric]):
+                    continue
+
+                new[sandbox_id] = metric
+                if buffers is not None:
+                    buffers.setdefault(sandbox_id, MetricsBuffer()).append(metric)
+
+            if new:
+                yield new
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    async def _batch(
+        sandbox_ids: Sequence[Optional[str]],
+        operation: Callable[[Optional[str]], Awaitable[T]],
+        concurrency: int,
+    ) -> List[SandboxBatchResult[T]]:
+        check_concurrency(concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        backoff = RateLimitBackoff()
+
+        async def run(sandbox_id: Optional[str]) -> SandboxBatchResult[T]:
+            async with semaphore:
+                attempt = 0
+                while True:
+                    await asyncio.sleep(backoff.wait_time())
+                    try:
+                        value = await operation(sandbox_id)
+                        return SandboxBatchResult(sandbox_id, value=value)
+                    except RateLimitException as e:
+                        if not backoff.limited(attempt):
+                            return SandboxBatchResult(sandbox_id, error=e)
+                        attempt += 1
+                    except Exception as e:
+                        return SandboxBatchResult(sandbox_id, error=e)
+
+        return list(await asyncio.gather(*(run(s) for s in sandbox_ids)))
+
     @classmethod
     async def _cls_get_info(
         cls,
@@ -99,6 +294,7 @@ class SandboxApi(SandboxBase):
     async def _cls_kill(
         cls,
         sandbox_id: str,
+        api_client: Optional[AsyncApiClient] = None,
         **opts: Unpack[ApiParams],
     ) -> bool:
         config = ConnectionConfig(**opts)
@@ -107,7 +303,7 @@ class SandboxApi(SandboxBase):
             # Skip killing the sandbox in debug mode
             return True
 
-        api_client = get_api_client(config)
+        api_client = api_client or get_api_client(config)
         res = await delete_sandboxes_sandbox_id.asyncio_detailed(
             sandbox_id,
             client=api_client,
@@ -126,6 +322,7 @@ class SandboxApi(SandboxBase):
         cls,
         sandbox_id: str,
         timeout: int,
+        api_client: Optional[AsyncApiClient] = None,
         **opts: Unpack[ApiParams],
     ) -> None:
         config = ConnectionConfig(**opts)
@@ -134,7 +331,7 @@ class SandboxApi(SandboxBase):
             # Skip setting the timeout in debug mode
             return
 
-        api_client = get_api_client(config)
+        api_client = api_client or get_api_client(config)
         res = await post_sandboxes_sandbox_id_timeout.asyncio_detailed(
             sandbox_id,
             client=api_client,
@@ -159,11 +356,12 @@ class SandboxApi(SandboxBase):
         secure: bool,
         mcp: Optional[McpServer] = None,
         network: Optional[SandboxNetworkOpts] = None,
+        api_client: Optional[AsyncApiClient] = None,
         **opts: Unpack[ApiParams],
     ) -> SandboxCreateResponse:
         config = ConnectionConfig(**opts)
 
-        api_client = get_api_client(config)
+        api_client = api_client or get_api_client(config)
         res = await post_sandboxes.asyncio_detailed(
             body=NewSandbox(
                 template_id=template,
@@ -245,18 +443,66 @@ class SandboxApi(SandboxBase):
             raise SandboxException(f"{res.parsed.message}: Request failed")
 
         # Convert to typed SandboxMetrics objects
-        return [
-            SandboxMetrics(
-                cpu_count=metric.cpu_count,
-                cpu_used_pct=metric.cpu_used_pct,
-                disk_total=metric.disk_total,
-                disk_used=metric.disk_used,
-                mem_total=metric.mem_total,
-                mem_used=metric.mem_used,
-                timestamp=metric.timestamp,
+        return [SandboxMetrics._from_sandbox_metric(metric) for metric in res.parsed]
+
+    @classmethod
+    async def _cls_watch_metrics(
+        cls,
+        sandbox_id: str,
+        interval: float = DEFAULT_METRICS_POLL_INTERVAL,
+        start: Optional[datetime.datetime] = None,
+        buffer: Optional[MetricsBuffer] = None,
+        **opts: Unpack[ApiParams],
+    ) -> AsyncIterator[SandboxMetrics]:
+        """
+        Poll the metrics of the sandbox specified by sandbox ID.
+
+        :param sandbox_id: Sandbox ID
+        :param interval: Interval in **seconds** between the polls
+        :param start: Start time for the metrics, defaults to the start of the sandbox
+        :param buffer: Buffer fed with the new samples
+
+        :return: Async iterator of the new metrics
+        """
+        cursor = MetricsCursor()
+        while True:
+            # Only the samples since the latest seen one are fetched
+            since = cursor.last_seen or start
+            metrics = await cls._cls_get_metrics(sandbox_id, start=since, **opts)
+
+            for metric in cursor.new(metrics):
+                if buffer is not None:
+                    buffer.append(metric)
+                yield metric
+
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    async def _get_metrics_batch(
+        sandbox_ids: List[str],
+        api_client: AsyncApiClient,
+    ) -> Dict[str, SandboxMetrics]:
+        res = await get_sandboxes_metrics.asyncio_detailed(
+            sandbox_ids=sandbox_ids,
+            client=api_client,
+        )
+
+        if res.status_code >= 300:
+            raise handle_api_exception(res)
+
+        if res.parsed is None:
+            return {}
+
+        # Check if res.parse is Error
+        if isinstance(res.parsed, Error):
+            raise SandboxException(f"{res.parsed.message}: Request failed")
+
+        return {
+            sandbox_id: SandboxMetrics._from_sandbox_metric(
+                SandboxMetric.from_dict(metric)
             )
-            for metric in res.parsed
-        ]
+            for sandbox_id, metric in res.parsed.sandboxes.items()
+        }
 
     @classmethod
     async def _cls_pause(
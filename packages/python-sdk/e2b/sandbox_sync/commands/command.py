@@ -10,7 +10,12 @@ from e2b.connection_config import (
     KEEPALIVE_PING_INTERVAL_SEC,
 )
 from e2b.envd.process import process_connect, process_pb2
-from e2b.envd.rpc import authentication_header, handle_rpc_exception
+from e2b.envd.rpc import (
+    authentication_header,
+    handle_rpc_exception,
+    rpc_retry_policy,
+    use_json_codec,
+)
 from e2b.envd.versions import ENVD_COMMANDS_STDIN
 from e2b.exceptions import SandboxException
 from e2b.sandbox.commands.main import ProcessInfo
@@ -37,8 +42,9 @@ class Commands:
             # TODO: Fix and enable compression again — the headers compression is not solved for streaming.
             # compressor=e2b_connect.GzipCompressor,
             pool=pool,
-            json=True,
+            json=use_json_codec(envd_version),
             headers=connection_config.sandbox_headers,
+            retry_policy=rpc_retry_policy(connection_config),
         )
 
     def list(
@@ -145,6 +151,9 @@ class Commands:
         stdin: Optional[bool] = None,
         timeout: Optional[float] = 60,
         request_timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ) -> CommandResult:
         """
         Start a new command and wait until it finishes executing.
@@ -159,6 +168,9 @@ class Commands:
         :param stdin: If `True`, the command will have a stdin stream that you can send data to using `sandbox.commands.send_stdin()`
         :param timeout: Timeout for the command connection in **seconds**. Using `0` will not limit the command connection time
         :param request_timeout: Timeout for the request in **seconds**
+        :param max_output_size: Maximum number of characters kept in memory for each of stdout and stderr, older output is dropped once it's reached
+        :param spill_output: If `True`, the whole output is also written to temporary files available as `stdout_file` and `stderr_file`
+        :param raw: If `True`, the output is passed and returned as bytes instead of being decoded as UTF-8, `max_output_size` is then in bytes
 
         :return: `CommandResult` result of the command execution
         """
@@ -177,6 +189,9 @@ class Commands:
         stdin: Optional[bool] = None,
         timeout: Optional[float] = 60,
         request_timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ) -> CommandHandle:
         """
         Start a new command and return a handle to interact with it.
@@ -189,6 +204,9 @@ class Commands:
         :param stdin: If `True`, the command will have a stdin stream that you can send data to using `sandbox.commands.send_stdin()`
         :param timeout: Timeout for the command connection in **seconds**. Using `0` will not limit the command connection time
         :param request_timeout: Timeout for the request in **seconds**
+        :param max_output_size: Maximum number of characters kept in memory for each of stdout and stderr, older output is dropped once it's reached
+        :param spill_output: If `True`, the whole output is also written to temporary files available as `stdout_file` and `stderr_file`
+        :param raw: If `True`, the output is passed and returned as bytes instead of being decoded as UTF-8, `max_output_size` is then in bytes
 
         :return: `CommandHandle` handle to interact with the running command
         """
@@ -206,6 +224,9 @@ class Commands:
         stdin: Optional[bool] = None,
         timeout: Optional[float] = 60,
         request_timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ):
         # Check version for stdin support
         if stdin is False and self._envd_version < ENVD_COMMANDS_STDIN:
@@ -225,6 +246,9 @@ class Commands:
             stdin,
             timeout,
             request_timeout,
+            max_output_size=max_output_size,
+            spill_output=spill_output,
+            raw=raw,
         )
 
         return (
@@ -245,6 +269,9 @@ class Commands:
         stdin: bool,
         timeout: Optional[float],
         request_timeout: Optional[float],
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ):
         events = self._rpc.start(
             process_pb2.StartRequest(
@@ -278,6 +305,9 @@ class Commands:
                 pid=start_event.event.start.pid,
                 handle_kill=lambda: self.kill(start_event.event.start.pid),
                 events=events,
+                max_output_size=max_output_size,
+                spill_output=spill_output,
+                raw=raw,
             )
         except Exception as e:
             raise handle_rpc_exception(e)
@@ -287,6 +317,9 @@ class Commands:
         pid: int,
         timeout: Optional[float] = 60,
         request_timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ):
         """
         Connects to a running command.
@@ -295,6 +328,9 @@ class Commands:
         :param pid: Process ID of the command to connect to. You can get the list of processes using `sandbox.commands.list()`
         :param timeout: Timeout for the connection in **seconds**. Using `0` will not limit the connection time
         :param request_timeout: Timeout for the request in **seconds**
+        :param max_output_size: Maximum number of characters kept in memory for each of stdout and stderr, older output is dropped once it's reached
+        :param spill_output: If `True`, the whole output is also written to temporary files available as `stdout_file` and `stderr_file`
+        :param raw: If `True`, the output is passed and returned as bytes instead of being decoded as UTF-8, `max_output_size` is then in bytes
 
         :return: `CommandHandle` handle to interact with the running command
         """
@@ -323,6 +359,9 @@ class Commands:
                 pid=start_event.event.start.pid,
                 handle_kill=lambda: self.kill(start_event.event.start.pid),
                 events=events,
+                max_output_size=max_output_size,
+                spill_output=spill_output,
+                raw=raw,
             )
         except Exception as e:
             raise handle_rpc_exception(e)
@@ -1,10 +1,12 @@
-from typing import Optional, Callable, Any, Generator, Union, Tuple
+from typing import IO, Optional, Callable, Any, Generator, Union, Tuple
 
 from e2b.envd.rpc import handle_rpc_exception
 from e2b.envd.process import process_pb2
 from e2b.sandbox.commands.command_handle import (
     CommandExitException,
     CommandResult,
+    OutputBuffer,
+    OutputDecoder,
     Stderr,
     Stdout,
     PtyOutput,
@@ -25,6 +27,34 @@ class CommandHandle:
         """
         return self._pid
 
+    @property
+    def stdout(self):
+        """
+        Command stdout output received so far. Bytes if the command was started with `raw=True`.
+        """
+        return self._stdout.value
+
+    @property
+    def stderr(self):
+        """
+        Command stderr output received so far. Bytes if the command was started with `raw=True`.
+        """
+        return self._stderr.value
+
+    @property
+    def stdout_file(self) -> Optional[IO[bytes]]:
+        """
+        Temporary file with the whole stdout output received so far, set only if the command was started with `spill_output=True`.
+        """
+        return self._stdout.file
+
+    @property
+    def stderr_file(self) -> Optional[IO[bytes]]:
+        """
+        Temporary file with the whole stderr output received so far, set only if the command was started with `spill_output=True`.
+        """
+        return self._stderr.file
+
     def __init__(
         self,
         pid: int,
@@ -32,15 +62,20 @@ class CommandHandle:
         events: Generator[
             Union[process_pb2.StartResponse, process_pb2.ConnectResponse], Any, None
         ],
+        max_output_size: Optional[int] = None,
+        spill_output: bool = False,
+        raw: bool = False,
     ):
         self._pid = pid
         self._handle_kill = handle_kill
         self._events = events
 
-        self._stdout: str = ""
-        self._stderr: str = ""
+        self._stdout = OutputBuffer(max_output_size, spill_output, raw)
+        self._stderr = OutputBuffer(max_output_size, spill_output, raw)
+        self._stdout_decoder = OutputDecoder(raw)
+        self._stderr_decoder = OutputDecoder(raw)
 
-        self._result: Optional[CommandResult] = None
+        self._end: Optional[process_pb2.ProcessEvent.EndEvent] = None
         self._iteration_exception: Optional[Exception] = None
 
     def __iter__(self):
@@ -66,22 +101,27 @@ class CommandHandle:
             for event in self._events:
                 if event.event.HasField("data"):
                     if event.event.data.stdout:
-                        out = event.event.data.stdout.decode("utf-8", "replace")
-                        self._stdout += out
-                        yield out, None, None
+                        out = self._stdout_decoder.decode(event.event.data.stdout)
+                        if out:
+                            self._stdout.append(out)
+                            yield out, None, None
                     if event.event.data.stderr:
-                        out = event.event.data.stderr.decode("utf-8", "replace")
-                        self._stderr += out
-                        yield None, out, None
+                        out = self._stderr_decoder.decode(event.event.data.stderr)
+                        if out:
+                            self._stderr.append(out)
+                            yield None, out, None
                     if event.event.data.pty:
                         yield None, None, event.event.data.pty
                 if event.event.HasField("end"):
-                    self._result = CommandResult(
-                        stdout=self._stdout,
-                        stderr=self._stderr,
-                        exit_code=event.event.end.exit_code,
-                        error=event.event.end.error,
-                    )
+                    out = self._stdout_decoder.flush()
+                    if out:
+                        self._stdout.append(out)
+                        yield out, None, None
+                    out = self._stderr_decoder.flush()
+                    if out:
+                        self._stderr.append(out)
+                        yield None, out, None
+                    self._end = event.event.end
         except Exception as e:
             raise handle_rpc_exception(e)
 
@@ -126,18 +166,27 @@ class CommandHandle:
         if self._iteration_exception:
             raise self._iteration_exception
 
-        if self._result is None:
+        if self._end is None:
             raise Exception("Command ended without an end event")
 
-        if self._result.exit_code != 0:
+        if self._end.exit_code != 0:
             raise CommandExitException(
-                stdout=self._stdout,
-                stderr=self._stderr,
-                exit_code=self._result.exit_code,
-                error=self._result.error,
+                stdout=self.stdout,
+                stderr=self.stderr,
+                exit_code=self._end.exit_code,
+                error=self._end.error,
+                stdout_file=self._stdout.file,
+                stderr_file=self._stderr.file,
             )
 
-        return self._result
+        return CommandResult(
+            stdout=self.stdout,
+            stderr=self.stderr,
+            exit_code=self._end.exit_code,
+            error=self._end.error,
+            stdout_file=self._stdout.file,
+            stderr_file=self._stderr.file,
+        )
 
     def kill(self) -> bool:
         """
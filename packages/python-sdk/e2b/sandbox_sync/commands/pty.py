@@ -12,7 +12,12 @@ from e2b.connection_config import (
     KEEPALIVE_PING_INTERVAL_SEC,
 )
 from e2b.exceptions import SandboxException
-from e2b.envd.rpc import authentication_header, handle_rpc_exception
+from e2b.envd.rpc import (
+    authentication_header,
+    handle_rpc_exception,
+    rpc_retry_policy,
+    use_json_codec,
+)
 from e2b.sandbox.commands.command_handle import PtySize
 from e2b.sandbox_sync.commands.command_handle import CommandHandle
 
@@ -36,8 +41,9 @@ class Pty:
             # TODO: Fix and enable compression again — the headers compression is not solved for streaming.
             # compressor=e2b_connect.GzipCompressor,
             pool=pool,
-            json=True,
+            json=use_json_codec(envd_version),
             headers=connection_config.sandbox_headers,
+            retry_policy=rpc_retry_policy(connection_config),
         )
 
     def kill(
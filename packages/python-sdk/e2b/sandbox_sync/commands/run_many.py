@@ -0,0 +1,224 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from e2b.sandbox.commands.run_many import (
+    RUN_MANY_OUTPUT_QUEUE_SIZE,
+    CommandBatchResult,
+    CommandOutput,
+    RunManyIteration,
+    cancelled,
+    iterated,
+    timed_out,
+)
+from e2b.sandbox.utils import check_concurrency
+from e2b.sandbox_sync.commands.command_handle import CommandHandle
+
+if TYPE_CHECKING:
+    from e2b.sandbox_sync.main import Sandbox
+
+logger = logging.getLogger(__name__)
+
+
+class CommandGroup:
+    """
+    Commands started by `Sandbox.run_many`.
+
+    The commands run in background threads. Iterating over the group yields the output of all commands as it arrives,
+    tagged with the sandbox and the process ID.
+    The iteration ends when all commands have finished, it can be done only once.
+    Output not consumed by iterating is still kept in the results.
+
+    Up to `RUN_MANY_OUTPUT_QUEUE_SIZE` output chunks are buffered until the iteration starts, the later ones are not yielded.
+    While iterating, the output of the commands stops being read when the consumer falls behind, until it catches up.
+    Breaking out of the iteration stops buffering the output.
+
+    Example
+    ```python
+    with Sandbox.run_many([(sbx, "make test") for sbx in sandboxes]) as group:
+        for output in group:
+            print(output.sandbox_id, output.data, end="")
+
+        results = group.wait()
+    ```
+    """
+
+    def __init__(
+        self,
+        commands: Sequence[Tuple["Sandbox", str]],
+        concurrency: int,
+        timeout: Optional[float],
+        **run_opts,
+    ):
+        check_concurrency(concurrency)
+
+        self._commands = list(commands)
+        self._timeout = timeout
+        self._run_opts = run_opts
+        self._handles: Dict[int, CommandHandle] = {}
+        self._timed_out: Dict[int, bool] = {}
+        self._queue: "queue.Queue[Optional[CommandOutput]]" = queue.Queue()
+        self._slots = threading.Semaphore(RUN_MANY_OUTPUT_QUEUE_SIZE)
+        self._iteration: RunManyIteration = "pending"
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="e2b-run-many"
+        )
+        self._futures = [
+            self._executor.submit(self._run, index, sandbox, cmd)
+            for index, (sandbox, cmd) in enumerate(self._commands)
+        ]
+        self._executor.shutdown(wait=False)
+
+        self._pending = len(self._futures)
+        if not self._futures:
+            self._queue.put(None)
+        for future in self._futures:
+            future.add_done_callback(self._finished)
+
+    def __iter__(self) -> Iterator[CommandOutput]:
+        if self._iteration != "pending":
+            raise iterated()
+        self._iteration = "running"
+
+        try:
+            while True:
+                output = self._queue.get()
+                if output is None:
+                    return
+                self._slots.release()
+                yield output
+        finally:
+            # Unblock the commands if the consumer stopped early
+            self._iteration = "done"
+            while True:
+                try:
+                    output = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if output is not None:
+                    self._slots.release()
+
+    def wait(self) -> List[CommandBatchResult]:
+        """
+        Wait for all commands to finish.
+
+        :return: Result for each command in the order of the commands, failed commands have the error set instead of raising it
+        """
+        return [future.result() for future in self._futures]
+
+    def cancel(self) -> None:
+        """
+        Kill the running commands and don't start the ones still waiting for their turn.
+        """
+        self._cancelled.set()
+        with self._lock:
+            handles = list(self._handles.values())
+        for handle in handles:
+            self._kill(handle)
+        self.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cancel()
+
+    def _run(self, index: int, sandbox: "Sandbox", cmd: str) -> CommandBatchResult:
+        result = CommandBatchResult(sandbox.sandbox_id)
+        if self._cancelled.is_set():
+            result.error = cancelled()
+            return result
+
+        timer: Optional[threading.Timer] = None
+        try:
+            # The command is killed by the group after the timeout, so the stream itself has no deadline
+            handle = sandbox.commands.run(
+                cmd, background=True, timeout=0, **self._run_opts
+            )
+            result.pid = handle.pid
+            with self._lock:
+                self._handles[index] = handle
+            if self._cancelled.is_set():
+                self._kill(handle)
+
+            if self._timeout:
+                timer = threading.Timer(self._timeout, self._expire, (index, handle))
+                timer.daemon = True
+                timer.start()
+
+            result.value = handle.wait(
+                on_stdout=lambda data: self._emit(index, handle, "stdout", data),
+                on_stderr=lambda data: self._emit(index, handle, "stderr", data),
+            )
+        except Exception as e:
+            if self._timed_out.get(index):
+                result.error = timed_out(self._timeout)
+            elif self._cancelled.is_set():
+                result.error = cancelled()
+            else:
+                result.error = e
+        finally:
+            if timer is not None:
+                timer.cancel()
+            with self._lock:
+                self._handles.pop(index, None)
+
+        return result
+
+    def _expire(self, index: int, handle: CommandHandle):
+        self._timed_out[index] = True
+        self._kill(handle)
+
+    def _emit(
+        self,
+        index: int,
+        handle: CommandHandle,
+        stream: Literal["stdout", "stderr"],
+        data: str,
+    ):
+        if self._iteration == "done":
+            return
+        # Before the iteration starts the output is buffered only while there's room
+        if not self._slots.acquire(blocking=self._iteration == "running"):
+            return
+        if self._iteration == "done":
+            self._slots.release()
+            return
+
+        self._queue.put(
+            CommandOutput(
+                index=index,
+                sandbox_id=self._commands[index][0].sandbox_id,
+                pid=handle.pid,
+                stream=stream,
+                data=data,
+            )
+        )
+
+    def _finished(self, _):
+        with self._lock:
+            self._pending -= 1
+            done = self._pending == 0
+        if done:
+            self._queue.put(None)
+
+    @staticmethod
+    def _kill(handle: CommandHandle):
+        try:
+            handle.kill()
+        except Exception as e:
+            logger.debug(f"Failed to kill command {handle.pid}: {e}")
@@ -1,7 +1,57 @@
-from io import IOBase
-from typing import IO, Iterator, List, Literal, Optional, overload, Union
-
-from e2b.sandbox.filesystem.filesystem import WriteEntry
+import hashlib
+import os
+import posixpath
+import shlex
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from typing import Callable, Dict, Iterator, List, Literal, Optional, TypeVar, overload
+
+from e2b.sandbox.filesystem.batch import (
+    DEFAULT_BATCH_CONCURRENCY,
+    BatchResult,
+    exists_result,
+    group_by_parent,
+    not_found,
+)
+from e2b.sandbox.filesystem.chunked import (
+    CHUNK_RETRIES,
+    FileRange,
+    assemble_command,
+    chunk_dir,
+    chunk_hashes_command,
+    chunk_name,
+    hash_file_range,
+    parse_chunk_hashes,
+    parse_range_hashes,
+    plan_chunks,
+    range_hashes_command,
+)
+from e2b.sandbox.utils import check_concurrency
+from e2b.sandbox.filesystem.filesystem import WriteData, WriteEntry
+from e2b.sandbox.filesystem.sync import (
+    MAX_SYNC_DEPTH,
+    IteratorReader,
+    SyncResult,
+    diff_trees,
+    extract_tar,
+    file_list,
+    hashes_command,
+    local_hashes,
+    local_tree,
+    pack_command,
+    parse_hashes,
+    remote_tree,
+    tar_stream,
+    temporary_path,
+    unpack_command,
+)
+from e2b.sandbox.filesystem.list_cache import (
+    DEFAULT_LIST_CACHE_TTL,
+    ListCache,
+    ListCacheStats,
+)
+from e2b.sandbox.filesystem.multipart import MultipartEncoder
 
 import e2b_connect
 import httpcore
@@ -9,7 +59,12 @@ import httpx
 from packaging.version import Version
 
 from e2b.envd.versions import ENVD_VERSION_RECURSIVE_WATCH, ENVD_DEFAULT_USER
-from e2b.exceptions import SandboxException, TemplateException, InvalidArgumentException
+from e2b.exceptions import (
+    InvalidArgumentException,
+    NotFoundException,
+    SandboxException,
+    TemplateException,
+)
 from e2b.connection_config import (
     ConnectionConfig,
     Username,
@@ -17,16 +72,28 @@ from e2b.connection_config import (
     KEEPALIVE_PING_HEADER,
     KEEPALIVE_PING_INTERVAL_SEC,
 )
-from e2b.envd.api import ENVD_API_FILES_ROUTE, handle_envd_api_exception
+from e2b.envd.api import (
+    ENVD_API_FILES_ROUTE,
+    handle_envd_api_exception,
+    ResponseBytes,
+)
 from e2b.envd.filesystem import filesystem_connect, filesystem_pb2
-from e2b.envd.rpc import authentication_header, handle_rpc_exception
+from e2b.envd.rpc import (
+    authentication_header,
+    handle_rpc_exception,
+    rpc_retry_policy,
+    use_json_codec,
+)
 from e2b.sandbox.filesystem.filesystem import (
     WriteInfo,
     EntryInfo,
     map_file_type,
 )
+from e2b.sandbox_sync.commands.command import Commands
 from e2b.sandbox_sync.filesystem.watch_handle import WatchHandle
 
+T = TypeVar("T")
+
 
 class Filesystem:
     """
@@ -40,20 +107,25 @@ class Filesystem:
         connection_config: ConnectionConfig,
         pool: httpcore.ConnectionPool,
         envd_api: httpx.Client,
+        commands: Optional[Commands] = None,
     ) -> None:
         self._envd_api_url = envd_api_url
         self._envd_version = envd_version
         self._connection_config = connection_config
         self._pool = pool
         self._envd_api = envd_api
+        self._commands = commands
+        self._list_cache: Optional[ListCache] = None
+        self._list_cache_watchers: Dict[str, WatchHandle] = {}
 
         self._rpc = filesystem_connect.FilesystemClient(
             envd_api_url,
             # TODO: Fix and enable compression again — the headers compression is not solved for streaming.
             # compressor=e2b_connect.GzipCompressor,
             pool=pool,
-            json=True,
+            json=use_json_codec(envd_version),
             headers=connection_config.sandbox_headers,
+            retry_policy=rpc_retry_policy(connection_config),
         )
 
     @overload
@@ -106,6 +178,7 @@ class Filesystem:
     ) -> Iterator[bytes]:
         """
         Read file content as a `Iterator[bytes]`.
+        The content is streamed from the sandbox as it is consumed, the connection is released once the iterator is exhausted or closed.
 
         :param path: Path to the file
         :param user: Run the operation as this user
@@ -131,6 +204,9 @@ class Filesystem:
         if username:
             params["username"] = username
 
+        if format == "stream":
+            return self._read_stream(params, request_timeout)
+
         r = self._envd_api.get(
             ENVD_API_FILES_ROUTE,
             params=params,
@@ -145,13 +221,188 @@ class Filesystem:
             return r.text
         elif format == "bytes":
             return bytearray(r.content)
-        elif format == "stream":
-            return r.iter_bytes()
+
+    def _read_stream(
+        self,
+        params: dict,
+        request_timeout: Optional[float],
+    ) -> Iterator[bytes]:
+        r = self._envd_api.send(
+            self._envd_api.build_request(
+                "GET",
+                ENVD_API_FILES_ROUTE,
+                params=params,
+                timeout=self._connection_config.get_request_timeout(request_timeout),
+            ),
+            stream=True,
+        )
+
+        err = handle_envd_api_exception(r)
+        if err:
+            r.close()
+            raise err
+
+        return ResponseBytes(r)
+
+    def read_to_path(
+        self,
+        path: str,
+        local_path: str,
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        chunk_size: Optional[int] = None,
+        concurrency: int = 4,
+    ) -> int:
+        """
+        Download a file to the local filesystem.
+        The file content is written to disk as it arrives, so it is never held in memory as a whole.
+
+        With `chunk_size` set, the file is downloaded in byte ranges over parallel requests.
+        Each chunk is checked against its SHA-256 in the sandbox and
+        only the chunks that failed or don't match are downloaded again.
+
+        :param path: Path to the file in the sandbox
+        :param local_path: Path to the local file, it will be overwritten if it already exists
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for the request in **seconds**
+        :param chunk_size: Size of the chunks in **bytes**, the file is downloaded over a single request if not set
+        :param concurrency: Maximum number of chunks downloaded at the same time
+
+        :return: Number of bytes written
+        """
+        if chunk_size is not None:
+            return self._read_chunked(
+                path, local_path, user, request_timeout, chunk_size, concurrency
+            )
+
+        # Opened before the request, so a local error doesn't leave the response open
+        with open(local_path, "wb") as f:
+            written = 0
+            try:
+                stream = self.read(
+                    path, format="stream", user=user, request_timeout=request_timeout
+                )
+                try:
+                    for chunk in stream:
+                        f.write(chunk)
+                        written += len(chunk)
+                finally:
+                    stream.close()
+            except BaseException:
+                f.close()
+                os.remove(local_path)
+                raise
+
+        return written
+
+    def _read_chunked(
+        self,
+        path: str,
+        local_path: str,
+        user: Optional[Username],
+        request_timeout: Optional[float],
+        chunk_size: int,
+        concurrency: int,
+    ) -> int:
+        check_concurrency(concurrency)
+        commands = self._require_commands("Chunked transfer")
+
+        size = self.get_info(path, user=user, request_timeout=request_timeout).size
+        chunks = plan_chunks(size, chunk_size)
+        expected = parse_range_hashes(
+            commands.run(
+                range_hashes_command(path, chunk_size, len(chunks)),
+                # Runs as long as the file takes to read, not limited by the command timeout
+                timeout=0,
+                user=user,
+                request_timeout=request_timeout,
+            ).stdout
+        )
+        if len(expected) != len(chunks):
+            raise SandboxException(f"Failed to get hashes of the chunks of {path}")
+
+        username = user
+        if username is None and self._envd_version < ENVD_DEFAULT_USER:
+            username = default_username
+
+        params = {"path": path}
+        if username:
+            params["username"] = username
+
+        def download(index: int) -> Optional[str]:
+            offset, length = chunks[index]
+            digest = hashlib.sha256()
+
+            try:
+                with self._envd_api.stream(
+                    "GET",
+                    ENVD_API_FILES_ROUTE,
+                    params=params,
+                    headers={"Range": f"bytes={offset}-{offset + length - 1}"},
+                    timeout=self._connection_config.get_request_timeout(
+                        request_timeout
+                    ),
+                ) as r:
+                    err = handle_envd_api_exception(r)
+                    if err:
+                        raise err
+
+                    with open(local_path, "r+b") as f:
+                        f.seek(offset)
+                        for data in r.iter_bytes():
+                            f.write(data)
+                            digest.update(data)
+            except httpx.TransportError:
+                # Chunks that failed in transit are retried
+                return None
+
+            return digest.hexdigest()
+
+        def verify(pending: List[int], digests: List[Optional[str]]) -> List[int]:
+            return [i for i, d in zip(pending, digests) if d != expected[i]]
+
+        with open(local_path, "wb") as f:
+            f.truncate(size)
+
+        try:
+            self._transfer_chunks(
+                path, list(range(len(chunks))), download, verify, concurrency
+            )
+        except BaseException:
+            os.remove(local_path)
+            raise
+
+        return size
+
+    def _transfer_chunks(
+        self,
+        path: str,
+        pending: List[int],
+        transfer: Callable[[int], Optional[str]],
+        verify: Callable[[List[int], List[Optional[str]]], List[int]],
+        concurrency: int,
+    ):
+        """
+        Transfer the chunks in parallel, `verify` returns the chunks that failed or didn't match their hash,
+        only those are transferred again.
+        """
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(CHUNK_RETRIES + 1):
+                if not pending:
+                    return
+
+                pending = verify(pending, list(executor.map(transfer, pending)))
+
+        if pending:
+            raise SandboxException(
+                f"Failed to transfer {len(pending)} chunks of {path} "
+                f"after {CHUNK_RETRIES} retries"
+            )
 
     def write(
         self,
         path: str,
-        data: Union[str, bytes, IO],
+        data: WriteData,
         user: Optional[Username] = None,
         request_timeout: Optional[float] = None,
     ) -> WriteInfo:
@@ -162,7 +413,7 @@ class Filesystem:
         Writing to a file at path that doesn't exist creates the necessary directories.
 
         :param path: Path to the file
-        :param data: Data to write to the file, can be a `str`, `bytes`, or `IO`.
+        :param data: Data to write to the file, can be a `str`, `bytes`, or `IO`. File objects are uploaded in chunks, without reading them into memory.
         :param user: Run the operation as this user
         :param request_timeout: Timeout for the request in **seconds**
 
@@ -179,6 +430,231 @@ class Filesystem:
 
         return result[0]
 
+    def write_from_path(
+        self,
+        path: str,
+        local_path: str,
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        chunk_size: Optional[int] = None,
+        concurrency: int = 4,
+    ) -> WriteInfo:
+        """
+        Upload a local file to the sandbox.
+        The file is read from disk as it is uploaded, so it is never held in memory as a whole.
+
+        With `chunk_size` set, the file is uploaded in chunks over parallel requests and assembled in the sandbox.
+        Each chunk is checked against its SHA-256,
+        only the chunks that failed or don't match are uploaded again.
+        Chunks left in the sandbox by an interrupted upload with the same `chunk_size` are reused.
+
+        :param path: Path to the file in the sandbox
+        :param local_path: Path to the local file
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for the request in **seconds**
+        :param chunk_size: Size of the chunks in **bytes**, the file is uploaded over a single request if not set
+        :param concurrency: Maximum number of chunks uploaded at the same time
+
+        :return: Information about the written file
+        """
+        if chunk_size is None:
+            with open(local_path, "rb") as f:
+                return self.write(path, f, user=user, request_timeout=request_timeout)
+
+        check_concurrency(concurrency)
+        commands = self._require_commands("Chunked transfer")
+
+        chunks = plan_chunks(os.path.getsize(local_path), chunk_size)
+        if not chunks:
+            # An empty file has no chunks to assemble
+            return self.write(path, b"", user=user, request_timeout=request_timeout)
+        directory = chunk_dir(path, chunk_size)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            expected = list(
+                executor.map(lambda c: hash_file_range(local_path, *c), chunks)
+            )
+
+        def uploaded() -> Dict[str, str]:
+            return parse_chunk_hashes(
+                commands.run(
+                    chunk_hashes_command(directory),
+                    timeout=0,
+                    user=user,
+                    request_timeout=request_timeout,
+                ).stdout
+            )
+
+        def upload(index: int) -> Optional[str]:
+            with FileRange(local_path, *chunks[index]) as f:
+                try:
+                    self.write(
+                        f"{directory}/{chunk_name(index)}",
+                        f,
+                        user=user,
+                        request_timeout=request_timeout,
+                    )
+                except httpx.TransportError:
+                    # Chunks that failed in transit are retried
+                    return None
+
+            return expected[index]
+
+        def missing(*_) -> List[int]:
+            existing = uploaded()
+            return [
+                i
+                for i in range(len(chunks))
+                if existing.get(chunk_name(i)) != expected[i]
+            ]
+
+        # Chunks already in the sandbox from an interrupted upload aren't sent again
+        self._transfer_chunks(path, missing(), upload, missing, concurrency)
+
+        commands.run(
+            assemble_command(directory, path, len(chunks)),
+            timeout=0,
+            user=user,
+            request_timeout=request_timeout,
+        )
+
+        info = self.get_info(path, user=user, request_timeout=request_timeout)
+        return WriteInfo(name=info.name, type=info.type, path=info.path)
+
+    def sync_dir(
+        self,
+        local_path: str,
+        remote_path: str,
+        direction: Literal["upload", "download"] = "upload",
+        checksum: bool = False,
+        depth: int = MAX_SYNC_DEPTH,
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+    ) -> SyncResult:
+        """
+        Sync a local directory with a directory in the sandbox, copying only the files that changed.
+
+        Both sides are listed and files are compared by size and modification time, or by SHA-256 with `checksum`.
+        Changed files are sent as one tar archive unpacked in a single command,
+        so the number of requests doesn't grow with the number of files.
+        Files missing in the source directory are not deleted from the target and symlinks are skipped.
+
+        :param local_path: Path to the local directory
+        :param remote_path: Path to the directory in the sandbox
+        :param direction: `upload` copies the local changes to the sandbox, `download` copies the sandbox changes to the local directory
+        :param checksum: Compare files of the same size by their SHA-256 instead of the modification time
+        :param depth: Depth of the directories to sync
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for the request in **seconds**
+
+        :return: Paths of the copied files and number of unchanged files
+        """
+        if direction not in ("upload", "download"):
+            raise InvalidArgumentException("direction should be 'upload' or 'download'")
+
+        commands = self._require_commands("Directory sync")
+
+        local = local_tree(local_path)
+        try:
+            root = self.get_info(
+                remote_path, user=user, request_timeout=request_timeout
+            ).path
+            remote = remote_tree(
+                self.list(
+                    root, depth=depth, user=user, request_timeout=request_timeout
+                ),
+                root,
+            )
+        except NotFoundException:
+            root, remote = remote_path, {}
+
+        source, target = (local, remote) if direction == "upload" else (remote, local)
+        changed, check = diff_trees(source, target, checksum)
+
+        if check:
+            list_path = temporary_path("list")
+            self.write(
+                list_path, file_list(check), user=user, request_timeout=request_timeout
+            )
+            remote_hashes = parse_hashes(
+                commands.run(
+                    hashes_command(root, list_path),
+                    timeout=0,
+                    user=user,
+                    request_timeout=request_timeout,
+                ).stdout
+            )
+            hashes = local_hashes(local_path, check, local)
+            changed = sorted(
+                changed + [n for n in check if remote_hashes.get(n) != hashes[n]]
+            )
+
+        if changed:
+            archive = temporary_path("tar")
+
+            if direction == "upload":
+                self.write(
+                    archive,
+                    IteratorReader(tar_stream(local_path, changed, local)),
+                    user=user,
+                    request_timeout=request_timeout,
+                )
+                commands.run(
+                    unpack_command(archive, root),
+                    timeout=0,
+                    user=user,
+                    request_timeout=request_timeout,
+                )
+            else:
+                self._download_archive(
+                    root, archive, changed, local_path, user, request_timeout
+                )
+
+        return SyncResult(transferred=changed, unchanged=len(source) - len(changed))
+
+    def _download_archive(
+        self,
+        root: str,
+        archive: str,
+        names: List[str],
+        local_path: str,
+        user: Optional[Username],
+        request_timeout: Optional[float],
+    ):
+        commands = self._require_commands("Directory sync")
+
+        list_path = temporary_path("list")
+        self.write(
+            list_path, file_list(names), user=user, request_timeout=request_timeout
+        )
+
+        try:
+            commands.run(
+                pack_command(root, list_path, archive),
+                timeout=0,
+                user=user,
+                request_timeout=request_timeout,
+            )
+
+            with tempfile.TemporaryDirectory() as tmp:
+                local_archive = os.path.join(tmp, "sync.tar")
+                self.read_to_path(
+                    archive, local_archive, user=user, request_timeout=request_timeout
+                )
+                extract_tar(local_archive, local_path)
+        finally:
+            commands.run(
+                f"rm -f {shlex.quote(archive)}",
+                user=user,
+                request_timeout=request_timeout,
+            )
+
+    def _require_commands(self, feature: str) -> "Commands":
+        if self._commands is None:
+            raise SandboxException(f"{feature} needs to run commands in the sandbox")
+
+        return self._commands
+
     def write_files(
         self,
         files: List[WriteEntry],
@@ -206,29 +682,26 @@ class Filesystem:
         if len(files) == 1:
             params["path"] = files[0]["path"]
 
-        # Prepare the files for the multipart/form-data request
-        httpx_files = []
-        for file in files:
-            file_path, file_data = file["path"], file["data"]
-            if isinstance(file_data, str) or isinstance(file_data, bytes):
-                httpx_files.append(("file", (file_path, file_data)))
-            elif isinstance(file_data, IOBase):
-                httpx_files.append(("file", (file_path, file_data.read())))
-            else:
-                raise InvalidArgumentException(
-                    f"Unsupported data type for file {file_path}"
-                )
-
         # Allow passing empty list of files
-        if len(httpx_files) == 0:
+        if len(files) == 0:
             return []
 
+        # The multipart/form-data body is streamed, file objects are read chunk by chunk while uploading
+        encoder = MultipartEncoder([(file["path"], file["data"]) for file in files])
+
+        if encoder.is_async:
+            raise InvalidArgumentException(
+                "Async iterables can be only written with the async SDK"
+            )
+
         r = self._envd_api.post(
             ENVD_API_FILES_ROUTE,
-            files=httpx_files,
+            content=encoder,
+            headers=encoder.headers,
             params=params,
             timeout=self._connection_config.get_request_timeout(request_timeout),
         )
+        self._invalidate_list_cache(*(file["path"] for file in files))
 
         err = handle_envd_api_exception(r)
         if err:
@@ -261,6 +734,13 @@ class Filesystem:
         if depth is not None and depth < 1:
             raise InvalidArgumentException("depth should be at least 1")
 
+        cache = self._list_cache
+        if cache is not None:
+            cached = self._cached_list(cache, path, depth, user)
+            if cached is not None:
+                return cached
+            generation = cache.generation
+
         try:
             res = self._rpc.list_dir(
                 filesystem_pb2.ListDirRequest(path=path, depth=depth),
@@ -295,6 +775,9 @@ class Filesystem:
                         )
                     )
 
+            if cache is not None:
+                cache.put(path, depth, user, entries, generation)
+
             return entries
         except Exception as e:
             raise handle_rpc_exception(e)
@@ -397,6 +880,8 @@ class Filesystem:
             )
         except Exception as e:
             raise handle_rpc_exception(e)
+        finally:
+            self._invalidate_list_cache(path)
 
     def rename(
         self,
@@ -446,6 +931,8 @@ class Filesystem:
             )
         except Exception as e:
             raise handle_rpc_exception(e)
+        finally:
+            self._invalidate_list_cache(old_path, new_path)
 
     def make_dir(
         self,
@@ -477,6 +964,160 @@ class Filesystem:
                 if e.status == e2b_connect.Code.already_exists:
                     return False
             raise handle_rpc_exception(e)
+        finally:
+            self._invalidate_list_cache(path)
+
+    def exists_many(
+        self,
+        paths: List[str],
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[BatchResult[bool]]:
+        """
+        Check if files or directories exist.
+        Requests for the paths are sent in parallel, many paths in the same directory are checked with a single listing.
+
+        :param paths: Paths to files or directories
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for each request in **seconds**
+        :param concurrency: Maximum number of requests sent at the same time
+
+        :return: Results in the order of `paths`, each with `True` if the path exists or the error for the path
+        """
+        return [
+            exists_result(r)
+            for r in self.stat_many(
+                paths,
+                user=user,
+                request_timeout=request_timeout,
+                concurrency=concurrency,
+            )
+        ]
+
+    def stat_many(
+        self,
+        paths: List[str],
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[BatchResult[EntryInfo]]:
+        """
+        Get information about files or directories.
+        Requests for the paths are sent in parallel, many paths in the same directory are looked up with a single listing.
+
+        :param paths: Paths to files or directories
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for each request in **seconds**
+        :param concurrency: Maximum number of requests sent at the same time
+
+        :return: Results in the order of `paths`, each with the information about the path or the error for the path
+        """
+        check_concurrency(concurrency)
+
+        results: List[Optional[BatchResult[EntryInfo]]] = [None] * len(paths)
+        groups, singles = group_by_parent(paths)
+
+        def list_parent(parent: str) -> List[int]:
+            indices = groups[parent]
+            try:
+                entries = {
+                    e.name: e
+                    for e in self.list(
+                        parent, user=user, request_timeout=request_timeout
+                    )
+                }
+            except NotFoundException:
+                entries = {}
+            except Exception:
+                # Fall back to looking up the paths one by one
+                return indices
+
+            for i in indices:
+                entry = entries.get(posixpath.basename(paths[i]))
+                results[i] = (
+                    BatchResult(paths[i], value=entry)
+                    if entry is not None
+                    else BatchResult(paths[i], error=not_found(paths[i]))
+                )
+            return []
+
+        def stat(index: int):
+            results[index] = self._batch_item(
+                paths[index],
+                lambda p: self.get_info(p, user=user, request_timeout=request_timeout),
+            )
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for fallback in executor.map(list_parent, groups):
+                singles.extend(fallback)
+            list(executor.map(stat, singles))
+
+        return results
+
+    def remove_many(
+        self,
+        paths: List[str],
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[BatchResult[None]]:
+        """
+        Remove files or directories, requests for the paths are sent in parallel.
+
+        :param paths: Paths to files or directories
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for each request in **seconds**
+        :param concurrency: Maximum number of requests sent at the same time
+
+        :return: Results in the order of `paths`, each with the error for the path if it couldn't be removed
+        """
+        return self._batch(
+            paths,
+            lambda p: self.remove(p, user=user, request_timeout=request_timeout),
+            concurrency,
+        )
+
+    def make_dirs(
+        self,
+        paths: List[str],
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[BatchResult[bool]]:
+        """
+        Create directories and all directories along the way if needed, requests for the paths are sent in parallel.
+
+        :param paths: Paths to new directories
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for each request in **seconds**
+        :param concurrency: Maximum number of requests sent at the same time
+
+        :return: Results in the order of `paths`, each with `True` if the directory was created, `False` if it already existed, or the error for the path
+        """
+        return self._batch(
+            paths,
+            lambda p: self.make_dir(p, user=user, request_timeout=request_timeout),
+            concurrency,
+        )
+
+    def _batch(
+        self,
+        paths: List[str],
+        operation: Callable[[str], T],
+        concurrency: int,
+    ) -> List[BatchResult[T]]:
+        check_concurrency(concurrency)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(lambda p: self._batch_item(p, operation), paths))
+
+    @staticmethod
+    def _batch_item(path: str, operation: Callable[[str], T]) -> BatchResult[T]:
+        try:
+            return BatchResult(path, value=operation(path))
+        except Exception as e:
+            return BatchResult(path, error=e)
 
     def watch_dir(
         self,
@@ -516,3 +1157,88 @@ class Filesystem:
             raise handle_rpc_exception(e)
 
         return WatchHandle(self._rpc, r.watcher_id)
+
+    def enable_list_cache(
+        self,
+        path: str,
+        ttl: float = DEFAULT_LIST_CACHE_TTL,
+        user: Optional[Username] = None,
+        request_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Cache the results of `list()` for the directory and everything inside it.
+
+        The directory is watched recursively and a cached listing is dropped when a change inside it is reported,
+        changes made through this module drop it right away.
+        There is no background task receiving the reported changes,
+        so every `list()` inside the directory first fetches them with one request to the sandbox.
+        A cache hit saves listing the directory again, not the round trip, so it pays off for large or deep listings.
+        A listing is requested from the sandbox again after `ttl` seconds at the latest.
+
+        :param path: Path to the watched directory, only listings of paths inside it, written the same way, are cached
+        :param ttl: Maximum time in **seconds** a cached listing is used for
+        :param user: Run the operation as this user
+        :param request_timeout: Timeout for the request in **seconds**
+        """
+        if self._list_cache is None:
+            self._list_cache = ListCache(ttl)
+        self._list_cache.ttl = ttl
+
+        root = posixpath.normpath(path)
+        if root in self._list_cache_watchers:
+            return
+
+        self._list_cache_watchers[root] = self.watch_dir(
+            path, user=user, request_timeout=request_timeout, recursive=True
+        )
+        self._list_cache.add_root(root)
+
+    def disable_list_cache(self) -> None:
+        """
+        Stop caching directory listings and stop the watchers used for it.
+        """
+        for handle in self._list_cache_watchers.values():
+            try:
+                handle.stop()
+            except Exception:
+                pass
+
+        self._list_cache_watchers = {}
+        self._list_cache = None
+
+    @property
+    def list_cache_stats(self) -> Optional[ListCacheStats]:
+        """
+        Hit, miss and invalidation counters of the directory listing cache, `None` if the cache isn't enabled.
+        """
+        return self._list_cache.stats if self._list_cache is not None else None
+
+    def _cached_list(
+        self,
+        cache: ListCache,
+        path: str,
+        depth: Optional[int],
+        user: Optional[Username],
+    ) -> Optional[List[EntryInfo]]:
+        root = cache.root_for(path)
+        if root is None:
+            return None
+
+        # One request on every lookup, there is no background task receiving the events
+        try:
+            events = self._list_cache_watchers[root].get_new_events()
+        except Exception:
+            # Without the watcher the cached listings can't be trusted anymore
+            self._list_cache_watchers.pop(root, None)
+            cache.remove_root(root)
+            return None
+
+        for event in events:
+            cache.on_event(root, event)
+
+        return cache.get(path, depth, user)
+
+    def _invalidate_list_cache(self, *paths: str):
+        if self._list_cache is not None:
+            for path in paths:
+                self._list_cache.invalidate(path)
@@ -1,10 +1,10 @@
-import urllib.parse
-from typing import Optional, List
+import queue
+import threading
+from typing import Iterator, List, Union
 
 from e2b.api import handle_api_exception
 from e2b.api.client.api.sandboxes import get_v2_sandboxes
 from e2b.api.client.models.error import Error
-from e2b.api.client.types import UNSET
 from e2b.exceptions import SandboxException
 from e2b.sandbox.sandbox_api import SandboxPaginatorBase, SandboxInfo
 from e2b.api.client_sync import get_api_client
@@ -22,6 +22,13 @@ class SandboxPaginator(SandboxPaginatorBase):
         sandboxes = paginator.next_items()
         print(sandboxes)
     ```
+
+    The paginator can also be iterated over, the next `prefetch` pages are fetched in a background thread
+    while the current one is being consumed:
+    ```python
+    for sandbox in Sandbox.list(limit=500, prefetch=2):
+        print(sandbox.sandbox_id)
+    ```
     """
 
     def next_items(self) -> List[SandboxInfo]:
@@ -35,22 +42,10 @@ class SandboxPaginator(SandboxPaginatorBase):
         if not self.has_next:
             raise Exception("No more items to fetch")
 
-        # Convert filters to the format expected by the API
-        metadata: Optional[str] = None
-        if self.query and self.query.metadata:
-            quoted_metadata = {
-                urllib.parse.quote(k): urllib.parse.quote(v)
-                for k, v in self.query.metadata.items()
-            }
-            metadata = urllib.parse.urlencode(quoted_metadata)
-
         api_client = get_api_client(self._config)
         res = get_v2_sandboxes.sync_detailed(
             client=api_client,
-            metadata=metadata if metadata else UNSET,
-            state=self.query.state if self.query and self.query.state else UNSET,
-            limit=self.limit if self.limit else UNSET,
-            next_token=self._next_token if self._next_token else UNSET,
+            **self._list_params(),
         )
 
         if res.status_code >= 300:
@@ -67,3 +62,50 @@ class SandboxPaginator(SandboxPaginatorBase):
             raise SandboxException(f"{res.parsed.message}: Request failed")
 
         return [SandboxInfo._from_listed_sandbox(sandbox) for sandbox in res.parsed]
+
+    def __iter__(self) -> Iterator[SandboxInfo]:
+        """
+        Iterate over the remaining sandboxes, fetching up to `prefetch` pages ahead.
+
+        Don't call `next_items` while iterating, the pages are fetched by the iteration.
+        """
+        if self.prefetch == 0:
+            while self.has_next:
+                yield from self.next_items()
+            return
+
+        pages: "queue.Queue[Union[List[SandboxInfo], Exception, None]]" = queue.Queue()
+        # A slot is taken for every page fetched and freed once it's being consumed
+        slots = threading.Semaphore(self.prefetch)
+        stopped = threading.Event()
+
+        def fetch():
+            try:
+                while self.has_next:
+                    slots.acquire()
+                    if stopped.is_set():
+                        return
+                    pages.put(self.next_items())
+            except Exception as e:
+                pages.put(e)
+                return
+
+            pages.put(None)
+
+        threading.Thread(
+            target=fetch, name="e2b-sandbox-list-prefetch", daemon=True
+        ).start()
+        try:
+            while True:
+                page = pages.get()
+                if page is None:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+
+                slots.release()
+                yield from page
+        finally:
+            # Wake up the fetching thread if it's waiting for a slot
+            stopped.set()
+            slots.release()
@@ -0,0 +1,328 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Generic, List, Optional, Type, TypeVar
+
+from typing_extensions import Unpack
+
+from e2b.connection_config import ApiParams
+from e2b.exceptions import InvalidArgumentException, SandboxException
+from e2b.sandbox.pool import (
+    DEFAULT_HEALTH_CHECK_INTERVAL,
+    DEFAULT_POOL_SANDBOX_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    PoolBucket,
+    PoolKey,
+    PooledSandbox,
+    PoolMetrics,
+    SandboxPoolStats,
+    pool_key,
+)
+from e2b.sandbox_sync.main import Sandbox
+
+logger = logging.getLogger(__name__)
+
+S = TypeVar("S", bound=Sandbox)
+
+
+class SandboxPool(Generic[S]):
+    """
+    Pool keeping sandboxes warm, so they can be checked out without waiting for a new sandbox to start.
+
+    For each template, metadata and environment variables combination that was warmed up or checked out,
+    the pool keeps `size` sandboxes running and refills them in background threads as they are checked out.
+    The waiting sandboxes are periodically checked with `is_running` and have their timeout extended with `set_timeout`,
+    the ones that stopped running are evicted.
+
+    Example
+    ```python
+    with SandboxPool(size=4) as pool:
+        pool.warm("base")
+
+        sandbox = pool.checkout("base")
+        ...
+        sandbox.kill()
+    ```
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: int = DEFAULT_POOL_SANDBOX_TIMEOUT,
+        health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+        sandbox_class: Type[S] = Sandbox,
+        **opts: Unpack[ApiParams],
+    ):
+        """
+        :param size: Number of warm sandboxes kept for each template, metadata and environment variables combination
+        :param timeout: Timeout for the warm sandboxes in **seconds**, extended for as long as they wait in the pool
+        :param health_check_interval: Interval in **seconds** in which the warm sandboxes are checked and the pool is refilled, should be less than half of `timeout`
+        :param sandbox_class: Sandbox class used to create the sandboxes
+        """
+        if size < 0:
+            raise InvalidArgumentException("Pool size must not be negative")
+        if health_check_interval <= 0 or health_check_interval * 2 >= timeout:
+            raise InvalidArgumentException(
+                "Health check interval must be positive and less than half of the timeout"
+            )
+
+        self._size = size
+        self._timeout = timeout
+        self._health_check_interval = health_check_interval
+        self._sandbox_class = sandbox_class
+        self._opts = opts
+        self._buckets: Dict[PoolKey, PoolBucket[S]] = {}
+        self._metrics = PoolMetrics()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="e2b-sandbox-pool")
+        self._maintenance: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> SandboxPoolStats:
+        """
+        Counters and checkout latencies of the pool.
+        """
+        with self._lock:
+            idle = sum(len(bucket.idle) for bucket in self._buckets.values())
+        return self._metrics.snapshot(idle)
+
+    def warm(
+        self,
+        template: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        envs: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Start keeping sandboxes warm for the combination and wait until the pool is filled.
+        If any sandbox fails to start, its error is raised once the others started,
+        the pool keeps trying to fill up in the background with a growing delay between the attempts.
+
+        :param template: Sandbox template name or ID, defaults to the default template of the sandbox class
+        :param metadata: Custom metadata for the sandboxes
+        :param envs: Custom environment variables for the sandboxes
+        """
+        bucket = self._bucket(template, metadata, envs)
+        errors = [future.result() for future in self._refill(bucket, force=True)]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def checkout(
+        self,
+        template: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        envs: Optional[Dict[str, str]] = None,
+        timeout: Optional[int] = None,
+    ) -> S:
+        """
+        Take a running sandbox out of the pool, a new one is created if there is no warm sandbox available.
+        The pool is refilled in the background, the checked out sandbox is not returned to the pool.
+
+        :param template: Sandbox template name or ID, defaults to the default template of the sandbox class
+        :param metadata: Custom metadata for the sandbox
+        :param envs: Custom environment variables for the sandbox
+        :param timeout: Timeout for the sandbox in **seconds** from the checkout, defaults to the default timeout of the sandbox class
+
+        :return: Sandbox owned by the caller
+        """
+        start = time.monotonic()
+        bucket = self._bucket(template, metadata, envs)
+        timeout = timeout or self._sandbox_class.default_sandbox_timeout
+
+        try:
+            while True:
+                with self._lock:
+                    if not bucket.idle:
+                        break
+                    pooled = bucket.idle.popleft()
+                    pooled.lease_timeout = timeout
+
+                sandbox = self._lease(pooled, timeout)
+                if sandbox is not None:
+                    self._metrics.checkout(time.monotonic() - start, warm=True)
+                    return sandbox
+
+            sandbox = self._sandbox_class.create(
+                template=bucket.template,
+                timeout=timeout,
+                metadata=bucket.metadata,
+                envs=bucket.envs,
+                **self._opts,
+            )
+            self._metrics.checkout(time.monotonic() - start, warm=False)
+            return sandbox
+        finally:
+            self._refill(bucket)
+
+    def close(self) -> None:
+        """
+        Stop refilling the pool and kill the warm sandboxes. Checked out sandboxes are not affected.
+        """
+        with self._lock:
+            self._closed = True
+        self._stopped.set()
+        if self._maintenance is not None:
+            self._maintenance.join()
+
+        # Sandboxes still being created are killed as soon as they start
+        self._executor.shutdown(wait=True)
+
+        with self._lock:
+            idle: List[PooledSandbox[S]] = []
+            for bucket in self._buckets.values():
+                idle.extend(bucket.idle)
+                bucket.idle.clear()
+
+        if idle:
+            with ThreadPoolExecutor(max_workers=len(idle)) as executor:
+                executor.map(lambda pooled: self._kill(pooled.sandbox), idle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _bucket(
+        self,
+        template: Optional[str],
+        metadata: Optional[Dict[str, str]],
+        envs: Optional[Dict[str, str]],
+    ) -> PoolBucket[S]:
+        template = template or self._sandbox_class.default_template
+        key = pool_key(template, metadata, envs)
+
+        with self._lock:
+            if self._closed:
+                raise SandboxException("Sandbox pool is closed")
+
+            if self._maintenance is None:
+                self._maintenance = threading.Thread(
+                    target=self._maintain,
+                    name="e2b-sandbox-pool-maintenance",
+                    daemon=True,
+                )
+                self._maintenance.start()
+
+            if key not in self._buckets:
+                self._buckets[key] = PoolBucket(
+                    template=template,
+                    metadata=dict(metadata) if metadata else None,
+                    envs=dict(envs) if envs else None,
+                )
+            return self._buckets[key]
+
+    def _refill(self, bucket: PoolBucket[S], force: bool = False) -> List[Future]:
+        """
+        Start creating the missing sandboxes, unless the last attempts failed recently and `force` isn't set.
+        The futures result in the creation error, `None` if the sandbox started.
+        """
+        with self._lock:
+            if self._closed or (not force and time.monotonic() < bucket.retry_at):
+                return []
+
+            missing = bucket.missing(self._size)
+            bucket.pending += missing
+            return [self._executor.submit(self._create, bucket) for _ in range(missing)]
+
+    def _create(self, bucket: PoolBucket[S]) -> Optional[Exception]:
+        try:
+            sandbox = self._sandbox_class.create(
+                template=bucket.template,
+                timeout=self._timeout,
+                metadata=bucket.metadata,
+                envs=bucket.envs,
+                **self._opts,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to create a warm sandbox: {e}")
+            self._metrics.error()
+            with self._lock:
+                bucket.pending -= 1
+                bucket.failed(time.monotonic(), self._health_check_interval)
+            return e
+
+        now = time.monotonic()
+        with self._lock:
+            bucket.pending -= 1
+            bucket.started()
+            closed = self._closed
+            if not closed:
+                bucket.idle.append(PooledSandbox(sandbox, now + self._timeout, now))
+
+        if closed:
+            self._kill(sandbox)
+        return None
+
+    def _lease(self, pooled: PooledSandbox[S], timeout: int) -> Optional[S]:
+        """
+        Prepare a warm sandbox for the checkout, returns `None` if it was evicted.
+        """
+        now = time.monotonic()
+        try:
+            if pooled.needs_check(now, self._health_check_interval):
+                if not pooled.sandbox.is_running():
+                    raise SandboxException("Sandbox is not running")
+
+            pooled.sandbox.set_timeout(timeout)
+            return pooled.sandbox
+        except Exception as e:
+            self._evict(pooled, e)
+            return None
+
+    def _maintain(self) -> None:
+        while not self._stopped.wait(self._health_check_interval):
+            with self._lock:
+                buckets = list(self._buckets.values())
+
+            for bucket in buckets:
+                with self._lock:
+                    idle = list(bucket.idle)
+
+                for pooled in idle:
+                    self._keep_alive(bucket, pooled)
+                self._refill(bucket)
+
+    def _keep_alive(self, bucket: PoolBucket[S], pooled: PooledSandbox[S]):
+        now = time.monotonic()
+        try:
+            if not pooled.sandbox.is_running():
+                raise SandboxException("Sandbox is not running")
+            pooled.checked_at = now
+
+            if pooled.needs_extension(now, self._timeout):
+                with self._lock:
+                    # Checked out in the meantime, the checkout sets its own timeout
+                    if pooled.lease_timeout is not None:
+                        return
+
+                pooled.sandbox.set_timeout(self._timeout)
+                pooled.expires_at = now + self._timeout
+
+                with self._lock:
+                    lease_timeout = pooled.lease_timeout
+                if lease_timeout is not None:
+                    # Checked out while being extended, the timeout of the checkout must win
+                    pooled.sandbox.set_timeout(lease_timeout)
+        except Exception as e:
+            with self._lock:
+                # Checked out in the meantime, the checkout did its own check
+                if pooled not in bucket.idle:
+                    return
+                bucket.idle.remove(pooled)
+            self._evict(pooled, e)
+
+    def _evict(self, pooled: PooledSandbox[S], reason: Exception):
+        logger.info(f"Evicting sandbox {pooled.sandbox.sandbox_id}: {reason}")
+        self._metrics.eviction()
+        self._kill(pooled.sandbox)
+
+    @staticmethod
+    def _kill(sandbox: S) -> None:
+        try:
+            sandbox.kill()
+        except Exception as e:
+            logger.debug(f"Failed to kill sandbox {sandbox.sandbox_id}: {e}")
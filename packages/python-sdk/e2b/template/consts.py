@@ -28,3 +28,13 @@ Default setting for whether to resolve symbolic links when copying files.
 When False, symlinks are copied as symlinks rather than following them.
 """
 RESOLVE_SYMLINKS = False
+
+"""
+Default number of COPY steps whose files are uploaded at the same time during a template build.
+"""
+DEFAULT_UPLOAD_CONCURRENCY = 4
+
+"""
+Interval in **seconds** between the progress entries logged for each file upload during a template build.
+"""
+UPLOAD_PROGRESS_INTERVAL = 5
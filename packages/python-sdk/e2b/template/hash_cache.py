@@ -0,0 +1,258 @@
+"""
+On-disk cache of the hashes of the files copied into templates.
+
+Hashing a COPY step reads every copied file, which takes long for large build contexts.
+The cache keeps the hash of each COPY step together with a fingerprint of the copied files made from their
+path, size, modification time, inode and mode. When none of the files changed, the hash is reused without reading them.
+
+The cache of a build context is stored in `$XDG_CACHE_HOME/e2b/template-hashes` (`~/.cache/e2b/template-hashes` by default).
+Set `E2B_TEMPLATE_HASH_CACHE_DIR` to store it elsewhere, a relative path is resolved against the build context,
+so `.e2b` keeps the cache in the build context itself. Set `E2B_TEMPLATE_HASH_CACHE=false` to disable the cache.
+
+Inspect or clear the cache with:
+```
+python -m e2b.template.hash_cache info [CONTEXT]
+python -m e2b.template.hash_cache clear [CONTEXT]
+```
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HASH_CACHE_ENV = "E2B_TEMPLATE_HASH_CACHE"
+"""
+Environment variable disabling the template hash cache when set to `false`.
+"""
+
+HASH_CACHE_DIR_ENV = "E2B_TEMPLATE_HASH_CACHE_DIR"
+"""
+Environment variable with the directory the template hash caches are stored in.
+"""
+
+HASH_CACHE_VERSION = 1
+"""
+Version of the cache file format, caches of other versions are ignored.
+"""
+
+MAX_HASH_CACHE_ENTRIES = 1024
+"""
+Maximum number of COPY steps kept in the cache of one build context, the least recently used ones are dropped first.
+"""
+
+RACY_MTIME_WINDOW_NS = 2_000_000_000
+"""
+Files modified less than this many nanoseconds before hashing started aren't cached.
+A file can still change within the same modification time tick, its fingerprint wouldn't tell.
+"""
+
+
+def default_cache_dir() -> str:
+    """
+    Directory the template hash caches are stored in when `E2B_TEMPLATE_HASH_CACHE_DIR` isn't set.
+    """
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "e2b", "template-hashes")
+
+
+def cache_path(context_path: str) -> str:
+    """
+    Path of the cache file of the build context.
+    """
+    context_path = os.path.abspath(context_path)
+    cache_dir = os.getenv(HASH_CACHE_DIR_ENV)
+    if cache_dir:
+        cache_dir = os.path.join(context_path, os.path.expanduser(cache_dir))
+    else:
+        cache_dir = default_cache_dir()
+
+    name = hashlib.sha256(context_path.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{name}.json")
+
+
+class FilesHashCache:
+    """
+    Cache of the COPY step hashes of one build context.
+
+    The entries are read when the cache is created and written back by `save`.
+    Failing to read or write the cache never fails the build, the hashes are calculated from the files instead.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path of the cache file
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def for_context(cls, context_path: str) -> Optional["FilesHashCache"]:
+        """
+        Cache of the build context, `None` if the cache is disabled.
+        """
+        if os.getenv(HASH_CACHE_ENV, "true").lower() == "false":
+            return None
+        return cls(cache_path(context_path))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, fingerprint: str) -> Optional[str]:
+        """
+        Hash of the step if the files still have the given fingerprint.
+
+        :param key: Key of the COPY step
+        :param fingerprint: Fingerprint of the copied files
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        entry["used"] = time.time()
+        self._dirty = True
+        return entry["hash"]
+
+    def put(self, key: str, fingerprint: str, files_hash: str) -> None:
+        """
+        Store the hash of the step for the fingerprint of the copied files.
+        """
+        self._entries[key] = {
+            "fingerprint": fingerprint,
+            "hash": files_hash,
+            "used": time.time(),
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        """
+        Write the cache back to disk if it changed, keeping the most recently used entries.
+        """
+        if not self._dirty:
+            return
+
+        entries = sorted(
+            self._entries.items(), key=lambda item: item[1]["used"], reverse=True
+        )[:MAX_HASH_CACHE_ENTRIES]
+        data = {"version": HASH_CACHE_VERSION, "entries": dict(entries)}
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # Written next to the cache and renamed, so concurrent builds never read a partial file
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.path), suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.debug(f"Failed to write the template hash cache {self.path}: {e}")
+            return
+
+        self._dirty = False
+
+    def clear(self) -> None:
+        """
+        Remove all entries and the cache file.
+        """
+        self._entries.clear()
+        self._dirty = False
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring the template hash cache {self.path}: {e}")
+            return
+
+        if isinstance(data, dict) and data.get("version") == HASH_CACHE_VERSION:
+            self._entries = data.get("entries", {})
+
+
+def copy_step_key(
+    src: str, dest: str, ignore_patterns: List[str], resolve_symlinks: bool
+) -> str:
+    """
+    Key of a COPY step in the cache.
+    """
+    return json.dumps([src, dest, sorted(ignore_patterns), resolve_symlinks])
+
+
+def _cache_files(cache_dir: str) -> List[str]:
+    if not os.path.isdir(cache_dir):
+        return []
+    return sorted(
+        os.path.join(cache_dir, name)
+        for name in os.listdir(cache_dir)
+        if name.endswith(".json")
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m e2b.template.hash_cache",
+        description="Inspect or clear the cache of the template file hashes.",
+    )
+    parser.add_argument("command", choices=["info", "clear"])
+    parser.add_argument(
+        "context",
+        nargs="?",
+        help="Build context directory, all cached build contexts by default",
+    )
+    args = parser.parse_args(argv)
+
+    if args.context is not None:
+        paths = [cache_path(args.context)]
+    else:
+        cache_dir = os.getenv(HASH_CACHE_DIR_ENV)
+        if cache_dir and not os.path.isabs(os.path.expanduser(cache_dir)):
+            parser.error(
+                f"{HASH_CACHE_DIR_ENV} is relative to the build context, pass the build context"
+            )
+        paths = _cache_files(
+            os.path.expanduser(cache_dir) if cache_dir else default_cache_dir()
+        )
+
+    for path in paths:
+        cache = FilesHashCache(path)
+        if args.command == "clear":
+            cache.clear()
+            print(f"Cleared {path}")
+            continue
+
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        print(f"{path}: {len(cache)} steps, {size} bytes")
+
+    if not paths:
+        print("No template hash caches found")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,15 +6,18 @@ from pathlib import Path
 from e2b.exceptions import BuildException
 from e2b.template.consts import STACK_TRACE_DEPTH, RESOLVE_SYMLINKS
 from e2b.template.dockerfile_parser import parse_dockerfile
+from e2b.template.hash_cache import FilesHashCache
 from e2b.template.readycmd import ReadyCmd, wait_for_file
 from e2b.template.types import (
     CopyItem,
+    FileUpload,
     Instruction,
     TemplateType,
     RegistryConfig,
     InstructionType,
 )
 from e2b.template.utils import (
+    FileContextIndex,
     calculate_files_hash,
     get_caller_directory,
     pad_octal,
@@ -1257,15 +1260,35 @@ class TemplateBase:
 
         return dockerfile
 
+    def _file_index(self) -> FileContextIndex:
+        """
+        Index of the build context, ignoring the files matching the ignore patterns of the template and `.dockerignore`.
+
+        :return: Index to share by the steps of one build
+        """
+        return FileContextIndex(
+            self._file_context_path,
+            [
+                *self._file_ignore_patterns,
+                *read_dockerignore(self._file_context_path),
+            ],
+        )
+
     def _instructions_with_hashes(
         self,
+        file_index: Optional[FileContextIndex] = None,
     ) -> List[Instruction]:
         """
         Add file hashes to COPY instructions for cache invalidation.
 
+        :param file_index: Index of the build context shared with the uploads of the build, created if not given
+
         :return: Copy of instructions list with filesHash added to COPY instructions
         """
         steps: List[Instruction] = []
+        if file_index is None:
+            file_index = self._file_index()
+        cache = FilesHashCache.for_context(self._file_context_path)
 
         for index, instruction in enumerate(self._instructions):
             step: Instruction = {
@@ -1292,20 +1315,65 @@ class TemplateBase:
                     src,
                     dest,
                     self._file_context_path,
-                    [
-                        *self._file_ignore_patterns,
-                        *read_dockerignore(self._file_context_path),
-                    ],
+                    file_index.ignore_patterns,
                     resolve_symlinks
                     if resolve_symlinks is not None
                     else RESOLVE_SYMLINKS,
                     stack_trace,
+                    cache,
+                    index=file_index,
                 )
 
             steps.append(step)
 
+        if cache is not None:
+            cache.save()
+
         return steps
 
+    def _file_uploads(self, steps: List[Instruction]) -> List[FileUpload]:
+        """
+        Collect the files to upload for the COPY steps.
+
+        Steps copying identical files have the same hash, they share one upload.
+
+        :param steps: List of build instructions with file hashes
+
+        :return: Files to upload in the order of the steps
+        """
+        uploads: Dict[str, FileUpload] = {}
+
+        for index, step in enumerate(steps):
+            if step["type"] != InstructionType.COPY:
+                continue
+
+            args = step.get("args", [])
+            src = args[0] if len(args) > 0 else None
+            files_hash = step.get("filesHash", None)
+            if src is None or files_hash is None:
+                raise ValueError("Source path and files hash are required")
+
+            upload = uploads.get(files_hash)
+            if upload is None:
+                stack_trace = None
+                if index + 1 < len(self._stack_traces):
+                    stack_trace = self._stack_traces[index + 1]
+
+                resolve_symlinks = step.get("resolveSymlinks")
+                upload = uploads[files_hash] = FileUpload(
+                    src=src,
+                    files_hash=files_hash,
+                    resolve_symlinks=resolve_symlinks
+                    if resolve_symlinks is not None
+                    else RESOLVE_SYMLINKS,
+                    stack_trace=stack_trace,
+                )
+
+            if step.get("forceUpload"):
+                upload.force_upload = True
+
+        return list(uploads.values())
+
     def _serialize(self, steps: List[Instruction]) -> TemplateType:
         """
         Serialize the template to the API request format.
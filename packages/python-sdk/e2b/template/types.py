@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
+from types import TracebackType
 from typing import List, Literal, Optional, TypedDict, Union
 
 from typing_extensions import NotRequired
@@ -103,3 +104,31 @@ class BuildInfo:
     alias: str
     template_id: str
     build_id: str
+
+
+@dataclass
+class FileUpload:
+    """
+    Files of a COPY step to upload, shared by all steps copying identical files.
+    """
+
+    src: str
+    """
+    Source path pattern of the files.
+    """
+    files_hash: str
+    """
+    Hash of the files, the upload link is requested for it.
+    """
+    resolve_symlinks: bool
+    """
+    Whether symbolic links are resolved when archiving the files.
+    """
+    force_upload: bool = False
+    """
+    Whether the files are uploaded even when they're already cached.
+    """
+    stack_trace: Optional[TracebackType] = None
+    """
+    Stack trace of the first step copying the files, for error reporting.
+    """
@@ -7,10 +7,23 @@ import stat
 from wcmatch import glob
 import re
 import inspect
+import tempfile
+import time
+import zlib
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+from concurrent.futures import Future, ThreadPoolExecutor
 from types import TracebackType, FrameType
-from typing import List, Optional, Union
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple, Union
 
+from e2b.exceptions import InvalidArgumentException
+from e2b.sandbox.utils import check_concurrency
 from e2b.template.consts import BASE_STEP_NAME, FINALIZE_STEP_NAME
+from e2b.template.hash_cache import (
+    RACY_MTIME_WINDOW_NS,
+    FilesHashCache,
+    copy_step_key,
+)
 
 
 def read_dockerignore(context_path: str) -> List[str]:
@@ -45,6 +58,101 @@ def normalize_path(path: str) -> str:
     return path.replace(os.sep, "/")
 
 
+class FileContextIndex:
+    """
+    Index of the files in a build context, shared by the steps of a build.
+
+    Each directory is listed once with `os.scandir` and the entries are kept, so matching the files of the COPY steps,
+    hashing and archiving them doesn't walk the context again and reuses the `lstat` results of the listing.
+    The ignore patterns are compiled once.
+    """
+
+    def __init__(self, context_path: str, ignore_patterns: List[str]):
+        """
+        :param context_path: Base directory for resolving relative paths
+        :param ignore_patterns: Ignore patterns
+        """
+        self.context_path = os.path.abspath(context_path)
+        self.ignore_patterns = ignore_patterns
+        self._ignored = (
+            glob.compile(ignore_patterns, flags=glob.GLOBSTAR)
+            if ignore_patterns
+            else None
+        )
+        # Shared by threads uploading in parallel, listing a directory twice in a race is harmless
+        self._dirs: Dict[str, List[os.DirEntry]] = {}
+        self._entries: Dict[str, os.DirEntry] = {}
+
+    def files(self, src: str, include_directories: bool = True) -> List[str]:
+        """
+        Get all files for a given path.
+
+        :param src: Path to the source directory
+        :param include_directories: Whether to include directories
+        :return: Array of files
+        """
+        files = set()
+
+        # Use glob to find all files/directories matching the pattern under context_path
+        files_glob = glob.glob(
+            src,
+            flags=glob.GLOBSTAR,
+            root_dir=self.context_path,
+            exclude=self.ignore_patterns,
+        )
+
+        for file in files_glob:
+            # Join it with context_path to get the absolute path
+            file_path = os.path.join(self.context_path, file)
+
+            if os.path.isdir(file_path):
+                # If it's a directory, add the directory and all entries recursively
+                if include_directories:
+                    files.add(file_path)
+                files.update(self._walk(normalize_path(file).rstrip("/")))
+            else:
+                files.add(file_path)
+
+        return sorted(files)
+
+    def lstat(self, path: str) -> os.stat_result:
+        """
+        Status of a file returned by `files`, without following symbolic links.
+        """
+        entry = self._entries.get(path)
+        if entry is None:
+            return os.lstat(path)
+        return entry.stat(follow_symlinks=False)
+
+    def _walk(self, directory: str) -> Iterator[str]:
+        """
+        Paths of the entries under the directory, matching what `glob` returns for `directory/**/*`.
+        Hidden entries aren't matched and symbolic links to directories aren't followed.
+        """
+        for entry in self._scandir(os.path.join(self.context_path, directory)):
+            if entry.name.startswith("."):
+                continue
+
+            relative_path = f"{directory}/{entry.name}"
+            # Like glob, directories are matched with a trailing slash, so `dir/**` ignores `dir` too
+            matched_path = relative_path + "/" if entry.is_dir() else relative_path
+            if self._ignored is None or not self._ignored.match(matched_path):
+                yield entry.path
+
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._walk(relative_path)
+
+    def _scandir(self, path: str) -> List[os.DirEntry]:
+        entries = self._dirs.get(path)
+        if entries is None:
+            with os.scandir(path) as it:
+                entries = list(it)
+            for entry in entries:
+                self._entries[entry.path] = entry
+            self._dirs[path] = entries
+        return entries
+
+
 def get_all_files_in_path(
     src: str,
     context_path: str,
@@ -60,38 +168,21 @@ def get_all_files_in_path(
     :param include_directories: Whether to include directories
     :return: Array of files
     """
-    files = set()
-
-    # Use glob to find all files/directories matching the pattern under context_path
-    abs_context_path = os.path.abspath(context_path)
-    files_glob = glob.glob(
-        src,
-        flags=glob.GLOBSTAR,
-        root_dir=abs_context_path,
-        exclude=ignore_patterns,
+    return FileContextIndex(context_path, ignore_patterns).files(
+        src, include_directories
     )
 
-    for file in files_glob:
-        # Join it with abs_context_path to get the absolute path
-        file_path = os.path.join(abs_context_path, file)
 
-        if os.path.isdir(file_path):
-            # If it's a directory, add the directory and all entries recursively
-            if include_directories:
-                files.add(file_path)
-            dir_files = glob.glob(
-                normalize_path(file) + "/**/*",
-                flags=glob.GLOBSTAR,
-                root_dir=abs_context_path,
-                exclude=ignore_patterns,
-            )
-            for dir_file in dir_files:
-                dir_file_path = os.path.join(abs_context_path, dir_file)
-                files.add(dir_file_path)
-        else:
-            files.add(file_path)
+HASH_CHUNK_SIZE = 1024 * 1024
+"""
+Size of the chunks the copied files are read in when hashing them, so large files aren't read into memory at once.
+"""
 
-    return sorted(list(files))
+DEFAULT_HASH_CONCURRENCY = min(8, os.cpu_count() or 1)
+"""
+Default number of threads the copied files are read with when hashing them.
+The content is still hashed by a single thread, so more threads than cores only help on slow storage.
+"""
 
 
 def calculate_files_hash(
@@ -101,6 +192,9 @@ def calculate_files_hash(
     ignore_patterns: List[str],
     resolve_symlinks: bool,
     stack_trace: Optional[TracebackType],
+    cache: Optional[FilesHashCache] = None,
+    concurrency: int = DEFAULT_HASH_CONCURRENCY,
+    index: Optional[FileContextIndex] = None,
 ) -> str:
     """
     Calculate a hash of files being copied to detect changes for cache invalidation.
@@ -114,55 +208,370 @@ def calculate_files_hash(
     :param ignore_patterns: Glob patterns to ignore
     :param resolve_symlinks: Whether to resolve symbolic links when hashing
     :param stack_trace: Optional stack trace for error reporting
+    :param cache: Cache the hash is reused from when none of the files changed since it was calculated
+    :param concurrency: Number of threads reading the files, the content is hashed in the order of the files either way
+    :param index: Index of the build context shared by the steps of a build, created for the call if not given
 
     :return: Hex string hash of all files
 
     :raises ValueError: If no files match the source pattern
     """
+    check_concurrency(concurrency)
+    started_ns = time.time_ns()
     src_path = os.path.join(context_path, src)
     hash_obj = hashlib.sha256()
     content = f"COPY {src} {dest}"
 
     hash_obj.update(content.encode())
 
-    files = get_all_files_in_path(src, context_path, ignore_patterns, True)
+    if index is None:
+        index = FileContextIndex(context_path, ignore_patterns)
+    files = index.files(src, True)
 
     if len(files) == 0:
         raise ValueError(f"No files found in {src_path}").with_traceback(stack_trace)
 
-    def hash_stats(stat_info: os.stat_result) -> None:
-        # Only include stable metadata (mode, size)
-        # Exclude uid, gid, and mtime to ensure consistent hashes across environments
-        hash_obj.update(str(stat_info.st_mode).encode())
-        hash_obj.update(str(stat_info.st_size).encode())
-
+    # Stat each file once, for both the fingerprint and the hash, reusing the status from the directory listing
+    entries: List[Tuple[str, str, os.stat_result, Optional[str]]] = []
     for file in files:
-        # Hash the relative path
         relative_path = os.path.relpath(file, context_path)
-        hash_obj.update(relative_path.encode())
-
-        # Add stat information to hash calculation
-        if os.path.islink(file):
-            stats = os.lstat(file)
-            should_follow = resolve_symlinks and (
-                os.path.isfile(file) or os.path.isdir(file)
+        stats = index.lstat(file)
+
+        if stat.S_ISLNK(stats.st_mode):
+            try:
+                target_stats: Optional[os.stat_result] = os.stat(file)
+            except OSError:
+                target_stats = None
+
+            should_follow = (
+                resolve_symlinks
+                and target_stats is not None
+                and (
+                    stat.S_ISREG(target_stats.st_mode)
+                    or stat.S_ISDIR(target_stats.st_mode)
+                )
             )
-
             if not should_follow:
-                hash_stats(stats)
-
-                content = os.readlink(file)
-                hash_obj.update(content.encode())
+                entries.append((file, relative_path, stats, os.readlink(file)))
                 continue
+            stats = target_stats
+
+        entries.append((file, relative_path, stats, None))
+
+    key = fingerprint = None
+    if cache is not None:
+        key = copy_step_key(src, dest, ignore_patterns, resolve_symlinks)
+        fingerprint = files_fingerprint(entries)
+        cached = cache.get(key, fingerprint)
+        if cached is not None:
+            return cached
+
+    for part in _read_in_order(_hash_parts(entries), concurrency):
+        hash_obj.update(part)
+
+    files_hash = hash_obj.hexdigest()
+
+    # A file modified right before hashing can still change without its fingerprint changing
+    if cache is not None and all(
+        stats.st_mtime_ns < started_ns - RACY_MTIME_WINDOW_NS
+        for _, _, stats, link_target in entries
+        if link_target is None and stat.S_ISREG(stats.st_mode)
+    ):
+        cache.put(key, fingerprint, files_hash)
+
+    return files_hash
 
-        stats = os.stat(file)
-        hash_stats(stats)
 
+FileRange = Tuple[str, int, int, bool]
+"""
+Range of a file to read as `(path, offset, length, last)`, the last range of a file is read up to the end of the file.
+"""
+
+
+def _hash_parts(
+    entries: List[Tuple[str, str, os.stat_result, Optional[str]]],
+) -> Iterator[Union[bytes, FileRange]]:
+    """
+    Data hashed for the copied files, in the order it's hashed in.
+    """
+    for file, relative_path, stats, link_target in entries:
+        # Only include stable metadata (mode, size) besides the relative path
+        # Exclude uid, gid, and mtime to ensure consistent hashes across environments
+        metadata = relative_path + str(stats.st_mode) + str(stats.st_size)
+
+        if link_target is not None:
+            yield (metadata + link_target).encode()
+            continue
+
+        yield metadata.encode()
         if stat.S_ISREG(stats.st_mode):
-            with open(file, "rb") as f:
-                hash_obj.update(f.read())
+            offset = 0
+            while offset + HASH_CHUNK_SIZE < stats.st_size:
+                yield file, offset, HASH_CHUNK_SIZE, False
+                offset += HASH_CHUNK_SIZE
+            yield file, offset, stats.st_size - offset, True
+
+
+def _batches(
+    parts: Iterator[Union[bytes, FileRange]],
+) -> Iterator[List[Union[bytes, FileRange]]]:
+    """
+    Group the parts into batches of about `HASH_CHUNK_SIZE` bytes, so small files aren't read one task each.
+    """
+    batch: List[Union[bytes, FileRange]] = []
+    size = 0
+    for part in parts:
+        batch.append(part)
+        size += len(part) if isinstance(part, bytes) else part[2]
+        if size >= HASH_CHUNK_SIZE:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def _read(part: Union[bytes, FileRange]) -> bytes:
+    if isinstance(part, bytes):
+        return part
+
+    path, offset, length, last = part
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read() if last else f.read(length)
+
+
+def _read_batch(batch: List[Union[bytes, FileRange]]) -> bytes:
+    return b"".join(_read(part) for part in batch)
+
+
+def _read_in_order(
+    parts: Iterator[Union[bytes, FileRange]], concurrency: int
+) -> Iterator[bytes]:
+    """
+    Read the file ranges in background threads, yielding the data in the order of the parts.
+    At most a few batches per thread are read ahead, so the memory used stays bounded.
+    """
+    if concurrency == 1:
+        for part in parts:
+            yield _read(part)
+        return
+
+    window: Deque["Future[bytes]"] = deque()
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="e2b-hash"
+    ) as executor:
+        try:
+            for batch in _batches(parts):
+                window.append(executor.submit(_read_batch, batch))
+                if len(window) > 2 * concurrency:
+                    yield window.popleft().result()
+
+            while window:
+                yield window.popleft().result()
+        finally:
+            for future in window:
+                future.cancel()
+
+
+def files_fingerprint(
+    entries: List[Tuple[str, str, os.stat_result, Optional[str]]],
+) -> str:
+    """
+    Fingerprint of the copied files made from their path, size, modification time, inode and mode, without reading them.
+    """
+    fingerprint = hashlib.sha256()
+    for _, relative_path, stats, link_target in entries:
+        fingerprint.update(
+            json.dumps(
+                [
+                    relative_path,
+                    stats.st_size,
+                    stats.st_mtime_ns,
+                    stats.st_ino,
+                    stats.st_mode,
+                    link_target,
+                ]
+            ).encode()
+        )
+    return fingerprint.hexdigest()
+
+
+TAR_CHUNK_SIZE = 1024 * 1024
+"""
+Size of the chunks the compressed tar of the copied files is produced in.
+"""
+
+DEFAULT_COMPRESSION_LEVEL = 9
+"""
+Default gzip compression level of the uploaded tar of the copied files.
+"""
+
+TAR_SPOOL_MAX_SIZE = 64 * 1024 * 1024
+"""
+Size up to which a spooled tar of the copied files is kept in memory before it's written to a temporary file.
+"""
+
+CONTENT_LENGTH_REQUIRED_STATUSES = (411, 501)
+"""
+Response statuses of storages not accepting uploads without a `Content-Length`.
+"""
 
-    return hash_obj.hexdigest()
+CONTENT_LENGTH_REQUIRED_QUERY_PARAMS = ("X-Amz-Signature", "AWSAccessKeyId")
+"""
+Query parameters of presigned upload URLs of storages not accepting uploads without a `Content-Length`, like S3.
+"""
+
+_content_length_hosts: Set[str] = set()
+
+
+def requires_content_length(url: str) -> bool:
+    """
+    Whether an upload to the URL has to be sent with a `Content-Length`.
+
+    It's known from the presigned URL itself or from an earlier streamed upload the host refused.
+    """
+    parts = urlsplit(url)
+    if parts.hostname in _content_length_hosts:
+        return True
+    query = parse_qs(parts.query)
+    return any(param in query for param in CONTENT_LENGTH_REQUIRED_QUERY_PARAMS)
+
+
+def content_length_required(url: str) -> None:
+    """
+    Remember that the host of the URL refused a streamed upload, later uploads to it are spooled right away.
+    """
+    _content_length_hosts.add(urlsplit(url).hostname)
+
+
+def _tar_blocks(
+    files: List[str], file_context_path: str, resolve_symlinks: bool
+) -> Iterator[bytes]:
+    """
+    Uncompressed tar of the files, the same `tarfile` would write, with the file content read in chunks.
+    """
+    # Only creates the headers, so the content isn't buffered by tarfile
+    tar = tarfile.TarFile(fileobj=io.BytesIO(), mode="w", dereference=resolve_symlinks)
+    size = 0
+    for file in files:
+        tarinfo = tar.gettarinfo(file, arcname=os.path.relpath(file, file_context_path))
+        if tarinfo is None:
+            # Sockets and other files tarfile can't archive are skipped by it too
+            continue
+
+        header = tarinfo.tobuf(tar.format, tar.encoding, tar.errors)
+        size += len(header)
+        yield header
+
+        if not tarinfo.isreg():
+            continue
+
+        remaining = tarinfo.size
+        with open(file, "rb") as f:
+            while remaining:
+                chunk = f.read(min(remaining, TAR_CHUNK_SIZE))
+                if not chunk:
+                    raise OSError(f"File {file} changed while it was archived")
+                remaining -= len(chunk)
+                yield chunk
+
+        padding = -tarinfo.size % tarfile.BLOCKSIZE
+        size += tarinfo.size + padding
+        yield tarfile.NUL * padding
+
+    # End of archive marker, padded to a full record
+    size += 2 * tarfile.BLOCKSIZE
+    yield tarfile.NUL * (2 * tarfile.BLOCKSIZE + (-size % tarfile.RECORDSIZE))
+
+
+def check_compression_level(compression_level: int):
+    """
+    Check the gzip compression level is between 0 and 9.
+    """
+    if not 0 <= compression_level <= 9:
+        raise InvalidArgumentException("compression_level should be between 0 and 9")
+
+
+def tar_file_chunks(
+    file_name: str,
+    file_context_path: str,
+    ignore_patterns: List[str],
+    resolve_symlinks: bool,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    index: Optional[FileContextIndex] = None,
+) -> Iterator[bytes]:
+    """
+    Create a gzipped tar of files matching a pattern, produced in chunks as the files are read.
+
+    The whole tar is never held in memory, so it can be streamed straight into an upload.
+
+    :param file_name: Glob pattern for files to include
+    :param file_context_path: Base directory for resolving file paths
+    :param ignore_patterns: Ignore patterns
+    :param resolve_symlinks: Whether to resolve symbolic links
+    :param compression_level: Gzip compression level from 0 (no compression, fastest) to 9 (smallest, slowest)
+    :param index: Index of the build context shared by the steps of a build, created for the call if not given
+
+    :return: Chunks of the gzipped tar
+    """
+    check_compression_level(compression_level)
+
+    if index is None:
+        index = FileContextIndex(file_context_path, ignore_patterns)
+    files = index.files(file_name, True)
+    compressor = zlib.compressobj(compression_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    pending = bytearray()
+    for block in _tar_blocks(files, file_context_path, resolve_symlinks):
+        pending += compressor.compress(block)
+        if len(pending) >= TAR_CHUNK_SIZE:
+            yield bytes(pending)
+            pending.clear()
+
+    pending += compressor.flush()
+    yield bytes(pending)
+
+
+def spool_tar_file(
+    file_name: str,
+    file_context_path: str,
+    ignore_patterns: List[str],
+    resolve_symlinks: bool,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    index: Optional[FileContextIndex] = None,
+) -> Tuple[tempfile.SpooledTemporaryFile, int]:
+    """
+    Create a gzipped tar of files matching a pattern in a spooled temporary file, for uploads that need the size upfront.
+
+    The tar is kept in memory up to `TAR_SPOOL_MAX_SIZE` and written to a temporary file beyond that.
+
+    :return: The tar file positioned at its start and its size, the caller closes the file
+    """
+    tar_file = tempfile.SpooledTemporaryFile(max_size=TAR_SPOOL_MAX_SIZE)
+    try:
+        for chunk in tar_file_chunks(
+            file_name,
+            file_context_path,
+            ignore_patterns,
+            resolve_symlinks,
+            compression_level,
+            index,
+        ):
+            tar_file.write(chunk)
+        size = tar_file.tell()
+        tar_file.seek(0)
+    except BaseException:
+        tar_file.close()
+        raise
+
+    return tar_file, size
+
+
+def read_chunks(file: io.IOBase) -> Iterator[bytes]:
+    """
+    Read a file in chunks of `TAR_CHUNK_SIZE`.
+    """
+    return iter(lambda: file.read(TAR_CHUNK_SIZE), b"")
 
 
 def tar_file_stream(
@@ -174,6 +583,8 @@ def tar_file_stream(
     """
     Create a tar stream of files matching a pattern.
 
+    The whole tar is held in memory, use `tar_file_chunks` to stream it instead.
+
     :param file_name: Glob pattern for files to include
     :param file_context_path: Base directory for resolving file paths
     :param ignore_patterns: Ignore patterns
@@ -182,18 +593,11 @@ def tar_file_stream(
     :return: Tar stream
     """
     tar_buffer = io.BytesIO()
-    with tarfile.open(
-        fileobj=tar_buffer,
-        mode="w:gz",
-        dereference=resolve_symlinks,
-    ) as tar:
-        files = get_all_files_in_path(
-            file_name, file_context_path, ignore_patterns, True
-        )
-        for file in files:
-            tar.add(
-                file, arcname=os.path.relpath(file, file_context_path), recursive=False
-            )
+    for chunk in tar_file_chunks(
+        file_name, file_context_path, ignore_patterns, resolve_symlinks
+    ):
+        tar_buffer.write(chunk)
+    tar_buffer.seek(0)
 
     return tar_buffer
 
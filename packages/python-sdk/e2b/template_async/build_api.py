@@ -1,6 +1,7 @@
 import asyncio
+import time
 from types import TracebackType
-from typing import Callable, Literal, Optional, List, Union
+from typing import AsyncIterator, Callable, Iterator, Literal, Optional, List, Union
 
 import httpx
 
@@ -20,9 +21,20 @@ from e2b.api.client.models import (
     Error,
 )
 from e2b.exceptions import BuildException, FileUploadException
+from e2b.template.consts import UPLOAD_PROGRESS_INTERVAL
 from e2b.template.logger import LogEntry
 from e2b.template.types import TemplateType
-from e2b.template.utils import get_build_step_index, tar_file_stream
+from e2b.template.utils import (
+    CONTENT_LENGTH_REQUIRED_STATUSES,
+    DEFAULT_COMPRESSION_LEVEL,
+    content_length_required,
+    FileContextIndex,
+    get_build_step_index,
+    read_chunks,
+    requires_content_length,
+    spool_tar_file,
+    tar_file_chunks,
+)
 
 
 async def request_build(
@@ -77,6 +89,17 @@ async def get_file_upload_link(
     return res.parsed
 
 
+async def _in_thread(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Produce the chunks in a thread, so reading and compressing the files doesn't block the event loop.
+    """
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
 async def upload_file(
     api_client: AuthenticatedClient,
     file_name: str,
@@ -85,14 +108,83 @@ async def upload_file(
     ignore_patterns: List[str],
     resolve_symlinks: bool,
     stack_trace: Optional[TracebackType],
-):
-    try:
-        tar_buffer = tar_file_stream(
-            file_name, context_path, ignore_patterns, resolve_symlinks
-        )
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    index: Optional[FileContextIndex] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Upload the gzipped tar of the files, streamed as it's created.
+    Storages that need the size upfront, known from the URL or from refusing the streamed upload,
+    get the tar spooled to a temporary file first.
+
+    :param on_progress: Called with the number of bytes uploaded so far, at most once every `UPLOAD_PROGRESS_INTERVAL` seconds
+
+    :return: Size of the uploaded tar in bytes
+    """
+    size = 0
+    reported_at = time.monotonic()
+
+    def uploaded(chunk: bytes):
+        nonlocal size, reported_at
+        size += len(chunk)
+        if on_progress and time.monotonic() - reported_at >= UPLOAD_PROGRESS_INTERVAL:
+            reported_at = time.monotonic()
+            on_progress(size)
+
+    # Counted on the event loop, so the progress callback isn't called from the threads producing the chunks
+    async def counted(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            uploaded(chunk)
+            yield chunk
 
+    try:
         client = api_client.get_async_httpx_client()
-        response = await client.put(url, content=tar_buffer.getvalue())
+        response: Optional[httpx.Response] = None
+        if not requires_content_length(url):
+            try:
+                response = await client.put(
+                    url,
+                    content=counted(
+                        _in_thread(
+                            tar_file_chunks(
+                                file_name,
+                                context_path,
+                                ignore_patterns,
+                                resolve_symlinks,
+                                compression_level,
+                                index,
+                            )
+                        )
+                    ),
+                )
+            except (httpx.WriteError, httpx.RemoteProtocolError):
+                # Some storages close the connection instead of refusing the streamed upload
+                response = None
+            if (
+                response is not None
+                and response.status_code in CONTENT_LENGTH_REQUIRED_STATUSES
+            ):
+                content_length_required(url)
+                response = None
+
+        if response is None:
+            tar_file, tar_size = await asyncio.to_thread(
+                spool_tar_file,
+                file_name,
+                context_path,
+                ignore_patterns,
+                resolve_symlinks,
+                compression_level,
+                index,
+            )
+            with tar_file:
+                size = 0
+                response = await client.put(
+                    url,
+                    content=counted(_in_thread(read_chunks(tar_file))),
+                    headers={"Content-Length": str(tar_size)},
+                )
+
         response.raise_for_status()
     except httpx.HTTPStatusError as e:
         raise FileUploadException(f"Failed to upload file: {e}").with_traceback(
@@ -103,6 +195,8 @@ async def upload_file(
             stack_trace
         )
 
+    return size
+
 
 async def trigger_build(
     client: AuthenticatedClient,
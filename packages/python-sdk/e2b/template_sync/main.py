@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Callable, Optional
 
@@ -6,10 +9,11 @@ from e2b.api.client.client import AuthenticatedClient
 from e2b.connection_config import ConnectionConfig
 
 from e2b.api.client_sync import get_api_client
-from e2b.template.consts import RESOLVE_SYMLINKS
+from e2b.sandbox.utils import check_concurrency
+from e2b.template.consts import DEFAULT_UPLOAD_CONCURRENCY
 from e2b.template.logger import LogEntry, LogEntryEnd, LogEntryStart
 from e2b.template.main import TemplateBase, TemplateClass
-from e2b.template.types import BuildInfo, InstructionType
+from e2b.template.types import BuildInfo, FileUpload
 from e2b.template_sync.build_api import (
     get_build_status,
     get_file_upload_link,
@@ -18,7 +22,7 @@ from e2b.template_sync.build_api import (
     upload_file,
     wait_for_build_finish,
 )
-from e2b.template.utils import read_dockerignore
+from e2b.template.utils import DEFAULT_COMPRESSION_LEVEL, check_compression_level
 
 
 class Template(TemplateBase):
@@ -35,6 +39,8 @@ class Template(TemplateBase):
         memory_mb: int = 1024,
         skip_cache: bool = False,
         on_build_logs: Optional[Callable[[LogEntry], None]] = None,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        upload_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
     ) -> BuildInfo:
         """
         Internal implementation of the template build process
@@ -45,8 +51,13 @@ class Template(TemplateBase):
         :param cpu_count: Number of CPUs allocated to the sandbox
         :param memory_mb: Amount of memory in MB allocated to the sandbox
         :param skip_cache: If True, forces a complete rebuild ignoring cache
-        :param on_build_logs: Callback function to receive build logs during the build process
+        :param on_build_logs: Callback function to receive build logs during the build process, during the file uploads it's called from the upload threads, one entry at a time
+        :param compression_level: Gzip compression level of the uploaded files from 0 (fastest) to 9 (smallest)
+        :param upload_concurrency: Maximum number of COPY steps whose files are uploaded at the same time
         """
+        check_concurrency(upload_concurrency)
+        check_compression_level(compression_level)
+
         if skip_cache:
             template._template._force = True
 
@@ -79,62 +90,74 @@ class Template(TemplateBase):
                 )
             )
 
-        instructions_with_hashes = template._template._instructions_with_hashes()
-
-        # Upload files
-        for index, file_upload in enumerate(instructions_with_hashes):
-            if file_upload["type"] != InstructionType.COPY:
-                continue
-
-            args = file_upload.get("args", [])
-            src = args[0] if len(args) > 0 else None
-            force_upload = file_upload.get("forceUpload")
-            files_hash = file_upload.get("filesHash", None)
-            resolve_symlinks = file_upload.get("resolveSymlinks", RESOLVE_SYMLINKS)
+        # The context is walked once, for both hashing and uploading the files
+        file_index = template._template._file_index()
+        instructions_with_hashes = template._template._instructions_with_hashes(
+            file_index
+        )
 
-            if src is None or files_hash is None:
-                raise ValueError("Source path and files hash are required")
+        # Upload the files of the COPY steps, the files of identical steps only once
+        # The uploads run in threads, the logs of each are passed to the callback one at a time
+        log_lock = threading.Lock()
 
-            stack_trace = None
-            if index + 1 < len(template._template._stack_traces):
-                stack_trace = template._template._stack_traces[index + 1]
+        def log(message: str):
+            if on_build_logs:
+                with log_lock:
+                    on_build_logs(
+                        LogEntry(
+                            timestamp=datetime.now(), level="info", message=message
+                        )
+                    )
 
+        def upload(file_upload: FileUpload):
             file_info = get_file_upload_link(
-                api_client, template_id, files_hash, stack_trace
+                api_client, template_id, file_upload.files_hash, file_upload.stack_trace
             )
 
-            if (force_upload and file_info.url) or (
-                file_info.present is False and file_info.url
+            if not file_info.url or (
+                not file_upload.force_upload and file_info.present is not False
             ):
-                upload_file(
-                    api_client,
-                    src,
-                    template._template._file_context_path,
-                    file_info.url,
-                    [
-                        *template._template._file_ignore_patterns,
-                        *read_dockerignore(template._template._file_context_path),
-                    ],
-                    resolve_symlinks,
-                    stack_trace,
+                log(f"Skipping upload of '{file_upload.src}', already cached")
+                return
+
+            log(f"Uploading '{file_upload.src}'")
+            start = time.monotonic()
+            size = upload_file(
+                api_client,
+                file_upload.src,
+                template._template._file_context_path,
+                file_info.url,
+                file_index.ignore_patterns,
+                file_upload.resolve_symlinks,
+                file_upload.stack_trace,
+                compression_level,
+                file_index,
+                on_progress=lambda uploaded: log(
+                    f"Uploading '{file_upload.src}' ({uploaded / 2**20:.1f} MiB uploaded)"
+                ),
+            )
+            log(
+                f"Uploaded '{file_upload.src}' "
+                f"({size / 2**20:.1f} MiB in {time.monotonic() - start:.1f}s)"
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=upload_concurrency, thread_name_prefix="e2b-template-upload"
+        ) as executor:
+            uploads = [
+                executor.submit(upload, file_upload)
+                for file_upload in template._template._file_uploads(
+                    instructions_with_hashes
                 )
-                if on_build_logs:
-                    on_build_logs(
-                        LogEntry(
-                            timestamp=datetime.now(),
-                            level="info",
-                            message=f"Uploaded '{src}'",
-                        )
-                    )
-            else:
-                if on_build_logs:
-                    on_build_logs(
-                        LogEntry(
-                            timestamp=datetime.now(),
-                            level="info",
-                            message=f"Skipping upload of '{src}', already cached",
-                        )
-                    )
+            ]
+            try:
+                for future in uploads:
+                    future.result()
+            except BaseException:
+                # Don't start the remaining uploads when one of them fails
+                for future in uploads:
+                    future.cancel()
+                raise
 
         if on_build_logs:
             on_build_logs(
@@ -178,6 +201,8 @@ class Template(TemplateBase):
         on_build_logs: Optional[Callable[[LogEntry], None]] = None,
         api_key: Optional[str] = None,
         domain: Optional[str] = None,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        upload_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
     ) -> BuildInfo:
         """
         Build and deploy a template to E2B infrastructure.
@@ -187,9 +212,11 @@ class Template(TemplateBase):
         :param cpu_count: Number of CPUs allocated to the sandbox
         :param memory_mb: Amount of memory in MB allocated to the sandbox
         :param skip_cache: If True, forces a complete rebuild ignoring cache
-        :param on_build_logs: Callback function to receive build logs during the build process
+        :param on_build_logs: Callback function to receive build logs during the build process, during the file uploads it's called from the upload threads, one entry at a time
         :param api_key: E2B API key for authentication
         :param domain: Domain of the E2B API
+        :param compression_level: Gzip compression level of the uploaded files from 0 (fastest) to 9 (smallest)
+        :param upload_concurrency: Maximum number of COPY steps whose files are uploaded at the same time
 
         Example
         ```python
@@ -237,6 +264,8 @@ class Template(TemplateBase):
                 memory_mb,
                 skip_cache,
                 on_build_logs,
+                compression_level,
+                upload_concurrency,
             )
 
             if on_build_logs:
@@ -277,6 +306,8 @@ class Template(TemplateBase):
         on_build_logs: Optional[Callable[[LogEntry], None]] = None,
         api_key: Optional[str] = None,
         domain: Optional[str] = None,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        upload_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
     ) -> BuildInfo:
         """
         Build and deploy a template to E2B infrastructure without waiting for completion.
@@ -288,6 +319,8 @@ class Template(TemplateBase):
         :param skip_cache: If True, forces a complete rebuild ignoring cache
         :param api_key: E2B API key for authentication
         :param domain: Domain of the E2B API
+        :param compression_level: Gzip compression level of the uploaded files from 0 (fastest) to 9 (smallest)
+        :param upload_concurrency: Maximum number of COPY steps whose files are uploaded at the same time
         :return: BuildInfo containing the template ID and build ID
 
         Example
@@ -327,6 +360,8 @@ class Template(TemplateBase):
             memory_mb,
             skip_cache,
             on_build_logs,
+            compression_level,
+            upload_concurrency,
         )
 
     @staticmethod
@@ -1 +1,9 @@
-from .client import Client, GzipCompressor, ConnectException, Code  # noqa: F401
+from .client import (  # noqa: F401
+    Client,
+    GzipCompressor,
+    ConnectException,
+    Code,
+    RetryBudget,
+    RetryPolicy,
+    RetryStats,
+)
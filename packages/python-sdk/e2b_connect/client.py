@@ -1,19 +1,28 @@
+import asyncio
 import gzip
-import inspect
 import json
+import logging
+import random
 import struct
-import typing
+import threading
+import time
 
+from dataclasses import dataclass, field, replace
 from httpcore import (
     ConnectionPool,
     AsyncConnectionPool,
+    ConnectError,
+    ConnectTimeout,
+    ReadError,
     RemoteProtocolError,
     Response,
 )
 from enum import Flag, Enum
-from typing import Callable, Optional, Dict, Any, Generator, Tuple
+from typing import Callable, Optional, Dict, Any, FrozenSet, Generator, Iterable
 from google.protobuf import json_format
 
+logger = logging.getLogger(__name__)
+
 
 class EnvelopeFlags(Flag):
     compressed = 0b00000001
@@ -61,6 +70,11 @@ def make_error_from_http_code(http_code: int):
 
 
 class ConnectException(Exception):
+    http_status: Optional[int] = None
+    """
+    HTTP status of the response the error was read from, `None` for errors at the end of a stream.
+    """
+
     def __init__(self, status: Code, message: str):
         self.status = status
         self.message = message
@@ -85,11 +99,14 @@ def decode_envelope_header(header):
 
 def error_for_response(http_resp: Response):
     try:
-        error = json.loads(http_resp.content)
-        return make_error(error)
+        error = make_error(json.loads(http_resp.content))
     except (json.decoder.JSONDecodeError, KeyError):
-        error = {"code": http_resp.status, "message": http_resp.content.decode("utf-8")}
-        return make_error(error)
+        error = make_error(
+            {"code": http_resp.status, "message": http_resp.content.decode("utf-8")}
+        )
+
+    error.http_status = http_resp.status
+    return error
 
 
 def make_error(error):
@@ -107,40 +124,196 @@ def make_error(error):
     return ConnectException(status, error.get("message", ""))
 
 
-def _sync_retry(func, exc, retries):
-    def retry(*args, **kwargs):
-        for _ in range(retries):
-            try:
-                return func(*args, **kwargs)
-            except exc:
-                continue
+# The request never reached the server, retrying can't apply it twice
+_NOT_SENT_ERRORS = (ConnectError, ConnectTimeout)
+# The connection broke after the request was sent, it might have been processed
+_LOST_RESPONSE_ERRORS = (RemoteProtocolError, ReadError)
+
+# Returned by the sandbox proxy when the sandbox isn't running, retrying won't help
+_SANDBOX_NOT_RUNNING_STATUS = 502
+
+
+def _is_stale_connection(error: Exception) -> bool:
+    """
+    Whether a pooled keep-alive connection was closed by the server before the request was read,
+    the request wasn't processed, so even non-idempotent calls can be retried.
+    """
+    return isinstance(error, RemoteProtocolError) and str(error).startswith(
+        "Server disconnected without sending a response"
+    )
+
+
+@dataclass
+class RetryStats:
+    """
+    Counters of the retries made under a retry policy.
+    """
+
+    calls: int = 0
+    """
+    Number of calls made, not counting the retries.
+    """
+    retries: int = 0
+    """
+    Number of retried requests.
+    """
+    exhausted: int = 0
+    """
+    Number of calls that failed with a retryable error after using all attempts.
+    """
+    throttled: int = 0
+    """
+    Number of retries not made because the retry budget was used up.
+    """
+    reasons: Dict[str, int] = field(default_factory=dict)
+    """
+    Number of retries per reason, e.g. `connect_error` or `unavailable`.
+    """
+
+
+class RetryBudget:
+    """
+    Token bucket limiting the retries to a fraction of the successful calls, like gRPC retry throttling.
+
+    Every failed attempt takes a token, every successful call adds `token_ratio` tokens.
+    Retries are allowed only while more than half of `max_tokens` is left,
+    so a failing server isn't hit with `max_attempts` times the load.
+    """
+
+    def __init__(self, max_tokens: float = 10, token_ratio: float = 0.1):
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
 
-        return func(*args, **kwargs)
+    @property
+    def tokens(self) -> float:
+        return self._tokens
 
-    return retry
+    def on_success(self):
+        with self._lock:
+            self._tokens = min(self._tokens + self.token_ratio, self.max_tokens)
 
+    def on_failure(self) -> bool:
+        """
+        Register a failed attempt, returns whether it can be retried.
+        """
+        with self._lock:
+            self._tokens = max(self._tokens - 1, 0)
+            return self._tokens > self.max_tokens / 2
 
-def _async_retry(func, exc, retries):
-    async def retry(*args, **kwargs):
-        for _ in range(retries):
-            try:
-                return await func(*args, **kwargs)
-            except exc:
-                continue
 
-        return await func(*args, **kwargs)
+class RetryPolicy:
+    """
+    When and how calls of the Connect clients sharing the policy are retried.
+
+    Calls are retried with exponential backoff and full jitter on:
+    - connection errors, stale keep-alive connections and 503 responses, for all calls, as the request wasn't processed
+    - broken connections and `retryable_codes` errors, only for the idempotent procedures
+
+    Server streams are retried only until they yield the first message, a retry never replays a part of the stream.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        initial_backoff: float = 0.05,
+        max_backoff: float = 2.0,
+        multiplier: float = 2.0,
+        retryable_codes: Iterable[Code] = (Code.unavailable,),
+        idempotent_procedures: Iterable[str] = (),
+        budget: Optional[RetryBudget] = None,
+    ):
+        """
+        :param max_attempts: Maximum number of attempts of a call, including the first one, `1` disables retries
+        :param initial_backoff: Upper bound of the delay in **seconds** before the first retry
+        :param max_backoff: Maximum upper bound of the delay in **seconds** before a retry
+        :param multiplier: Growth of the delay upper bound with every retry
+        :param retryable_codes: Error codes idempotent calls are retried on
+        :param idempotent_procedures: Procedures that can be safely repeated, e.g. `filesystem.Filesystem/Stat`
+        :param budget: Retry budget shared by the calls, a new one by default
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.retryable_codes: FrozenSet[Code] = frozenset(retryable_codes)
+        self.idempotent_procedures: FrozenSet[str] = frozenset(idempotent_procedures)
+        self.budget = budget or RetryBudget()
+        self._stats = RetryStats()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> RetryStats:
+        with self._lock:
+            return replace(self._stats, reasons=dict(self._stats.reasons))
+
+    def is_idempotent(self, url: str) -> bool:
+        return any(url.endswith(f"/{p}") for p in self.idempotent_procedures)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay in **seconds** before the retry following the given attempt, counted from `0`.
+        """
+        return random.uniform(
+            0, min(self.initial_backoff * self.multiplier**attempt, self.max_backoff)
+        )
+
+    def retry_reason(self, error: Exception, idempotent: bool) -> Optional[str]:
+        """
+        Why the failed call can be retried, `None` if it can't.
+        """
+        if isinstance(error, _NOT_SENT_ERRORS):
+            return "connect_error"
+
+        if isinstance(error, ConnectException):
+            if error.status not in self.retryable_codes:
+                return None
+            if error.http_status == 503:
+                return error.status.value
+            if idempotent and error.http_status != _SANDBOX_NOT_RUNNING_STATUS:
+                return error.status.value
+            return None
+
+        if isinstance(error, _LOST_RESPONSE_ERRORS):
+            if idempotent or _is_stale_connection(error):
+                return "protocol_error"
+
+        return None
+
+    def on_call(self):
+        with self._lock:
+            self._stats.calls += 1
 
-    return retry
+    def on_success(self):
+        self.budget.on_success()
 
+    def on_failure(
+        self, error: Exception, attempt: int, idempotent: bool
+    ) -> Optional[float]:
+        """
+        Register a failed attempt, returns the delay in **seconds** before retrying or `None` if the error should be raised.
+        """
+        reason = self.retry_reason(error, idempotent)
+        if reason is None:
+            return None
 
-def _retry(exc: typing.Type[Exception], retries: int):
-    def decorator(func):
-        if inspect.iscoroutinefunction(func):
-            return _async_retry(func, exc, retries)
+        with self._lock:
+            if attempt + 1 >= self.max_attempts:
+                self._stats.exhausted += 1
+                return None
 
-        return _sync_retry(func, exc, retries)
+            if not self.budget.on_failure():
+                self._stats.throttled += 1
+                return None
 
-    return decorator
+            self._stats.retries += 1
+            self._stats.reasons[reason] = self._stats.reasons.get(reason, 0) + 1
+
+        return self.backoff(attempt)
 
 
 class GzipCompressor:
@@ -188,7 +361,13 @@ class Client:
         compressor=None,
         json: Optional[bool] = False,
         headers: Optional[Dict[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        idempotent: Optional[bool] = None,
     ):
+        """
+        :param retry_policy: Policy the calls are retried by, shared with other clients to share the retry budget and stats
+        :param idempotent: Whether the procedure can be safely repeated, decided by the retry policy by default
+        """
         if headers is None:
             headers = {}
 
@@ -199,7 +378,12 @@ class Client:
         self._response_type = response_type
         self._compressor = compressor
         self._headers = headers
-        self._connection_retries = 3
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.idempotent = (
+            idempotent
+            if idempotent is not None
+            else self.retry_policy.is_idempotent(url)
+        )
 
     def _prepare_unary_request(
         self,
@@ -263,7 +447,6 @@ class Client:
             msg_type=self._response_type,
         )
 
-    @_retry(RemoteProtocolError, 3)
     async def acall_unary(
         self,
         req,
@@ -281,10 +464,23 @@ class Client:
             **opts,
         )
 
-        res = await self.async_pool.request(**req_data)
-        return self._process_unary_response(res)
+        self.retry_policy.on_call()
+        attempt = 0
+        while True:
+            try:
+                res = await self.async_pool.request(**req_data)
+                result = self._process_unary_response(res)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            self.retry_policy.on_success()
+            return result
 
-    @_retry(RemoteProtocolError, 3)
     def call_unary(
         self,
         req,
@@ -302,8 +498,30 @@ class Client:
             **opts,
         )
 
-        res = self.pool.request(**req_data)
-        return self._process_unary_response(res)
+        self.retry_policy.on_call()
+        attempt = 0
+        while True:
+            try:
+                res = self.pool.request(**req_data)
+                result = self._process_unary_response(res)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            self.retry_policy.on_success()
+            return result
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        delay = self.retry_policy.on_failure(error, attempt, self.idempotent)
+        if delay is not None:
+            logger.debug(
+                f"Retrying {self.url} in {delay:.3f}s after attempt {attempt + 1} failed: {error!r}"
+            )
+        return delay
 
     def _create_stream_timeout(self, timeout: Optional[int]):
         if timeout:
@@ -355,7 +573,6 @@ class Client:
             },
         }
 
-    @_retry(RemoteProtocolError, 3)
     async def acall_server_stream(
         self,
         req,
@@ -375,21 +592,37 @@ class Client:
             **opts,
         )
 
-        parser = ServerStreamParser(
-            decode=self._codec.decode,
-            response_type=self._response_type,
-        )
+        self.retry_policy.on_call()
+        attempt = 0
+        while True:
+            parser = ServerStreamParser(
+                decode=self._codec.decode,
+                response_type=self._response_type,
+            )
+            started = False
 
-        async with self.async_pool.stream(**req_data) as http_resp:
-            if http_resp.status != 200:
-                await http_resp.aread()
-                raise error_for_response(http_resp)
+            try:
+                async with self.async_pool.stream(**req_data) as http_resp:
+                    if http_resp.status != 200:
+                        await http_resp.aread()
+                        raise error_for_response(http_resp)
+
+                    async for chunk in http_resp.aiter_stream():
+                        for parsed in parser.parse(chunk):
+                            started = True
+                            yield parsed
+            except Exception as e:
+                # Once a message was yielded, retrying would replay the stream
+                delay = None if started else self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
 
-            async for chunk in http_resp.aiter_stream():
-                for parsed in parser.parse(chunk):
-                    yield parsed
+            self.retry_policy.on_success()
+            return
 
-    @_retry(RemoteProtocolError, 3)
     def call_server_stream(
         self,
         req,
@@ -409,19 +642,36 @@ class Client:
             **opts,
         )
 
-        parser = ServerStreamParser(
-            decode=self._codec.decode,
-            response_type=self._response_type,
-        )
+        self.retry_policy.on_call()
+        attempt = 0
+        while True:
+            parser = ServerStreamParser(
+                decode=self._codec.decode,
+                response_type=self._response_type,
+            )
+            started = False
 
-        with self.pool.stream(**req_data) as http_resp:
-            if http_resp.status != 200:
-                http_resp.read()
-                raise error_for_response(http_resp)
+            try:
+                with self.pool.stream(**req_data) as http_resp:
+                    if http_resp.status != 200:
+                        http_resp.read()
+                        raise error_for_response(http_resp)
+
+                    for chunk in http_resp.iter_stream():
+                        for parsed in parser.parse(chunk):
+                            started = True
+                            yield parsed
+            except Exception as e:
+                # Once a message was yielded, retrying would replay the stream
+                delay = None if started else self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
 
-            for chunk in http_resp.iter_stream():
-                for parsed in parser.parse(chunk):
-                    yield parsed
+            self.retry_policy.on_success()
+            return
 
     def call_client_stream(self, req, **opts):
         raise NotImplementedError("client stream not supported")
@@ -438,8 +688,19 @@ class Client:
 
 DataLen = int
 
+_MEMORYVIEW_THRESHOLD = 64 * 1024
+_END_STREAM = EnvelopeFlags.end_stream.value
+
 
 class ServerStreamParser:
+    """
+    Incremental parser for Connect server stream envelopes.
+
+    Incoming chunks are appended to a single `bytearray` and frames are read from it
+    at an offset cursor, so the unread tail is not copied again for every frame.
+    The consumed prefix is dropped only once it makes up at least half of the buffer.
+    """
+
     def __init__(
         self,
         decode: Callable,
@@ -448,40 +709,44 @@ class ServerStreamParser:
         self.decode = decode
         self.response_type = response_type
 
-        self.buffer: bytes = b""
-        self._header: Optional[tuple[EnvelopeFlags, DataLen]] = None
-
-    def shift_buffer(self, size: int):
-        buffer = self.buffer[:size]
-        self.buffer = self.buffer[size:]
-        return buffer
+        self.buffer = bytearray()
+        self._offset = 0
 
-    @property
-    def header(self) -> Tuple[EnvelopeFlags, DataLen]:
-        if self._header:
-            return self._header
+    def _compact(self):
+        if self._offset == len(self.buffer):
+            self.buffer.clear()
+            self._offset = 0
+        elif self._offset * 2 >= len(self.buffer):
+            del self.buffer[: self._offset]
+            self._offset = 0
 
-        header_data = self.shift_buffer(envelope_header_length)
-        self._header = decode_envelope_header(header_data)
+    def _read(self, start: int, end: int) -> bytes:
+        if end - start < _MEMORYVIEW_THRESHOLD:
+            return bytes(self.buffer[start:end])
 
-        return self._header
-
-    @header.deleter
-    def header(self):
-        self._header = None
+        # Copy large frames only once instead of slicing into a temporary bytearray first
+        with memoryview(self.buffer) as view:
+            return view[start:end].tobytes()
 
     def parse(self, chunk: bytes) -> Generator[Any, None, None]:
+        self._compact()
         self.buffer += chunk
 
-        while len(self.buffer) >= envelope_header_length:
-            flags, data_len = self.header
+        while len(self.buffer) - self._offset >= envelope_header_length:
+            flags, data_len = struct.unpack_from(
+                envelope_header_pack, self.buffer, self._offset
+            )
+
+            start = self._offset + envelope_header_length
+            end = start + data_len
 
-            if data_len > len(self.buffer):
+            if end > len(self.buffer):
                 break
 
-            data = self.shift_buffer(data_len)
+            data = self._read(start, end)
+            self._offset = end
 
-            if EnvelopeFlags.end_stream in flags:
+            if flags & _END_STREAM:
                 data = json.loads(data)
 
                 if "error" in data:
@@ -490,4 +755,3 @@ class ServerStreamParser:
                 return
 
             yield self.decode(data, msg_type=self.response_type)
-            del self.header
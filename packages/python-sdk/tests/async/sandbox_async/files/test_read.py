@@ -26,3 +26,15 @@ async def test_read_empty_file(async_sandbox: AsyncSandbox):
     await async_sandbox.commands.run(f"touch {filename}")
     read_content = await async_sandbox.files.read(filename)
     assert read_content == content
+
+
+async def test_read_file_to_path(async_sandbox: AsyncSandbox, tmp_path):
+    filename = "test_read_to_path.bin"
+    content = bytes(range(256)) * 1024
+
+    await async_sandbox.files.write(filename, content)
+    local_path = tmp_path / filename
+    written = await async_sandbox.files.read_to_path(filename, str(local_path))
+
+    assert written == len(content)
+    assert local_path.read_bytes() == content
@@ -36,6 +36,21 @@ async def test_write_binary_file(async_sandbox: AsyncSandbox):
     assert read_content == text
 
 
+async def test_write_async_iterable(async_sandbox: AsyncSandbox):
+    filename = "test_write_stream.txt"
+    parts = [b"This ", b"is ", b"a streamed ", b"test file."]
+
+    async def content():
+        for part in parts:
+            yield part
+
+    info = await async_sandbox.files.write(filename, content())
+    assert info.path == f"/home/user/{filename}"
+
+    read_content = await async_sandbox.files.read(filename)
+    assert read_content == b"".join(parts).decode("utf-8")
+
+
 async def test_write_multiple_files(async_sandbox: AsyncSandbox):
     # Attempt to write with empty files array
     empty_info = await async_sandbox.files.write_files([])
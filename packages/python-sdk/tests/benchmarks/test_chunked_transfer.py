@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+
+SIZE = 64 * 2**20
+CHUNK_SIZE = 4 * 2**20
+CONCURRENCY = 8
+BANDWIDTH = 32 * 2**20  # per connection, a single request can't go faster
+
+
+@pytest.fixture(autouse=True)
+def limited_bandwidth(envd_stand_in):
+    envd_stand_in.bandwidth = BANDWIDTH
+
+
+@pytest.fixture
+def big_file(tmp_path):
+    local = tmp_path / "local.bin"
+    local.write_bytes(os.urandom(SIZE))
+    return local
+
+
+def _throughput(elapsed: float) -> str:
+    return f"{SIZE / 2**20 / elapsed:.1f} MiB/s"
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("chunk_size", [None, CHUNK_SIZE], ids=["single", "chunked"])
+def test_download_throughput(stand_in_files, envd_stand_in, big_file, chunk_size):
+    remote = os.path.join(envd_stand_in.workdir, "big.bin")
+    os.link(big_file, remote)
+
+    local = big_file.with_name("downloaded.bin")
+    start = time.perf_counter()
+    stand_in_files.read_to_path(
+        remote, str(local), chunk_size=chunk_size, concurrency=CONCURRENCY
+    )
+    elapsed = time.perf_counter() - start
+
+    assert local.stat().st_size == SIZE
+    print(f"download {'chunked' if chunk_size else 'single'}: {_throughput(elapsed)}")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("chunk_size", [None, CHUNK_SIZE], ids=["single", "chunked"])
+def test_upload_throughput(stand_in_files, envd_stand_in, big_file, chunk_size):
+    remote = os.path.join(envd_stand_in.workdir, "big.bin")
+
+    start = time.perf_counter()
+    stand_in_files.write_from_path(
+        remote, str(big_file), chunk_size=chunk_size, concurrency=CONCURRENCY
+    )
+    elapsed = time.perf_counter() - start
+
+    assert os.path.getsize(remote) == SIZE
+    print(f"upload {'chunked' if chunk_size else 'single'}: {_throughput(elapsed)}")
+
+
+@pytest.mark.benchmark
+def test_chunked_download_after_failure_moves_less_data(
+    stand_in_files, envd_stand_in, big_file
+):
+    remote = os.path.join(envd_stand_in.workdir, "big.bin")
+    os.link(big_file, remote)
+    local = big_file.with_name("downloaded.bin")
+
+    # A broken connection costs one chunk instead of the whole file
+    envd_stand_in.fail_next(1)
+    stand_in_files.read_to_path(
+        remote, str(local), chunk_size=CHUNK_SIZE, concurrency=CONCURRENCY
+    )
+
+    assert local.read_bytes() == big_file.read_bytes()
+    assert envd_stand_in.requests.count(("GET", "/files")) == SIZE // CHUNK_SIZE + 1
@@ -0,0 +1,80 @@
+import json
+import time
+
+import pytest
+
+from e2b.envd.process import process_pb2
+from e2b_connect.client import (
+    EnvelopeFlags,
+    JSONCodec,
+    ProtobufCodec,
+    ServerStreamParser,
+    encode_envelope,
+)
+
+STDOUT_CHUNK = bytes(range(256)) * 16  # 4 KiB of stdout per event
+EVENTS = 2_000  # ~8 MiB of stdout in total
+NETWORK_CHUNK = 16 * 1024
+
+
+def _stdout_stream(codec) -> bytes:
+    event = codec.encode(
+        process_pb2.StartResponse(
+            event=process_pb2.ProcessEvent(
+                data=process_pb2.ProcessEvent.DataEvent(stdout=STDOUT_CHUNK),
+            )
+        )
+    )
+    frame = encode_envelope(flags=EnvelopeFlags(0), data=event)
+    end = encode_envelope(flags=EnvelopeFlags.end_stream, data=json.dumps({}).encode())
+
+    return frame * EVENTS + end
+
+
+def _consume(codec, stream: bytes) -> int:
+    parser = ServerStreamParser(
+        decode=codec.decode,
+        response_type=process_pb2.StartResponse,
+    )
+
+    received = 0
+    for i in range(0, len(stream), NETWORK_CHUNK):
+        for msg in parser.parse(stream[i : i + NETWORK_CHUNK]):
+            received += len(msg.event.data.stdout)
+
+    return received
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("codec", [JSONCodec, ProtobufCodec], ids=["json", "proto"])
+def test_stdout_stream_throughput(codec):
+    stream = _stdout_stream(codec)
+
+    start = time.perf_counter()
+    received = _consume(codec, stream)
+    elapsed = time.perf_counter() - start
+
+    assert received == len(STDOUT_CHUNK) * EVENTS
+    print(
+        f"{codec.content_type}: {len(stream) / 2**20:.1f} MiB on the wire, "
+        f"{received / 2**20 / elapsed:.1f} MiB/s of stdout"
+    )
+
+
+@pytest.mark.benchmark
+def test_proto_stream_is_smaller_and_faster_than_json():
+    json_stream = _stdout_stream(JSONCodec)
+    proto_stream = _stdout_stream(ProtobufCodec)
+
+    # base64 inflates the JSON payload by a third
+    assert len(proto_stream) < len(json_stream)
+
+    start = time.perf_counter()
+    _consume(JSONCodec, json_stream)
+    json_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _consume(ProtobufCodec, proto_stream)
+    proto_elapsed = time.perf_counter() - start
+
+    assert proto_elapsed < json_elapsed
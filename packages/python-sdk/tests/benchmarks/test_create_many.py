@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from e2b import AsyncSandbox, Sandbox
+
+SANDBOXES = 50
+CREATE_LATENCY = 0.02
+
+
+@pytest.mark.benchmark
+def test_create_many_throughput(api_stand_in):
+    api_stand_in.create_delay = CREATE_LATENCY
+
+    start = time.perf_counter()
+    for _ in range(SANDBOXES):
+        Sandbox.create(**api_stand_in.opts)
+    sequential = SANDBOXES / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    results = Sandbox.create_many(SANDBOXES, **api_stand_in.opts)
+    batched = SANDBOXES / (time.perf_counter() - start)
+
+    assert all(r.ok for r in results)
+    assert batched > sequential * 2
+    print(
+        f"{SANDBOXES} creations: sequential {sequential:.0f}/s, create_many {batched:.0f}/s"
+    )
+
+
+@pytest.mark.benchmark
+async def test_async_create_many_throughput(api_stand_in):
+    api_stand_in.create_delay = CREATE_LATENCY
+
+    start = time.perf_counter()
+    results = await AsyncSandbox.create_many(SANDBOXES, **api_stand_in.opts)
+    batched = SANDBOXES / (time.perf_counter() - start)
+
+    assert all(r.ok for r in results)
+    print(f"{SANDBOXES} creations: async create_many {batched:.0f}/s")
+
+    start = time.perf_counter()
+    results = await AsyncSandbox.kill_many(
+        [r.sandbox_id for r in results], **api_stand_in.opts
+    )
+    killed = SANDBOXES / (time.perf_counter() - start)
+
+    assert all(r.value for r in results)
+    print(f"{SANDBOXES} kills: async kill_many {killed:.0f}/s")
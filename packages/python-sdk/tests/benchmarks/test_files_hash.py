@@ -0,0 +1,62 @@
+import os
+import time
+
+import pytest
+
+from e2b.template.utils import calculate_files_hash
+
+SMALL_FILES = 100_000
+FILES_PER_DIR = 1000
+HUGE_FILES = 3
+HUGE_FILE_SIZE = 128 * 2**20
+CONCURRENCY = sorted({1, 2, 4, os.cpu_count() or 1})
+
+
+@pytest.fixture(scope="module")
+def small_files(tmp_path_factory):
+    root = tmp_path_factory.mktemp("small")
+    for i in range(SMALL_FILES):
+        directory = root / "src" / f"pkg{i // FILES_PER_DIR}"
+        if i % FILES_PER_DIR == 0:
+            directory.mkdir(parents=True)
+        (directory / f"module{i}.py").write_text(f"value = {i}\n")
+    return str(root)
+
+
+@pytest.fixture(scope="module")
+def huge_files(tmp_path_factory):
+    root = tmp_path_factory.mktemp("huge")
+    (root / "src").mkdir()
+    for i in range(HUGE_FILES):
+        (root / "src" / f"blob{i}.bin").write_bytes(os.urandom(HUGE_FILE_SIZE))
+    return str(root)
+
+
+def _speedup(context: str, name: str):
+    elapsed = {}
+    hashes = set()
+    for concurrency in CONCURRENCY:
+        start = time.perf_counter()
+        hashes.add(
+            calculate_files_hash(
+                "src", "/app", context, [], False, None, concurrency=concurrency
+            )
+        )
+        elapsed[concurrency] = time.perf_counter() - start
+
+    assert len(hashes) == 1
+    for concurrency, seconds in elapsed.items():
+        print(
+            f"{name}, {concurrency} threads on {os.cpu_count()} cores: "
+            f"{seconds:.2f}s ({elapsed[1] / seconds:.2f}x)"
+        )
+
+
+@pytest.mark.benchmark
+def test_small_files(small_files):
+    _speedup(small_files, f"{SMALL_FILES} small files")
+
+
+@pytest.mark.benchmark
+def test_huge_files(huge_files):
+    _speedup(huge_files, f"{HUGE_FILES} x {HUGE_FILE_SIZE // 2**20} MiB files")
@@ -0,0 +1,161 @@
+import asyncio
+import shutil
+import ssl
+import subprocess
+import threading
+import time
+
+import httpx
+import pytest
+
+from e2b import ConnectionConfig
+from e2b.api.client_async import get_transport
+from e2b.sandbox.pool import percentile
+
+h2_connection = pytest.importorskip("h2.connection")
+h2_config = pytest.importorskip("h2.config")
+h2_events = pytest.importorskip("h2.events")
+
+STREAMS = 100
+RESPONSE_DELAY = 0.05
+
+
+class TlsServer:
+    """
+    TLS server negotiating HTTP/2 or HTTP/1.1 with ALPN, answering every request after a delay.
+    """
+
+    def __init__(self, certfile: str, keyfile: str):
+        self.connections = 0
+        self._context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self._context.load_cert_chain(certfile, keyfile)
+        self._context.set_alpn_protocols(["h2", "http/1.1"])
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    @property
+    def url(self) -> str:
+        return f"https://127.0.0.1:{self._port}"
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", 0, ssl=self._context)
+        )
+        self._port = server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        ssl_object = writer.get_extra_info("ssl_object")
+        try:
+            if ssl_object.selected_alpn_protocol() == "h2":
+                await self._http2(reader, writer)
+            else:
+                await self._http1(reader, writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _http1(reader, writer):
+        while await reader.readline():
+            while await reader.readline() not in (b"\r\n", b""):
+                pass
+            await asyncio.sleep(RESPONSE_DELAY)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+
+    @staticmethod
+    async def _http2(reader, writer):
+        conn = h2_connection.H2Connection(h2_config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+
+        async def respond(stream_id: int):
+            await asyncio.sleep(RESPONSE_DELAY)
+            conn.send_headers(stream_id, [(":status", "200"), ("content-length", "2")])
+            conn.send_data(stream_id, b"ok", end_stream=True)
+            writer.write(conn.data_to_send())
+
+        tasks = set()
+        while data := await reader.read(65536):
+            for event in conn.receive_data(data):
+                if isinstance(event, h2_events.RequestReceived):
+                    task = asyncio.create_task(respond(event.stream_id))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                elif isinstance(event, h2_events.ConnectionTerminated):
+                    return
+            writer.write(conn.data_to_send())
+            await writer.drain()
+
+
+@pytest.fixture
+def tls_server(tmp_path, monkeypatch):
+    if shutil.which("openssl") is None:
+        pytest.skip("requires openssl")
+
+    certfile, keyfile = str(tmp_path / "cert.pem"), str(tmp_path / "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes"]
+        + ["-keyout", keyfile, "-out", certfile, "-days", "1"]
+        + ["-subj", "/CN=localhost", "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True,
+        capture_output=True,
+    )
+    # Trusted by the transports created by the SDK
+    monkeypatch.setenv("SSL_CERT_FILE", certfile)
+
+    server = TlsServer(certfile, keyfile)
+    yield server
+    server.stop()
+
+
+async def _concurrent_streams(server: TlsServer, http2: bool):
+    transport = get_transport(ConnectionConfig(http2=http2))
+    latencies = []
+
+    async with httpx.AsyncClient(base_url=server.url, transport=transport) as client:
+
+        async def request():
+            start = time.perf_counter()
+            r = await client.get("/health")
+            assert r.status_code == 200
+            latencies.append(time.perf_counter() - start)
+            return r.http_version
+
+        versions = await asyncio.gather(*(request() for _ in range(STREAMS)))
+
+    return set(versions), percentile(latencies, 99)
+
+
+@pytest.mark.benchmark
+async def test_http1_concurrent_streams(tls_server):
+    versions, p99 = await _concurrent_streams(tls_server, http2=False)
+
+    assert versions == {"HTTP/1.1"}
+    assert tls_server.connections == STREAMS
+    print(
+        f"HTTP/1.1, {STREAMS} streams: {tls_server.connections} connections, p99 {p99 * 1000:.0f}ms"
+    )
+
+
+@pytest.mark.benchmark
+async def test_http2_concurrent_streams(tls_server):
+    versions, p99 = await _concurrent_streams(tls_server, http2=True)
+
+    assert versions == {"HTTP/2"}
+    assert tls_server.connections == 1
+    print(
+        f"HTTP/2, {STREAMS} streams: {tls_server.connections} connections, p99 {p99 * 1000:.0f}ms"
+    )
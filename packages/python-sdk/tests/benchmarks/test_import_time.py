@@ -0,0 +1,66 @@
+import subprocess
+import sys
+
+import pytest
+
+IMPORT_BUDGETS = {
+    "from e2b import AsyncSandbox": 1.5,
+    "from e2b import Sandbox": 1.5,
+    "from e2b import Template": 1.5,
+}
+"""
+Maximum time in **seconds** the statements may spend importing modules, generous enough for slow CI machines.
+"""
+
+LAZY_STATEMENTS = ["import e2b", "from e2b import SandboxException"]
+"""
+Statements that must not load the SDK, `tests/test_lazy_import.py` checks which modules they load.
+"""
+
+
+def import_time(statement: str) -> float:
+    """
+    Time in **seconds** the statement spends importing modules in a fresh interpreter,
+    measured with `python -X importtime` and excluding the interpreter startup.
+    """
+
+    def total(code: str) -> int:
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stderr
+
+        microseconds = 0
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line.split("|")
+            # Nested imports are indented and already included in the top level ones
+            if not name.startswith("  "):
+                microseconds += int(cumulative)
+        return microseconds
+
+    return max(total(statement) - total("pass"), 0) / 1_000_000
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("statement", IMPORT_BUDGETS)
+def test_import_time_budget(statement):
+    # The best of a few runs, the first one may read the files from a cold disk cache
+    seconds = min(import_time(statement) for _ in range(3))
+
+    print(f"{statement}: {seconds * 1000:.1f}ms")
+    assert seconds <= IMPORT_BUDGETS[statement]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("statement", LAZY_STATEMENTS)
+def test_lazy_import_time(statement):
+    seconds = min(import_time(statement) for _ in range(3))
+    sandbox_seconds = min(import_time("from e2b import Sandbox") for _ in range(3))
+
+    print(f"{statement}: {seconds * 1000:.1f}ms")
+    # Relative to loading the SDK, an absolute budget this small is noise on a busy machine
+    assert seconds < sandbox_seconds / 2
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+
+from e2b import AsyncSandbox, Sandbox
+
+SANDBOXES = 200
+PAGE_SIZE = 20
+LIST_LATENCY = 0.03
+PAGE_PROCESSING = 0.03
+
+
+@pytest.mark.benchmark
+def test_list_prefetch(api_stand_in):
+    for _ in range(SANDBOXES):
+        api_stand_in.create({"templateID": "base"})
+    api_stand_in.list_delay = LIST_LATENCY
+
+    def consume(prefetch: int) -> float:
+        start = time.perf_counter()
+        for i, _ in enumerate(
+            Sandbox.list(limit=PAGE_SIZE, prefetch=prefetch, **api_stand_in.opts)
+        ):
+            if i % PAGE_SIZE == 0:
+                time.sleep(PAGE_PROCESSING)
+        return time.perf_counter() - start
+
+    serial = consume(0)
+    prefetched = consume(1)
+
+    assert prefetched < serial * 0.8
+    print(
+        f"{SANDBOXES} sandboxes in pages of {PAGE_SIZE}: serial {serial:.2f}s, prefetch {prefetched:.2f}s"
+    )
+
+
+@pytest.mark.benchmark
+async def test_async_list_prefetch(api_stand_in):
+    for _ in range(SANDBOXES):
+        api_stand_in.create({"templateID": "base"})
+    api_stand_in.list_delay = LIST_LATENCY
+
+    async def consume(prefetch: int) -> float:
+        start = time.perf_counter()
+        i = 0
+        async for _ in AsyncSandbox.list(
+            limit=PAGE_SIZE, prefetch=prefetch, **api_stand_in.opts
+        ):
+            if i % PAGE_SIZE == 0:
+                await asyncio.sleep(PAGE_PROCESSING)
+            i += 1
+        return time.perf_counter() - start
+
+    serial = await consume(0)
+    prefetched = await consume(1)
+
+    assert prefetched < serial * 0.8
+    print(
+        f"{SANDBOXES} sandboxes in pages of {PAGE_SIZE}: async serial {serial:.2f}s, prefetch {prefetched:.2f}s"
+    )
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from e2b_connect.client import (
+    EnvelopeFlags,
+    ServerStreamParser,
+    encode_envelope,
+    envelope_header_length,
+    decode_envelope_header,
+)
+
+
+class QuadraticParser:
+    """
+    The previous `bytes` based parser, kept here as the baseline.
+    """
+
+    def __init__(self, decode, response_type):
+        self.decode = decode
+        self.response_type = response_type
+        self.buffer = b""
+        self._header = None
+
+    def shift_buffer(self, size):
+        buffer = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return buffer
+
+    def parse(self, chunk):
+        self.buffer += chunk
+
+        while len(self.buffer) >= envelope_header_length:
+            if self._header is None:
+                self._header = decode_envelope_header(
+                    self.shift_buffer(envelope_header_length)
+                )
+            flags, data_len = self._header
+
+            if data_len > len(self.buffer):
+                break
+
+            data = self.shift_buffer(data_len)
+            if EnvelopeFlags.end_stream in flags:
+                return
+
+            yield self.decode(data, msg_type=self.response_type)
+            self._header = None
+
+
+def decode(data, *, msg_type):
+    return len(data)
+
+
+def _run(parser_cls, stream: bytes, chunk_size: int) -> float:
+    parser = parser_cls(decode=decode, response_type=None)
+
+    start = time.perf_counter()
+    received = 0
+    for i in range(0, len(stream), chunk_size):
+        for size in parser.parse(stream[i : i + chunk_size]):
+            received += size
+
+    return time.perf_counter() - start
+
+
+def _stream(frame_size: int, frames: int) -> bytes:
+    data = encode_envelope(flags=EnvelopeFlags(0), data=b"x" * frame_size)
+    end = encode_envelope(flags=EnvelopeFlags.end_stream, data=b"{}")
+    return data * frames + end
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "frame_size,frames,chunk_size",
+    [
+        (64, 50_000, 512),  # many small frames
+        (4 * 2**20, 4, 4096),  # few huge frames
+    ],
+    ids=["many-small-frames", "few-huge-frames"],
+)
+def test_stream_parser_throughput(frame_size, frames, chunk_size):
+    stream = _stream(frame_size, frames)
+
+    new = _run(ServerStreamParser, stream, chunk_size)
+    old = _run(QuadraticParser, stream, chunk_size)
+
+    print(
+        f"{frames} x {frame_size} B frames in {chunk_size} B chunks: "
+        f"{len(stream) / 2**20 / new:.1f} MiB/s (was {len(stream) / 2**20 / old:.1f} MiB/s)"
+    )
+
+    if frame_size > chunk_size:
+        assert new < old
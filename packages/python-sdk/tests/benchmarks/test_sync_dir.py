@@ -0,0 +1,37 @@
+import os
+import time
+
+import pytest
+
+FILES = 20_000
+FILES_PER_DIR = 100
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    for i in range(FILES):
+        directory = root / f"pkg{i // FILES_PER_DIR}"
+        if i % FILES_PER_DIR == 0:
+            directory.mkdir(parents=True)
+        (directory / f"module{i}.py").write_text(f"value = {i}\n")
+    return root
+
+
+@pytest.mark.benchmark
+def test_resync_after_one_line_edit(stand_in_files, envd_stand_in, repo):
+    remote = os.path.join(envd_stand_in.workdir, "repo")
+
+    start = time.perf_counter()
+    stand_in_files.sync_dir(str(repo), remote)
+    initial = time.perf_counter() - start
+
+    with open(repo / "pkg7" / "module700.py", "a") as f:
+        f.write("other = 1\n")
+
+    start = time.perf_counter()
+    result = stand_in_files.sync_dir(str(repo), remote)
+    resync = time.perf_counter() - start
+
+    assert result.transferred == ["pkg7/module700.py"]
+    print(f"{FILES} files: initial sync {initial:.2f}s, re-sync {resync:.2f}s")
@@ -1,9 +1,13 @@
 import asyncio
 import os
+import signal
+import threading
 import uuid
 from typing import Callable, Optional
 from uuid import uuid4
 
+import httpcore
+import httpx
 import pytest
 import pytest_asyncio
 
@@ -18,6 +22,12 @@ from e2b import (
     Template,
     TemplateClass,
 )
+from e2b.connection_config import ConnectionConfig
+from e2b.sandbox_async.commands.command import Commands as AsyncCommands
+from e2b.sandbox_async.filesystem.filesystem import Filesystem as AsyncFilesystem
+from e2b.sandbox_sync.commands.command import Commands
+from e2b.sandbox_sync.filesystem.filesystem import Filesystem
+from tests.stand_in import STAND_IN_ENVD_VERSION, StandInApi, StandInEnvd
 
 
 @pytest.fixture(scope="session")
@@ -180,3 +190,84 @@ class Helpers:
 @pytest.fixture
 def helpers():
     return Helpers
+
+
+@pytest.fixture
+def envd_stand_in(tmp_path):
+    workdir = tmp_path / "sandbox"
+    workdir.mkdir()
+
+    server = StandInEnvd(str(workdir))
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+
+    yield server
+
+    server.stopped.set()
+    for pid in list(server.processes):
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stand_in_files(envd_stand_in):
+    """
+    Sync filesystem module talking to the stand-in envd.
+    """
+    config = ConnectionConfig(api_key="test")
+    pool = httpcore.ConnectionPool()
+
+    with httpx.Client(base_url=envd_stand_in.url) as envd_api:
+        commands = Commands(envd_stand_in.url, config, pool, STAND_IN_ENVD_VERSION)
+        yield Filesystem(
+            envd_stand_in.url,
+            STAND_IN_ENVD_VERSION,
+            config,
+            pool,
+            envd_api,
+            commands,
+        )
+
+    pool.close()
+
+
+@pytest_asyncio.fixture
+async def async_stand_in_files(envd_stand_in):
+    """
+    Async filesystem module talking to the stand-in envd.
+    """
+    config = ConnectionConfig(api_key="test")
+    pool = httpcore.AsyncConnectionPool()
+
+    async with httpx.AsyncClient(base_url=envd_stand_in.url) as envd_api:
+        commands = AsyncCommands(envd_stand_in.url, config, pool, STAND_IN_ENVD_VERSION)
+        yield AsyncFilesystem(
+            envd_stand_in.url,
+            STAND_IN_ENVD_VERSION,
+            config,
+            pool,
+            envd_api,
+            commands,
+        )
+
+    await pool.aclose()
+
+
+@pytest.fixture
+def api_stand_in():
+    server = StandInApi()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,243 @@
+import contextlib
+import json
+
+import pytest
+from httpcore import ConnectError, ReadError, RemoteProtocolError
+
+from e2b.envd.filesystem import filesystem_pb2
+from e2b_connect.client import (
+    Client,
+    Code,
+    ConnectException,
+    EnvelopeFlags,
+    RetryBudget,
+    RetryPolicy,
+    encode_envelope,
+)
+
+STAT_URL = "http://envd/filesystem.Filesystem/Stat"
+MAKE_DIR_URL = "http://envd/filesystem.Filesystem/MakeDir"
+
+
+def unavailable(http_status: int) -> ConnectException:
+    error = ConnectException(Code.unavailable, "try again")
+    error.http_status = http_status
+    return error
+
+
+def fast_policy(**kwargs) -> RetryPolicy:
+    return RetryPolicy(initial_backoff=0, max_backoff=0, **kwargs)
+
+
+class FakeResponse:
+    def __init__(self, status: int = 200, content: bytes = b"", chunks=()):
+        self.status = status
+        self.content = content
+        self._chunks = chunks
+
+    def read(self):
+        return self.content
+
+    def iter_stream(self):
+        for chunk in self._chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+class FakePool:
+    """
+    Connection pool answering the requests with the given responses or errors in order.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = 0
+
+    def _next(self):
+        self.requests += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def request(self, **kwargs):
+        return self._next()
+
+    @contextlib.contextmanager
+    def stream(self, **kwargs):
+        yield self._next()
+
+
+def entry(name: str) -> bytes:
+    msg = filesystem_pb2.StatResponse(entry=filesystem_pb2.EntryInfo(name=name))
+    return msg.SerializeToString()
+
+
+def stream_chunk(name: str) -> bytes:
+    return encode_envelope(flags=EnvelopeFlags(0), data=entry(name))
+
+
+def stream_end() -> bytes:
+    return encode_envelope(flags=EnvelopeFlags.end_stream, data=json.dumps({}).encode())
+
+
+def client(pool, url=STAT_URL, **kwargs) -> Client:
+    return Client(
+        pool=pool,
+        url=url,
+        response_type=filesystem_pb2.StatResponse,
+        **kwargs,
+    )
+
+
+def test_backoff_is_bounded():
+    policy = RetryPolicy(initial_backoff=0.1, max_backoff=0.3, multiplier=2)
+
+    for attempt, bound in [(0, 0.1), (1, 0.2), (2, 0.3), (10, 0.3)]:
+        delays = [policy.backoff(attempt) for _ in range(100)]
+        assert all(0 <= d <= bound for d in delays)
+
+
+def test_retry_reasons():
+    policy = RetryPolicy()
+
+    assert policy.retry_reason(ConnectError("refused"), idempotent=False) == (
+        "connect_error"
+    )
+    assert policy.retry_reason(unavailable(503), idempotent=False) == "unavailable"
+    assert policy.retry_reason(unavailable(504), idempotent=False) is None
+    assert policy.retry_reason(unavailable(504), idempotent=True) == "unavailable"
+    assert policy.retry_reason(ReadError("reset"), idempotent=False) is None
+    assert policy.retry_reason(ReadError("reset"), idempotent=True) == (
+        "protocol_error"
+    )
+    assert (
+        policy.retry_reason(
+            RemoteProtocolError("Server disconnected without sending a response."),
+            idempotent=False,
+        )
+        == "protocol_error"
+    )
+    assert policy.retry_reason(ValueError(), idempotent=True) is None
+    assert (
+        policy.retry_reason(
+            ConnectException(Code.not_found, "missing"), idempotent=True
+        )
+        is None
+    )
+
+
+def test_sandbox_not_running_is_not_retried():
+    policy = RetryPolicy()
+
+    assert policy.retry_reason(unavailable(502), idempotent=True) is None
+
+
+def test_idempotent_procedures():
+    policy = RetryPolicy(idempotent_procedures=["filesystem.Filesystem/Stat"])
+
+    assert policy.is_idempotent(STAT_URL)
+    assert not policy.is_idempotent(MAKE_DIR_URL)
+    assert client(FakePool(), retry_policy=policy).idempotent
+    assert client(FakePool(), retry_policy=policy, idempotent=False).idempotent is False
+
+
+def test_budget_throttles_retries():
+    budget = RetryBudget(max_tokens=4, token_ratio=1)
+
+    assert budget.on_failure()
+    assert not budget.on_failure()
+    assert not budget.on_failure()
+
+    for _ in range(3):
+        budget.on_success()
+    assert budget.on_failure()
+
+
+def test_unary_retries_until_success():
+    pool = FakePool(
+        ConnectError("refused"),
+        FakeResponse(503, b'{"code": "unavailable", "message": "busy"}'),
+        FakeResponse(200, entry("file")),
+    )
+    policy = fast_policy()
+
+    res = client(pool, retry_policy=policy).call_unary(filesystem_pb2.StatRequest())
+
+    assert res.entry.name == "file"
+    assert pool.requests == 3
+
+    stats = policy.stats
+    assert stats.calls == 1
+    assert stats.retries == 2
+    assert stats.reasons == {"connect_error": 1, "unavailable": 1}
+
+
+def test_unary_gives_up_after_max_attempts():
+    pool = FakePool(*[ConnectError("refused")] * 3)
+    policy = fast_policy(max_attempts=3)
+
+    with pytest.raises(ConnectError):
+        client(pool, retry_policy=policy).call_unary(filesystem_pb2.StatRequest())
+
+    assert pool.requests == 3
+    assert policy.stats.exhausted == 1
+
+
+def test_non_idempotent_unary_is_not_retried_after_lost_response():
+    pool = FakePool(ReadError("reset"), FakeResponse(200, entry("dir")))
+    policy = fast_policy(idempotent_procedures=["filesystem.Filesystem/Stat"])
+
+    with pytest.raises(ReadError):
+        client(pool, url=MAKE_DIR_URL, retry_policy=policy).call_unary(
+            filesystem_pb2.StatRequest()
+        )
+
+    assert pool.requests == 1
+    assert policy.stats.retries == 0
+
+
+def test_unary_retries_are_throttled_by_budget():
+    policy = fast_policy(budget=RetryBudget(max_tokens=2, token_ratio=0.1))
+    pool = FakePool(ConnectError("refused"), ConnectError("refused"))
+
+    with pytest.raises(ConnectError):
+        client(pool, retry_policy=policy).call_unary(filesystem_pb2.StatRequest())
+
+    assert pool.requests == 1
+    assert policy.stats.throttled == 1
+
+
+def test_stream_retries_before_first_message():
+    pool = FakePool(
+        FakeResponse(chunks=[ReadError("reset")]),
+        FakeResponse(chunks=[stream_chunk("a"), stream_chunk("b"), stream_end()]),
+    )
+    policy = fast_policy(idempotent_procedures=["filesystem.Filesystem/Stat"])
+
+    messages = client(pool, retry_policy=policy).call_server_stream(
+        filesystem_pb2.StatRequest()
+    )
+
+    assert [m.entry.name for m in messages] == ["a", "b"]
+    assert policy.stats.retries == 1
+
+
+def test_stream_is_not_replayed_after_first_message():
+    pool = FakePool(
+        FakeResponse(chunks=[stream_chunk("a"), ReadError("reset")]),
+        FakeResponse(chunks=[stream_chunk("a"), stream_chunk("b"), stream_end()]),
+    )
+    policy = fast_policy(idempotent_procedures=["filesystem.Filesystem/Stat"])
+
+    received = []
+    with pytest.raises(ReadError):
+        for msg in client(pool, retry_policy=policy).call_server_stream(
+            filesystem_pb2.StatRequest()
+        ):
+            received.append(msg.entry.name)
+
+    assert received == ["a"]
+    assert pool.requests == 1
+    assert policy.stats.retries == 0
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from e2b_connect.client import (
+    Code,
+    ConnectException,
+    EnvelopeFlags,
+    ServerStreamParser,
+    encode_envelope,
+)
+
+
+class Raw:
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def decode(data, *, msg_type):
+    return msg_type(data)
+
+
+def frame(data: bytes) -> bytes:
+    return encode_envelope(flags=EnvelopeFlags(0), data=data)
+
+
+def end_frame(payload: dict) -> bytes:
+    return encode_envelope(
+        flags=EnvelopeFlags.end_stream, data=json.dumps(payload).encode()
+    )
+
+
+def parse_all(parser: ServerStreamParser, chunks):
+    return [msg.data for chunk in chunks for msg in parser.parse(chunk)]
+
+
+def test_parse_multiple_frames_in_one_chunk():
+    parser = ServerStreamParser(decode=decode, response_type=Raw)
+    stream = frame(b"a") + frame(b"") + frame(b"bcd") + end_frame({})
+
+    assert parse_all(parser, [stream]) == [b"a", b"", b"bcd"]
+
+
+def test_parse_frames_split_at_every_byte():
+    payloads = [b"x" * n for n in (0, 1, 4, 5, 6, 300)]
+    stream = b"".join(frame(p) for p in payloads) + end_frame({})
+
+    parser = ServerStreamParser(decode=decode, response_type=Raw)
+    chunks = [stream[i : i + 1] for i in range(len(stream))]
+
+    assert parse_all(parser, chunks) == payloads
+
+
+def test_parse_large_frame_in_small_chunks():
+    payload = bytes(range(256)) * 4096
+    stream = frame(payload) + frame(b"tail") + end_frame({})
+
+    parser = ServerStreamParser(decode=decode, response_type=Raw)
+    chunks = [stream[i : i + 1000] for i in range(0, len(stream), 1000)]
+
+    assert parse_all(parser, chunks) == [payload, b"tail"]
+    assert len(parser.buffer) - parser._offset == 0
+
+
+def test_parse_end_stream_error():
+    parser = ServerStreamParser(decode=decode, response_type=Raw)
+    stream = frame(b"a") + end_frame(
+        {"error": {"code": "not_found", "message": "missing"}}
+    )
+
+    received = []
+    with pytest.raises(ConnectException) as e:
+        for msg in parser.parse(stream):
+            received.append(msg.data)
+
+    assert received == [b"a"]
+    assert e.value.status == Code.not_found
+    assert e.value.message == "missing"
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from e2b.envd.process import process_pb2
+from e2b.exceptions import InvalidArgumentException, SandboxException
+from e2b.sandbox_async.commands.command_handle import AsyncCommandHandle
+
+
+def _event(**kwargs):
+    return process_pb2.StartResponse(event=process_pb2.ProcessEvent(**kwargs))
+
+
+def _data(**kwargs):
+    return _event(data=process_pb2.ProcessEvent.DataEvent(**kwargs))
+
+
+def _end(exit_code: int = 0):
+    return _event(end=process_pb2.ProcessEvent.EndEvent(exit_code=exit_code))
+
+
+class Stream:
+    """
+    Command event stream counting how many events were read from it.
+    """
+
+    def __init__(self, *events):
+        self.events = list(events)
+        self.read = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.read == len(self.events):
+            raise StopAsyncIteration
+        self.read += 1
+        await asyncio.sleep(0)
+        return self.events[self.read - 1]
+
+
+async def _kill():
+    return True
+
+
+def handle(stream: Stream) -> AsyncCommandHandle:
+    return AsyncCommandHandle(pid=1, handle_kill=_kill, events=stream)
+
+
+async def test_events_in_order():
+    h = handle(
+        Stream(_data(stdout=b"a"), _data(stderr=b"b"), _data(stdout=b"c"), _end(2))
+    )
+
+    events = [(e.type, e.data, e.exit_code) async for e in h]
+
+    assert events == [
+        ("stdout", "a", None),
+        ("stderr", "b", None),
+        ("stdout", "c", None),
+        ("end", None, 2),
+    ]
+    assert h.stdout == "ac"
+
+
+async def test_slow_consumer_applies_backpressure():
+    stream = Stream(*[_data(stdout=f"{i}".encode()) for i in range(100)], _end())
+    h = handle(stream)
+
+    events = h.events(queue_size=4)
+    first = await events.__anext__()
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+    # One event taken, four queued and one waiting to be queued
+    assert first.data == "0"
+    assert stream.read <= 6
+
+    rest = [e async for e in events]
+    assert len(rest) == 100
+    assert stream.read == 101
+
+
+async def test_pty_output_is_dropped():
+    stream = Stream(*[_data(pty=b"x") for _ in range(100)], _end())
+    h = handle(stream)
+
+    events = h.events(queue_size=4, pty_overflow="drop")
+    # The pty output doesn't block, the whole stream is read up to the end event
+    while stream.read < 101:
+        await asyncio.sleep(0)
+    received = [e async for e in events]
+
+    assert [e.type for e in received] == ["pty"] * 4 + ["end"]
+
+
+async def test_pty_output_is_coalesced():
+    stream = Stream(*[_data(pty=bytes([i])) for i in range(100)], _end())
+    h = handle(stream)
+
+    events = h.events(queue_size=4, pty_overflow="coalesce")
+    # The pty output doesn't block, the whole stream is read up to the end event
+    while stream.read < 101:
+        await asyncio.sleep(0)
+    received = [e async for e in events]
+
+    assert [e.type for e in received] == ["pty"] * 5 + ["end"]
+    assert b"".join(e.data for e in received[:-1]) == bytes(range(100))
+
+
+async def test_breaking_out_unblocks_the_command():
+    h = handle(Stream(*[_data(stdout=b"x") for _ in range(100)], _end()))
+
+    events = h.events(queue_size=1)
+    async for _ in events:
+        break
+    await events.aclose()
+
+    result = await asyncio.wait_for(h.wait(), 5)
+    assert result.stdout == "x" * 100
+
+
+async def test_finished_command_yields_end():
+    h = handle(Stream(_data(stdout=b"a"), _end()))
+    await h.wait()
+
+    assert [e.type async for e in h] == ["end"]
+
+
+async def test_invalid_arguments():
+    h = handle(Stream(_end()))
+
+    with pytest.raises(InvalidArgumentException):
+        h.events(queue_size=0)
+    with pytest.raises(InvalidArgumentException):
+        h.events(pty_overflow="skip")
+
+    h.events()
+    with pytest.raises(SandboxException):
+        h.events()
@@ -0,0 +1,234 @@
+import pytest
+
+from e2b.envd.process import process_pb2
+from e2b.exceptions import InvalidArgumentException
+from e2b.sandbox.commands.command_handle import CommandExitException, OutputBuffer
+from e2b.sandbox_async.commands.command_handle import AsyncCommandHandle
+from e2b.sandbox_sync.commands.command_handle import CommandHandle
+
+
+def _events(exit_code: int = 0):
+    for i in range(1000):
+        yield process_pb2.StartResponse(
+            event=process_pb2.ProcessEvent(
+                data=process_pb2.ProcessEvent.DataEvent(stdout=f"{i}\n".encode())
+            )
+        )
+    yield process_pb2.StartResponse(
+        event=process_pb2.ProcessEvent(
+            data=process_pb2.ProcessEvent.DataEvent(stderr=b"done")
+        )
+    )
+    yield process_pb2.StartResponse(
+        event=process_pb2.ProcessEvent(
+            end=process_pb2.ProcessEvent.EndEvent(exit_code=exit_code)
+        )
+    )
+
+
+async def _async_events(exit_code: int = 0):
+    for event in _events(exit_code):
+        yield event
+
+
+EXPECTED_STDOUT = "".join(f"{i}\n" for i in range(1000))
+
+
+def test_output_buffer_joins_all_chunks():
+    buffer = OutputBuffer()
+    for chunk in ["a", "bc", "", "def"]:
+        buffer.append(chunk)
+
+    assert buffer.value == "abcdef"
+    buffer.append("g")
+    assert buffer.value == "abcdefg"
+
+
+def test_output_buffer_keeps_tail_when_capped():
+    buffer = OutputBuffer(max_size=5)
+    for chunk in ["abc", "def", "gh", "ijklmn"]:
+        buffer.append(chunk)
+        assert len(buffer.value) <= 5
+
+    assert buffer.value == "jklmn"
+
+
+def test_output_buffer_spills_to_file():
+    buffer = OutputBuffer(max_size=10, spill=True)
+    for i in range(100):
+        buffer.append(f"{i},")
+
+    assert buffer._file._rolled
+    assert buffer.value == ",97,98,99,"
+    assert buffer.file.read() == "".join(f"{i}," for i in range(100)).encode()
+    buffer.append("end")
+    assert buffer.value == ",98,99,end"
+    assert buffer.file.read().endswith(b"99,end")
+
+
+def test_output_buffer_value_is_not_read_from_file():
+    buffer = OutputBuffer(max_size=4, spill=True)
+    for i in range(100):
+        buffer.append("abcd")
+        assert buffer.value == "abcd"
+
+    assert buffer.file.tell() == 0
+    assert len(buffer.file.read()) == 400
+
+
+def test_output_buffer_spill_requires_max_size():
+    with pytest.raises(InvalidArgumentException):
+        OutputBuffer(spill=True)
+
+
+def test_sync_handle_accumulates_output():
+    handle = CommandHandle(pid=1, handle_kill=lambda: True, events=_events())
+
+    result = handle.wait()
+
+    assert result.stdout == EXPECTED_STDOUT
+    assert result.stderr == "done"
+    assert handle.stdout == EXPECTED_STDOUT
+
+
+def test_sync_handle_caps_output():
+    handle = CommandHandle(
+        pid=1, handle_kill=lambda: True, events=_events(1), max_output_size=4
+    )
+
+    with pytest.raises(CommandExitException) as e:
+        handle.wait()
+
+    assert e.value.stdout == "999\n"
+    assert e.value.stderr == "done"
+
+
+async def test_async_handle_accumulates_output():
+    handle = AsyncCommandHandle(pid=1, handle_kill=lambda: True, events=_async_events())
+
+    result = await handle.wait()
+
+    assert result.stdout == EXPECTED_STDOUT
+    assert handle.stdout == EXPECTED_STDOUT
+    assert handle.exit_code == 0
+
+
+async def test_async_handle_spills_output():
+    handle = AsyncCommandHandle(
+        pid=1,
+        handle_kill=lambda: True,
+        events=_async_events(),
+        max_output_size=16,
+        spill_output=True,
+    )
+
+    result = await handle.wait()
+
+    assert result.stdout == EXPECTED_STDOUT[-16:]
+    assert result.stdout_file.read().decode() == EXPECTED_STDOUT
+    assert result.stderr_file.read() == b"done"
+    assert handle.stdout_file is result.stdout_file
+
+
+def _chunked_events(chunks):
+    for chunk in chunks:
+        yield process_pb2.StartResponse(
+            event=process_pb2.ProcessEvent(
+                data=process_pb2.ProcessEvent.DataEvent(stdout=chunk)
+            )
+        )
+    yield process_pb2.StartResponse(
+        event=process_pb2.ProcessEvent(end=process_pb2.ProcessEvent.EndEvent())
+    )
+
+
+def test_output_buffer_raw():
+    buffer = OutputBuffer(raw=True)
+    for chunk in [b"\x00\xff", b"", b"\xc3"]:
+        buffer.append(chunk)
+
+    assert buffer.value == b"\x00\xff\xc3"
+
+
+def test_output_buffer_raw_keeps_tail_when_capped():
+    buffer = OutputBuffer(max_size=3, raw=True)
+    written = b""
+    for i in range(100):
+        buffer.append(bytes([i, i]))
+        written += bytes([i, i])
+        assert buffer.value == written[-3:]
+
+
+def test_output_buffer_raw_spills_to_file():
+    buffer = OutputBuffer(max_size=10, spill=True, raw=True)
+    for i in range(256):
+        buffer.append(bytes([i]))
+
+    assert buffer.value == bytes(range(246, 256))
+    assert buffer.file.read() == bytes(range(256))
+
+
+def test_split_characters_are_decoded():
+    text = "zażółć 🙂"
+    data = text.encode("utf-8")
+    handle = CommandHandle(
+        pid=1,
+        handle_kill=lambda: True,
+        events=_chunked_events([data[i : i + 1] for i in range(len(data))]),
+    )
+
+    received = []
+    result = handle.wait(on_stdout=received.append)
+
+    assert result.stdout == text
+    assert "".join(received) == text
+
+
+def test_incomplete_character_is_replaced_at_end():
+    handle = CommandHandle(
+        pid=1, handle_kill=lambda: True, events=_chunked_events([b"a\xf0\x9f"])
+    )
+
+    assert handle.wait().stdout == "a�"
+
+
+def test_sync_handle_raw_output():
+    chunks = [b"\x1f\x8b", b"\x08\x00\xff"]
+    handle = CommandHandle(
+        pid=1, handle_kill=lambda: True, events=_chunked_events(chunks), raw=True
+    )
+
+    received = []
+    result = handle.wait(on_stdout=received.append)
+
+    assert received == chunks
+    assert result.stdout == b"\x1f\x8b\x08\x00\xff"
+    assert result.stderr == b""
+
+
+async def test_async_handle_raw_output():
+    async def events():
+        for event in _chunked_events([b"\xe2\x82", b"\xac"]):
+            yield event
+
+    received = []
+    handle = AsyncCommandHandle(
+        pid=1,
+        handle_kill=lambda: True,
+        events=events(),
+        on_stdout=received.append,
+        raw=True,
+    )
+
+    result = await handle.wait()
+
+    assert received == [b"\xe2\x82", b"\xac"]
+    assert result.stdout == "€".encode("utf-8")
+
+
+def test_raw_run(stand_in_files):
+    commands = stand_in_files._commands
+
+    result = commands.run("printf '\\x00\\xff\\xc3'", raw=True)
+
+    assert result.stdout == b"\x00\xff\xc3"
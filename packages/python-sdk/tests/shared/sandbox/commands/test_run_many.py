@@ -0,0 +1,212 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from e2b import (
+    AsyncSandbox,
+    CommandExitException,
+    Sandbox,
+    SandboxException,
+    TimeoutException,
+)
+
+LINES = "for i in 1 2 3 4 5; do echo $i; sleep 0.05; done"
+
+
+def sandboxes(files, count: int):
+    """
+    Sandboxes sharing the commands module talking to the stand-in envd.
+    """
+    return [
+        SimpleNamespace(sandbox_id=f"sbx-{i}", commands=files._commands)
+        for i in range(count)
+    ]
+
+
+def gone(envd_stand_in) -> bool:
+    """
+    Whether all processes the stand-in envd started have exited, they are reaped shortly after being killed.
+    """
+    deadline = time.monotonic() + 5
+    while envd_stand_in.processes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return not envd_stand_in.processes
+
+
+def test_results_are_in_order(stand_in_files):
+    sbxs = sandboxes(stand_in_files, 3)
+    commands = [(sbx, f"sleep 0.{3 - i}; echo {i}") for i, sbx in enumerate(sbxs)]
+
+    with Sandbox.run_many(commands) as group:
+        results = group.wait()
+
+    assert [r.sandbox_id for r in results] == ["sbx-0", "sbx-1", "sbx-2"]
+    assert [r.value.stdout for r in results] == ["0\n", "1\n", "2\n"]
+    assert all(r.ok and r.pid for r in results)
+
+
+def test_output_is_tagged(stand_in_files):
+    sbxs = sandboxes(stand_in_files, 2)
+    group = Sandbox.run_many([(sbxs[0], "echo out"), (sbxs[1], "echo err >&2; exit 3")])
+
+    outputs = list(group)
+    results = group.wait()
+
+    assert sorted((o.index, o.sandbox_id, o.stream, o.data) for o in outputs) == [
+        (0, "sbx-0", "stdout", "out\n"),
+        (1, "sbx-1", "stderr", "err\n"),
+    ]
+    assert {o.pid for o in outputs} == {r.pid for r in results}
+    assert isinstance(results[1].error, CommandExitException)
+    assert results[1].error.exit_code == 3
+
+
+def test_output_before_iteration_is_bounded(stand_in_files, monkeypatch):
+    monkeypatch.setattr(
+        "e2b.sandbox_sync.commands.run_many.RUN_MANY_OUTPUT_QUEUE_SIZE", 2
+    )
+    group = Sandbox.run_many([(sandboxes(stand_in_files, 1)[0], LINES)])
+
+    results = group.wait()
+    outputs = list(group)
+
+    assert [o.data for o in outputs] == ["1\n", "2\n"]
+    assert results[0].value.stdout == "1\n2\n3\n4\n5\n"
+
+
+def test_slow_iteration_gets_all_output(stand_in_files, monkeypatch):
+    monkeypatch.setattr(
+        "e2b.sandbox_sync.commands.run_many.RUN_MANY_OUTPUT_QUEUE_SIZE", 1
+    )
+    group = Sandbox.run_many([(sandboxes(stand_in_files, 1)[0], LINES)])
+
+    outputs = []
+    for output in group:
+        time.sleep(0.1)
+        outputs.append(output.data)
+
+    assert outputs == ["1\n", "2\n", "3\n", "4\n", "5\n"]
+    with pytest.raises(SandboxException, match="only once"):
+        list(group)
+
+
+def test_stopped_iteration_doesnt_block(stand_in_files, monkeypatch):
+    monkeypatch.setattr(
+        "e2b.sandbox_sync.commands.run_many.RUN_MANY_OUTPUT_QUEUE_SIZE", 1
+    )
+    group = Sandbox.run_many([(sandboxes(stand_in_files, 1)[0], LINES)])
+
+    for _ in group:
+        break
+    results = group.wait()
+
+    assert results[0].value.stdout == "1\n2\n3\n4\n5\n"
+
+
+def test_concurrency_is_limited(stand_in_files):
+    commands = [(sbx, "sleep 0.2") for sbx in sandboxes(stand_in_files, 4)]
+
+    start = time.monotonic()
+    Sandbox.run_many(commands, concurrency=2).wait()
+
+    assert time.monotonic() - start >= 0.4
+
+
+def test_stragglers_are_killed(stand_in_files, envd_stand_in):
+    sbxs = sandboxes(stand_in_files, 2)
+
+    start = time.monotonic()
+    results = Sandbox.run_many(
+        [(sbxs[0], "echo fast"), (sbxs[1], "echo slow; sleep 30")], timeout=0.5
+    ).wait()
+
+    assert time.monotonic() - start < 10
+    assert results[0].ok
+    assert isinstance(results[1].error, TimeoutException)
+    assert gone(envd_stand_in)
+
+
+def test_invalid_concurrency(stand_in_files):
+    with pytest.raises(Exception, match="concurrency"):
+        Sandbox.run_many([], concurrency=0)
+
+
+async def test_async_output_and_results(async_stand_in_files):
+    sbxs = sandboxes(async_stand_in_files, 3)
+    commands = [(sbx, f"sleep 0.{3 - i}; echo {i}") for i, sbx in enumerate(sbxs)]
+
+    async with await AsyncSandbox.run_many(commands, concurrency=3) as group:
+        outputs = [o async for o in group]
+        results = await group.wait()
+
+    # The shortest sleep finishes first, the results keep the order of the commands
+    assert [o.data for o in outputs] == ["2\n", "1\n", "0\n"]
+    assert [o.sandbox_id for o in outputs] == ["sbx-2", "sbx-1", "sbx-0"]
+    assert [r.value.stdout for r in results] == ["0\n", "1\n", "2\n"]
+    assert [o.pid for o in outputs] == [r.pid for r in reversed(results)]
+
+
+async def test_async_output_is_bounded(async_stand_in_files, monkeypatch):
+    monkeypatch.setattr(
+        "e2b.sandbox_async.commands.run_many.RUN_MANY_OUTPUT_QUEUE_SIZE", 1
+    )
+    sbxs = sandboxes(async_stand_in_files, 2)
+
+    # Only the first chunk is buffered before the iteration starts
+    group = await AsyncSandbox.run_many([(sbxs[0], LINES)])
+    results = await group.wait()
+    assert [o.data async for o in group] == ["1\n"]
+    assert results[0].value.stdout == "1\n2\n3\n4\n5\n"
+
+    # The output is read as the consumer catches up
+    group = await AsyncSandbox.run_many([(sbxs[1], LINES)])
+    outputs = []
+    async for output in group:
+        await asyncio.sleep(0.1)
+        outputs.append(output)
+    results = await group.wait()
+    assert [o.data for o in outputs] == ["1\n", "2\n", "3\n", "4\n", "5\n"]
+    assert {o.pid for o in outputs} == {results[0].pid}
+
+
+async def test_async_immediate_output_has_pid(async_stand_in_files):
+    sbxs = sandboxes(async_stand_in_files, 4)
+
+    group = await AsyncSandbox.run_many([(sbx, "echo now") for sbx in sbxs])
+    outputs = [o async for o in group]
+    results = await group.wait()
+
+    assert sorted((o.index, o.pid) for o in outputs) == [
+        (i, r.pid) for i, r in enumerate(results)
+    ]
+
+
+async def test_async_stragglers_are_killed(async_stand_in_files, envd_stand_in):
+    sbxs = sandboxes(async_stand_in_files, 2)
+
+    start = time.monotonic()
+    group = await AsyncSandbox.run_many(
+        [(sbxs[0], "echo fast"), (sbxs[1], "sleep 30")], timeout=0.5
+    )
+    results = await group.wait()
+
+    assert time.monotonic() - start < 10
+    assert results[0].ok
+    assert isinstance(results[1].error, TimeoutException)
+    assert gone(envd_stand_in)
+
+
+async def test_async_cancel(async_stand_in_files, envd_stand_in):
+    commands = [(sbx, "sleep 30") for sbx in sandboxes(async_stand_in_files, 3)]
+
+    group = await AsyncSandbox.run_many(commands, concurrency=2)
+    while len(envd_stand_in.processes) < 2:
+        await asyncio.sleep(0.01)
+    await group.cancel()
+    results = await group.wait()
+
+    assert all("cancelled" in str(r.error) for r in results)
+    assert [r.pid is not None for r in results] == [True, True, False]
+    assert gone(envd_stand_in)
@@ -0,0 +1,102 @@
+import os
+
+from e2b import NotFoundException
+from e2b.sandbox.filesystem.batch import LIST_DIR_THRESHOLD, group_by_parent
+
+STAT = ("POST", "/filesystem.Filesystem/Stat")
+LIST_DIR = ("POST", "/filesystem.Filesystem/ListDir")
+
+
+def test_group_by_parent():
+    paths = [f"/dir/{i}" for i in range(LIST_DIR_THRESHOLD)] + [
+        "/other/a",
+        "relative",
+        "/dir/../x",
+    ]
+
+    groups, singles = group_by_parent(paths)
+
+    assert groups == {"/dir": list(range(LIST_DIR_THRESHOLD))}
+    assert singles == [
+        LIST_DIR_THRESHOLD,
+        LIST_DIR_THRESHOLD + 1,
+        LIST_DIR_THRESHOLD + 2,
+    ]
+
+
+def test_exists_many(stand_in_files, envd_stand_in):
+    root = envd_stand_in.workdir
+    open(os.path.join(root, "a"), "w").close()
+    os.mkdir(os.path.join(root, "b"))
+
+    paths = [os.path.join(root, name) for name in ["a", "missing", "b"]]
+    results = stand_in_files.exists_many(paths)
+
+    assert [r.path for r in results] == paths
+    assert [r.value for r in results] == [True, False, True]
+    assert all(r.ok for r in results)
+    assert envd_stand_in.requests.count(STAT) == 3
+
+
+def test_stat_many_lists_crowded_directories(stand_in_files, envd_stand_in):
+    root = envd_stand_in.workdir
+    names = [f"file{i}" for i in range(20)]
+    for name in names:
+        with open(os.path.join(root, name), "w") as f:
+            f.write(name)
+
+    paths = [os.path.join(root, name) for name in names + ["missing"]]
+    results = stand_in_files.stat_many(paths, concurrency=4)
+
+    assert [r.path for r in results] == paths
+    assert [r.value.size for r in results[:-1]] == [len(name) for name in names]
+    assert isinstance(results[-1].error, NotFoundException)
+    assert envd_stand_in.requests.count(LIST_DIR) == 1
+    assert envd_stand_in.requests.count(STAT) == 0
+
+
+def test_stat_many_in_missing_directory(stand_in_files, envd_stand_in):
+    paths = [
+        os.path.join(envd_stand_in.workdir, "missing", str(i))
+        for i in range(LIST_DIR_THRESHOLD)
+    ]
+
+    results = stand_in_files.exists_many(paths)
+
+    assert [r.value for r in results] == [False] * LIST_DIR_THRESHOLD
+
+
+def test_make_dirs_and_remove_many(stand_in_files, envd_stand_in):
+    root = envd_stand_in.workdir
+    os.mkdir(os.path.join(root, "existing"))
+    paths = [os.path.join(root, name) for name in ["x/y", "existing", "z"]]
+
+    results = stand_in_files.make_dirs(paths)
+    assert [r.value for r in results] == [True, False, True]
+    assert all(os.path.isdir(p) for p in paths)
+
+    results = stand_in_files.remove_many(paths + [os.path.join(root, "missing")])
+    assert [r.ok for r in results] == [True, True, True, False]
+    assert isinstance(results[-1].error, NotFoundException)
+    assert not any(os.path.exists(p) for p in paths)
+
+
+async def test_async_batch(async_stand_in_files, envd_stand_in):
+    root = envd_stand_in.workdir
+    paths = [os.path.join(root, f"dir{i}") for i in range(LIST_DIR_THRESHOLD + 2)]
+
+    results = await async_stand_in_files.make_dirs(paths, concurrency=3)
+    assert all(r.value for r in results)
+
+    results = await async_stand_in_files.exists_many(
+        paths + [os.path.join(root, "missing")]
+    )
+    assert [r.value for r in results] == [True] * len(paths) + [False]
+    assert envd_stand_in.requests.count(LIST_DIR) == 1
+
+    results = await async_stand_in_files.stat_many(paths[:2])
+    assert [r.value.name for r in results] == ["dir0", "dir1"]
+
+    results = await async_stand_in_files.remove_many(paths)
+    assert all(r.ok for r in results)
+    assert os.listdir(root) == []
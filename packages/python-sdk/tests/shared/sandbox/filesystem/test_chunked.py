@@ -0,0 +1,223 @@
+import os
+import subprocess
+
+import pytest
+
+from e2b import SandboxException
+from e2b.exceptions import InvalidArgumentException
+from e2b.sandbox.filesystem.chunked import (
+    FileRange,
+    assemble_command,
+    chunk_dir,
+    chunk_name,
+    plan_chunks,
+)
+
+CHUNK_SIZE = 64 * 1024
+CONTENT = os.urandom(CHUNK_SIZE * 5 + 123)
+CHUNKS = len(plan_chunks(len(CONTENT), CHUNK_SIZE))
+
+
+def _files_requests(server, method: str) -> int:
+    return server.requests.count((method, "/files"))
+
+
+def test_plan_chunks():
+    assert plan_chunks(10, 4) == [(0, 4), (4, 4), (8, 2)]
+    assert plan_chunks(8, 4) == [(0, 4), (4, 4)]
+    assert plan_chunks(0, 4) == []
+
+    with pytest.raises(InvalidArgumentException):
+        plan_chunks(10, 0)
+
+
+def test_assemble_many_chunks(tmp_path):
+    directory = tmp_path / "file.e2b-chunks"
+    directory.mkdir()
+    count = 20_000
+    for i in range(count):
+        (directory / chunk_name(i)).write_bytes(b"%d," % i)
+
+    # One argument per chunk would exceed the maximum length of the command line
+    subprocess.run(
+        ["bash", "-c", assemble_command(str(directory), "file", count)],
+        cwd=tmp_path,
+        check=True,
+    )
+
+    assert (tmp_path / "file").read_bytes() == b"".join(
+        b"%d," % i for i in range(count)
+    )
+    assert not directory.exists()
+
+
+def test_file_range(tmp_path):
+    local = tmp_path / "local"
+    local.write_bytes(CONTENT)
+
+    with FileRange(str(local), 100, 1000) as f:
+        assert f.read(10) == CONTENT[100:110]
+        assert f.read() == CONTENT[110:1100]
+        assert f.read() == b""
+
+        f.seek(0)
+        assert f.tell() == 0
+        assert f.seek(0, os.SEEK_END) == 1000
+
+
+def test_chunked_download(stand_in_files, envd_stand_in, tmp_path):
+    remote = os.path.join(envd_stand_in.workdir, "big.bin")
+    with open(remote, "wb") as f:
+        f.write(CONTENT)
+
+    local = tmp_path / "local.bin"
+    written = stand_in_files.read_to_path(
+        remote, str(local), chunk_size=CHUNK_SIZE, concurrency=3
+    )
+
+    assert written == len(CONTENT)
+    assert local.read_bytes() == CONTENT
+    assert _files_requests(envd_stand_in, "GET") == CHUNKS
+
+
+def test_chunked_download_resumes_failed_chunks(
+    stand_in_files, envd_stand_in, tmp_path
+):
+    remote = os.path.join(envd_stand_in.workdir, "big.bin")
+    with open(remote, "wb") as f:
+        f.write(CONTENT)
+
+    envd_stand_in.fail_next(2)
+
+    local = tmp_path / "local.bin"
+    stand_in_files.read_to_path(remote, str(local), chunk_size=CHUNK_SIZE)
+
+    assert local.read_bytes() == CONTENT
+    # Only the two broken chunks are downloaded again
+    assert _files_requests(envd_stand_in, "GET") == CHUNKS + 2
+
+
+def test_chunked_download_gives_up(stand_in_files, envd_stand_in, tmp_path):
+    remote = os.path.join(envd_stand_in.workdir, "big.bin")
+    with open(remote, "wb") as f:
+        f.write(CONTENT)
+
+    envd_stand_in.fail_next(1000)
+
+    local = tmp_path / "local.bin"
+    with pytest.raises(SandboxException):
+        stand_in_files.read_to_path(remote, str(local), chunk_size=CHUNK_SIZE)
+
+    assert not local.exists()
+
+
+def test_chunked_upload(stand_in_files, envd_stand_in, tmp_path):
+    local = tmp_path / "local.bin"
+    local.write_bytes(CONTENT)
+
+    remote = os.path.join(envd_stand_in.workdir, "dir", "big.bin")
+    envd_stand_in.fail_next(2)
+
+    info = stand_in_files.write_from_path(
+        remote, str(local), chunk_size=CHUNK_SIZE, concurrency=3
+    )
+
+    assert info.path == remote
+    with open(remote, "rb") as f:
+        assert f.read() == CONTENT
+    assert not os.path.exists(chunk_dir(remote, CHUNK_SIZE))
+    assert _files_requests(envd_stand_in, "POST") == CHUNKS + 2
+
+
+def test_chunked_upload_reuses_uploaded_chunks(stand_in_files, envd_stand_in, tmp_path):
+    local = tmp_path / "local.bin"
+    local.write_bytes(CONTENT)
+
+    remote = os.path.join(envd_stand_in.workdir, "big.bin")
+
+    # Leftovers of an interrupted upload, the second chunk is truncated
+    directory = chunk_dir(remote, CHUNK_SIZE)
+    os.makedirs(directory)
+    for index, name in enumerate(["000000", "000001", "000002"]):
+        chunk = CONTENT[index * CHUNK_SIZE : (index + 1) * CHUNK_SIZE]
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(chunk[: CHUNK_SIZE // 2] if index == 1 else chunk)
+
+    stand_in_files.write_from_path(remote, str(local), chunk_size=CHUNK_SIZE)
+
+    with open(remote, "rb") as f:
+        assert f.read() == CONTENT
+    assert _files_requests(envd_stand_in, "POST") == CHUNKS - 2
+
+
+def test_chunked_empty_file(stand_in_files, envd_stand_in, tmp_path):
+    local = tmp_path / "empty"
+    local.write_bytes(b"")
+
+    remote = os.path.join(envd_stand_in.workdir, "empty")
+    info = stand_in_files.write_from_path(remote, str(local), chunk_size=CHUNK_SIZE)
+
+    assert info.path == remote
+    assert os.path.getsize(remote) == 0
+    assert not os.path.exists(chunk_dir(remote, CHUNK_SIZE))
+
+    downloaded = tmp_path / "downloaded"
+    written = stand_in_files.read_to_path(
+        remote, str(downloaded), chunk_size=CHUNK_SIZE
+    )
+
+    assert written == 0
+    assert downloaded.read_bytes() == b""
+
+
+def test_upload_without_chunks(stand_in_files, envd_stand_in, tmp_path):
+    local = tmp_path / "local.bin"
+    local.write_bytes(CONTENT)
+
+    remote = os.path.join(envd_stand_in.workdir, "big.bin")
+    stand_in_files.write_from_path(remote, str(local))
+
+    with open(remote, "rb") as f:
+        assert f.read() == CONTENT
+    assert _files_requests(envd_stand_in, "POST") == 1
+
+
+async def test_async_chunked_round_trip(async_stand_in_files, envd_stand_in, tmp_path):
+    local = tmp_path / "local.bin"
+    local.write_bytes(CONTENT)
+
+    remote = os.path.join(envd_stand_in.workdir, "big.bin")
+    envd_stand_in.fail_next(1)
+    await async_stand_in_files.write_from_path(
+        remote, str(local), chunk_size=CHUNK_SIZE, concurrency=3
+    )
+
+    envd_stand_in.fail_next(1)
+    downloaded = tmp_path / "downloaded.bin"
+    written = await async_stand_in_files.read_to_path(
+        remote, str(downloaded), chunk_size=CHUNK_SIZE, concurrency=3
+    )
+
+    assert written == len(CONTENT)
+    assert downloaded.read_bytes() == CONTENT
+    assert _files_requests(envd_stand_in, "POST") == CHUNKS + 1
+    assert _files_requests(envd_stand_in, "GET") == CHUNKS + 1
+
+
+async def test_async_chunked_empty_file(async_stand_in_files, envd_stand_in, tmp_path):
+    local = tmp_path / "empty"
+    local.write_bytes(b"")
+
+    remote = os.path.join(envd_stand_in.workdir, "empty")
+    await async_stand_in_files.write_from_path(
+        remote, str(local), chunk_size=CHUNK_SIZE
+    )
+    assert os.path.getsize(remote) == 0
+
+    downloaded = tmp_path / "downloaded"
+    written = await async_stand_in_files.read_to_path(
+        remote, str(downloaded), chunk_size=CHUNK_SIZE
+    )
+
+    assert written == 0
+    assert downloaded.read_bytes() == b""
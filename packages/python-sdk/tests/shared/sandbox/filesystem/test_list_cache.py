@@ -0,0 +1,161 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from e2b import EntryInfo, FileType
+from e2b.sandbox.filesystem.list_cache import ListCache, ListCacheStats
+from e2b.sandbox.filesystem.watch_handle import FilesystemEvent, FilesystemEventType
+
+LIST_DIR = ("POST", "/filesystem.Filesystem/ListDir")
+
+
+def _entry(path: str) -> EntryInfo:
+    return EntryInfo(
+        name=os.path.basename(path),
+        type=FileType.FILE,
+        path=path,
+        size=0,
+        mode=0o644,
+        permissions="-rw-r--r--",
+        owner="user",
+        group="user",
+        modified_time=datetime(2025, 1, 1),
+    )
+
+
+def test_list_cache():
+    cache = ListCache(ttl=60)
+    cache.add_root("/workspace")
+
+    assert cache.get("/workspace/src", 1, None) is None
+    cache.put("/workspace/src", 1, None, [_entry("/workspace/src/a")], 0)
+    assert cache.get("/workspace/src", 1, None) == [_entry("/workspace/src/a")]
+    # Different depth or user is a different listing
+    assert cache.get("/workspace/src", 2, None) is None
+    assert cache.get("/workspace/src", 1, "root") is None
+
+    # Outside of the watched directory nothing is cached or counted
+    cache.put("/other", 1, None, [], 0)
+    assert cache.get("/other", 1, None) is None
+
+    assert cache.stats == ListCacheStats(hits=1, misses=3, invalidations=0)
+
+
+def test_list_cache_invalidation():
+    cache = ListCache(ttl=60)
+    cache.add_root("/workspace")
+
+    for path in [
+        "/workspace",
+        "/workspace/src",
+        "/workspace/src/pkg",
+        "/workspace/docs",
+    ]:
+        cache.put(path, 1, None, [], cache.generation)
+
+    cache.on_event(
+        "/workspace",
+        FilesystemEvent(name="src/main.py", type=FilesystemEventType.WRITE),
+    )
+
+    assert cache.get("/workspace/docs", 1, None) == []
+    assert cache.get("/workspace/src/pkg", 1, None) == []
+    assert cache.get("/workspace/src", 1, None) is None
+    assert cache.get("/workspace", 1, None) is None
+
+    # Removing a directory drops the listings inside of it
+    cache.invalidate("/workspace/src")
+    assert cache.get("/workspace/src/pkg", 1, None) is None
+    assert cache.stats.invalidations == 3
+
+
+def test_list_cache_skips_outdated_listings():
+    cache = ListCache(ttl=60)
+    cache.add_root("/workspace")
+
+    generation = cache.generation
+    cache.invalidate("/workspace/a")
+    cache.put("/workspace", 1, None, [], generation)
+
+    assert cache.get("/workspace", 1, None) is None
+
+
+def test_list_cache_ttl():
+    cache = ListCache(ttl=0)
+    cache.add_root("/workspace")
+    cache.put("/workspace", 1, None, [], cache.generation)
+
+    assert cache.get("/workspace", 1, None) is None
+
+
+def test_sync_list_cache(stand_in_files, envd_stand_in):
+    root = envd_stand_in.workdir
+    open(os.path.join(root, "a"), "w").close()
+
+    stand_in_files.enable_list_cache(root)
+
+    assert [e.name for e in stand_in_files.list(root)] == ["a"]
+    assert [e.name for e in stand_in_files.list(root)] == ["a"]
+    assert envd_stand_in.requests.count(LIST_DIR) == 1
+
+    # Changed behind the SDK's back, the watcher reports it
+    open(os.path.join(root, "b"), "w").close()
+    time.sleep(0.3)
+    assert [e.name for e in stand_in_files.list(root)] == ["a", "b"]
+
+    # Changed through the SDK, dropped right away
+    stand_in_files.write(os.path.join(root, "c"), "c")
+    assert [e.name for e in stand_in_files.list(root)] == ["a", "b", "c"]
+
+    stats = stand_in_files.list_cache_stats
+    assert (stats.hits, stats.misses) == (1, 3)
+    assert envd_stand_in.requests.count(LIST_DIR) == 3
+
+    stand_in_files.disable_list_cache()
+    assert stand_in_files.list_cache_stats is None
+    assert envd_stand_in.watchers == {}
+
+
+async def test_async_list_cache(async_stand_in_files, envd_stand_in):
+    root = envd_stand_in.workdir
+    os.mkdir(os.path.join(root, "src"))
+
+    await async_stand_in_files.enable_list_cache(root)
+
+    src = os.path.join(root, "src")
+    assert await async_stand_in_files.list(src) == []
+    assert await async_stand_in_files.list(src) == []
+    assert envd_stand_in.requests.count(LIST_DIR) == 1
+
+    open(os.path.join(src, "main.py"), "w").close()
+    for _ in range(40):
+        if async_stand_in_files.list_cache_stats.invalidations:
+            break
+        await asyncio.sleep(0.05)
+
+    assert [e.name for e in await async_stand_in_files.list(src)] == ["main.py"]
+
+    stats = async_stand_in_files.list_cache_stats
+    assert (stats.hits, stats.misses, stats.invalidations) == (1, 2, 1)
+
+    await async_stand_in_files.disable_list_cache()
+
+
+async def test_async_list_cache_watcher_exit(async_stand_in_files, envd_stand_in):
+    root = envd_stand_in.workdir
+    await async_stand_in_files.enable_list_cache(root)
+    handle = async_stand_in_files._list_cache_watchers[root]
+    assert handle.is_running
+
+    # The watch ends on the sandbox side
+    envd_stand_in.stopped.set()
+    for _ in range(40):
+        if not handle.is_running:
+            break
+        await asyncio.sleep(0.05)
+
+    assert not handle.is_running
+    assert root not in async_stand_in_files._list_cache_watchers
+    assert await async_stand_in_files.list(root) == []
+    assert async_stand_in_files.list_cache_stats.misses == 0
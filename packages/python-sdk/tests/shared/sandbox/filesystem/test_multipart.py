@@ -0,0 +1,167 @@
+import io
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+
+import httpx
+import pytest
+from packaging.version import Version
+
+from e2b import InvalidArgumentException
+from e2b.connection_config import ConnectionConfig
+from e2b.sandbox.filesystem.filesystem import WriteEntry
+from e2b.sandbox.filesystem.multipart import CHUNK_SIZE, MultipartEncoder
+from e2b.sandbox_async.filesystem.filesystem import Filesystem as AsyncFilesystem
+from e2b.sandbox_sync.filesystem.filesystem import Filesystem
+
+ENVD_URL = "http://envd.local"
+
+
+def _parse(content_type: str, body: bytes):
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    return [
+        (part.get_filename(), part.get_payload(decode=True))
+        for part in message.iter_parts()
+    ]
+
+
+class Recorder:
+    def __init__(self):
+        self.requests = []
+        self.bodies = []
+
+    def handler(self, request: httpx.Request):
+        body = request.read()
+        self.requests.append(request)
+        self.bodies.append(body)
+
+        files = _parse(request.headers["content-type"], body)
+        return httpx.Response(
+            200,
+            json=[{"name": name, "type": "file", "path": name} for name, _ in files],
+        )
+
+    async def ahandler(self, request: httpx.Request):
+        await request.aread()
+        return self.handler(request)
+
+
+def test_encoder_reads_file_objects_in_chunks():
+    data = io.BytesIO(b"x" * (CHUNK_SIZE * 3 + 1))
+    encoder = MultipartEncoder([("big.bin", data)])
+
+    chunks = list(encoder)
+
+    assert max(len(c) for c in chunks) <= CHUNK_SIZE
+    assert int(encoder.headers["Content-Length"]) == sum(len(c) for c in chunks)
+
+
+def test_encoder_content_length_unknown_for_text_streams():
+    encoder = MultipartEncoder([("a.txt", io.StringIO("text"))])
+
+    assert "Content-Length" not in encoder.headers
+
+
+def test_encoder_rejects_unsupported_data():
+    with pytest.raises(InvalidArgumentException):
+        MultipartEncoder([("a.txt", 1)])
+
+
+def test_sync_write_files_streams_multipart_body(tmp_path):
+    local_file = tmp_path / "local.bin"
+    local_file.write_bytes(bytes(range(256)) * 1024)
+
+    recorder = Recorder()
+    fs = Filesystem(
+        ENVD_URL,
+        Version("0.4.0"),
+        ConnectionConfig(api_key="test"),
+        None,
+        httpx.Client(
+            base_url=ENVD_URL, transport=httpx.MockTransport(recorder.handler)
+        ),
+    )
+
+    with open(local_file, "rb") as f:
+        info = fs.write_files(
+            [
+                WriteEntry(path="dir/text.txt", data="text ✓"),
+                WriteEntry(path="bytes.bin", data=b"\x00\x01"),
+                WriteEntry(path="local.bin", data=f),
+            ]
+        )
+
+    assert [i.path for i in info] == ["dir/text.txt", "bytes.bin", "local.bin"]
+
+    request = recorder.requests[0]
+    assert int(request.headers["content-length"]) == len(recorder.bodies[0])
+    assert _parse(request.headers["content-type"], recorder.bodies[0]) == [
+        ("dir/text.txt", "text ✓".encode()),
+        ("bytes.bin", b"\x00\x01"),
+        ("local.bin", local_file.read_bytes()),
+    ]
+
+
+def test_sync_write_rejects_async_iterables():
+    async def content():
+        yield b"data"
+
+    fs = Filesystem(
+        ENVD_URL,
+        Version("0.4.0"),
+        ConnectionConfig(api_key="test"),
+        None,
+        httpx.Client(base_url=ENVD_URL),
+    )
+
+    with pytest.raises(InvalidArgumentException):
+        fs.write("file.txt", content())
+
+
+async def test_async_write_streams_async_iterable():
+    async def content():
+        for i in range(100):
+            yield f"line {i}\n".encode()
+
+    recorder = Recorder()
+    fs = AsyncFilesystem(
+        ENVD_URL,
+        Version("0.4.0"),
+        ConnectionConfig(api_key="test"),
+        None,
+        httpx.AsyncClient(
+            base_url=ENVD_URL, transport=httpx.MockTransport(recorder.ahandler)
+        ),
+    )
+
+    info = await fs.write("stream.txt", content())
+
+    assert info.path == "stream.txt"
+
+    request = recorder.requests[0]
+    assert request.headers["transfer-encoding"] == "chunked"
+    assert _parse(request.headers["content-type"], recorder.bodies[0]) == [
+        ("stream.txt", "".join(f"line {i}\n" for i in range(100)).encode()),
+    ]
+
+
+async def test_async_encoder_reads_file_objects_off_the_loop():
+    class File(io.BytesIO):
+        def __init__(self, data: bytes):
+            super().__init__(data)
+            self.threads = set()
+
+        def read(self, size=-1):
+            self.threads.add(threading.current_thread())
+            return super().read(size)
+
+    data = File(b"x" * (CHUNK_SIZE * 2 + 1))
+    encoder = MultipartEncoder([("big.bin", data)])
+
+    body = b"".join([chunk async for chunk in encoder.aiter()])
+
+    assert int(encoder.headers["Content-Length"]) == len(body)
+    assert data.threads
+    assert threading.current_thread() not in data.threads
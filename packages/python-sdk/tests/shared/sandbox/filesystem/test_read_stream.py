@@ -0,0 +1,150 @@
+import httpx
+import pytest
+from packaging.version import Version
+
+from e2b import NotFoundException
+from e2b.connection_config import ConnectionConfig
+from e2b.sandbox_async.filesystem.filesystem import Filesystem as AsyncFilesystem
+from e2b.sandbox_sync.filesystem.filesystem import Filesystem
+
+CONTENT = bytes(range(256)) * 4096
+ENVD_URL = "http://envd.local"
+
+
+class ChunkedBody(httpx.SyncByteStream, httpx.AsyncByteStream):
+    def __init__(self):
+        self.sent = 0
+        self.closed = False
+
+    def _chunks(self):
+        for i in range(0, len(CONTENT), 64 * 1024):
+            chunk = CONTENT[i : i + 64 * 1024]
+            self.sent += len(chunk)
+            yield chunk
+
+    def __iter__(self):
+        yield from self._chunks()
+
+    async def __aiter__(self):
+        for chunk in self._chunks():
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+    async def aclose(self):
+        self.closed = True
+
+
+def _handler(body: ChunkedBody):
+    def handler(request: httpx.Request):
+        if request.url.params["path"] == "missing":
+            return httpx.Response(404, json={"message": "file not found"})
+        return httpx.Response(200, stream=body)
+
+    return handler
+
+
+def _filesystem(body: ChunkedBody) -> Filesystem:
+    return Filesystem(
+        ENVD_URL,
+        Version("0.4.0"),
+        ConnectionConfig(api_key="test"),
+        None,
+        httpx.Client(base_url=ENVD_URL, transport=httpx.MockTransport(_handler(body))),
+    )
+
+
+def _async_filesystem(body: ChunkedBody) -> AsyncFilesystem:
+    return AsyncFilesystem(
+        ENVD_URL,
+        Version("0.4.0"),
+        ConnectionConfig(api_key="test"),
+        None,
+        httpx.AsyncClient(
+            base_url=ENVD_URL, transport=httpx.MockTransport(_handler(body))
+        ),
+    )
+
+
+def test_read_stream_is_lazy():
+    body = ChunkedBody()
+    stream = _filesystem(body).read("file", format="stream")
+
+    assert body.sent == 0
+    first = next(stream)
+    assert body.sent == len(first)
+
+    stream.close()
+    assert body.closed
+
+
+def test_read_stream_closed_before_iteration():
+    body = ChunkedBody()
+    stream = _filesystem(body).read("file", format="stream")
+
+    stream.close()
+    assert body.closed
+
+
+def test_read_to_path_local_error_sends_no_request(tmp_path):
+    body = ChunkedBody()
+
+    with pytest.raises(FileNotFoundError):
+        _filesystem(body).read_to_path("file", str(tmp_path / "missing" / "file"))
+
+    assert body.sent == 0
+
+
+def test_read_stream_raises_before_iteration():
+    with pytest.raises(NotFoundException):
+        _filesystem(ChunkedBody()).read("missing", format="stream")
+
+
+def test_read_to_path(tmp_path):
+    body = ChunkedBody()
+    local_path = tmp_path / "file"
+
+    written = _filesystem(body).read_to_path("file", str(local_path))
+
+    assert written == len(CONTENT)
+    assert local_path.read_bytes() == CONTENT
+    assert body.closed
+
+
+async def test_async_read_stream_is_lazy():
+    body = ChunkedBody()
+    stream = await _async_filesystem(body).read("file", format="stream")
+
+    assert body.sent == 0
+    received = b"".join([chunk async for chunk in stream])
+
+    assert received == CONTENT
+    assert body.closed
+
+
+async def test_async_read_to_path(tmp_path):
+    body = ChunkedBody()
+    local_path = tmp_path / "file"
+
+    written = await _async_filesystem(body).read_to_path("file", str(local_path))
+
+    assert written == len(CONTENT)
+    assert local_path.read_bytes() == CONTENT
+
+
+async def test_async_read_to_path_does_not_create_file_on_error(tmp_path):
+    local_path = tmp_path / "file"
+
+    with pytest.raises(NotFoundException):
+        await _async_filesystem(ChunkedBody()).read_to_path("missing", str(local_path))
+
+    assert not local_path.exists()
+
+
+async def test_async_read_stream_closed_before_iteration():
+    body = ChunkedBody()
+    stream = await _async_filesystem(body).read("file", format="stream")
+
+    await stream.aclose()
+    assert body.closed
@@ -0,0 +1,323 @@
+import io
+import os
+import tarfile
+import threading
+
+import pytest
+
+from e2b import SandboxException
+
+from e2b.sandbox.filesystem.sync import (
+    SYNC_TEMPORARY_DIR,
+    IteratorReader,
+    diff_trees,
+    extract_tar,
+    local_tree,
+    tar_stream,
+    temporary_path,
+)
+
+
+def _make_tree(root, files):
+    for name, content in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+
+def _read_tree(root):
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path) as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def _temporary_files():
+    return {name for name in os.listdir(SYNC_TEMPORARY_DIR) if "e2b-sync" in name}
+
+
+FILES = {
+    "README.md": "hello",
+    "src/main.py": "print('hello')",
+    "src/pkg/util.py": "x = 1",
+    "src/pkg/empty.py": "",
+}
+
+
+def test_tar_stream_round_trip(tmp_path):
+    source = tmp_path / "source"
+    _make_tree(str(source), FILES)
+    tree = local_tree(str(source))
+
+    archive = tmp_path / "archive.tar"
+    with open(archive, "wb") as f:
+        reader = IteratorReader(tar_stream(str(source), sorted(tree), tree))
+        while chunk := reader.read(1000):
+            f.write(chunk)
+
+    target = tmp_path / "target"
+    with tarfile.open(archive) as tar:
+        tar.extractall(target)
+
+    assert _read_tree(str(target)) == FILES
+    assert local_tree(str(target)) == tree
+
+
+def _archive(path, members):
+    """
+    Write a tar of `(name, type, content or link target)` members.
+    """
+    with tarfile.open(path, "w") as tar:
+        for name, type, value in members:
+            info = tarfile.TarInfo(name)
+            info.type = type
+            if type == tarfile.REGTYPE:
+                info.size = len(value)
+                tar.addfile(info, io.BytesIO(value))
+            else:
+                info.linkname = value
+                tar.addfile(info)
+
+
+@pytest.mark.parametrize(
+    "members",
+    [
+        [("../evil", tarfile.REGTYPE, b"x")],
+        [("/tmp/evil", tarfile.REGTYPE, b"x")],
+        [("link", tarfile.SYMTYPE, "/tmp")],
+        [("link", tarfile.SYMTYPE, "../..")],
+        [("link", tarfile.LNKTYPE, "../evil")],
+        # The second link is inside the directory only until the first one is extracted
+        [
+            ("here", tarfile.SYMTYPE, "."),
+            ("here/sub/link", tarfile.SYMTYPE, "../.."),
+        ],
+        [("link", tarfile.SYMTYPE, ".."), ("link/evil", tarfile.REGTYPE, b"x")],
+    ],
+)
+def test_extract_tar_fallback_rejects_outside_members(tmp_path, monkeypatch, members):
+    monkeypatch.delattr(tarfile, "data_filter", raising=False)
+    archive = tmp_path / "archive.tar"
+    _archive(archive, members)
+    target = tmp_path / "a" / "target"
+
+    with pytest.raises(SandboxException):
+        extract_tar(str(archive), str(target))
+
+    assert os.listdir(tmp_path / "a") == ["target"]
+    assert not os.path.lexists(tmp_path / "evil")
+
+
+def test_extract_tar_fallback(tmp_path, monkeypatch):
+    monkeypatch.delattr(tarfile, "data_filter", raising=False)
+    archive = tmp_path / "archive.tar"
+    _archive(
+        archive,
+        [
+            ("dir/file", tarfile.REGTYPE, b"data"),
+            ("dir/link", tarfile.SYMTYPE, "file"),
+            ("hardlink", tarfile.LNKTYPE, "dir/file"),
+        ],
+    )
+    target = tmp_path / "target"
+
+    extract_tar(str(archive), str(target))
+
+    assert (target / "dir" / "link").read_bytes() == b"data"
+    assert (target / "hardlink").read_bytes() == b"data"
+
+
+def test_diff_trees(tmp_path):
+    source = tmp_path / "source"
+    _make_tree(str(source), FILES)
+    tree = local_tree(str(source))
+
+    assert diff_trees(tree, tree, checksum=False) == ([], [])
+    assert diff_trees(tree, {}, checksum=False) == (sorted(tree), [])
+
+    target = dict(tree)
+    target["README.md"] = target["README.md"]._replace(mtime=0)
+    target["src/main.py"] = target["src/main.py"]._replace(size=1)
+    del target["src/pkg"]
+    assert diff_trees(tree, target, checksum=False) == (
+        ["README.md", "src/main.py", "src/pkg"],
+        [],
+    )
+    assert diff_trees(tree, target, checksum=True) == (
+        ["src/main.py", "src/pkg"],
+        ["README.md", "src/pkg/empty.py", "src/pkg/util.py"],
+    )
+
+
+def test_sync_dir_upload(stand_in_files, envd_stand_in, tmp_path):
+    temporary = _temporary_files()
+    local = tmp_path / "project"
+    _make_tree(str(local), FILES)
+    remote = os.path.join(envd_stand_in.workdir, "project")
+
+    result = stand_in_files.sync_dir(str(local), remote)
+
+    assert _read_tree(remote) == FILES
+    assert result.unchanged == 0
+    assert len(result.transferred) == len(local_tree(str(local)))
+
+    # Nothing changed, nothing is sent
+    requests = len(envd_stand_in.requests)
+    result = stand_in_files.sync_dir(str(local), remote)
+    assert result.transferred == []
+    assert ("POST", "/files") not in envd_stand_in.requests[requests:]
+
+    with open(local / "src" / "main.py", "a") as f:
+        f.write("\nprint('world')")
+
+    result = stand_in_files.sync_dir(str(local), remote)
+    assert result.transferred == ["src/main.py"]
+    assert _read_tree(remote) == _read_tree(str(local))
+    assert _temporary_files() == temporary
+
+
+def test_sync_dir_download(stand_in_files, envd_stand_in, tmp_path):
+    temporary = _temporary_files()
+    remote = os.path.join(envd_stand_in.workdir, "results")
+    _make_tree(remote, FILES)
+    local = tmp_path / "results"
+
+    result = stand_in_files.sync_dir(str(local), remote, direction="download")
+
+    assert _read_tree(str(local)) == FILES
+    assert len(result.transferred) == len(local_tree(str(local)))
+
+    with open(os.path.join(remote, "out.txt"), "w") as f:
+        f.write("done")
+
+    result = stand_in_files.sync_dir(str(local), remote, direction="download")
+    assert result.transferred == ["out.txt"]
+    assert (local / "out.txt").read_text() == "done"
+    assert _temporary_files() == temporary
+
+
+def test_temporary_path():
+    path = temporary_path("tar")
+
+    assert path.startswith(f"{SYNC_TEMPORARY_DIR}/e2b-sync-")
+    assert path.endswith(".tar")
+    assert path != temporary_path("tar")
+
+
+def test_sync_dir_home(stand_in_files, envd_stand_in, tmp_path, monkeypatch):
+    local = tmp_path / "project"
+    _make_tree(str(local), FILES)
+    home = os.path.join(envd_stand_in.workdir, "home")
+    remote = os.path.join(home, "user")
+    _make_tree(remote, {"out.txt": "done"})
+
+    write = stand_in_files.write
+    written = []
+
+    def recording_write(path, *args, **kwargs):
+        written.append(path)
+        return write(path, *args, **kwargs)
+
+    monkeypatch.setattr(stand_in_files, "write", recording_write)
+
+    stand_in_files.sync_dir(str(local), remote, checksum=True)
+    stand_in_files.sync_dir(str(local), remote, direction="download")
+
+    # Nothing is written next to the synced directory, its parent isn't writable by the user
+    assert written
+    assert all(path.startswith(f"{SYNC_TEMPORARY_DIR}/") for path in written)
+    assert os.listdir(home) == ["user"]
+    assert _read_tree(remote) == {**FILES, "out.txt": "done"}
+    assert (local / "out.txt").read_text() == "done"
+
+
+def test_sync_dir_checksum(stand_in_files, envd_stand_in, tmp_path):
+    local = tmp_path / "project"
+    _make_tree(str(local), FILES)
+    remote = os.path.join(envd_stand_in.workdir, "project")
+    stand_in_files.sync_dir(str(local), remote)
+
+    # Same size and modification time, only the content differs
+    path = os.path.join(remote, "src", "pkg", "util.py")
+    st = os.stat(path)
+    with open(path, "w") as f:
+        f.write("x = 2")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert stand_in_files.sync_dir(str(local), remote).transferred == []
+
+    result = stand_in_files.sync_dir(str(local), remote, checksum=True)
+    assert result.transferred == ["src/pkg/util.py"]
+    assert _read_tree(remote) == FILES
+
+
+def test_sync_dir_commands_are_not_timed_out(
+    stand_in_files, envd_stand_in, tmp_path, monkeypatch
+):
+    local = tmp_path / "project"
+    _make_tree(str(local), FILES)
+    remote = os.path.join(envd_stand_in.workdir, "project")
+    _make_tree(remote, {"out.txt": "done"})
+
+    commands = stand_in_files._commands
+    run = commands.run
+    timeouts = {}
+
+    def recording_run(cmd, **kwargs):
+        timeouts[cmd.split()[0]] = kwargs.get("timeout")
+        return run(cmd, **kwargs)
+
+    monkeypatch.setattr(commands, "run", recording_run)
+
+    stand_in_files.sync_dir(str(local), remote, checksum=True)
+    stand_in_files.sync_dir(str(local), remote, direction="download", checksum=True)
+
+    # Hashing and archiving take as long as the files take to read
+    assert {timeouts[cmd] for cmd in ["cd", "mkdir", "tar"]} == {0}
+
+
+async def test_async_sync_dir(async_stand_in_files, envd_stand_in, tmp_path):
+    local = tmp_path / "project"
+    _make_tree(str(local), FILES)
+    remote = os.path.join(envd_stand_in.workdir, "project")
+
+    await async_stand_in_files.sync_dir(str(local), remote)
+    assert _read_tree(remote) == FILES
+
+    with open(os.path.join(remote, "out.txt"), "w") as f:
+        f.write("done")
+
+    result = await async_stand_in_files.sync_dir(
+        str(local), remote, direction="download", checksum=True
+    )
+    assert result.transferred == ["out.txt"]
+    assert (local / "out.txt").read_text() == "done"
+
+
+async def test_async_sync_dir_tar_is_produced_off_the_loop(
+    async_stand_in_files, envd_stand_in, tmp_path, monkeypatch
+):
+    local = tmp_path / "project"
+    _make_tree(str(local), FILES)
+    remote = os.path.join(envd_stand_in.workdir, "project")
+
+    threads = set()
+
+    def recording_tar_stream(*args):
+        for chunk in tar_stream(*args):
+            threads.add(threading.current_thread())
+            yield chunk
+
+    monkeypatch.setattr(
+        "e2b.sandbox_async.filesystem.filesystem.tar_stream", recording_tar_stream
+    )
+
+    await async_stand_in_files.sync_dir(str(local), remote)
+
+    assert _read_tree(remote) == FILES
+    assert threads
+    assert threading.current_thread() not in threads
@@ -0,0 +1,172 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from e2b import AsyncSandbox, InvalidArgumentException, MetricsBuffer, Sandbox
+from e2b.sandbox.metrics import (
+    FLEET_METRICS_BATCH_SIZE,
+    MetricsCursor,
+    metrics_batches,
+)
+from e2b.sandbox.sandbox_api import SandboxMetrics
+
+T0 = 1_700_000_000
+
+
+def sample(t: float, cpu: float = 0.0, mem: int = 0, disk: int = 0):
+    return SandboxMetrics(
+        cpu_count=2,
+        cpu_used_pct=cpu,
+        disk_total=0,
+        disk_used=disk,
+        mem_total=0,
+        mem_used=mem,
+        timestamp=datetime.fromtimestamp(T0 + t, timezone.utc),
+    )
+
+
+def test_buffer_keeps_latest_samples():
+    buffer = MetricsBuffer(capacity=3)
+    for i in range(5):
+        buffer.append(sample(i * 5, cpu=i, mem=i * 10))
+
+    assert len(buffer) == 3
+    assert buffer.values("cpu_used_pct") == [2, 3, 4]
+    assert buffer.values("mem_used") == [20, 30, 40]
+
+
+def test_buffer_aggregates():
+    buffer = MetricsBuffer()
+    for i in range(1, 101):
+        buffer.append(sample(i, cpu=i, disk=i * 2))
+
+    summary = buffer.summary()
+    assert summary.samples == 100
+    assert summary.cpu_used_pct.p50 == 50
+    assert summary.cpu_used_pct.p95 == 95
+    assert summary.cpu_used_pct.max == 100
+    assert summary.disk_used.max == 200
+
+    # The 10 seconds before the latest sample
+    windowed = buffer.aggregate("cpu_used_pct", window=10)
+    assert windowed.max == 100
+    assert windowed.p50 == 95
+    assert buffer.summary(window=10).samples == 11
+
+
+def test_empty_buffer():
+    buffer = MetricsBuffer()
+
+    assert buffer.summary().samples == 0
+    assert buffer.aggregate("mem_used").max == 0
+
+    with pytest.raises(InvalidArgumentException):
+        buffer.values("network")
+    with pytest.raises(InvalidArgumentException):
+        MetricsBuffer(capacity=0)
+
+
+def test_cursor_skips_seen_samples():
+    cursor = MetricsCursor()
+
+    assert len(cursor.new([sample(5), sample(0)])) == 2
+    new = cursor.new([sample(5), sample(10)])
+    assert [m.timestamp.timestamp() for m in new] == [T0 + 10]
+
+
+def test_metrics_batches():
+    ids = [f"sbx-{i}" for i in range(FLEET_METRICS_BATCH_SIZE + 1)] + ["sbx-0"]
+    batches = metrics_batches(ids)
+
+    assert [len(b) for b in batches] == [FLEET_METRICS_BATCH_SIZE, 1]
+
+
+def test_watch_metrics(api_stand_in):
+    sandbox_id = api_stand_in.create({"templateID": "base"})["sandboxID"]
+    for i in range(3):
+        api_stand_in.report(sandbox_id, T0 + i * 5, cpu_used_pct=i)
+
+    buffer = MetricsBuffer()
+    seen = []
+    for metric in Sandbox.watch_metrics(
+        sandbox_id, interval=0.01, buffer=buffer, **api_stand_in.opts
+    ):
+        seen.append(metric.cpu_used_pct)
+        if len(seen) == 3:
+            api_stand_in.report(sandbox_id, T0 + 15, cpu_used_pct=3)
+        if len(seen) == 4:
+            break
+
+    assert seen == [0, 1, 2, 3]
+    assert buffer.values("cpu_used_pct") == [0, 1, 2, 3]
+
+    polls = [path for _, path in api_stand_in.requests if "/metrics" in path]
+    # The first poll fetches everything, the later ones start at the latest seen sample
+    assert polls[0] == f"/sandboxes/{sandbox_id}/metrics"
+    assert polls[1] == f"/sandboxes/{sandbox_id}/metrics?start={(T0 + 10) * 1000}"
+
+
+async def test_async_watch_metrics(api_stand_in):
+    sandbox_id = api_stand_in.create({"templateID": "base"})["sandboxID"]
+    api_stand_in.report(sandbox_id, T0, cpu_used_pct=1)
+
+    seen = []
+    async for metric in AsyncSandbox.watch_metrics(
+        sandbox_id, interval=0.01, **api_stand_in.opts
+    ):
+        seen.append(metric.cpu_used_pct)
+        if len(seen) == 1:
+            api_stand_in.report(sandbox_id, T0 + 5, cpu_used_pct=2)
+        else:
+            break
+
+    assert seen == [1, 2]
+
+
+def test_get_metrics_many(api_stand_in):
+    ids = [
+        api_stand_in.create({"templateID": "base"})["sandboxID"]
+        for _ in range(FLEET_METRICS_BATCH_SIZE + 5)
+    ]
+    for i, sandbox_id in enumerate(ids[:-1]):
+        api_stand_in.report(sandbox_id, T0, mem_used=i)
+    api_stand_in.kill(ids[0])
+
+    metrics = Sandbox.get_metrics_many(ids, **api_stand_in.opts)
+
+    # Killed and silent sandboxes are left out
+    assert set(metrics) == set(ids[1:-1])
+    assert metrics[ids[1]].mem_used == 1
+
+    requests = [r for r in api_stand_in.requests if "/sandboxes/metrics" in r[1]]
+    assert len(requests) == 2
+
+
+async def test_async_watch_metrics_many(api_stand_in):
+    ids = [api_stand_in.create({"templateID": "base"})["sandboxID"] for _ in range(3)]
+    for sandbox_id in ids:
+        api_stand_in.report(sandbox_id, T0, cpu_used_pct=10)
+
+    buffers = {}
+    polls = []
+    async for new in AsyncSandbox.watch_metrics_many(
+        ids, interval=0.01, buffers=buffers, **api_stand_in.opts
+    ):
+        polls.append(set(new))
+        if len(polls) == 1:
+            api_stand_in.report(ids[1], T0 + 5, cpu_used_pct=20)
+        else:
+            break
+
+    assert polls == [set(ids), {ids[1]}]
+    assert buffers[ids[1]].values("cpu_used_pct") == [10, 20]
+    assert len(buffers[ids[0]]) == 1
+
+
+def test_watch_metrics_of_instance(api_stand_in):
+    sandbox = Sandbox.create(**api_stand_in.opts)
+    api_stand_in.report(sandbox.sandbox_id, T0, mem_used=42)
+
+    metric = next(iter(sandbox.watch_metrics(interval=0.01)))
+
+    assert metric.mem_used == 42
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from e2b import AsyncSandbox, InvalidArgumentException, Sandbox
+from e2b.exceptions import RateLimitException
+
+
+def list_requests(api_stand_in):
+    return [r for r in api_stand_in.requests if r[1].startswith("/v2/sandboxes")]
+
+
+@pytest.fixture
+def listed(api_stand_in):
+    """
+    IDs of 25 running sandboxes in the listing order.
+    """
+    for _ in range(25):
+        api_stand_in.create({"templateID": "base"})
+    return sorted(api_stand_in.running)
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_iterate(api_stand_in, listed, prefetch):
+    paginator = Sandbox.list(limit=10, prefetch=prefetch, **api_stand_in.opts)
+
+    assert [s.sandbox_id for s in paginator] == listed
+    assert len(list_requests(api_stand_in)) == 3
+    assert not paginator.has_next
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+async def test_async_iterate(api_stand_in, listed, prefetch):
+    paginator = AsyncSandbox.list(limit=10, prefetch=prefetch, **api_stand_in.opts)
+
+    assert [s.sandbox_id async for s in paginator] == listed
+    assert len(list_requests(api_stand_in)) == 3
+    assert not paginator.has_next
+
+
+def test_iterate_continues_after_next_items(api_stand_in, listed):
+    paginator = Sandbox.list(limit=10, **api_stand_in.opts)
+
+    first = paginator.next_items()
+    rest = list(paginator)
+
+    assert [s.sandbox_id for s in first + rest] == listed
+
+
+def test_break_stops_prefetching(api_stand_in, listed):
+    for s in Sandbox.list(limit=5, prefetch=1, **api_stand_in.opts):
+        break
+
+    time.sleep(0.1)
+    # At most the consumed page and the one fetched ahead out of 5
+    assert len(list_requests(api_stand_in)) <= 2
+
+
+async def test_async_break_stops_prefetching(api_stand_in, listed):
+    paginator = AsyncSandbox.list(limit=5, prefetch=1, **api_stand_in.opts)
+    sandboxes = paginator.__aiter__()
+    await sandboxes.__anext__()
+    await sandboxes.aclose()
+
+    assert len(list_requests(api_stand_in)) <= 2
+
+
+def test_iterate_raises_errors(api_stand_in, listed):
+    api_stand_in.rate_limit(1)
+
+    with pytest.raises(RateLimitException):
+        list(Sandbox.list(limit=10, **api_stand_in.opts))
+
+
+async def test_async_iterate_raises_errors(api_stand_in, listed):
+    api_stand_in.rate_limit(1)
+
+    with pytest.raises(RateLimitException):
+        [s async for s in AsyncSandbox.list(limit=10, **api_stand_in.opts)]
+
+
+def test_negative_prefetch():
+    with pytest.raises(InvalidArgumentException):
+        Sandbox.list(prefetch=-1, api_key="test")
@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+import pytest
+
+from e2b import AsyncSandboxPool, InvalidArgumentException, SandboxPool
+from e2b.exceptions import RateLimitException
+from e2b.sandbox.pool import percentile, pool_key
+
+
+def _timeouts(api_stand_in, sandbox_id: str) -> int:
+    return api_stand_in.requests.count(("POST", f"/sandboxes/{sandbox_id}/timeout"))
+
+
+def test_pool_key():
+    assert pool_key("base", {"a": "1", "b": "2"}, None) == pool_key(
+        "base", {"b": "2", "a": "1"}, {}
+    )
+    assert pool_key("base", None, {"A": "1"}) != pool_key("base", {"A": "1"}, None)
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile([float(i) for i in range(1, 101)], 95) == 95.0
+
+
+def test_pool_options():
+    with pytest.raises(InvalidArgumentException):
+        SandboxPool(size=-1)
+    with pytest.raises(InvalidArgumentException):
+        SandboxPool(timeout=10, health_check_interval=5)
+
+
+def test_sync_pool(api_stand_in):
+    with SandboxPool(
+        size=2, timeout=60, health_check_interval=0.1, **api_stand_in.opts
+    ) as pool:
+        pool.warm("base", metadata={"user": "a"})
+        assert len(api_stand_in.running) == 2
+        assert pool.stats.idle == 2
+
+        warm = set(api_stand_in.running)
+        sandbox = pool.checkout("base", metadata={"user": "a"}, timeout=120)
+        assert sandbox.sandbox_id in warm
+        assert api_stand_in.sandboxes[sandbox.sandbox_id]["timeout"] == 120
+
+        # A different combination isn't served from the warm sandboxes
+        other = pool.checkout("base", metadata={"user": "b"})
+        assert other.sandbox_id not in warm
+        assert api_stand_in.sandboxes[other.sandbox_id]["metadata"] == {"user": "b"}
+
+        # Refilled in the background
+        for _ in range(40):
+            if pool.stats.idle == 4:
+                break
+            time.sleep(0.05)
+
+        stats = pool.stats
+        assert (stats.checkouts, stats.hits, stats.misses) == (2, 1, 1)
+        assert 0 < stats.latency_p50 <= stats.latency_p95 <= stats.latency_max
+
+    # Closing kills the warm sandboxes, not the checked out ones
+    assert sorted(api_stand_in.running) == sorted(
+        [sandbox.sandbox_id, other.sandbox_id]
+    )
+
+
+def test_sync_pool_evicts_stopped_sandboxes(api_stand_in):
+    with SandboxPool(
+        size=1, timeout=60, health_check_interval=0.1, **api_stand_in.opts
+    ) as pool:
+        pool.warm("base")
+        [stopped] = api_stand_in.running
+        api_stand_in.kill(stopped)
+        time.sleep(0.1)
+
+        sandbox = pool.checkout("base")
+
+        assert sandbox.sandbox_id != stopped
+        assert sandbox.is_running()
+        # Evicted either by the checkout or by the maintenance thread that already refilled the pool
+        assert pool.stats.evictions == 1
+
+
+async def test_async_pool(api_stand_in):
+    api_stand_in.create_delay = 0.2
+
+    async with AsyncSandboxPool(
+        size=2, timeout=60, health_check_interval=0.1, **api_stand_in.opts
+    ) as pool:
+        await pool.warm(envs={"A": "1"})
+        assert pool.stats.idle == 2
+
+        start = time.monotonic()
+        sandboxes = [await pool.checkout(envs={"A": "1"}) for _ in range(2)]
+        # Served without waiting for a sandbox to start
+        assert time.monotonic() - start < api_stand_in.create_delay
+
+        for sandbox in sandboxes:
+            assert api_stand_in.sandboxes[sandbox.sandbox_id]["envs"] == {"A": "1"}
+            assert await sandbox.is_running()
+
+        for _ in range(40):
+            if pool.stats.idle == 2:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.stats.hits == 2
+
+    assert sorted(api_stand_in.running) == sorted(s.sandbox_id for s in sandboxes)
+
+
+async def test_async_pool_keeps_sandboxes_alive(api_stand_in):
+    async with AsyncSandboxPool(
+        size=2, timeout=1, health_check_interval=0.1, **api_stand_in.opts
+    ) as pool:
+        await pool.warm()
+        first, second = api_stand_in.running
+
+        api_stand_in.kill(first)
+        # Evicted and replaced in the background, the other one is extended
+        for _ in range(40):
+            if pool.stats.evictions and _timeouts(api_stand_in, second):
+                break
+            await asyncio.sleep(0.05)
+
+        assert pool.stats.evictions == 1
+        assert _timeouts(api_stand_in, second) >= 1
+        assert api_stand_in.sandboxes[second]["timeout"] == 1
+
+        for _ in range(40):
+            if pool.stats.idle == 2:
+                break
+            await asyncio.sleep(0.05)
+        assert len(api_stand_in.running) == 2
+
+    assert api_stand_in.running == []
+
+
+def test_sync_pool_warm_raises_creation_error(api_stand_in):
+    with SandboxPool(
+        size=2, timeout=60, health_check_interval=0.1, **api_stand_in.opts
+    ) as pool:
+        api_stand_in.rate_limit(1)
+
+        with pytest.raises(RateLimitException):
+            pool.warm("base")
+
+        # The other sandbox started, the failed one is retried only after a delay
+        assert pool.stats.idle == 1
+        assert pool.stats.errors == 1
+        time.sleep(0.05)
+        assert len(api_stand_in.running) == 1
+
+        pool.warm("base")
+        assert pool.stats.idle == 2
+
+
+async def test_async_pool_extension_keeps_checkout_timeout(api_stand_in):
+    async with AsyncSandboxPool(
+        size=1, timeout=60, health_check_interval=10, **api_stand_in.opts
+    ) as pool:
+        await pool.warm()
+        bucket = next(iter(pool._buckets.values()))
+        pooled = bucket.idle[0]
+        pooled.expires_at = time.monotonic()
+
+        set_timeout = pooled.sandbox.set_timeout
+
+        async def checked_out_while_extending(timeout: int):
+            if pooled.lease_timeout is None:
+                # The checkout's own extension lands before the pool's
+                pooled.lease_timeout = 120
+                await set_timeout(120)
+            await set_timeout(timeout)
+
+        pooled.sandbox.set_timeout = checked_out_while_extending
+        await pool._keep_alive(bucket, pooled)
+
+        sandbox_id = pooled.sandbox.sandbox_id
+        assert api_stand_in.sandboxes[sandbox_id]["timeout"] == 120
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from e2b import SandboxException
+from e2b.envd.rpc import rpc_retry_policy
+
+STAT = ("POST", "/filesystem.Filesystem/Stat")
+MAKE_DIR = ("POST", "/filesystem.Filesystem/MakeDir")
+LIST_DIR = ("POST", "/filesystem.Filesystem/ListDir")
+
+
+def test_rpc_clients_share_policy(stand_in_files):
+    fs_rpc = stand_in_files._rpc
+    process_rpc = stand_in_files._commands._rpc
+
+    policy = rpc_retry_policy(stand_in_files._connection_config)
+    assert fs_rpc._stat.retry_policy is policy
+    assert process_rpc._start.retry_policy is policy
+
+    assert fs_rpc._stat.idempotent
+    assert process_rpc._list.idempotent
+    assert not fs_rpc._make_dir.idempotent
+    assert not process_rpc._start.idempotent
+
+
+def test_unavailable_is_retried(stand_in_files, envd_stand_in):
+    open(os.path.join(envd_stand_in.workdir, "a"), "w").close()
+    envd_stand_in.reject_next(2)
+
+    assert stand_in_files.exists("a")
+    assert envd_stand_in.requests.count(STAT) == 3
+
+
+def test_unavailable_non_idempotent_call_is_retried(stand_in_files, envd_stand_in):
+    envd_stand_in.reject_next(1)
+
+    assert stand_in_files.make_dir("dir")
+    assert envd_stand_in.requests.count(MAKE_DIR) == 2
+    assert os.path.isdir(os.path.join(envd_stand_in.workdir, "dir"))
+
+
+def test_sandbox_not_running_is_not_retried(stand_in_files, envd_stand_in):
+    envd_stand_in.reject_next(1, status=502)
+
+    with pytest.raises(SandboxException):
+        stand_in_files.list(".")
+    assert envd_stand_in.requests.count(LIST_DIR) == 1
@@ -0,0 +1,111 @@
+import pytest
+
+from e2b import AsyncSandbox, InvalidArgumentException, NotFoundException, Sandbox
+from e2b.exceptions import RateLimitException
+from e2b.sandbox.batch import RateLimitBackoff
+
+
+def _fast_backoff(monkeypatch, module: str):
+    monkeypatch.setattr(
+        f"{module}.RateLimitBackoff",
+        lambda: RateLimitBackoff(retries=3, base_delay=0.01),
+    )
+
+
+def test_rate_limit_backoff():
+    backoff = RateLimitBackoff(retries=2, base_delay=0.2)
+    assert backoff.wait_time() == 0
+
+    assert backoff.limited(0)
+    assert 0 <= backoff.wait_time() <= 0.2
+    assert backoff.limited(1)
+    assert not backoff.limited(2)
+
+
+def test_create_many(api_stand_in):
+    results = Sandbox.create_many(
+        5, template="base", metadata={"job": "1"}, concurrency=2, **api_stand_in.opts
+    )
+
+    assert all(r.ok for r in results)
+    assert sorted(r.sandbox_id for r in results) == sorted(api_stand_in.running)
+    assert all(r.value.sandbox_id == r.sandbox_id for r in results)
+    assert api_stand_in.sandboxes[results[0].sandbox_id]["metadata"] == {"job": "1"}
+
+
+def test_batch_backs_off_on_rate_limit(api_stand_in, monkeypatch):
+    _fast_backoff(monkeypatch, "e2b.sandbox_sync.sandbox_api")
+    api_stand_in.rate_limit(3)
+
+    results = Sandbox.create_many(2, **api_stand_in.opts)
+    assert all(r.ok for r in results)
+
+    # Out of retries
+    api_stand_in.rate_limit(10)
+    results = Sandbox.kill_many([results[0].sandbox_id], **api_stand_in.opts)
+    assert isinstance(results[0].error, RateLimitException)
+
+
+def test_kill_and_set_timeout_many(api_stand_in):
+    created = Sandbox.create_many(3, **api_stand_in.opts)
+    ids = [r.sandbox_id for r in created]
+
+    results = Sandbox.set_timeout_many(ids + ["missing"], 600, **api_stand_in.opts)
+    assert [r.sandbox_id for r in results] == ids + ["missing"]
+    assert [r.ok for r in results] == [True, True, True, False]
+    assert isinstance(results[-1].error, NotFoundException)
+    assert all(api_stand_in.sandboxes[i]["timeout"] == 600 for i in ids)
+
+    results = Sandbox.kill_many(ids + ["missing"], **api_stand_in.opts)
+    assert [r.value for r in results] == [True, True, True, False]
+    assert api_stand_in.running == []
+
+    with pytest.raises(InvalidArgumentException):
+        Sandbox.kill_many(ids, concurrency=0, **api_stand_in.opts)
+
+
+async def test_async_batch(api_stand_in, monkeypatch):
+    _fast_backoff(monkeypatch, "e2b.sandbox_async.sandbox_api")
+    api_stand_in.rate_limit(1)
+
+    created = await AsyncSandbox.create_many(4, concurrency=3, **api_stand_in.opts)
+    ids = [r.sandbox_id for r in created]
+    assert all(r.ok for r in created)
+    assert await created[0].value.is_running()
+
+    results = await AsyncSandbox.set_timeout_many(ids, 60, **api_stand_in.opts)
+    assert all(r.ok for r in results)
+
+    results = await AsyncSandbox.kill_many(ids, **api_stand_in.opts)
+    assert [r.value for r in results] == [True] * 4
+    assert api_stand_in.running == []
+
+
+def test_create_many_kills_sandboxes_that_failed_to_initialize(
+    api_stand_in, monkeypatch
+):
+    def fail(*args, **kwargs):
+        raise ValueError("failed to initialize")
+
+    monkeypatch.setattr(Sandbox, "__init__", fail)
+
+    results = Sandbox.create_many(2, **api_stand_in.opts)
+
+    assert all(isinstance(r.error, ValueError) for r in results)
+    assert len(api_stand_in.sandboxes) == 2
+    assert api_stand_in.running == []
+
+
+async def test_async_create_many_kills_sandboxes_that_failed_to_initialize(
+    api_stand_in, monkeypatch
+):
+    def fail(*args, **kwargs):
+        raise ValueError("failed to initialize")
+
+    monkeypatch.setattr(AsyncSandbox, "__init__", fail)
+
+    results = await AsyncSandbox.create_many(2, **api_stand_in.opts)
+
+    assert all(isinstance(r.error, ValueError) for r in results)
+    assert len(api_stand_in.sandboxes) == 2
+    assert api_stand_in.running == []
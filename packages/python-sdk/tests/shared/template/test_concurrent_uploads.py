@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from e2b import AsyncTemplate, Template
+from e2b.exceptions import FileUploadException, InvalidArgumentException
+
+UPLOAD_TIME = 0.2
+
+
+@pytest.fixture
+def context(tmp_path):
+    for name in ["a", "b", "c", "d"]:
+        (tmp_path / f"{name}.txt").write_text(name)
+    return str(tmp_path)
+
+
+def template(cls, context):
+    return (
+        cls(file_context_path=context)
+        .from_python_image("3")
+        .copy("a.txt", "/app/")
+        .copy("b.txt", "/app/")
+        .run_cmd("echo between")
+        .copy("c.txt", "/app/")
+        .copy("d.txt", "/app/")
+        # Identical to the first step, the files are uploaded once
+        .copy("a.txt", "/app/")
+    )
+
+
+class BuildApi:
+    """
+    Build API stand-in recording the uploads and how many ran at the same time.
+    """
+
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.uploads = []
+        self.completed = []
+        self.running = 0
+        self.max_running = 0
+        self.builds = 0
+        self.lock = threading.Lock()
+
+    def request_build(self, *args, **kwargs):
+        self.builds += 1
+        return SimpleNamespace(template_id="tpl", build_id="build")
+
+    def get_file_upload_link(self, client, template_id, files_hash, stack_trace):
+        return SimpleNamespace(url=f"http://storage/{files_hash}", present=False)
+
+    def started(self, src):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.uploads.append(src)
+        if src in self.failing:
+            raise FileUploadException(f"Failed to upload {src}")
+
+    def finished(self, src):
+        with self.lock:
+            self.running -= 1
+            self.completed.append(src)
+
+    def upload_file(self, client, src, *args, on_progress=None):
+        self.started(src)
+        time.sleep(UPLOAD_TIME)
+        on_progress(2**19)
+        self.finished(src)
+        return 2**20
+
+    async def async_upload_file(self, client, src, *args, on_progress=None):
+        self.started(src)
+        await asyncio.sleep(UPLOAD_TIME)
+        on_progress(2**19)
+        self.finished(src)
+        return 2**20
+
+    def trigger_build(self, *args):
+        pass
+
+    def install(self, monkeypatch, module: str, is_async: bool):
+        def wrap(function):
+            if not is_async:
+                return function
+
+            async def wrapper(*args, **kwargs):
+                return function(*args, **kwargs)
+
+            return wrapper
+
+        monkeypatch.setattr(f"{module}.request_build", wrap(self.request_build))
+        monkeypatch.setattr(
+            f"{module}.get_file_upload_link", wrap(self.get_file_upload_link)
+        )
+        monkeypatch.setattr(f"{module}.trigger_build", wrap(self.trigger_build))
+        monkeypatch.setattr(
+            f"{module}.upload_file",
+            self.async_upload_file if is_async else self.upload_file,
+        )
+
+
+def test_uploads_run_concurrently(context, monkeypatch):
+    api = BuildApi()
+    api.install(monkeypatch, "e2b.template_sync.main", is_async=False)
+    logs = []
+
+    start = time.monotonic()
+    Template._build(
+        template(Template, context),
+        None,
+        "alias",
+        on_build_logs=lambda entry: logs.append(entry.message),
+        upload_concurrency=2,
+    )
+    elapsed = time.monotonic() - start
+
+    assert sorted(api.uploads) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+    assert api.max_running == 2
+    assert elapsed < 3 * UPLOAD_TIME
+    assert "Uploading 'a.txt'" in logs
+    assert "Uploading 'a.txt' (0.5 MiB uploaded)" in logs
+    assert any(log.startswith("Uploaded 'a.txt' (1.0 MiB in") for log in logs)
+    assert logs.index("All file uploads completed") > logs.index("Uploading 'd.txt'")
+
+
+def test_failed_upload_stops_the_rest(context, monkeypatch):
+    api = BuildApi(failing=["a.txt"])
+    api.install(monkeypatch, "e2b.template_sync.main", is_async=False)
+
+    with pytest.raises(FileUploadException):
+        Template._build(
+            template(Template, context), None, "alias", upload_concurrency=1
+        )
+
+    # The upload the thread already took can't be stopped, the later ones never start
+    assert api.uploads[0] == "a.txt"
+    assert "d.txt" not in api.uploads
+
+
+def test_invalid_upload_concurrency(context):
+    with pytest.raises(InvalidArgumentException):
+        Template._build(
+            template(Template, context), None, "alias", upload_concurrency=0
+        )
+
+
+@pytest.mark.parametrize("compression_level", [-1, 10])
+def test_invalid_compression_level(context, monkeypatch, compression_level):
+    api = BuildApi()
+    api.install(monkeypatch, "e2b.template_sync.main", is_async=False)
+
+    # Checked before the build is requested, even when no files would be uploaded
+    with pytest.raises(InvalidArgumentException):
+        Template._build(
+            template(Template, context),
+            None,
+            "alias",
+            compression_level=compression_level,
+        )
+    assert api.builds == 0
+
+
+async def test_async_invalid_compression_level(context, monkeypatch):
+    api = BuildApi()
+    api.install(monkeypatch, "e2b.template_async.main", is_async=True)
+
+    with pytest.raises(InvalidArgumentException):
+        await AsyncTemplate._build(
+            template(AsyncTemplate, context), None, "alias", compression_level=10
+        )
+    assert api.builds == 0
+
+
+async def test_async_uploads_run_concurrently(context, monkeypatch):
+    api = BuildApi()
+    api.install(monkeypatch, "e2b.template_async.main", is_async=True)
+    logs = []
+
+    start = time.monotonic()
+    await AsyncTemplate._build(
+        template(AsyncTemplate, context),
+        None,
+        "alias",
+        on_build_logs=lambda entry: logs.append(entry.message),
+        upload_concurrency=3,
+    )
+    elapsed = time.monotonic() - start
+
+    assert sorted(api.uploads) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+    assert api.max_running == 3
+    assert elapsed < 3 * UPLOAD_TIME
+    assert any(log.startswith("Uploaded 'd.txt' (1.0 MiB in") for log in logs)
+
+
+async def test_async_failed_upload_cancels_the_rest(context, monkeypatch):
+    api = BuildApi(failing=["b.txt"])
+    api.install(monkeypatch, "e2b.template_async.main", is_async=True)
+
+    with pytest.raises(FileUploadException):
+        await AsyncTemplate._build(
+            template(AsyncTemplate, context), None, "alias", upload_concurrency=2
+        )
+    await asyncio.sleep(2 * UPLOAD_TIME)
+
+    # The uploads still running are cancelled and the waiting ones never start
+    assert "d.txt" not in api.uploads
+    assert api.completed == []
@@ -0,0 +1,242 @@
+import gzip
+import io
+import os
+import tarfile
+import threading
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from e2b.exceptions import FileUploadException
+from e2b.template_async.build_api import upload_file as async_upload_file
+from e2b.template_sync.build_api import upload_file
+
+
+@pytest.fixture(autouse=True)
+def content_length_hosts(monkeypatch):
+    monkeypatch.setattr("e2b.template.utils._content_length_hosts", set())
+
+
+@pytest.fixture
+def context(tmp_path):
+    (tmp_path / "app.py").write_text("print('hello')\n")
+    return str(tmp_path)
+
+
+class Storage:
+    """
+    Upload URL handler recording the uploads, optionally refusing uploads without a `Content-Length`
+    or dropping the connection on them.
+    """
+
+    def __init__(
+        self, require_length: bool = False, status: int = 200, drop: bool = False
+    ):
+        self.require_length = require_length
+        self.status = status
+        self.drop = drop
+        self.uploads = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        length = request.headers.get("Content-Length")
+        self.uploads.append((length, body))
+        if self.drop and length is None:
+            raise httpx.WriteError("Connection reset by peer", request=request)
+        if self.require_length and length is None:
+            return httpx.Response(411)
+        return httpx.Response(self.status)
+
+    def files(self):
+        _, body = self.uploads[-1]
+        with tarfile.open(fileobj=io.BytesIO(gzip.decompress(body))) as tar:
+            return tar.getnames()
+
+
+def sync_client(storage: Storage):
+    client = httpx.Client(transport=httpx.MockTransport(storage))
+    return SimpleNamespace(get_httpx_client=lambda: client)
+
+
+def async_client(storage: Storage):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(storage))
+    return SimpleNamespace(get_async_httpx_client=lambda: client)
+
+
+def test_tar_is_streamed(context):
+    storage = Storage()
+
+    upload_file(
+        sync_client(storage), "*.py", context, "http://storage/up", [], False, None
+    )
+
+    assert [length for length, _ in storage.uploads] == [None]
+    assert storage.files() == ["app.py"]
+
+
+def test_spooled_when_length_is_required(context):
+    storage = Storage(require_length=True)
+
+    upload_file(
+        sync_client(storage), "*.py", context, "http://storage/up", [], False, None
+    )
+
+    length, body = storage.uploads[-1]
+    assert len(storage.uploads) == 2
+    assert length == str(len(body))
+    assert storage.files() == ["app.py"]
+
+
+def test_refusing_host_is_remembered(context):
+    storage = Storage(require_length=True)
+    client = sync_client(storage)
+
+    upload_file(client, "*.py", context, "http://storage/a", [], False, None)
+    upload_file(client, "*.py", context, "http://storage/b", [], False, None)
+
+    assert [length is None for length, _ in storage.uploads] == [True, False, False]
+
+
+def test_presigned_s3_url_is_spooled(context):
+    storage = Storage()
+
+    upload_file(
+        sync_client(storage),
+        "*.py",
+        context,
+        "http://bucket.s3.amazonaws.com/up?X-Amz-Algorithm=AWS4-HMAC-SHA256&X-Amz-Signature=abc",
+        [],
+        False,
+        None,
+    )
+
+    length, body = storage.uploads[0]
+    assert len(storage.uploads) == 1
+    assert length == str(len(body))
+
+
+def test_spooled_when_connection_is_dropped(context):
+    storage = Storage(drop=True)
+
+    upload_file(
+        sync_client(storage), "*.py", context, "http://storage/up", [], False, None
+    )
+
+    length, body = storage.uploads[-1]
+    assert len(storage.uploads) == 2
+    assert length == str(len(body))
+    assert storage.files() == ["app.py"]
+
+
+def test_progress_is_reported(context, monkeypatch):
+    monkeypatch.setattr("e2b.template_sync.build_api.UPLOAD_PROGRESS_INTERVAL", 0)
+    monkeypatch.setattr("e2b.template.utils.TAR_CHUNK_SIZE", 1024)
+    with open(os.path.join(context, "big.py"), "wb") as f:
+        f.write(os.urandom(10_000))
+    storage = Storage(require_length=True)
+    progress = []
+
+    size = upload_file(
+        sync_client(storage),
+        "*.py",
+        context,
+        "http://storage/up",
+        [],
+        False,
+        None,
+        on_progress=progress.append,
+    )
+
+    # The streamed upload is refused in one chunk, the spooled one is counted from the start again
+    spooled = progress[1:]
+    assert len(spooled) > 2
+    assert spooled == sorted(spooled)
+    assert spooled[-1] == size
+
+
+def test_failed_upload(context):
+    storage = Storage(status=403)
+
+    with pytest.raises(FileUploadException):
+        upload_file(
+            sync_client(storage), "*.py", context, "http://storage/up", [], False, None
+        )
+
+
+async def test_async_tar_is_streamed(context):
+    storage = Storage()
+
+    await async_upload_file(
+        async_client(storage), "*.py", context, "http://storage/up", [], False, None
+    )
+
+    assert [length for length, _ in storage.uploads] == [None]
+    assert storage.files() == ["app.py"]
+
+
+async def test_async_spooled_when_length_is_required(context):
+    storage = Storage(require_length=True)
+
+    await async_upload_file(
+        async_client(storage), "*.py", context, "http://storage/up", [], False, None
+    )
+
+    length, body = storage.uploads[-1]
+    assert len(storage.uploads) == 2
+    assert length == str(len(body))
+    assert storage.files() == ["app.py"]
+
+
+async def test_async_spooled_when_connection_is_dropped(context):
+    storage = Storage(drop=True)
+
+    await async_upload_file(
+        async_client(storage), "*.py", context, "http://storage/up", [], False, None
+    )
+
+    length, body = storage.uploads[-1]
+    assert len(storage.uploads) == 2
+    assert length == str(len(body))
+
+
+async def test_async_presigned_s3_url_is_spooled(context):
+    storage = Storage()
+
+    await async_upload_file(
+        async_client(storage),
+        "*.py",
+        context,
+        "http://bucket.s3.amazonaws.com/up?X-Amz-Signature=abc",
+        [],
+        False,
+        None,
+    )
+
+    assert [length is None for length, _ in storage.uploads] == [False]
+
+
+async def test_async_progress_is_reported_on_the_loop(context, monkeypatch):
+    monkeypatch.setattr("e2b.template_async.build_api.UPLOAD_PROGRESS_INTERVAL", 0)
+    monkeypatch.setattr("e2b.template.utils.TAR_CHUNK_SIZE", 1024)
+    with open(os.path.join(context, "big.py"), "wb") as f:
+        f.write(os.urandom(10_000))
+    progress = []
+
+    def on_progress(uploaded: int):
+        progress.append((uploaded, threading.current_thread()))
+
+    size = await async_upload_file(
+        async_client(Storage(require_length=True)),
+        "*.py",
+        context,
+        "http://storage/up",
+        [],
+        False,
+        None,
+        on_progress=on_progress,
+    )
+
+    assert len(progress) > 2
+    assert [uploaded for uploaded, _ in progress][-1] == size
+    assert {thread for _, thread in progress} == {threading.current_thread()}
@@ -0,0 +1,69 @@
+import hashlib
+import os
+
+import pytest
+
+from e2b.exceptions import InvalidArgumentException
+from e2b.template.utils import calculate_files_hash, get_all_files_in_path
+
+
+def reference_hash(src: str, dest: str, context: str) -> str:
+    """
+    The files hash calculated one file at a time, reading each file whole.
+    """
+    hash_obj = hashlib.sha256(f"COPY {src} {dest}".encode())
+    for file in get_all_files_in_path(src, context, [], True):
+        hash_obj.update(os.path.relpath(file, context).encode())
+        if os.path.islink(file):
+            stats = os.lstat(file)
+            hash_obj.update(str(stats.st_mode).encode())
+            hash_obj.update(str(stats.st_size).encode())
+            hash_obj.update(os.readlink(file).encode())
+            continue
+
+        stats = os.stat(file)
+        hash_obj.update(str(stats.st_mode).encode())
+        hash_obj.update(str(stats.st_size).encode())
+        if os.path.isfile(file):
+            with open(file, "rb") as f:
+                hash_obj.update(f.read())
+    return hash_obj.hexdigest()
+
+
+@pytest.fixture
+def context(tmp_path):
+    for i in range(50):
+        directory = tmp_path / "src" / f"dir{i % 5}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file{i}.txt").write_bytes(os.urandom(i * 37))
+    (tmp_path / "src" / "big.bin").write_bytes(os.urandom(100_000))
+    (tmp_path / "src" / "empty").write_bytes(b"")
+    os.symlink("big.bin", tmp_path / "src" / "link")
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize("concurrency", [1, 2, 16])
+@pytest.mark.parametrize("chunk_size", [1000, 1024 * 1024])
+def test_hash_is_identical(context, monkeypatch, concurrency, chunk_size):
+    monkeypatch.setattr("e2b.template.utils.HASH_CHUNK_SIZE", chunk_size)
+
+    files_hash = calculate_files_hash(
+        "src", "/app", context, [], False, None, concurrency=concurrency
+    )
+
+    assert files_hash == reference_hash("src", "/app", context)
+
+
+def test_read_error_is_raised(context, monkeypatch):
+    def fail(part):
+        raise PermissionError(part)
+
+    monkeypatch.setattr("e2b.template.utils._read", fail)
+
+    with pytest.raises(PermissionError):
+        calculate_files_hash("src", "/app", context, [], False, None, concurrency=4)
+
+
+def test_invalid_concurrency(context):
+    with pytest.raises(InvalidArgumentException):
+        calculate_files_hash("src", "/app", context, [], False, None, concurrency=0)
@@ -0,0 +1,112 @@
+import os
+from collections import Counter
+
+import pytest
+from wcmatch import glob
+
+from e2b.template.utils import FileContextIndex, calculate_files_hash
+
+
+def glob_files(src: str, context: str, ignore_patterns, include_directories: bool):
+    """
+    The files of a COPY step found by globbing every matched directory.
+    """
+    files = set()
+    for file in glob.glob(
+        src, flags=glob.GLOBSTAR, root_dir=context, exclude=ignore_patterns
+    ):
+        file_path = os.path.join(context, file)
+        if not os.path.isdir(file_path):
+            files.add(file_path)
+            continue
+
+        if include_directories:
+            files.add(file_path)
+        for dir_file in glob.glob(
+            file + "/**/*",
+            flags=glob.GLOBSTAR,
+            root_dir=context,
+            exclude=ignore_patterns,
+        ):
+            files.add(os.path.join(context, dir_file))
+    return sorted(files)
+
+
+@pytest.fixture
+def context(tmp_path):
+    for path in [
+        "src/a.py",
+        "src/.env",
+        "src/.hidden/h.py",
+        "src/node_modules/pkg/i.js",
+        "src/sub/b.py",
+        "src/sub/deep/c.txt",
+        "src/sub/.git/config",
+        "other/o.txt",
+    ]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(path)
+    os.symlink("../other", tmp_path / "src" / "linkdir")
+    os.symlink("a.py", tmp_path / "src" / "linkfile")
+    os.symlink("missing", tmp_path / "src" / "broken")
+    os.symlink("src", tmp_path / "toplink")
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize(
+    "src", ["src", "src/", ".", "src/*", "**/*.py", "toplink", "src/linkdir"]
+)
+@pytest.mark.parametrize(
+    "ignore_patterns",
+    [
+        [],
+        ["**/node_modules"],
+        ["src/sub/**"],
+        ["src/sub/"],
+        ["**/*.py"],
+        ["src/*", "!src/a.py"],
+    ],
+)
+@pytest.mark.parametrize("include_directories", [True, False])
+def test_files_match_glob(context, src, ignore_patterns, include_directories):
+    index = FileContextIndex(context, ignore_patterns)
+
+    assert index.files(src, include_directories) == glob_files(
+        src, context, ignore_patterns, include_directories
+    )
+
+
+def test_directories_are_listed_once(context, monkeypatch):
+    listed = Counter()
+    scandir = os.scandir
+
+    def counting_scandir(path="."):
+        listed[path] += 1
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+
+    index = FileContextIndex(context, [])
+    index.files("src")
+    index.files("src")
+    calculate_files_hash("src", "/app", context, [], False, None, index=index)
+
+    # The pattern itself is matched by glob, the directories under it come from the index
+    del listed[context]
+    assert listed[os.path.join(context, "src", "sub", "deep")] == 1
+    assert max(listed.values()) == 1
+
+
+def test_listing_status_is_reused(context, monkeypatch):
+    index = FileContextIndex(context, [])
+    # The entries under the directory come from its listing
+    files = index.files("src/sub")[1:]
+    sizes = [os.lstat(file).st_size for file in files]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file was stat-ed again")
+
+    monkeypatch.setattr(os, "lstat", fail)
+    monkeypatch.setattr(os, "stat", fail)
+
+    assert [index.lstat(file).st_size for file in files] == sizes
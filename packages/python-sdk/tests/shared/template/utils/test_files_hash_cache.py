@@ -0,0 +1,138 @@
+import os
+import time
+
+import pytest
+
+from e2b.template import hash_cache
+from e2b.template.hash_cache import FilesHashCache, cache_path
+from e2b.template.utils import calculate_files_hash
+
+OLD = time.time() - 3600
+
+
+@pytest.fixture
+def context(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.delenv(hash_cache.HASH_CACHE_DIR_ENV, raising=False)
+    monkeypatch.delenv(hash_cache.HASH_CACHE_ENV, raising=False)
+
+    context = tmp_path / "context"
+    (context / "src" / "nested").mkdir(parents=True)
+    for name, content in [("src/a.txt", "a"), ("src/nested/b.txt", "b" * 10)]:
+        write(context, name, content)
+    os.symlink("a.txt", context / "src" / "link")
+    return str(context)
+
+
+def write(context, name: str, content: str, mtime: float = OLD):
+    path = os.path.join(context, name)
+    with open(path, "w") as f:
+        f.write(content)
+    os.utime(path, (mtime, mtime))
+
+
+def files_hash(context: str, cache=None, resolve_symlinks=False) -> str:
+    return calculate_files_hash(
+        "src", "/app", context, [], resolve_symlinks, None, cache
+    )
+
+
+@pytest.mark.parametrize("resolve_symlinks", [False, True])
+def test_cached_hash_is_identical(context, resolve_symlinks):
+    expected = files_hash(context, resolve_symlinks=resolve_symlinks)
+
+    cache = FilesHashCache.for_context(context)
+    assert files_hash(context, cache, resolve_symlinks) == expected
+    assert files_hash(context, cache, resolve_symlinks) == expected
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_unchanged_files_are_not_read(context, monkeypatch):
+    cache = FilesHashCache.for_context(context)
+    expected = files_hash(context, cache)
+    cache.save()
+    cache = FilesHashCache(cache.path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file was read")
+
+    monkeypatch.setattr("builtins.open", fail)
+    assert files_hash(context, cache) == expected
+
+
+def test_changed_file_is_rehashed(context):
+    cache = FilesHashCache.for_context(context)
+    before = files_hash(context, cache)
+
+    # Same size, only the modification time tells the content apart
+    write(context, "src/a.txt", "z", mtime=OLD + 1)
+
+    after = files_hash(context, cache)
+    assert after != before
+    assert after == files_hash(context)
+    assert cache.misses == 2
+
+
+def test_recently_modified_files_are_not_cached(context):
+    write(context, "src/a.txt", "a", mtime=time.time())
+
+    cache = FilesHashCache.for_context(context)
+    files_hash(context, cache)
+
+    assert len(cache) == 0
+
+
+def test_cache_is_persisted(context):
+    cache = FilesHashCache.for_context(context)
+    expected = files_hash(context, cache)
+    cache.save()
+
+    assert cache.path.startswith(os.environ["XDG_CACHE_HOME"])
+    cache = FilesHashCache.for_context(context)
+    assert files_hash(context, cache) == expected
+    assert cache.hits == 1
+
+
+def test_broken_cache_is_ignored(context):
+    path = cache_path(context)
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+        f.write("{not json")
+
+    cache = FilesHashCache.for_context(context)
+    assert files_hash(context, cache) == files_hash(context)
+
+
+def test_cache_in_context_dir(context, monkeypatch):
+    monkeypatch.setenv(hash_cache.HASH_CACHE_DIR_ENV, ".e2b")
+
+    assert cache_path(context).startswith(os.path.join(context, ".e2b"))
+
+
+def test_cache_can_be_disabled(context, monkeypatch):
+    monkeypatch.setenv(hash_cache.HASH_CACHE_ENV, "false")
+
+    assert FilesHashCache.for_context(context) is None
+
+
+def test_large_file_is_hashed_in_chunks(context, monkeypatch):
+    write(context, "src/big.bin", "x" * 300)
+    expected = files_hash(context)
+
+    monkeypatch.setattr("e2b.template.utils.HASH_CHUNK_SIZE", 7)
+    assert files_hash(context) == expected
+
+
+def test_cli(context, capsys):
+    cache = FilesHashCache.for_context(context)
+    files_hash(context, cache)
+    cache.save()
+
+    hash_cache.main(["info"])
+    assert "1 steps" in capsys.readouterr().out
+
+    hash_cache.main(["clear", context])
+    assert not os.path.exists(cache.path)
+
+    hash_cache.main(["info"])
+    assert "No template hash caches found" in capsys.readouterr().out
@@ -0,0 +1,77 @@
+import gzip
+import io
+import os
+import tarfile
+
+import pytest
+
+from e2b.exceptions import InvalidArgumentException
+from e2b.template.utils import (
+    TAR_CHUNK_SIZE,
+    get_all_files_in_path,
+    spool_tar_file,
+    tar_file_chunks,
+)
+
+
+@pytest.fixture
+def context(tmp_path):
+    (tmp_path / "src" / "nested").mkdir(parents=True)
+    (tmp_path / "src" / "a.txt").write_text("a" * 1000)
+    (tmp_path / "src" / "nested" / "b.txt").write_text("b")
+    (tmp_path / "src" / "empty").write_bytes(b"")
+    (tmp_path / "src" / "big.bin").write_bytes(os.urandom(3 * TAR_CHUNK_SIZE + 7))
+    os.symlink("a.txt", tmp_path / "src" / "link")
+    os.link(tmp_path / "src" / "a.txt", tmp_path / "src" / "hardlink")
+    return str(tmp_path)
+
+
+def tarfile_tar(context: str, resolve_symlinks: bool) -> bytes:
+    """
+    Uncompressed tar of the files written by tarfile itself.
+    """
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w", dereference=resolve_symlinks) as tar:
+        for file in get_all_files_in_path("src", context, [], True):
+            tar.add(file, arcname=os.path.relpath(file, context), recursive=False)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("resolve_symlinks", [False, True])
+def test_tar_matches_tarfile(context, resolve_symlinks):
+    chunks = list(tar_file_chunks("src", context, [], resolve_symlinks))
+
+    assert gzip.decompress(b"".join(chunks)) == tarfile_tar(context, resolve_symlinks)
+
+
+def test_tar_is_produced_in_chunks(context):
+    chunks = list(tar_file_chunks("src", context, [], False, compression_level=0))
+
+    assert len(chunks) > 2
+    assert max(len(chunk) for chunk in chunks) <= 2 * TAR_CHUNK_SIZE
+
+
+def test_compression_level(context):
+    sizes = [
+        len(b"".join(tar_file_chunks("src", context, [], False, level)))
+        for level in (0, 9)
+    ]
+
+    assert sizes[0] > sizes[1]
+
+
+def test_invalid_compression_level(context):
+    with pytest.raises(InvalidArgumentException):
+        list(tar_file_chunks("src", context, [], False, compression_level=10))
+
+
+def test_spooled_tar(context, monkeypatch):
+    monkeypatch.setattr("e2b.template.utils.TAR_SPOOL_MAX_SIZE", 1024)
+
+    tar_file, size = spool_tar_file("src", context, [], False)
+    with tar_file:
+        data = tar_file.read()
+
+    assert tar_file._rolled
+    assert len(data) == size
+    assert gzip.decompress(data) == tarfile_tar(context, False)
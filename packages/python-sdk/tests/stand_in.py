@@ -0,0 +1,757 @@
+"""
+Local stand-ins for envd and the E2B API the offline tests and benchmarks run against.
+"""
+
+import json
+import os
+import queue
+import shutil
+import signal
+import socket
+import stat
+import subprocess
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from packaging.version import Version
+
+from e2b.envd.filesystem import filesystem_pb2
+from e2b.envd.process import process_pb2
+from e2b_connect.client import (
+    Code,
+    ConnectException,
+    EnvelopeFlags,
+    JSONCodec,
+    ProtobufCodec,
+    encode_envelope,
+    envelope_header_length,
+)
+
+
+STAND_IN_ENVD_VERSION = Version("0.4.0")
+"""
+envd version the SDK modules talking to the stand-in envd are created with.
+"""
+
+
+class StandInEnvd(ThreadingHTTPServer):
+    """
+    Local stand-in for envd used by the offline tests and benchmarks.
+
+    It serves the `/files` API (with `Range` support) and the process and filesystem
+    Connect RPCs the SDK uses, operating directly on the local filesystem.
+    Relative paths are resolved against `workdir`.
+    Setting `bandwidth` limits each connection to that many bytes per second, like a remote sandbox would.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, workdir: str):
+        super().__init__(("127.0.0.1", 0), _StandInEnvdHandler)
+        self.workdir = workdir
+        self.requests: List[Tuple[str, str]] = []
+        self.bandwidth: Optional[int] = None
+        self.watchers: Dict[str, list] = {}
+        self.processes: Dict[int, subprocess.Popen] = {}
+        self.stopped = threading.Event()
+        self._failures = 0
+        self._rejections: List[int] = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def fail_next(self, count: int = 1):
+        """
+        Drop the connection in the middle of the next `count` `/files` requests.
+        """
+        with self._lock:
+            self._failures += count
+
+    def reject_next(self, count: int = 1, status: int = 503):
+        """
+        Answer the next `count` RPC requests with an `unavailable` error with the HTTP `status`, without processing them.
+        """
+        with self._lock:
+            self._rejections.extend([status] * count)
+
+    def _rejection(self) -> Optional[int]:
+        with self._lock:
+            return self._rejections.pop(0) if self._rejections else None
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            if self._failures > 0:
+                self._failures -= 1
+                return True
+            return False
+
+    def throttle(self, size: int):
+        if self.bandwidth:
+            time.sleep(size / self.bandwidth)
+
+    def resolve(self, path: str) -> str:
+        return os.path.join(self.workdir, os.path.expanduser(path))
+
+
+def _entry_info(path: str) -> filesystem_pb2.EntryInfo:
+    st = os.lstat(path)
+    entry = filesystem_pb2.EntryInfo(
+        name=os.path.basename(path),
+        type=(
+            filesystem_pb2.FileType.FILE_TYPE_DIRECTORY
+            if stat.S_ISDIR(st.st_mode)
+            else filesystem_pb2.FileType.FILE_TYPE_FILE
+        ),
+        path=path,
+        size=st.st_size,
+        mode=st.st_mode & 0o777,
+        permissions=stat.filemode(st.st_mode),
+    )
+    entry.modified_time.FromNanoseconds(st.st_mtime_ns)
+    return entry
+
+
+def _list_dir(path: str, depth: int) -> List[filesystem_pb2.EntryInfo]:
+    entries = []
+    for name in sorted(os.listdir(path)):
+        child = os.path.join(path, name)
+        entries.append(_entry_info(child))
+        if depth > 1 and os.path.isdir(child) and not os.path.islink(child):
+            entries.extend(_list_dir(child, depth - 1))
+    return entries
+
+
+def _not_found(path: str):
+    raise ConnectException(Code.not_found, f"path '{path}' does not exist")
+
+
+def _stat(server: StandInEnvd, req: filesystem_pb2.StatRequest):
+    path = server.resolve(req.path)
+    if not os.path.lexists(path):
+        _not_found(path)
+    return filesystem_pb2.StatResponse(entry=_entry_info(path))
+
+
+def _list_dir_rpc(server: StandInEnvd, req: filesystem_pb2.ListDirRequest):
+    path = server.resolve(req.path)
+    if not os.path.isdir(path):
+        _not_found(path)
+    return filesystem_pb2.ListDirResponse(entries=_list_dir(path, req.depth or 1))
+
+
+def _make_dir(server: StandInEnvd, req: filesystem_pb2.MakeDirRequest):
+    path = server.resolve(req.path)
+    if os.path.isdir(path):
+        raise ConnectException(Code.already_exists, f"directory '{path}' exists")
+    os.makedirs(path)
+    return filesystem_pb2.MakeDirResponse(entry=_entry_info(path))
+
+
+def _remove(server: StandInEnvd, req: filesystem_pb2.RemoveRequest):
+    path = server.resolve(req.path)
+    if not os.path.lexists(path):
+        _not_found(path)
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+    return filesystem_pb2.RemoveResponse()
+
+
+def _start(server: StandInEnvd, req: process_pb2.StartRequest):
+    # The login profile of the host running the tests has nothing to do with the sandbox
+    args = [arg for arg in req.process.args if arg != "-l"]
+
+    proc = subprocess.Popen(
+        [req.process.cmd, *args],
+        cwd=server.resolve(req.process.cwd or "."),
+        env={**os.environ, **dict(req.process.envs)},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    with server._lock:
+        server.processes[proc.pid] = proc
+
+    # Output is streamed as it's written, like envd does
+    chunks: "queue.Queue[Optional[Tuple[str, bytes]]]" = queue.Queue()
+
+    def pump(pipe, stream: str):
+        for chunk in iter(lambda: os.read(pipe.fileno(), 64 * 1024), b""):
+            chunks.put((stream, chunk))
+        chunks.put(None)
+
+    for pipe, stream in [(proc.stdout, "stdout"), (proc.stderr, "stderr")]:
+        threading.Thread(target=pump, args=(pipe, stream), daemon=True).start()
+
+    def event(**kwargs):
+        return process_pb2.StartResponse(event=process_pb2.ProcessEvent(**kwargs))
+
+    yield event(start=process_pb2.ProcessEvent.StartEvent(pid=proc.pid))
+    open_pipes = 2
+    while open_pipes:
+        chunk = chunks.get()
+        if chunk is None:
+            open_pipes -= 1
+            continue
+        stream, data = chunk
+        yield event(data=process_pb2.ProcessEvent.DataEvent(**{stream: data}))
+
+    proc.wait()
+    with server._lock:
+        server.processes.pop(proc.pid, None)
+    yield event(
+        end=process_pb2.ProcessEvent.EndEvent(
+            exit_code=proc.returncode, exited=True, status=f"exit {proc.returncode}"
+        )
+    )
+
+
+def _send_signal(server: StandInEnvd, req: process_pb2.SendSignalRequest):
+    with server._lock:
+        proc = server.processes.get(req.process.pid)
+    if proc is None:
+        raise ConnectException(Code.not_found, f"process {req.process.pid} not found")
+
+    # The whole process group, so the children of the shell don't keep the output open
+    os.killpg(proc.pid, signal.SIGKILL)
+    return process_pb2.SendSignalResponse()
+
+
+_WATCH_INTERVAL = 0.05
+
+
+def _snapshot(root: str, recursive: bool) -> dict:
+    entries = {}
+    for directory, dirs, files in os.walk(root):
+        for name in dirs + files:
+            path = os.path.join(directory, name)
+            try:
+                st = os.lstat(path)
+            except FileNotFoundError:
+                continue
+            entries[os.path.relpath(path, root)] = (st.st_mtime_ns, st.st_size)
+        if not recursive:
+            break
+    return entries
+
+
+def _watch(server: StandInEnvd, path: str, recursive: bool):
+    """
+    Poll the directory and yield the changes as filesystem events.
+    """
+    root = server.resolve(path)
+    if not os.path.isdir(root):
+        _not_found(root)
+
+    before = _snapshot(root, recursive)
+    while not server.stopped.wait(_WATCH_INTERVAL):
+        after = _snapshot(root, recursive)
+        events = []
+        for name in after.keys() - before.keys():
+            events.append((name, filesystem_pb2.EventType.EVENT_TYPE_CREATE))
+        for name in before.keys() - after.keys():
+            events.append((name, filesystem_pb2.EventType.EVENT_TYPE_REMOVE))
+        for name in after.keys() & before.keys():
+            if after[name] != before[name]:
+                events.append((name, filesystem_pb2.EventType.EVENT_TYPE_WRITE))
+        before = after
+
+        yield [filesystem_pb2.FilesystemEvent(name=n, type=t) for n, t in events]
+
+
+def _watch_dir(server: StandInEnvd, req: filesystem_pb2.WatchDirRequest):
+    changes = _watch(server, req.path, req.recursive)
+    next_changes = next(changes)
+
+    yield filesystem_pb2.WatchDirResponse(
+        start=filesystem_pb2.WatchDirResponse.StartEvent()
+    )
+    while True:
+        for event in next_changes:
+            yield filesystem_pb2.WatchDirResponse(filesystem=event)
+        if not next_changes:
+            # Lets the server notice a closed connection
+            yield filesystem_pb2.WatchDirResponse(
+                keepalive=filesystem_pb2.WatchDirResponse.KeepAlive()
+            )
+        next_changes = next(changes)
+
+
+def _create_watcher(server: StandInEnvd, req: filesystem_pb2.CreateWatcherRequest):
+    changes = _watch(server, req.path, req.recursive)
+    watcher_id = uuid4().hex
+    events = server.watchers[watcher_id] = []
+    # The snapshot is taken before the watcher is returned
+    events.extend(next(changes))
+
+    def poll():
+        for batch in changes:
+            if watcher_id not in server.watchers:
+                return
+            events.extend(batch)
+
+    threading.Thread(target=poll, daemon=True).start()
+    return filesystem_pb2.CreateWatcherResponse(watcher_id=watcher_id)
+
+
+def _get_watcher_events(
+    server: StandInEnvd, req: filesystem_pb2.GetWatcherEventsRequest
+):
+    if req.watcher_id not in server.watchers:
+        raise ConnectException(Code.not_found, f"watcher {req.watcher_id} not found")
+
+    events = server.watchers[req.watcher_id]
+    taken = events[: len(events)]
+    del events[: len(taken)]
+    return filesystem_pb2.GetWatcherEventsResponse(events=taken)
+
+
+def _remove_watcher(server: StandInEnvd, req: filesystem_pb2.RemoveWatcherRequest):
+    server.watchers.pop(req.watcher_id, None)
+    return filesystem_pb2.RemoveWatcherResponse()
+
+
+_STAND_IN_RPCS = {
+    "/filesystem.Filesystem/Stat": (filesystem_pb2.StatRequest, _stat),
+    "/filesystem.Filesystem/ListDir": (filesystem_pb2.ListDirRequest, _list_dir_rpc),
+    "/filesystem.Filesystem/MakeDir": (filesystem_pb2.MakeDirRequest, _make_dir),
+    "/filesystem.Filesystem/Remove": (filesystem_pb2.RemoveRequest, _remove),
+    "/filesystem.Filesystem/WatchDir": (filesystem_pb2.WatchDirRequest, _watch_dir),
+    "/filesystem.Filesystem/CreateWatcher": (
+        filesystem_pb2.CreateWatcherRequest,
+        _create_watcher,
+    ),
+    "/filesystem.Filesystem/GetWatcherEvents": (
+        filesystem_pb2.GetWatcherEventsRequest,
+        _get_watcher_events,
+    ),
+    "/filesystem.Filesystem/RemoveWatcher": (
+        filesystem_pb2.RemoveWatcherRequest,
+        _remove_watcher,
+    ),
+    "/process.Process/Start": (process_pb2.StartRequest, _start),
+    "/process.Process/SendSignal": (process_pb2.SendSignalRequest, _send_signal),
+}
+
+
+_STAND_IN_WRITE_SIZE = 64 * 1024
+_HTTP_STATUS = {Code.not_found: 404, Code.already_exists: 409}
+
+
+class _StandInEnvdHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StandInEnvd
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, headers: Optional[dict] = None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        for i in range(0, len(body), _STAND_IN_WRITE_SIZE):
+            self.server.throttle(min(_STAND_IN_WRITE_SIZE, len(body) - i))
+            self.wfile.write(body[i : i + _STAND_IN_WRITE_SIZE])
+
+    def _send_json(self, status: int, data):
+        self._send(
+            status, json.dumps(data).encode(), {"Content-Type": "application/json"}
+        )
+
+    def _read_body(self) -> bytes:
+        body = self._read_raw_body()
+        self.server.throttle(len(body))
+        return body
+
+    def _read_raw_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return bytes(body)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _drop(self):
+        self.close_connection = True
+        self.connection.shutdown(socket.SHUT_RDWR)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        self.server.requests.append(("GET", url.path))
+
+        if url.path == "/health":
+            return self._send(204, b"")
+
+        if url.path != "/files":
+            return self._send_json(404, {"message": "not found"})
+
+        path = self.server.resolve(urllib.parse.parse_qs(url.query)["path"][0])
+        if not os.path.exists(path):
+            return self._send_json(404, {"message": f"path '{path}' does not exist"})
+        if os.path.isdir(path):
+            return self._send_json(400, {"message": f"path '{path}' is a directory"})
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        status, headers = 200, {"Accept-Ranges": "bytes"}
+
+        range_header = self.headers.get("Range")
+        if range_header:
+            first, last = range_header.removeprefix("bytes=").split("-")
+            start, end = int(first), min(int(last or size - 1), size - 1)
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+
+        if self.server._should_fail():
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[: len(body) // 2])
+            return self._drop()
+
+        self._send(status, body, headers)
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        self.server.requests.append(("POST", url.path))
+        body = self._read_body()
+
+        if url.path == "/files":
+            if self.server._should_fail():
+                return self._drop()
+            return self._post_files(body)
+
+        if url.path not in _STAND_IN_RPCS:
+            return self._send_json(404, {"code": "unimplemented", "message": url.path})
+
+        rejection = self.server._rejection()
+        if rejection is not None:
+            return self._send_json(
+                rejection, {"code": "unavailable", "message": "try again"}
+            )
+
+        content_type = self.headers["Content-Type"]
+        codec = JSONCodec if content_type.endswith("json") else ProtobufCodec
+        request_type, handler = _STAND_IN_RPCS[url.path]
+
+        if content_type.startswith("application/connect+"):
+            return self._server_stream(codec, request_type, handler, body)
+
+        try:
+            res = handler(self.server, codec.decode(body, msg_type=request_type))
+        except ConnectException as e:
+            return self._send_json(
+                _HTTP_STATUS.get(e.status, 500),
+                {"code": e.status.value, "message": e.message},
+            )
+        self._send(200, codec.encode(res), {"Content-Type": content_type})
+
+    def _server_stream(self, codec, request_type, handler, body: bytes):
+        req = codec.decode(body[envelope_header_length:], msg_type=request_type)
+
+        self.send_response(200)
+        self.send_header("Content-Type", self.headers["Content-Type"])
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write_chunk(data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        end = {}
+        try:
+            for msg in handler(self.server, req):
+                write_chunk(
+                    encode_envelope(flags=EnvelopeFlags(0), data=codec.encode(msg))
+                )
+        except ConnectException as e:
+            end = {"error": {"code": e.status.value, "message": e.message}}
+        except OSError:
+            # The client went away
+            self.close_connection = True
+            return
+
+        write_chunk(
+            encode_envelope(
+                flags=EnvelopeFlags.end_stream, data=json.dumps(end).encode()
+            )
+        )
+        write_chunk(b"")
+
+    def _post_files(self, body: bytes):
+        params = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+
+        written = []
+        for part in message.iter_parts():
+            path = self.server.resolve(params.get("path", [part.get_filename()])[0])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(part.get_payload(decode=True))
+            written.append(
+                {"name": os.path.basename(path), "type": "file", "path": path}
+            )
+
+        self._send_json(200, written)
+
+
+class StandInApi(ThreadingHTTPServer):
+    """
+    Local stand-in for the E2B API used by the offline tests and benchmarks.
+
+    It creates, kills and extends in-memory sandboxes and also answers the envd health check,
+    so it can be used as both `api_url` and `sandbox_url`.
+    Setting `create_delay` makes each sandbox creation take that many seconds, like a cold start would,
+    `list_delay` does the same for each page of the sandbox list.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StandInApiHandler)
+        self.sandboxes: Dict[str, dict] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self.metrics: Dict[str, List[dict]] = {}
+        self.create_delay = 0.0
+        self.list_delay = 0.0
+        self._rate_limited = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def opts(self) -> dict:
+        """
+        Connection options of the SDK pointing at the stand-in.
+        """
+        return dict(api_key="test", api_url=self.url, sandbox_url=self.url)
+
+    def rate_limit(self, count: int):
+        """
+        Reject the next `count` requests with 429 Too Many Requests.
+        """
+        with self._lock:
+            self._rate_limited += count
+
+    def _should_rate_limit(self) -> bool:
+        with self._lock:
+            if self._rate_limited > 0:
+                self._rate_limited -= 1
+                return True
+            return False
+
+    @property
+    def running(self) -> List[str]:
+        with self._lock:
+            return [id for id, s in self.sandboxes.items() if s["running"]]
+
+    def create(self, body: dict) -> dict:
+        sandbox_id = f"sbx-{uuid4().hex[:8]}"
+        with self._lock:
+            self.sandboxes[sandbox_id] = {
+                "template": body["templateID"],
+                "metadata": body.get("metadata") or {},
+                "envs": body.get("envVars") or {},
+                "timeout": body.get("timeout"),
+                "running": True,
+            }
+        return {
+            "sandboxID": sandbox_id,
+            "templateID": body["templateID"],
+            "clientID": "stand-in",
+            "envdVersion": str(STAND_IN_ENVD_VERSION),
+        }
+
+    def list(self, limit: int, next_token: Optional[str]) -> Tuple[List[dict], str]:
+        """
+        Page of the running sandboxes and the token of the next page, empty on the last page.
+        """
+        start = int(next_token or 0)
+        with self._lock:
+            ids = sorted(id for id, s in self.sandboxes.items() if s["running"])
+            page = [
+                {
+                    "sandboxID": id,
+                    "templateID": self.sandboxes[id]["template"],
+                    "clientID": "stand-in",
+                    "cpuCount": 2,
+                    "memoryMB": 512,
+                    "diskSizeMB": 1024,
+                    "envdVersion": str(STAND_IN_ENVD_VERSION),
+                    "metadata": self.sandboxes[id]["metadata"],
+                    "startedAt": "2024-01-01T00:00:00Z",
+                    "endAt": "2024-01-01T01:00:00Z",
+                    "state": "running",
+                }
+                for id in ids[start : start + limit]
+            ]
+        end = start + limit
+        return page, str(end) if end < len(ids) else ""
+
+    def report(
+        self,
+        sandbox_id: str,
+        timestamp: float,
+        cpu_used_pct: float = 0.0,
+        mem_used: int = 0,
+        disk_used: int = 0,
+    ):
+        """
+        Record a metrics sample of the sandbox taken at the Unix `timestamp`.
+        """
+        sample = {
+            "cpuCount": 2,
+            "cpuUsedPct": cpu_used_pct,
+            "memTotal": 512 << 20,
+            "memUsed": mem_used,
+            "diskTotal": 1 << 30,
+            "diskUsed": disk_used,
+            "timestamp": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+            "timestampUnix": int(timestamp),
+        }
+        with self._lock:
+            self.metrics.setdefault(sandbox_id, []).append(sample)
+
+    def sandbox_metrics(self, sandbox_id: str, start_ms: int = 0) -> List[dict]:
+        with self._lock:
+            return [
+                m
+                for m in self.metrics.get(sandbox_id, [])
+                if datetime.fromisoformat(m["timestamp"]).timestamp() * 1000 >= start_ms
+            ]
+
+    def kill(self, sandbox_id: str) -> bool:
+        with self._lock:
+            sandbox = self.sandboxes.get(sandbox_id)
+            if sandbox is None or not sandbox["running"]:
+                return False
+            sandbox["running"] = False
+            return True
+
+    def set_timeout(self, sandbox_id: str, timeout: int) -> bool:
+        with self._lock:
+            sandbox = self.sandboxes.get(sandbox_id)
+            if sandbox is None or not sandbox["running"]:
+                return False
+            sandbox["timeout"] = timeout
+            return True
+
+
+class _StandInApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # The headers and the body are written separately, don't wait for the ACK in between
+    disable_nagle_algorithm = True
+    server: StandInApi
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data=None, headers: Optional[dict] = None):
+        body = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _not_found(self):
+        self._send_json(404, {"code": 404, "message": "Sandbox not found"})
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path))
+
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/health":
+            sandbox_id = self.headers.get("E2b-Sandbox-Id")
+            running = sandbox_id in self.server.running
+            self._send_json(204 if running else 502)
+        elif url.path == "/sandboxes/metrics":
+            ids = dict(urllib.parse.parse_qsl(url.query))["sandbox_ids"].split(",")
+            latest = {
+                id: self.server.sandbox_metrics(id)[-1]
+                for id in ids
+                if id in self.server.running and self.server.sandbox_metrics(id)
+            }
+            self._send_json(200, {"sandboxes": latest})
+        elif url.path.startswith("/sandboxes/") and url.path.endswith("/metrics"):
+            sandbox_id = url.path.split("/")[2]
+            params = dict(urllib.parse.parse_qsl(url.query))
+            if sandbox_id not in self.server.sandboxes:
+                return self._not_found()
+            self._send_json(
+                200,
+                self.server.sandbox_metrics(sandbox_id, int(params.get("start", 0))),
+            )
+        elif url.path == "/v2/sandboxes" and self.server._should_rate_limit():
+            self._send_json(429, {"code": 429, "message": "Too many requests"})
+        elif url.path == "/v2/sandboxes":
+            params = dict(urllib.parse.parse_qsl(url.query))
+            time.sleep(self.server.list_delay)
+            page, next_token = self.server.list(
+                int(params.get("limit", 100)), params.get("nextToken")
+            )
+            headers = {"X-Next-Token": next_token} if next_token else {}
+            self._send_json(200, page, headers)
+        else:
+            self._not_found()
+
+    def do_POST(self):
+        self.server.requests.append(("POST", self.path))
+        body = self._body()
+        parts = self.path.strip("/").split("/")
+
+        if self.server._should_rate_limit():
+            self._send_json(429, {"code": 429, "message": "Too many requests"})
+        elif parts == ["sandboxes"]:
+            time.sleep(self.server.create_delay)
+            self._send_json(201, self.server.create(body))
+        elif len(parts) == 3 and parts[0] == "sandboxes" and parts[2] == "timeout":
+            if self.server.set_timeout(parts[1], body["timeout"]):
+                self._send_json(204)
+            else:
+                self._not_found()
+        else:
+            self._not_found()
+
+    def do_DELETE(self):
+        self.server.requests.append(("DELETE", self.path))
+        parts = self.path.strip("/").split("/")
+
+        if self.server._should_rate_limit():
+            self._send_json(429, {"code": 429, "message": "Too many requests"})
+        elif len(parts) == 2 and parts[0] == "sandboxes" and self.server.kill(parts[1]):
+            self._send_json(204)
+        else:
+            self._not_found()
@@ -25,3 +25,15 @@ def test_read_empty_file(sandbox):
     sandbox.commands.run(f"touch {filename}")
     read_content = sandbox.files.read(filename)
     assert read_content == content
+
+
+def test_read_file_to_path(sandbox, tmp_path):
+    filename = "test_read_to_path.bin"
+    content = bytes(range(256)) * 1024
+
+    sandbox.files.write(filename, content)
+    local_path = tmp_path / filename
+    written = sandbox.files.read_to_path(filename, str(local_path))
+
+    assert written == len(content)
+    assert local_path.read_bytes() == content
@@ -0,0 +1,61 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import e2b
+
+
+def loaded_modules(statement: str) -> set:
+    """
+    Modules loaded by the statement in a fresh interpreter.
+    """
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import json, sys\n{statement}\nprint(json.dumps(sorted(sys.modules)))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return set(json.loads(out))
+
+
+def test_import_loads_nothing():
+    modules = loaded_modules("import e2b")
+
+    assert not {m for m in modules if m.startswith("e2b.")}
+    assert not {"httpx", "httpcore", "google.protobuf", "rich"} & modules
+
+
+def test_async_sandbox_import_skips_sync_sdk_and_templates():
+    modules = loaded_modules("from e2b import AsyncSandbox")
+
+    assert "e2b.sandbox_async.main" in modules
+    assert not {
+        m
+        for m in modules
+        if m.startswith(("e2b.sandbox_sync", "e2b.template", "rich", "wcmatch"))
+    }
+    assert "e2b.sandbox.mcp" not in modules
+
+
+def test_sandbox_import_skips_async_sdk():
+    modules = loaded_modules("from e2b import Sandbox")
+
+    assert "e2b.sandbox_sync.main" in modules
+    assert not {m for m in modules if m.startswith("e2b.sandbox_async")}
+
+
+def test_public_names_resolve():
+    for name in e2b.__all__:
+        assert getattr(e2b, name) is not None
+    assert set(e2b.__all__) <= set(dir(e2b))
+
+
+def test_unknown_name():
+    with pytest.raises(AttributeError, match="DoesNotExist"):
+        e2b.DoesNotExist